@@ -0,0 +1,266 @@
+"""
+Measures the cold start of the Lambda function: how long `guardduty_soar.main`
+takes to import, which modules that time is spent in, and how long the first
+and following (warm) `handler()` calls take. AWS is never called, every API
+request is answered locally with a canned response, so only our own code and
+the SDK's client creation and serialization are measured.
+
+Every measurement runs in a fresh interpreter, so module caches from one run
+never leak into the next. Results are written as JSON, so they can be diffed
+across releases.
+
+Usage:
+    python benchmarks/cold_start.py [--event samples/...json] [--warm-invocations 5]
+        [--runs 3] [--eager] [--output cold_start.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_EVENT = REPO_ROOT / "samples" / "UnauthorizedAccess-EC2-SSHBruteForce.json"
+
+# Fake credentials and region, so the SDK never looks for real ones (e.g. IMDS).
+CHILD_ENV = {
+    "AWS_ACCESS_KEY_ID": "testing",
+    "AWS_SECRET_ACCESS_KEY": "testing",
+    "AWS_SESSION_TOKEN": "testing",
+    "AWS_DEFAULT_REGION": "us-east-1",
+    "AWS_EC2_METADATA_DISABLED": "true",
+    # Priming would create clients while `guardduty_soar.main` is imported,
+    # before the stub below is registered, and they would call AWS.
+    "GD_PRIME_ON_INIT": "false",
+}
+
+# Canned responses for the calls that the default sample event drives. Anything
+# not listed gets an empty response, which actions handle like any other
+# unexpected API response.
+CANNED_RESPONSES: Dict[str, Dict[str, Any]] = {
+    "DescribeInstances": {
+        "Reservations": [
+            {
+                "Instances": [
+                    {
+                        "InstanceId": "i-99999999",
+                        "VpcId": "vpc-12345678",
+                        "SubnetId": "subnet-12345678",
+                        "SecurityGroups": [{"GroupId": "sg-12345678"}],
+                        "BlockDeviceMappings": [
+                            {"DeviceName": "/dev/xvda", "Ebs": {"VolumeId": "vol-1"}}
+                        ],
+                        "NetworkInterfaces": [],
+                    }
+                ]
+            }
+        ]
+    },
+    "CreateSecurityGroup": {"GroupId": "sg-87654321"},
+    "CreateSnapshot": {"SnapshotId": "snap-12345678"},
+    "CreateSnapshots": {
+        "Snapshots": [{"SnapshotId": "snap-12345678", "VolumeId": "vol-1"}]
+    },
+    "DescribeSecurityGroups": {"SecurityGroups": []},
+    "DescribeNetworkAcls": {"NetworkAcls": []},
+    "Publish": {"MessageId": "message-id"},
+    "SendEmail": {"MessageId": "message-id"},
+}
+
+# Module name prefixes that import time is grouped by. The first match wins, so
+# more specific prefixes come first. Playbook packages get a group each.
+MODULE_GROUPS = [
+    ("guardduty_soar.schemas", "guardduty_soar.schemas"),
+    ("guardduty_soar.actions", "guardduty_soar.actions"),
+    ("guardduty_soar.notifications", "guardduty_soar.notifications"),
+    ("guardduty_soar", "guardduty_soar (other)"),
+    ("pydantic", "pydantic"),
+    ("jinja2", "jinja2"),
+    ("markupsafe", "jinja2"),
+    ("boto3", "boto3"),
+    ("botocore", "botocore"),
+    ("aws_lambda_powertools", "aws_lambda_powertools"),
+]
+
+
+def _module_group(module_name: str) -> str:
+    if module_name.startswith("guardduty_soar.playbooks."):
+        return ".".join(module_name.split(".")[:3])
+    for prefix, group in MODULE_GROUPS:
+        if module_name == prefix or module_name.startswith(prefix + "."):
+            return group
+    return "other"
+
+
+def _child_prelude(eager: bool) -> None:
+    """Forces the full `load_playbooks()` import path when requested."""
+    if eager:
+        import guardduty_soar.manifest
+
+        guardduty_soar.manifest.load_manifest = lambda *args, **kwargs: False
+
+
+def _child_handler(event_path: str, warm_invocations: int, eager: bool) -> None:
+    """Runs inside a fresh interpreter, and prints its timings as JSON."""
+    _child_prelude(eager)
+
+    start = time.perf_counter()
+    import guardduty_soar.main
+
+    import_ms = (time.perf_counter() - start) * 1000
+
+    from botocore.awsrequest import AWSResponse
+
+    from guardduty_soar.clients import get_session
+
+    def _stub_call(model, **kwargs):
+        response = AWSResponse("https://stubbed.local", 200, {}, None)
+        return response, dict(CANNED_RESPONSES.get(model.name, {}))
+
+    # Clients copy the session's event hooks when they are created, and no
+    # client exists yet, so every client will answer from the stub.
+    get_session().events.register("before-call", _stub_call)
+
+    event = json.loads(Path(event_path).read_text(encoding="utf-8"))
+    invocations = []
+    for _ in range(warm_invocations + 1):
+        start = time.perf_counter()
+        response = guardduty_soar.main.handler(event, None)
+        invocations.append((time.perf_counter() - start) * 1000)
+
+    print(
+        json.dumps(
+            {
+                "import_ms": import_ms,
+                "first_invocation_ms": invocations[0],
+                "warm_invocations_ms": invocations[1:],
+                "status_code": response["statusCode"],
+            }
+        )
+    )
+
+
+def _child_import(eager: bool) -> None:
+    """Runs inside `python -X importtime`, only importing the handler module."""
+    _child_prelude(eager)
+    import guardduty_soar.main  # noqa: F401
+
+
+def _run_child(
+    args: List[str], importtime: bool = False
+) -> subprocess.CompletedProcess:
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += [__file__, "--child"] + args
+    return subprocess.run(
+        command,
+        cwd=REPO_ROOT,
+        env={**os.environ, **CHILD_ENV},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def parse_importtime(stderr: str) -> Dict[str, Any]:
+    """
+    Groups the output of `python -X importtime` by MODULE_GROUPS, using each
+    module's self time so nothing is counted twice.
+    """
+    groups: Dict[str, float] = defaultdict(float)
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        module_name = name.strip()
+        groups[_module_group(module_name)] += int(self_us) / 1000
+        modules.append(
+            {
+                "module": module_name,
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+            }
+        )
+
+    modules.sort(key=lambda module: module["self_ms"], reverse=True)
+    return {
+        "total_ms": sum(groups.values()),
+        "by_group_ms": dict(sorted(groups.items(), key=lambda item: -item[1])),
+        "slowest_modules": modules[:25],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--event", default=str(DEFAULT_EVENT))
+    parser.add_argument("--warm-invocations", type=int, default=5)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument(
+        "--eager",
+        action="store_true",
+        help="Import every playbook at start up, as when the manifest is missing.",
+    )
+    parser.add_argument("--output", help="Write the results to this file.")
+    parser.add_argument(
+        "--child", choices=["handler", "import"], help=argparse.SUPPRESS
+    )
+    args = parser.parse_args()
+
+    if args.child == "handler":
+        _child_handler(args.event, args.warm_invocations, args.eager)
+        return
+    if args.child == "import":
+        _child_import(args.eager)
+        return
+
+    child_args = [
+        "--event",
+        args.event,
+        "--warm-invocations",
+        str(args.warm_invocations),
+    ]
+    if args.eager:
+        child_args.append("--eager")
+
+    runs = [
+        json.loads(_run_child(["handler"] + child_args).stdout.strip().splitlines()[-1])
+        for _ in range(args.runs)
+    ]
+    importtime = parse_importtime(
+        _run_child(["import"] + child_args, importtime=True).stderr
+    )
+
+    results = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "event": Path(args.event).name,
+        "eager": args.eager,
+        "runs": args.runs,
+        "import_ms": statistics.median(run["import_ms"] for run in runs),
+        "first_invocation_ms": statistics.median(
+            run["first_invocation_ms"] for run in runs
+        ),
+        "warm_invocation_ms": statistics.median(
+            ms for run in runs for ms in run["warm_invocations_ms"]
+        ),
+        "status_codes": sorted({run["status_code"] for run in runs}),
+        "import_breakdown": importtime,
+    }
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding="utf-8")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
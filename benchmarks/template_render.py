@@ -0,0 +1,114 @@
+"""
+Compares notification render latency for each resource partial, between
+building a fresh Jinja2 environment per notification (the previous behavior)
+and the shared, precompiled environment.
+
+Usage:
+    python benchmarks/template_render.py [--iterations 200]
+"""
+
+import argparse
+import statistics
+import time
+from typing import Any, Callable, Dict, List
+
+import jinja2
+
+from guardduty_soar.actions.notifications.base import TEMPLATES_PATH, get_jinja_env
+from guardduty_soar.schemas import (
+    AccessKeyDetails,
+    BaseResourceDetails,
+    EC2InstanceDetails,
+    RDSInstanceDetails,
+    S3BucketDetails,
+)
+
+FINDING = {
+    "Id": "benchmark-finding",
+    "Type": "Benchmark:EC2/Finding",
+    "Title": "Benchmark finding",
+    "Severity": 8.0,
+    "AccountId": "123456789012",
+    "Region": "us-east-1",
+    "Description": "A finding used to benchmark template rendering.",
+}
+
+RESOURCES: Dict[str, BaseResourceDetails] = {
+    "_baseresourcedetails": BaseResourceDetails(ResourceType="Unknown"),
+    "_ec2instancedetails": EC2InstanceDetails(
+        ResourceType="Instance",
+        InstanceId="i-0123456789abcdef0",
+        VpcId="vpc-12345678",
+        InstanceType="t3.micro",
+        Tags=[{"Key": "Name", "Value": "benchmark"}],
+    ),
+    "_iamuserdetails": AccessKeyDetails(
+        ResourceType="AccessKey", UserName="benchmark-user", PrincipalId="AIDA0"
+    ),
+    "_iamroledetails": AccessKeyDetails(
+        ResourceType="AccessKey", PrincipalId="AROA0123456789:session"
+    ),
+    "_rdsinstancedetails": RDSInstanceDetails(
+        ResourceType="RDSDBInstance",
+        DbInstanceIdentifier="benchmark-db",
+        Engine="aurora-postgresql",
+        EngineVersion="15.4",
+    ),
+    "_s3bucketdetails": S3BucketDetails(
+        ResourceType="S3Bucket", Name="benchmark-bucket", Arn="arn:aws:s3:::bucket"
+    ),
+}
+
+
+def render_with_fresh_env(context: Dict[str, Any]) -> str:
+    env = jinja2.Environment(
+        loader=jinja2.FileSystemLoader(searchpath=TEMPLATES_PATH), autoescape=True
+    )
+    return env.get_template("ses/complete.html.j2").render(**context)
+
+
+def render_with_shared_env(context: Dict[str, Any]) -> str:
+    return get_jinja_env().get_template("ses/complete.html.j2").render(**context)
+
+
+def measure(
+    render: Callable[[Dict[str, Any]], str], context: Dict[str, Any], iterations: int
+) -> List[float]:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        render(context)
+        timings.append((time.perf_counter() - start) * 1_000_000)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    # Compile outside of the measured loop, as a warm container would have.
+    get_jinja_env()
+
+    print(
+        f"{'partial':<24}{'fresh env (us)':>18}{'shared env (us)':>18}{'speedup':>10}"
+    )
+    for partial, resource in RESOURCES.items():
+        context = {
+            "finding": FINDING,
+            "playbook_name": "BenchmarkPlaybook",
+            "resource": resource,
+            "enriched_data": None,
+            "action_results": [{"status": "success", "details": "Benchmark"}],
+        }
+        fresh = statistics.median(
+            measure(render_with_fresh_env, context, args.iterations)
+        )
+        shared = statistics.median(
+            measure(render_with_shared_env, context, args.iterations)
+        )
+        print(f"{partial:<24}{fresh:>18.1f}{shared:>18.1f}{fresh / shared:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
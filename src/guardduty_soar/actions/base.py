@@ -3,12 +3,18 @@ from __future__ import annotations
 import logging
 from abc import ABC, abstractmethod
 from datetime import datetime, timezone
-from typing import TYPE_CHECKING, Sequence
+from typing import TYPE_CHECKING, Any, Optional, Sequence
 
 import boto3
 
+from guardduty_soar.clients import get_client_pool
 from guardduty_soar.config import AppConfig
-from guardduty_soar.models import ActionResponse, GuardDutyEvent
+from guardduty_soar.models import (
+    SEVERITY_LEVELS,
+    ActionResponse,
+    GuardDutyEvent,
+    severity_level,
+)
 
 if TYPE_CHECKING:
     from mypy_boto3_s3.type_defs import TagTypeDef
@@ -24,6 +30,10 @@ class BaseAction(ABC):
     lot of similar functionality, however need to be handled differently
     based on the service and the GuardDuty event.
 
+    Clients are declared on inheriting classes with `LazyClient`, and are only
+    created the first time an action uses them. They come from a process-wide
+    pool, so every action in every playbook shares one client per service.
+
     :param boto3_session: a Boto3 Session object, used by inheriting classes
         to instantiate a Boto3 client.
     :param config: the inherited Application configuration.
@@ -33,6 +43,19 @@ class BaseAction(ABC):
         self.session = boto3_session
         self.config = config
 
+    def _get_client(self, service_name: str, region_name: Optional[str] = None) -> Any:
+        """
+        Returns a pooled client for a service, for when the region is only
+        known at run time (e.g. a resource in another region).
+
+        :param service_name: the AWS service name, e.g. "ec2".
+        :param region_name: optional region, defaults to the session's region.
+        :return: A boto3 client for the service.
+
+        :meta private:
+        """
+        return get_client_pool().get_client(self.session, service_name, region_name)
+
     def _calculate_severity(self, severity: float) -> str:
         """
         Simple function to take the numerical severity and return
@@ -45,14 +68,7 @@ class BaseAction(ABC):
 
         :meta private:
         """
-        if 9.0 <= severity <= 10.0:
-            return "CRITICAL"
-        elif 7.0 <= severity <= 8.9:
-            return "HIGH"
-        elif 4.0 <= severity <= 6.9:
-            return "MEDIUM"
-        else:
-            return "LOW"
+        return SEVERITY_LEVELS[severity_level(severity)][0]
 
     def _tags_to_apply(
         self, event: GuardDutyEvent, playbook_name: str
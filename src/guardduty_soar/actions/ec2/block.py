@@ -1,10 +1,13 @@
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
 
-import boto3
 from botocore.exceptions import ClientError
 
 from guardduty_soar.actions.base import BaseAction
-from guardduty_soar.config import AppConfig
+from guardduty_soar.actions.ec2.nacl import NaclEntryChange, NaclPlan, NaclRuleAllocator
+from guardduty_soar.clients import LazyClient
+from guardduty_soar.context import NETWORK_ACLS, FindingContext
 from guardduty_soar.models import ActionResponse, GuardDutyEvent
 
 logger = logging.getLogger(__name__)
@@ -16,13 +19,99 @@ class BlockMaliciousIpAction(BaseAction):
     rules for it in the network ACL associated with the affected subnets. Both
     inbound/outbound are added.
 
+    Every rule change is planned up front by a NaclRuleAllocator: IP addresses
+    an existing deny rule already covers are skipped, and when the network ACL
+    is at its rule quota the oldest GuardDuty-SOAR rules are evicted to make
+    room. The new rules are then created concurrently.
+
     :param session: a boto3 Session object to create clients with.
     :param config: the Application configuration.
     """
 
-    def __init__(self, session: boto3.Session, config: AppConfig):
-        super().__init__(session, config)
-        self.ec2_client = self.session.client("ec2")
+    ec2_client = LazyClient("ec2")
+
+    def _delete_entry(self, nacl_id: str, entry: NaclEntryChange) -> Optional[str]:
+        """
+        Deletes one of the rules being evicted.
+
+        :meta private:
+        :return: The error, None if the rule was deleted.
+        """
+        direction = "OUTBOUND" if entry.egress else "INBOUND"
+        logger.warning(
+            f"ACTION: Evicting {direction} rule number {entry.rule_number} from {nacl_id}."
+        )
+        try:
+            self.ec2_client.delete_network_acl_entry(
+                NetworkAclId=nacl_id, RuleNumber=entry.rule_number, Egress=entry.egress
+            )
+        except ClientError as e:
+            return f"{direction} rule {entry.rule_number}: {e}"
+        return None
+
+    def _create_entry(self, nacl_id: str, entry: NaclEntryChange) -> Optional[str]:
+        """
+        Creates one of the planned deny rules.
+
+        :meta private:
+        :return: The error, None if the rule was created.
+        """
+        direction = "OUTBOUND" if entry.egress else "INBOUND"
+        logger.warning(
+            f"ACTION: Adding {direction} deny rule to {nacl_id} for {entry.cidr_block} at rule number {entry.rule_number}."
+        )
+        try:
+            self.ec2_client.create_network_acl_entry(
+                NetworkAclId=nacl_id,
+                RuleNumber=entry.rule_number,
+                Protocol="-1",
+                RuleAction="deny",
+                Egress=entry.egress,
+                CidrBlock=entry.cidr_block,
+            )
+        except ClientError as e:
+            return f"{direction} rule {entry.rule_number} for {entry.cidr_block}: {e}"
+        return None
+
+    def _apply_plan(self, nacl_id: str, plan: NaclPlan) -> List[str]:
+        """
+        Makes the planned changes. The evictions must finish before the new
+        rules are added, or the network ACL could go over its quota, but within
+        each stage the calls are independent and run concurrently.
+
+        :meta private:
+        :return: The errors of the calls that failed.
+        """
+        errors: List[str] = []
+        with ThreadPoolExecutor(
+            max_workers=max(
+                1,
+                min(
+                    max(len(plan.deletes), len(plan.creates)),
+                    self.config.playbook_max_workers,
+                ),
+            ),
+            thread_name_prefix="nacl",
+        ) as pool:
+            errors.extend(
+                error
+                for error in pool.map(
+                    lambda entry: self._delete_entry(nacl_id, entry), plan.deletes
+                )
+                if error
+            )
+            if errors:
+                # Adding rules without the room the evictions were for would
+                # only fail on the quota.
+                return errors
+            errors.extend(
+                error
+                for error in pool.map(
+                    lambda entry: self._create_entry(nacl_id, entry), plan.creates
+                )
+                if error
+            )
+        return errors
 
     def execute(self, event: GuardDutyEvent, **kwargs) -> ActionResponse:
         ips_to_block = []
@@ -70,9 +159,8 @@ class BlockMaliciousIpAction(BaseAction):
             subnet_id = event["Resource"]["InstanceDetails"]["NetworkInterfaces"][0][
                 "SubnetId"
             ]
-            response = self.ec2_client.describe_network_acls(
-                Filters=[{"Name": "association.subnet-id", "Values": [subnet_id]}]
-            )
+            context = kwargs.get("context") or FindingContext(event)
+            response = context.describe_subnet_network_acls(self.ec2_client, subnet_id)
             if not response.get("NetworkAcls"):
                 return {
                     "status": "error",
@@ -83,50 +171,46 @@ class BlockMaliciousIpAction(BaseAction):
             nacl_id = nacl["NetworkAclId"]
             logger.info(f"Found Network ACL: {nacl_id} for subnet {subnet_id}.")
 
-            # Step 3: Determine the next available rule numbers
-            existing_rules = [
-                e["RuleNumber"] for e in nacl["Entries"] if e["RuleNumber"] < 100
-            ]
-            last_rule_num = max(existing_rules) if existing_rules else 0
-
-            # Step 4: Loop through all identified IPs and create deny rules for each
-            for ip in ips_to_block:
-                inbound_rule_num = last_rule_num + 1
-                outbound_rule_num = last_rule_num + 2
-                ip_cidr = f"{ip}/32"
-
-                logger.warning(
-                    f"ACTION: Adding INBOUND deny rule to {nacl_id} for {ip_cidr} at rule number {inbound_rule_num}."
-                )
-                self.ec2_client.create_network_acl_entry(
-                    NetworkAclId=nacl_id,
-                    RuleNumber=inbound_rule_num,
-                    Protocol="-1",
-                    RuleAction="deny",
-                    Egress=False,
-                    CidrBlock=ip_cidr,
-                )
-
-                logger.warning(
-                    f"ACTION: Adding OUTBOUND deny rule to {nacl_id} for {ip_cidr} at rule number {outbound_rule_num}."
-                )
-                self.ec2_client.create_network_acl_entry(
-                    NetworkAclId=nacl_id,
-                    RuleNumber=outbound_rule_num,
-                    Protocol="-1",
-                    RuleAction="deny",
-                    Egress=True,
-                    CidrBlock=ip_cidr,
-                )
-
-                # Increment the rule number for the next IP in the loop
-                last_rule_num += 2
+            # Step 3: Plan every rule change before making any of them
+            plan = NaclRuleAllocator(nacl["Entries"], self.config.nacl_max_rules).plan(
+                ips_to_block
+            )
+            if not plan.creates:
+                if plan.dropped:
+                    details = f"Network ACL {nacl_id} has no room for deny rules for IP(s): {plan.dropped}."
+                    logger.error(details)
+                    return {"status": "error", "details": details}
+                details = f"IP(s) {plan.covered} are already blocked by NACL {nacl_id}."
+                logger.info(details)
+                return {"status": "skipped", "details": details}
 
-            details = f"Successfully added inbound/outbound deny rules for {len(ips_to_block)} IP(s) to NACL {nacl_id}."
+            # Step 4: Evict the oldest rules to make room, then add the new ones
+            try:
+                errors = self._apply_plan(nacl_id, plan)
+            finally:
+                # Even a partial failure has changed the NACL, so later actions
+                # must describe it again.
+                context.invalidate(NETWORK_ACLS, subnet_id)
+
+            if errors:
+                details = f"Failed to add some deny rules to NACL {nacl_id}. Errors: {errors}."
+                logger.error(details)
+                return {"status": "error", "details": details}
+
+            details = f"Successfully added inbound/outbound deny rules for {len(plan.blocked)} IP(s) to NACL {nacl_id}."
+            if plan.covered:
+                details += f" Already blocked: {plan.covered}."
+            if plan.deletes:
+                details += f" Evicted {len(plan.deletes)} older rule(s) to stay within the quota."
+            if plan.dropped:
+                details += f" No room left for: {plan.dropped}."
             logger.info(details)
-            return {"status": "success", "details": details}
+            return {
+                "status": "error" if plan.dropped else "success",
+                "details": details,
+            }
 
-        except (ClientError, KeyError, IndexError) as e:
+        except (ClientError, KeyError, IndexError, ValueError) as e:
             details = f"Failed to block IP address. Error: {e}."
             logger.error(details, exc_info=True)
             return {"status": "error", "details": details}
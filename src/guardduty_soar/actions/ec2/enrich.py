@@ -1,10 +1,10 @@
 import logging
 
-import boto3
 from botocore.exceptions import ClientError
 
 from guardduty_soar.actions.base import BaseAction
-from guardduty_soar.config import AppConfig
+from guardduty_soar.clients import LazyClient
+from guardduty_soar.context import FindingContext
 from guardduty_soar.models import ActionResponse, EnrichedEC2Finding, GuardDutyEvent
 
 logger = logging.getLogger(__name__)
@@ -22,9 +22,7 @@ class EnrichFindingWithInstanceMetadataAction(BaseAction):
     :param config: the Applications configuration.
     """
 
-    def __init__(self, session: boto3.Session, config: AppConfig):
-        super().__init__(session, config)
-        self.ec2_client = self.session.client("ec2")
+    ec2_client = LazyClient("ec2")
 
     def execute(self, event: GuardDutyEvent, **kwargs) -> ActionResponse:
         instance_id = event["Resource"]["InstanceDetails"]["InstanceId"]
@@ -32,7 +30,8 @@ class EnrichFindingWithInstanceMetadataAction(BaseAction):
         logger.info(f"ACTION: Obtaining instance metadata for {instance_id}.")
 
         try:
-            response = self.ec2_client.describe_instances(InstanceIds=[instance_id])
+            context = kwargs.get("context") or FindingContext(event)
+            response = context.describe_instance(self.ec2_client, instance_id)
 
             # Make sure instances were returned
             if not response.get("Reservations") or not response["Reservations"][0].get(
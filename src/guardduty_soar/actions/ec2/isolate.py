@@ -1,22 +1,35 @@
 import logging
-import time
+import threading
+from typing import Dict, Optional
 
 import boto3
 from botocore.exceptions import ClientError
 
 from guardduty_soar.actions.base import BaseAction
+from guardduty_soar.clients import LazyClient
 from guardduty_soar.config import AppConfig
+from guardduty_soar.context import INSTANCES
 from guardduty_soar.models import ActionResponse, GuardDutyEvent
 
 logger = logging.getLogger(__name__)
 
+# The tag marking the deny-all quarantine security group of a VPC.
+QUARANTINE_TAG_KEY = "GUARDDUTY-SOAR-QUARANTINE"
+
 
 class IsolateInstanceAction(BaseAction):
     """
-    An action to isolate an EC2 instance by dynamically creating a new, deny-all
-    security group in the instance's VPC and applying it. We utilize the boto3
-    method "modify_instance_attributes" as it allows us to set this new security
-    group as the *only* security group for the instance, affectively quarantining it.
+    An action to isolate an EC2 instance by applying a deny-all quarantine
+    security group in the instance's VPC. We utilize the boto3 method
+    "modify_instance_attributes" as it allows us to set the quarantine security
+    group as the *only* security group for the instance, affectively
+    quarantining it.
+
+    Every VPC has a single quarantine security group, tagged with
+    `GUARDDUTY-SOAR-QUARANTINE`, that is shared by every isolated instance in
+    it. The group is looked up (or created, the first time a VPC needs one) and
+    then kept for the life of the action, so isolating further instances in
+    the VPC only takes the `modify_instance_attribute` call.
 
     :param boto3_session: a Boto3 Session object used to make clients.
     :param config: the Applications configurations.
@@ -25,10 +38,123 @@ class IsolateInstanceAction(BaseAction):
     # We originally were using a hard-coded sg that the end-user provided to attach to
     # instances. But it quickly became clear that we could not do that as we have no
     # way of knowing ahead of time what vpc/subnet an instance will be in that triggers
-    # an alert. So, now we dynamically create one at playbook run time.
+    # an alert. So, now we find or create one per VPC at playbook run time.
+    ec2_client = LazyClient("ec2")
+
     def __init__(self, boto3_session: boto3.Session, config: AppConfig):
         super().__init__(boto3_session, config)
-        self.ec2_client = self.session.client("ec2")
+        # Playbooks (and so their actions) are reused across warm invocations,
+        # and findings of a batch are processed concurrently.
+        self._lock = threading.Lock()
+        self._quarantine_groups: Dict[str, str] = {}
+
+    def _find_quarantine_group(self, vpc_id: str) -> Optional[str]:
+        """
+        Looks up an existing quarantine security group in the VPC. A group that
+        has ingress rules is not deny-all, and is never used. Egress rules left
+        behind (e.g. by an interrupted creation) are revoked.
+
+        :param vpc_id: the ID of the VPC.
+        :return: The ID of the security group, or None if there is none.
+
+        :meta private:
+        """
+        response = self.ec2_client.describe_security_groups(
+            Filters=[
+                {"Name": "vpc-id", "Values": [vpc_id]},
+                {"Name": f"tag:{QUARANTINE_TAG_KEY}", "Values": ["true"]},
+            ]
+        )
+        for group in response.get("SecurityGroups", []):
+            if group.get("IpPermissions"):
+                logger.warning(
+                    f"Quarantine security group {group['GroupId']} has ingress rules, not using it."
+                )
+                continue
+            if group.get("IpPermissionsEgress"):
+                self.ec2_client.revoke_security_group_egress(
+                    GroupId=group["GroupId"], IpPermissions=group["IpPermissionsEgress"]
+                )
+            return group["GroupId"]
+        return None
+
+    def _create_quarantine_group(self, event: GuardDutyEvent, vpc_id: str) -> str:
+        """
+        Creates the VPC's deny-all quarantine security group.
+
+        :param event: the GuardDutyEvent the group is first created for.
+        :param vpc_id: the ID of the VPC.
+        :return: The ID of the security group.
+
+        :meta private:
+        """
+        sg_name = f"gd-soar-quarantine-{vpc_id}"
+        sg_description = (
+            f"Quarantine SG for instances in VPC {vpc_id}, created in response "
+            f"to GuardDuty finding {event['Id']}."
+        )
+
+        try:
+            response = self.ec2_client.create_security_group(
+                GroupName=sg_name,
+                Description=sg_description,
+                VpcId=vpc_id,
+                # Add this TagSpecifications block to tag the resource on creation
+                TagSpecifications=[
+                    {
+                        "ResourceType": "security-group",
+                        "Tags": [
+                            {"Key": "Name", "Value": sg_name},
+                            {"Key": QUARANTINE_TAG_KEY, "Value": "true"},
+                            {"Key": "GUARDDUTY-SOAR-ID", "Value": event["Id"]},
+                        ],
+                    }
+                ],
+            )
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") != "InvalidGroup.Duplicate":
+                raise
+            # Another invocation created the group at the same time.
+            group_id = self._find_quarantine_group(vpc_id)
+            if group_id is None:
+                raise
+            return group_id
+
+        new_sg_id = response["GroupId"]
+        logger.info(f"Created and tagged new quarantine security group: {new_sg_id}")
+
+        # Revoke the default egress rule to make it a true deny-all group
+        self.ec2_client.revoke_security_group_egress(
+            GroupId=new_sg_id,
+            IpPermissions=[{"IpProtocol": "-1", "IpRanges": [{"CidrIp": "0.0.0.0/0"}]}],
+        )
+        logger.info(
+            f"Revoked default egress rule from {new_sg_id} to enforce deny-all."
+        )
+        return new_sg_id
+
+    def _get_quarantine_group(self, event: GuardDutyEvent, vpc_id: str) -> str:
+        """
+        Returns the VPC's quarantine security group, from the cache, an
+        existing group, or a newly created one.
+
+        :meta private:
+        """
+        with self._lock:
+            group_id = self._quarantine_groups.get(vpc_id)
+        if group_id is not None:
+            logger.info(f"Reusing cached quarantine security group: {group_id}.")
+            return group_id
+
+        group_id = self._find_quarantine_group(vpc_id)
+        if group_id is not None:
+            logger.info(f"Reusing existing quarantine security group: {group_id}.")
+        else:
+            group_id = self._create_quarantine_group(event, vpc_id)
+
+        with self._lock:
+            self._quarantine_groups[vpc_id] = group_id
+        return group_id
 
     def execute(self, event: GuardDutyEvent, **kwargs) -> ActionResponse:
         try:
@@ -57,52 +183,31 @@ class IsolateInstanceAction(BaseAction):
                 f"Beginning isolation for instance {instance_id} in VPC {vpc_id}."
             )
 
-            # Step 2: Create a new, dedicated quarantine security group
-            sg_name = f"gd-soar-quarantine-{instance_id}-{int(time.time())}"
-            sg_description = (
-                f"Dynamically created quarantine SG for instance {instance_id} "
-                f"in response to GuardDuty finding {event['Id']}."
-            )
-
-            response = self.ec2_client.create_security_group(
-                GroupName=sg_name,
-                Description=sg_description,
-                VpcId=vpc_id,
-                # Add this TagSpecifications block to tag the resource on creation
-                TagSpecifications=[
-                    {
-                        "ResourceType": "security-group",
-                        "Tags": [
-                            {"Key": "Name", "Value": sg_name},
-                            {"Key": "GUARDDUTY-SOAR-ID", "Value": event["Id"]},
-                        ],
-                    }
-                ],
-            )
-            new_sg_id = response["GroupId"]
-            logger.info(
-                f"Created and tagged new quarantine security group: {new_sg_id}"
-            )
-
-            # Step 3: Revoke the default egress rule to make it a true deny-all group
-            self.ec2_client.revoke_security_group_egress(
-                GroupId=new_sg_id,
-                IpPermissions=[
-                    {"IpProtocol": "-1", "IpRanges": [{"CidrIp": "0.0.0.0/0"}]}
-                ],
-            )
-            logger.info(
-                f"Revoked default egress rule from {new_sg_id} to enforce deny-all."
-            )
-
-            # Step 4: Apply the new security group to the instance, replacing all others
-            self.ec2_client.modify_instance_attribute(
-                InstanceId=instance_id, Groups=[new_sg_id]
-            )
+            # Step 2: Get the VPC's quarantine security group
+            sg_id = self._get_quarantine_group(event, vpc_id)
+
+            # Step 3: Apply the security group to the instance, replacing all others
+            try:
+                self.ec2_client.modify_instance_attribute(
+                    InstanceId=instance_id, Groups=[sg_id]
+                )
+            except ClientError as e:
+                if e.response.get("Error", {}).get("Code") != "InvalidGroup.NotFound":
+                    raise
+                # The cached group was deleted, we look it up (or create it) again.
+                logger.warning(f"Quarantine security group {sg_id} no longer exists.")
+                with self._lock:
+                    self._quarantine_groups.pop(vpc_id, None)
+                sg_id = self._get_quarantine_group(event, vpc_id)
+                self.ec2_client.modify_instance_attribute(
+                    InstanceId=instance_id, Groups=[sg_id]
+                )
+            if kwargs.get("context"):
+                kwargs["context"].invalidate(INSTANCES, instance_id)
 
             details = (
                 f"Successfully isolated instance {instance_id} "
-                f"by applying new security group {new_sg_id}."
+                f"by applying quarantine security group {sg_id}."
             )
             logger.info(details)
             return {"status": "success", "details": details}
@@ -0,0 +1,202 @@
+import ipaddress
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# GuardDuty-SOAR adds its deny rules below rule number 100, so they are
+# evaluated before the rules users typically start numbering at.
+SOAR_RULE_MIN = 1
+SOAR_RULE_MAX = 99
+# The catch-all rule every network ACL has, it does not count towards the quota.
+DEFAULT_RULE_NUMBER = 32767
+
+
+@dataclass(frozen=True)
+class NaclEntryChange:
+    """
+    A network ACL entry to create or delete.
+
+    :param egress: True for an outbound entry, False for an inbound one.
+    :param rule_number: the entry's rule number.
+    :param cidr_block: the CIDR block to deny, only set for entries to create.
+    """
+
+    egress: bool
+    rule_number: int
+    cidr_block: Optional[str] = None
+
+
+@dataclass
+class NaclPlan:
+    """
+    Every change needed to block a set of IP addresses in a network ACL,
+    planned before any of them is made.
+
+    :param creates: the deny entries to create.
+    :param deletes: the SOAR-owned entries to evict to stay within the quota.
+    :param blocked: the IP addresses that get new entries.
+    :param covered: the IP addresses an existing deny entry already blocks in
+        both directions.
+    :param dropped: the IP addresses that do not fit within the quota.
+    """
+
+    creates: List[NaclEntryChange] = field(default_factory=list)
+    deletes: List[NaclEntryChange] = field(default_factory=list)
+    blocked: List[str] = field(default_factory=list)
+    covered: List[str] = field(default_factory=list)
+    dropped: List[str] = field(default_factory=list)
+
+
+class NaclRuleAllocator:
+    """
+    Plans the deny entries for a set of IP addresses against a network ACL's
+    existing entries. IP addresses that an existing deny entry already covers
+    are skipped, and each direction is kept within `max_rules` entries, the
+    network ACL quota.
+
+    When the quota is reached, the oldest SOAR-owned entries (deny entries for
+    a single address, numbered below 100) are evicted. Network ACL entries have
+    no timestamps, so age follows the rule number: new entries are numbered
+    after the newest SOAR-owned entry, wrapping around from 99 to 1. The
+    SOAR-owned entries so always form a run of rule numbers, read in order from
+    the oldest entry, the one after the largest gap between them, to the
+    newest, the one before it.
+
+    :param entries: the network ACL's `Entries`, from `describe_network_acls`.
+    :param max_rules: the maximum number of entries per direction.
+    """
+
+    def __init__(self, entries: Sequence[Dict[str, Any]], max_rules: int):
+        self.entries = [e for e in entries if e["RuleNumber"] != DEFAULT_RULE_NUMBER]
+        self.max_rules = max_rules
+
+    @staticmethod
+    def _is_soar_owned(entry: Dict[str, Any]) -> bool:
+        """
+        Checks whether an entry is one of GuardDuty-SOAR's deny entries.
+
+        :meta private:
+        """
+        return (
+            entry.get("RuleAction") == "deny"
+            and str(entry.get("CidrBlock", "")).endswith("/32")
+            and SOAR_RULE_MIN <= entry["RuleNumber"] <= SOAR_RULE_MAX
+        )
+
+    @staticmethod
+    def _by_age(numbers: Sequence[int]) -> List[int]:
+        """
+        Orders SOAR-owned rule numbers from the oldest to the newest entry. The
+        run of numbers may wrap around, e.g. `[95, 98, 99, 1, 2]`, so it starts
+        after the largest gap between two numbers, counting the gap from the
+        highest number back around to the lowest.
+
+        :meta private:
+        """
+        ordered = sorted(numbers)
+        if not ordered:
+            return []
+        span = SOAR_RULE_MAX - SOAR_RULE_MIN + 1
+        # The gap before each number, the first one wrapping around.
+        gaps = [ordered[0] + span - ordered[-1]] + [
+            number - previous for previous, number in zip(ordered, ordered[1:])
+        ]
+        oldest = gaps.index(max(gaps))
+        return ordered[oldest:] + ordered[:oldest]
+
+    def _is_covered(self, ip: str, entries: Sequence[Dict[str, Any]]) -> bool:
+        """
+        Checks whether the entries already block all traffic of the IP address.
+        Entries are evaluated like AWS does, in ascending rule number order,
+        and the first one matching the address decides. An allow entry before
+        any deny entry (e.g. `100 allow 0.0.0.0/0` before `200 deny`) means it
+        is not blocked. A deny entry limited to some protocol still lets other
+        traffic through to the entries after it.
+
+        :meta private:
+        """
+        address = ipaddress.ip_address(ip)
+        for entry in sorted(entries, key=lambda e: e["RuleNumber"]):
+            cidr_block = entry.get("CidrBlock")
+            if not cidr_block or address not in ipaddress.ip_network(
+                cidr_block, strict=False
+            ):
+                continue
+            if entry.get("RuleAction") != "deny":
+                return False
+            if str(entry.get("Protocol", "-1")) == "-1":
+                return True
+        return False
+
+    def _plan_direction(self, ips: Sequence[str], egress: bool, plan: NaclPlan) -> None:
+        """
+        Plans the entries of one direction, adding them to the plan.
+
+        :meta private:
+        """
+        entries = [e for e in self.entries if e.get("Egress", False) == egress]
+        missing = [ip for ip in ips if not self._is_covered(ip, entries)]
+        if not missing:
+            return
+
+        # Entries for the addresses being blocked are never evicted.
+        blocking = {f"{ip}/32" for ip in ips}
+        by_age = self._by_age(
+            [entry["RuleNumber"] for entry in entries if self._is_soar_owned(entry)]
+        )
+        numbered = {entry["RuleNumber"]: entry for entry in entries}
+        evictable = [
+            number for number in by_age if numbered[number]["CidrBlock"] not in blocking
+        ]
+        capacity = self.max_rules - len(entries) + len(evictable)
+        if len(missing) > capacity:
+            dropped = missing[max(0, capacity) :]
+            logger.warning(
+                f"Network ACL quota of {self.max_rules} rules reached, not blocking: {dropped}."
+            )
+            plan.dropped.extend(ip for ip in dropped if ip not in plan.dropped)
+            missing = missing[: max(0, capacity)]
+
+        evicted = evictable[: max(0, len(missing) - (self.max_rules - len(entries)))]
+        plan.deletes.extend(NaclEntryChange(egress, number) for number in evicted)
+
+        in_use = {entry["RuleNumber"] for entry in entries} - set(evicted)
+        newest = by_age[-1] if by_age else SOAR_RULE_MIN - 1
+        # Numbers after the newest entry, wrapping around to the lowest.
+        free = [
+            n
+            for n in list(range(newest + 1, SOAR_RULE_MAX + 1))
+            + list(range(SOAR_RULE_MIN, newest + 1))
+            if n not in in_use
+        ]
+        if len(missing) > len(free):
+            logger.warning(
+                f"No free rule numbers below {SOAR_RULE_MAX + 1}, not blocking: {missing[len(free):]}."
+            )
+            plan.dropped.extend(
+                ip for ip in missing[len(free) :] if ip not in plan.dropped
+            )
+            missing = missing[: len(free)]
+
+        for ip, number in zip(missing, free):
+            plan.creates.append(NaclEntryChange(egress, number, f"{ip}/32"))
+            if ip not in plan.blocked:
+                plan.blocked.append(ip)
+
+    def plan(self, ips: Sequence[str]) -> NaclPlan:
+        """
+        Plans the entries needed to deny the IP addresses, inbound and outbound.
+
+        :param ips: the IPv4 addresses to block.
+        :return: A NaclPlan.
+        :raises ValueError: if one of the addresses is not valid.
+        """
+        plan = NaclPlan()
+        for egress in (False, True):
+            self._plan_direction(ips, egress, plan)
+        plan.covered = [
+            ip for ip in ips if ip not in plan.blocked and ip not in plan.dropped
+        ]
+        return plan
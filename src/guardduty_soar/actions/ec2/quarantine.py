@@ -1,10 +1,10 @@
 import logging
 
-import boto3
 from botocore.exceptions import ClientError
 
 from guardduty_soar.actions.base import BaseAction
-from guardduty_soar.config import AppConfig
+from guardduty_soar.clients import LazyClient
+from guardduty_soar.context import FindingContext
 from guardduty_soar.models import ActionResponse, GuardDutyEvent
 
 logger = logging.getLogger(__name__)
@@ -16,16 +16,15 @@ class QuarantineInstanceProfileAction(BaseAction):
     managed policy `AWSDenyAll` to it (or a deny all policy you choose by setting
     the configuration `iam_deny_all_policy_arn`). This action correctly looks up the role
     associated with the instance profile. Then attaches the deny-all policy to
-    it.
+    it. The role is always looked up live, never in the IAM index, so the
+    policy cannot land on a role the profile no longer uses.
 
     :param session: a Boto3 Session object to create clients with.
     :param config: the Applications configurations.
     """
 
-    def __init__(self, session: boto3.Session, config: AppConfig):
-        super().__init__(session, config)
-        self.iam_client = self.session.client("iam")
-        self.ec2_client = self.session.client("ec2")
+    iam_client = LazyClient("iam")
+    ec2_client = LazyClient("ec2")
 
     def execute(self, event: GuardDutyEvent, **kwargs) -> ActionResponse:
         instance_id = event["Resource"]["InstanceDetails"]["InstanceId"]
@@ -34,7 +33,8 @@ class QuarantineInstanceProfileAction(BaseAction):
         )
         try:
             # Step 1: Get live instance metadata
-            response = self.ec2_client.describe_instances(InstanceIds=[instance_id])
+            context = kwargs.get("context") or FindingContext(event)
+            response = context.describe_instance(self.ec2_client, instance_id)
 
             if not response.get("Reservations") or not response["Reservations"][0].get(
                 "Instances"
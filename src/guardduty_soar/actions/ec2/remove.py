@@ -1,13 +1,14 @@
 from __future__ import annotations
 
 import logging
-from typing import TYPE_CHECKING, Any, Dict, List, cast
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, cast
 
-import boto3
 from botocore.exceptions import ClientError
 
 from guardduty_soar.actions.base import BaseAction
-from guardduty_soar.config import AppConfig
+from guardduty_soar.clients import LazyClient
+from guardduty_soar.context import SECURITY_GROUPS, FindingContext
 from guardduty_soar.models import ActionResponse, GuardDutyEvent
 
 if TYPE_CHECKING:
@@ -22,13 +23,81 @@ class RemovePublicAccessAction(BaseAction):
     inbound rules that allow unrestricted public access. This action is optional
     and can be controlled by the applications configurations `allow_revoke_public_access`.
 
+    Every attached security group is described with one batched call (shared
+    with the other findings of a batch through the FindingContext), and the
+    groups with public rules are revoked concurrently.
+
     :param session: a Boto3 Session object to make clients with.
     :param config: the Applications configurations.
     """
 
-    def __init__(self, session: boto3.Session, config: AppConfig):
-        super().__init__(session, config)
-        self.ec2_client = self.session.client("ec2")
+    ec2_client = LazyClient("ec2")
+
+    @staticmethod
+    def _public_rules(sg_details: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Builds the rules to revoke from a security group, one per inbound rule
+        that allows public access, holding ONLY that rule's public ranges.
+
+        :meta private:
+        """
+        rules_to_revoke_for_sg: List[Dict[str, Any]] = []
+
+        # Iterate through each rule.
+        for rule in sg_details.get("IpPermissions", []):
+            # Find all public IPv4 and IPv6 ranges within this single rule
+            public_ipv4_ranges = [
+                r for r in rule.get("IpRanges", []) if r.get("CidrIp") == "0.0.0.0/0"
+            ]
+            public_ipv6_ranges = [
+                r for r in rule.get("Ipv6Ranges", []) if r.get("CidrIpv6") == "::/0"
+            ]
+
+            # If this rule contains any public ranges, construct a new, clean
+            # rule object containing ONLY those public ranges for revocation.
+            if public_ipv4_ranges or public_ipv6_ranges:
+                revocation_rule: Dict[str, Any] = {
+                    "IpProtocol": rule["IpProtocol"],
+                    "FromPort": rule.get("FromPort"),
+                    "ToPort": rule.get("ToPort"),
+                }
+                if public_ipv4_ranges:
+                    revocation_rule["IpRanges"] = public_ipv4_ranges
+                if public_ipv6_ranges:
+                    revocation_rule["Ipv6Ranges"] = public_ipv6_ranges
+
+                rules_to_revoke_for_sg.append(revocation_rule)
+
+        return rules_to_revoke_for_sg
+
+    def _revoke(
+        self, context: FindingContext, sg_id: str, rules: List[Dict[str, Any]]
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Revokes the public rules of one security group.
+
+        :meta private:
+        :return: A tuple of the summary of the revoked rules, and the error.
+        """
+        logger.warning(
+            f"ACTION: Found {len(rules)} public rule(s) in {sg_id}. Preparing to revoke."
+        )
+        try:
+            self.ec2_client.revoke_security_group_ingress(
+                GroupId=sg_id,
+                IpPermissions=cast("List[IpPermissionTypeDef]", rules),
+            )
+        except ClientError as e:
+            # The group may be shared with an instance of another finding in
+            # the batch, which already revoked the same rules.
+            if e.response["Error"]["Code"] != "InvalidPermission.NotFound":
+                return None, f"{sg_id}: {e}"
+            logger.info(f"Public rule(s) of {sg_id} were already revoked.")
+        finally:
+            context.invalidate(SECURITY_GROUPS, sg_id)
+
+        logger.info(f"Successfully revoked {len(rules)} public rule(s) from {sg_id}.")
+        return f"Removed {len(rules)} public rule(s) from {sg_id}.", None
 
     def execute(self, event: GuardDutyEvent, **kwargs) -> ActionResponse:
         # If disabled, carry on.
@@ -43,10 +112,11 @@ class RemovePublicAccessAction(BaseAction):
         logger.info(
             f"ACTION: Attempting to remove public access to instance: {instance_id}."
         )
-        revoked_rules_summary = []
+        revoked_rules_summary: List[str] = []
 
         try:
-            response = self.ec2_client.describe_instances(InstanceIds=[instance_id])
+            context = kwargs.get("context") or FindingContext(event)
+            response = context.describe_instance(self.ec2_client, instance_id)
             if not response.get("Reservations") or not response["Reservations"][0].get(
                 "Instances"
             ):
@@ -68,64 +138,42 @@ class RemovePublicAccessAction(BaseAction):
                     "details": f"No security groups found on instance {instance_id}.",
                 }
 
-            # Iterate through all connected SGs.
-            for sg in security_groups:
-                sg_id = sg["GroupId"]
-                logger.info(
-                    f"Reviewing security group {sg_id} for public access rules."
+            # Describe every attached SG with a single call.
+            group_ids = [sg["GroupId"] for sg in security_groups]
+            logger.info(
+                f"Reviewing security groups {group_ids} for public access rules."
+            )
+            rules_to_revoke = {
+                sg_details["GroupId"]: self._public_rules(sg_details)
+                for sg_details in context.describe_security_groups(
+                    self.ec2_client, group_ids
                 )
-
-                sg_details = self.ec2_client.describe_security_groups(GroupIds=[sg_id])[
-                    "SecurityGroups"
-                ][0]
-
-                rules_to_revoke_for_sg: List[Dict[str, Any]] = []
-
-                # Iterate through each rule.
-                for rule in sg_details.get("IpPermissions", []):
-                    # Find all public IPv4 and IPv6 ranges within this single rule
-                    public_ipv4_ranges = [
-                        r
-                        for r in rule.get("IpRanges", [])
-                        if r.get("CidrIp") == "0.0.0.0/0"
-                    ]
-                    public_ipv6_ranges = [
-                        r
-                        for r in rule.get("Ipv6Ranges", [])
-                        if r.get("CidrIpv6") == "::/0"
-                    ]
-
-                    # If this rule contains any public ranges, construct a new, clean
-                    # rule object containing ONLY those public ranges for revocation.
-                    if public_ipv4_ranges or public_ipv6_ranges:
-                        revocation_rule: Dict[str, Any] = {
-                            "IpProtocol": rule["IpProtocol"],
-                            "FromPort": rule.get("FromPort"),
-                            "ToPort": rule.get("ToPort"),
-                        }
-                        if public_ipv4_ranges:
-                            revocation_rule["IpRanges"] = public_ipv4_ranges
-                        if public_ipv6_ranges:
-                            revocation_rule["Ipv6Ranges"] = public_ipv6_ranges
-
-                        rules_to_revoke_for_sg.append(revocation_rule)
-
-                if rules_to_revoke_for_sg:
-                    logger.warning(
-                        f"ACTION: Found {len(rules_to_revoke_for_sg)} public rule(s) in {sg_id}. Preparing to revoke."
-                    )
-                    self.ec2_client.revoke_security_group_ingress(
-                        GroupId=sg_id,
-                        IpPermissions=cast(
-                            "List[IpPermissionTypeDef]", rules_to_revoke_for_sg
-                        ),
-                    )
-                    revoked_rules_summary.append(
-                        f"Removed {len(rules_to_revoke_for_sg)} public rule(s) from {sg_id}."
-                    )
-                    logger.info(
-                        f"Successfully revoked {len(rules_to_revoke_for_sg)} public rule(s) from {sg_id}."
+            }
+            rules_to_revoke = {
+                sg_id: rules for sg_id, rules in rules_to_revoke.items() if rules
+            }
+
+            # The groups are independent of each other, so they are revoked
+            # concurrently.
+            if rules_to_revoke:
+                with ThreadPoolExecutor(
+                    max_workers=min(
+                        len(rules_to_revoke), self.config.playbook_max_workers
+                    ),
+                    thread_name_prefix="revoke",
+                ) as pool:
+                    outcomes = list(
+                        pool.map(
+                            lambda item: self._revoke(context, *item),
+                            rules_to_revoke.items(),
+                        )
                     )
+                errors = [error for _, error in outcomes if error]
+                revoked_rules_summary = [summary for summary, _ in outcomes if summary]
+                if errors:
+                    details = f"Failed to remove public access for instance {instance_id}. {' '.join(revoked_rules_summary)} Errors: {errors}"
+                    logger.error(details)
+                    return {"status": "error", "details": details}
 
             if not revoked_rules_summary:
                 details = "No public access rules found to remove."
@@ -135,7 +183,7 @@ class RemovePublicAccessAction(BaseAction):
             final_details = " ".join(revoked_rules_summary)
             return {"status": "success", "details": final_details}
 
-        except ClientError as e:
+        except (ClientError, KeyError) as e:
             details = (
                 f"Failed to remove public access for instance {instance_id}. Error: {e}"
             )
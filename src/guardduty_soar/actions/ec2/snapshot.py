@@ -1,11 +1,12 @@
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List
 
-import boto3
 from botocore.exceptions import ClientError
 
 from guardduty_soar.actions.base import BaseAction
-from guardduty_soar.config import AppConfig
+from guardduty_soar.clients import LazyClient
+from guardduty_soar.context import FindingContext
 from guardduty_soar.models import ActionResponse, GuardDutyEvent
 
 logger = logging.getLogger(__name__)
@@ -18,27 +19,31 @@ class CreateSnapshotAction(BaseAction):
     created with GuardDuty-SOAR specific tags, including the event ID. This action
     also handles the possibility of now attached volumes.
 
+    With `allow_multi_volume_snapshots`, every volume is snapshotted with one
+    crash-consistent `create_snapshots` call. If that call fails, the volumes
+    are snapshotted concurrently, one call per volume.
+
     :param session: a Boto3 Session object to make clients with.
     :param config: the Applications configurations.
     """
 
-    def __init__(self, session: boto3.Session, config: AppConfig):
-        super().__init__(session, config)
-        self.ec2_client = self.session.client("ec2")
+    ec2_client = LazyClient("ec2")
 
-    def _get_volume_ids(self, instance_id: str) -> List[str]:
+    def _get_volume_ids(self, instance_id: str, context: FindingContext) -> List[str]:
         """
         Describes the EC2 instance to find all attached EBS volume IDs. It will
         return an list if none are found or if the instance doesn't exist. (Could
         happen if the instance is terminated during remediation actions.)
 
         :param instance_id: the string ID of the EC2 instance.
+        :param context: the finding's FindingContext, so the instance is only
+            described once per finding.
         :return: A list of strings representing the EBS volume IDs.
 
         :meta private:
         """
         try:
-            response = self.ec2_client.describe_instances(InstanceIds=[instance_id])
+            response = context.describe_instance(self.ec2_client, instance_id)
 
             reservations = response.get("Reservations", [])
             if not reservations:
@@ -68,6 +73,101 @@ class CreateSnapshotAction(BaseAction):
             )
             return []
 
+    def _tag_specifications(
+        self, event: GuardDutyEvent, instance_id: str
+    ) -> List[Dict]:
+        """
+        Builds the tags every snapshot is created with.
+
+        :meta private:
+        """
+        return [
+            {
+                "ResourceType": "snapshot",
+                "Tags": [
+                    {"Key": "GuardDuty-SOAR-Finding-ID", "Value": event["Id"]},
+                    {"Key": "GuardDuty-SOAR-Source-Instance-ID", "Value": instance_id},
+                ],
+            }
+        ]
+
+    def _snapshot_volume(
+        self, event: GuardDutyEvent, instance_id: str, volume_id: str
+    ) -> Dict[str, str]:
+        """
+        Creates the snapshot of a single volume.
+
+        :param event: the GuardDutyEvent.
+        :param instance_id: the ID of the EC2 instance the volume is attached to.
+        :param volume_id: the ID of the EBS volume.
+        :return: A dictionary with the `volume_id`, and either the `snapshot_id`
+            or the `error`.
+
+        :meta private:
+        """
+        try:
+            description_prefix = self.config.snapshot_description_prefix
+            description = (
+                f"{description_prefix}InstanceId: {instance_id}, "
+                f"VolumeId: {volume_id}, FindingId: {event['Id']}"
+            )
+
+            response = self.ec2_client.create_snapshot(
+                VolumeId=volume_id,
+                Description=description,
+                TagSpecifications=self._tag_specifications(event, instance_id),
+            )
+            snapshot_id = response.get("SnapshotId")
+            logger.info(
+                f"Successfully initiated snapshot ({snapshot_id}) for volume {volume_id}."
+            )
+            return {"volume_id": volume_id, "snapshot_id": snapshot_id}
+
+        except ClientError as e:
+            error_message = f"Failed to create snapshot for volume {volume_id}: {e}."
+            logger.error(error_message)
+            return {"volume_id": volume_id, "error": str(e)}
+
+    def _snapshot_instance(
+        self, event: GuardDutyEvent, instance_id: str, volume_ids: List[str]
+    ) -> List[Dict[str, str]]:
+        """
+        Creates crash-consistent snapshots of every volume attached to the
+        instance with a single `create_snapshots` call, so every volume is
+        captured at the same point in time.
+
+        :param event: the GuardDutyEvent.
+        :param instance_id: the ID of the EC2 instance.
+        :param volume_ids: the IDs of the volumes attached to the instance.
+        :return: A list of dictionaries, one per volume, as `_snapshot_volume`.
+        :raises ClientError: if the snapshots could not be created.
+
+        :meta private:
+        """
+        response = self.ec2_client.create_snapshots(
+            InstanceSpecification={"InstanceId": instance_id},
+            Description=(
+                f"{self.config.snapshot_description_prefix}InstanceId: {instance_id}, "
+                f"FindingId: {event['Id']}"
+            ),
+            TagSpecifications=self._tag_specifications(event, instance_id),
+        )
+        snapshots = {
+            snapshot["VolumeId"]: snapshot["SnapshotId"]
+            for snapshot in response.get("Snapshots", [])
+        }
+        logger.info(
+            f"Successfully initiated multi-volume snapshot of instance {instance_id}: {snapshots}."
+        )
+        return [
+            (
+                {"volume_id": volume_id, "snapshot_id": snapshots[volume_id]}
+                if volume_id in snapshots
+                else {"volume_id": volume_id, "error": "No snapshot was created."}
+            )
+            for volume_id in volume_ids
+        ]
+
     def execute(self, event: GuardDutyEvent, **kwargs) -> ActionResponse:
         instance_id = event["Resource"]["InstanceDetails"]["InstanceId"]
         logger.info(
@@ -75,7 +175,8 @@ class CreateSnapshotAction(BaseAction):
         )
         logger.info(f"Checking for EBS volumes on instance: {instance_id}.")
         # Use boto3 call to get the list of EBS volumes.
-        volume_ids = self._get_volume_ids(instance_id)
+        context = kwargs.get("context") or FindingContext(event)
+        volume_ids = self._get_volume_ids(instance_id, context)
 
         if not volume_ids:
             details = f"Instance {instance_id} has no EBS volumes attached or could not be described. Skipping snapshot action."
@@ -86,51 +187,36 @@ class CreateSnapshotAction(BaseAction):
             f"ACTION: Creating snapshots for volumes attached to instance {instance_id}: {volume_ids}"
         )
 
-        created_snapshots: List[Dict] = []
-        failed_snapshots: List[Dict] = []
-
-        # Handle multiple volumes by iterating through them.
-        for volume_id in volume_ids:
+        if self.config.allow_multi_volume_snapshots:
             try:
-                description_prefix = self.config.snapshot_description_prefix
-                description = (
-                    f"{description_prefix}InstanceId: {instance_id}, "
-                    f"VolumeId: {volume_id}, FindingId: {event['Id']}"
-                )
-
-                response = self.ec2_client.create_snapshot(
-                    VolumeId=volume_id,
-                    Description=description,
-                    TagSpecifications=[
-                        {
-                            "ResourceType": "snapshot",
-                            "Tags": [
-                                {
-                                    "Key": "GuardDuty-SOAR-Finding-ID",
-                                    "Value": event["Id"],
-                                },
-                                {
-                                    "Key": "GuardDuty-SOAR-Source-Instance-ID",
-                                    "Value": instance_id,
-                                },
-                            ],
-                        }
-                    ],
-                )
-                snapshot_id = response.get("SnapshotId")
-                created_snapshots.append(
-                    {"volume_id": volume_id, "snapshot_id": snapshot_id}
-                )
-                logger.info(
-                    f"Successfully initiated snapshot ({snapshot_id}) for volume {volume_id}."
-                )
-
+                results = self._snapshot_instance(event, instance_id, volume_ids)
             except ClientError as e:
-                error_message = (
-                    f"Failed to create snapshot for volume {volume_id}: {e}."
+                logger.warning(
+                    f"Multi-volume snapshot of instance {instance_id} failed, falling back to per-volume snapshots: {e}."
                 )
-                logger.error(error_message)
-                failed_snapshots.append({"volume_id": volume_id, "error": str(e)})
+                # Volumes are snapshotted concurrently, to keep them as close
+                # to a single point in time as we can.
+                with ThreadPoolExecutor(
+                    max_workers=min(len(volume_ids), self.config.playbook_max_workers),
+                    thread_name_prefix="snapshot",
+                ) as pool:
+                    results = list(
+                        pool.map(
+                            lambda volume_id: self._snapshot_volume(
+                                event, instance_id, volume_id
+                            ),
+                            volume_ids,
+                        )
+                    )
+        else:
+            # Handle multiple volumes by iterating through them.
+            results = [
+                self._snapshot_volume(event, instance_id, volume_id)
+                for volume_id in volume_ids
+            ]
+
+        created_snapshots = [result for result in results if "snapshot_id" in result]
+        failed_snapshots = [result for result in results if "error" in result]
 
         # Determining final status based on result lists.
         if failed_snapshots:
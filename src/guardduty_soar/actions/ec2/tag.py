@@ -3,11 +3,11 @@ from __future__ import annotations
 import logging
 from typing import TYPE_CHECKING, Sequence, cast
 
-import boto3
 from botocore.exceptions import ClientError
 
 from guardduty_soar.actions.base import BaseAction
-from guardduty_soar.config import AppConfig
+from guardduty_soar.clients import LazyClient
+from guardduty_soar.context import INSTANCES
 from guardduty_soar.models import ActionResponse, GuardDutyEvent
 
 if TYPE_CHECKING:
@@ -23,11 +23,7 @@ class TagInstanceAction(BaseAction):
     instance.
     """
 
-    def __init__(self, session: boto3.Session, config: AppConfig):
-        super().__init__(session, config)
-        # We only need to create the specific boto3 client once, for each
-        # action. Creating a disposable client.
-        self.ec2_client = self.session.client("ec2")
+    ec2_client = LazyClient("ec2")
 
     def execute(self, event: GuardDutyEvent, **kwargs) -> ActionResponse:
         instance_id = event["Resource"]["InstanceDetails"]["InstanceId"]
@@ -44,6 +40,8 @@ class TagInstanceAction(BaseAction):
                     "Sequence[TagTypeDef]", self._tags_to_apply(event, playbook_name)
                 ),
             )
+            if kwargs.get("context"):
+                kwargs["context"].invalidate(INSTANCES, instance_id)
             details = f"Successfully added SOAR tags to instance: {instance_id}."
             logger.info(details)
             return {"status": "success", "details": details}
@@ -1,10 +1,10 @@
 import logging
 
-import boto3
 from botocore.exceptions import ClientError
 
 from guardduty_soar.actions.base import BaseAction
-from guardduty_soar.config import AppConfig
+from guardduty_soar.clients import LazyClient
+from guardduty_soar.context import INSTANCES
 from guardduty_soar.models import ActionResponse, GuardDutyEvent
 
 logger = logging.getLogger(__name__)
@@ -21,9 +21,7 @@ class TerminateInstanceAction(BaseAction):
     :param config: the Applications configurations.
     """
 
-    def __init__(self, session: boto3.Session, config: AppConfig):
-        super().__init__(session, config)
-        self.ec2_client = self.session.client("ec2")
+    ec2_client = LazyClient("ec2")
 
     def execute(self, event: GuardDutyEvent, **kwargs) -> ActionResponse:
         instance_id = event["Resource"]["InstanceDetails"]["InstanceId"]
@@ -42,6 +40,8 @@ class TerminateInstanceAction(BaseAction):
 
         try:
             self.ec2_client.terminate_instances(InstanceIds=[instance_id])
+            if kwargs.get("context"):
+                kwargs["context"].invalidate(INSTANCES, instance_id)
             details = f"Successfully initiated termination for instance {instance_id}."
             logger.info(details)
             return {"status": "success", "details": details}
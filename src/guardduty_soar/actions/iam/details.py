@@ -1,12 +1,15 @@
 import logging
-from typing import Any, Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-import boto3
 from botocore.exceptions import ClientError
 
 from guardduty_soar.actions.base import BaseAction
-from guardduty_soar.config import AppConfig
+from guardduty_soar.clients import LazyClient
+from guardduty_soar.deadline import Deadline
+from guardduty_soar.iam_index import IamAuthorizationIndex, get_configured_iam_index
 from guardduty_soar.models import ActionResponse, GuardDutyEvent
+from guardduty_soar.policy_cache import get_policy_cache
 
 logger = logging.getLogger(__name__)
 
@@ -17,58 +20,171 @@ class GetIamPrincipalDetailsAction(BaseAction):
     including creation date, tags, and attached/inline policies. This information
     is used in other Actions as well as passed on to the end user during notifications.
 
+    Policy documents are fetched concurrently, and managed policy documents are
+    cached for the life of the container (see `PolicyDocumentCache`). When the
+    IAM index is enabled (`iam_index_ttl_seconds`), principals are looked up in
+    it first (see `IamAuthorizationIndex`).
+
     :param session: a Boto3 Session object to create clients with.
     :param config: the Applications configurations.
     """
 
-    def __init__(self, session: boto3.Session, config: AppConfig):
-        super().__init__(session, config)
-        self.iam_client = self.session.client("iam")
+    iam_client = LazyClient("iam")
 
-    def _get_user_details(self, user_name: str) -> Dict[str, Any]:
+    def _get_attached_policy(self, policy_arn: str) -> Optional[Dict[str, Any]]:
+        """
+        Fetches a managed policy and the document of its default version. The
+        document comes from the policy cache when that version was fetched
+        before, by this or any earlier finding.
+
+        :param policy_arn: the ARN of the managed policy.
+        :return: The policy's name, ARN and document, None if it could not be
+            retrieved.
+
+        :meta private:
+        """
+        try:
+            policy = self.iam_client.get_policy(PolicyArn=policy_arn)["Policy"]
+            version_id = policy["DefaultVersionId"]
+            cache = get_policy_cache(self.config.policy_cache_path)
+            policy_doc = cache.get(policy_arn, policy["PolicyId"], version_id)
+            if policy_doc is None:
+                policy_doc = self.iam_client.get_policy_version(
+                    PolicyArn=policy_arn, VersionId=version_id
+                )["PolicyVersion"]["Document"]
+                cache.put(policy_arn, policy["PolicyId"], version_id, policy_doc)
+            else:
+                logger.debug(f"Reusing cached document for {policy_arn} {version_id}.")
+        except ClientError as e:
+            logger.warning(
+                f"Could not retrieve document for attached policy {policy_arn}: {e}."
+            )
+            return None
+        return {
+            "PolicyName": policy["PolicyName"],
+            "PolicyArn": policy_arn,
+            "PolicyDocument": policy_doc,
+        }
+
+    def _get_policies(
+        self,
+        attached_policies_metas: List[Dict[str, Any]],
+        inline_policy_names: List[str],
+        get_inline_policy: Callable[[str], Dict[str, Any]],
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Fetches the documents of a principal's attached and inline policies.
+        Every policy is fetched independently, so they are fetched concurrently
+        on a pool bounded by `playbook_max_workers`.
+
+        :param attached_policies_metas: the principal's `AttachedPolicies`.
+        :param inline_policy_names: the names of the principal's inline policies.
+        :param get_inline_policy: a callable returning an inline policy's document.
+        :return: A tuple of the attached policies and the inline policies.
+
+        :meta private:
+        """
+        policy_arns = [meta["PolicyArn"] for meta in attached_policies_metas]
+        if not policy_arns and not inline_policy_names:
+            return [], {}
+
+        with ThreadPoolExecutor(
+            max_workers=min(
+                len(policy_arns) + len(inline_policy_names),
+                self.config.playbook_max_workers,
+            ),
+            thread_name_prefix="iam-policy",
+        ) as pool:
+            attached = [pool.submit(self._get_attached_policy, a) for a in policy_arns]
+            inline = {
+                name: pool.submit(get_inline_policy, name)
+                for name in inline_policy_names
+            }
+            # Results are collected in the order the policies were listed.
+            attached_policies = [
+                policy for policy in (f.result() for f in attached) if policy
+            ]
+            inline_policies = {name: f.result() for name, f in inline.items()}
+
+        return attached_policies, inline_policies
+
+    def _get_indexed_details(
+        self, index: IamAuthorizationIndex, record: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Builds a principal's details from its IamAuthorizationIndex record. Only
+        the documents of AWS managed policies, which are not indexed, are
+        fetched (or taken from the policy cache).
+
+        :param index: the IamAuthorizationIndex the record came from.
+        :param record: the principal's record.
+        :return: a dictionary consisting of details, inline policies and attached policies.
+
+        :meta private:
+        """
+        indexed = {}
+        missing = []
+        for policy_meta in record["attached_policies"]:
+            policy = index.get_managed_policy(self.iam_client, policy_meta["PolicyArn"])
+            if policy:
+                indexed[policy_meta["PolicyArn"]] = {
+                    "PolicyName": policy["PolicyName"],
+                    "PolicyArn": policy_meta["PolicyArn"],
+                    "PolicyDocument": policy["Document"],
+                }
+            else:
+                missing.append(policy_meta)
+
+        fetched, _ = self._get_policies(missing, [], lambda name: {})
+        indexed.update({policy["PolicyArn"]: policy for policy in fetched})
+
+        return {
+            "details": record["details"],
+            "attached_policies": [
+                indexed[meta["PolicyArn"]]
+                for meta in record["attached_policies"]
+                if meta["PolicyArn"] in indexed
+            ],
+            "inline_policies": record["inline_policies"],
+        }
+
+    def _get_user_details(
+        self, user_name: str, deadline: Optional[Deadline] = None
+    ) -> Dict[str, Any]:
         """
         Helper method to gather details for an IAM user. GuardDuty events only
         provide very high-level information. To provide adequate information to end
         users we get more data and return it to the end-user.
 
         :param user_name: the users name.
+        :param deadline: the invocation's Deadline, bounds rebuilding the IAM index.
         :return: a dictionary consisting of details, inline policies and attached policies.
         """
+        index = get_configured_iam_index(self.config)
+        record = (
+            index.get_user(self.iam_client, user_name, deadline=deadline)
+            if index
+            else None
+        )
+        if index and record:
+            logger.info(f"Found IAM user {user_name} in the IAM index.")
+            return self._get_indexed_details(index, record)
+
         user_info = self.iam_client.get_user(UserName=user_name)["User"]
         attached_policies_metas = self.iam_client.list_attached_user_policies(
             UserName=user_name
         ).get("AttachedPolicies", [])
-
-        attached_policies = []
-        for policy_meta in attached_policies_metas:
-            policy_arn = policy_meta["PolicyArn"]
-            try:
-                policy = self.iam_client.get_policy(PolicyArn=policy_arn)["Policy"]
-                version_id = policy["DefaultVersionId"]
-                policy_doc = self.iam_client.get_policy_version(
-                    PolicyArn=policy_arn, VersionId=version_id
-                )["PolicyVersion"]["Document"]
-                attached_policies.append(
-                    {
-                        "PolicyName": policy["PolicyName"],
-                        "PolicyArn": policy_arn,
-                        "PolicyDocument": policy_doc,
-                    }
-                )
-            except ClientError as e:
-                logger.warning(
-                    f"Could not retrieve document for attached policy {policy_arn}: {e}."
-                )
-
         inline_policy_names = self.iam_client.list_user_policies(
             UserName=user_name
         ).get("PolicyNames", [])
 
-        inline_policies = {}
-        for policy_name in inline_policy_names:
-            inline_policies[policy_name] = self.iam_client.get_user_policy(
+        attached_policies, inline_policies = self._get_policies(
+            attached_policies_metas,
+            inline_policy_names,
+            lambda policy_name: self.iam_client.get_user_policy(
                 UserName=user_name, PolicyName=policy_name
-            )["PolicyDocument"]
+            )["PolicyDocument"],
+        )
 
         return {
             "details": user_info,
@@ -76,52 +192,43 @@ class GetIamPrincipalDetailsAction(BaseAction):
             "inline_policies": inline_policies,
         }
 
-    def _get_role_details(self, role_name: str) -> Dict[str, Any]:
+    def _get_role_details(
+        self, role_name: str, deadline: Optional[Deadline] = None
+    ) -> Dict[str, Any]:
         """
         Similar to _get_user_details, but designed to handle IAM roles instead.
 
         :param role_name: the name of the IAM role.
+        :param deadline: the invocation's Deadline, bounds rebuilding the IAM index.
         :return: a dictionary consisting of details, inline policies and attached policies.
 
         :meta private:
         """
-        role_info = self.iam_client.get_role(RoleName=role_name)["Role"]
+        index = get_configured_iam_index(self.config)
+        record = (
+            index.get_role(self.iam_client, role_name, deadline=deadline)
+            if index
+            else None
+        )
+        if index and record:
+            logger.info(f"Found IAM role {role_name} in the IAM index.")
+            return self._get_indexed_details(index, record)
 
+        role_info = self.iam_client.get_role(RoleName=role_name)["Role"]
         attached_policies_metas = self.iam_client.list_attached_role_policies(
             RoleName=role_name
         ).get("AttachedPolicies", [])
-
-        # Add this logic to fetch full policy documents for roles
-        attached_policies = []
-        for policy_meta in attached_policies_metas:
-            policy_arn = policy_meta["PolicyArn"]
-            try:
-                policy = self.iam_client.get_policy(PolicyArn=policy_arn)["Policy"]
-                version_id = policy["DefaultVersionId"]
-                policy_doc = self.iam_client.get_policy_version(
-                    PolicyArn=policy_arn, VersionId=version_id
-                )["PolicyVersion"]["Document"]
-                attached_policies.append(
-                    {
-                        "PolicyName": policy["PolicyName"],
-                        "PolicyArn": policy_arn,
-                        "PolicyDocument": policy_doc,
-                    }
-                )
-            except ClientError as e:
-                logger.warning(
-                    f"Could not retrieve document for attached policy {policy_arn}: {e}."
-                )
-
         inline_policy_names = self.iam_client.list_role_policies(
             RoleName=role_name
         ).get("PolicyNames", [])
 
-        inline_policies = {}
-        for policy_name in inline_policy_names:
-            inline_policies[policy_name] = self.iam_client.get_role_policy(
+        attached_policies, inline_policies = self._get_policies(
+            attached_policies_metas,
+            inline_policy_names,
+            lambda policy_name: self.iam_client.get_role_policy(
                 RoleName=role_name, PolicyName=policy_name
-            )["PolicyDocument"]
+            )["PolicyDocument"],
+        )
 
         return {
             "details": role_info,
@@ -131,6 +238,8 @@ class GetIamPrincipalDetailsAction(BaseAction):
 
     def execute(self, event: GuardDutyEvent, **kwargs) -> ActionResponse:
         principal_details = kwargs.get("principal_details")
+        context = kwargs.get("context")
+        deadline = context.deadline if context else None
         if not principal_details:
             return {
                 "status": "error",
@@ -144,11 +253,11 @@ class GetIamPrincipalDetailsAction(BaseAction):
         try:
             if user_type == "IAMUser":
                 logger.info("Gathering IAM User details.")
-                result_details = self._get_user_details(user_name)
+                result_details = self._get_user_details(user_name, deadline)
             elif user_type in ["AssumedRole", "Role"]:
                 logger.info("Gathering IAM Role details.")
                 role_name = user_name.split("/")[0]
-                result_details = self._get_role_details(role_name)
+                result_details = self._get_role_details(role_name, deadline)
             elif user_type == "Root":
                 logger.info("Principal in event is Root user.")
                 result_details = {"details": "Principal is the AWS Account Root user."}
@@ -1,31 +1,185 @@
 import json
 import logging
-from typing import Any, Dict, List
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
-import boto3
 from botocore.exceptions import ClientError
 
 from guardduty_soar.actions.base import BaseAction
-from guardduty_soar.config import AppConfig
+from guardduty_soar.clients import LazyClient
+from guardduty_soar.deadline import Deadline
 from guardduty_soar.models import ActionResponse, GuardDutyEvent
 
 logger = logging.getLogger(__name__)
 
+# The most events a single `lookup_events` call returns.
+PAGE_SIZE = 50
+# `lookup_events` is limited to 2 calls per second, so another page is only
+# fetched while the deadline has at least this many seconds left.
+PAGE_SECONDS = 2
+
+# The fields kept from each event, the ones the notification templates use and
+# that help an investigation. Everything else (e.g. the full request and
+# response of every call) is dropped, to keep memory and notifications small.
+EVENT_FIELDS = (
+    "EventId",
+    "EventName",
+    "EventTime",
+    "EventSource",
+    "Username",
+    "AccessKeyId",
+    "ReadOnly",
+)
+CLOUDTRAIL_EVENT_FIELDS = (
+    "eventSource",
+    "eventName",
+    "awsRegion",
+    "sourceIPAddress",
+    "userAgent",
+    "errorCode",
+    "errorMessage",
+)
+USER_IDENTITY_FIELDS = ("type", "userName", "arn", "accountId")
+
+
+def _parse_time(value: Any) -> Optional[datetime]:
+    """
+    Parses a GuardDuty timestamp, e.g. `2025-10-01T12:00:00.000Z`.
+
+    :meta private:
+    """
+    if not isinstance(value, str):
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+def project_event(event_item: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Projects a `lookup_events` event to the fields we keep. Its `CloudTrailEvent`
+    JSON string is only decoded here, one event at a time, and only the fields
+    we keep from it are retained.
+
+    :param event_item: an event from a `lookup_events` response.
+    :return: The projected event.
+    """
+    projected = {
+        field: event_item[field] for field in EVENT_FIELDS if field in event_item
+    }
+
+    raw = event_item.get("CloudTrailEvent")
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except json.JSONDecodeError:
+            logger.warning(
+                "Could not parse the CloudTrailEvent JSON string in an event."
+            )
+            raw = None
+    if isinstance(raw, dict):
+        cloudtrail_event = {
+            field: raw[field] for field in CLOUDTRAIL_EVENT_FIELDS if field in raw
+        }
+        identity = raw.get("userIdentity") or {}
+        cloudtrail_event["userIdentity"] = {
+            field: identity[field]
+            for field in USER_IDENTITY_FIELDS
+            if field in identity
+        }
+        projected["CloudTrailEvent"] = cloudtrail_event
+
+    return projected
+
 
 class GetCloudTrailHistoryAction(BaseAction):
     """
     An action to retrieve the recent AWS CloudTrail event history for a specific IAM
     principal ARN identified in a GuardDuty finding. The volume of items retrieved
     is controlled via the configuration `cloudtrail_history_max_results`. The range
-    currently is between 1 and 50, with a default value of 25.
+    currently is between 1 and 1000, with a default value of 25.
+
+    Events are streamed page by page (following `NextToken`) and limited to a
+    window of `cloudtrail_history_window_minutes` around the finding's activity
+    (`Service.EventFirstSeen` to `Service.EventLastSeen`). Paging stops as soon
+    as the limit is reached, or the invocation's deadline runs low. Each event is
+    projected to the fields used in notifications as it is read.
 
     :param session: the Boto3 Session object to make clients with.
     :param config: the Applications configurations.
     """
 
-    def __init__(self, session: boto3.Session, config: AppConfig):
-        super().__init__(session, config)
-        self.cloudtrail_client = self.session.client("cloudtrail")
+    cloudtrail_client = LazyClient("cloudtrail")
+
+    def _time_window(
+        self, event: GuardDutyEvent
+    ) -> Tuple[Optional[datetime], Optional[datetime]]:
+        """
+        Builds the window of events to look up around the finding's activity.
+
+        :param event: the GuardDutyEvent.
+        :return: A tuple of the start and end times, None when not bounded.
+
+        :meta private:
+        """
+        window_minutes = self.config.cloudtrail_history_window_minutes
+        service = event.get("Service") or {}
+        first_seen = _parse_time(service.get("EventFirstSeen"))
+        last_seen = _parse_time(service.get("EventLastSeen")) or first_seen
+        if window_minutes <= 0 or first_seen is None or last_seen is None:
+            return None, None
+        window = timedelta(minutes=window_minutes)
+        return first_seen - window, last_seen + window
+
+    def iter_events(
+        self,
+        lookup_attributes: List[Dict[str, Any]],
+        max_results: int,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yields the projected events of a lookup, fetching pages as they are
+        needed. No page is fetched past `max_results` events, or once the
+        deadline has less than `PAGE_SECONDS` left.
+
+        :param lookup_attributes: the `LookupAttributes` of the lookup.
+        :param max_results: the maximum number of events to yield.
+        :param start_time: the earliest event time, unbounded if None.
+        :param end_time: the latest event time, unbounded if None.
+        :param deadline: the invocation's Deadline, unlimited if None.
+        :return: An iterator of projected events.
+        """
+        params: Dict[str, Any] = {"LookupAttributes": lookup_attributes}
+        if start_time is not None:
+            params["StartTime"] = start_time
+        if end_time is not None:
+            params["EndTime"] = end_time
+
+        remaining = max_results
+        next_token = None
+        while remaining > 0:
+            if next_token and deadline and not deadline.allows(PAGE_SECONDS):
+                logger.warning(
+                    "Stopped reading CloudTrail history early, the deadline is near."
+                )
+                return
+
+            page_params = dict(params, MaxResults=min(PAGE_SIZE, remaining))
+            if next_token:
+                page_params["NextToken"] = next_token
+            response = self.cloudtrail_client.lookup_events(**page_params)
+
+            for event_item in response.get("Events", [])[:remaining]:
+                remaining -= 1
+                yield project_event(event_item)
+
+            next_token = response.get("NextToken")
+            if not next_token:
+                return
 
     def execute(self, event: GuardDutyEvent, **kwargs) -> ActionResponse:
         """
@@ -47,26 +201,23 @@ class GetCloudTrailHistoryAction(BaseAction):
 
         try:
             max_results = self.config.cloudtrail_history_max_results
-            logger.info(f"Max results for CloudTrail history set to {max_results}.")
-            response = self.cloudtrail_client.lookup_events(
-                LookupAttributes=lookup_attributes,
-                MaxResults=max_results,
+            start_time, end_time = self._time_window(event)
+            logger.info(
+                f"Max results for CloudTrail history set to {max_results}, between {start_time or 'any time'} and {end_time or 'now'}."
+            )
+            context = kwargs.get("context")
+            events = list(
+                islice(
+                    self.iter_events(
+                        lookup_attributes,
+                        max_results,
+                        start_time,
+                        end_time,
+                        getattr(context, "deadline", None),
+                    ),
+                    max_results,
+                )
             )
-
-            events = response.get("Events", [])
-
-            for event_item in events:
-                if "CloudTrailEvent" in event_item and isinstance(
-                    event_item["CloudTrailEvent"], str
-                ):
-                    try:
-                        event_item["CloudTrailEvent"] = json.loads(
-                            event_item["CloudTrailEvent"]
-                        )
-                    except json.JSONDecodeError:
-                        logger.warning(
-                            "Could not parse the CloudTrailEvent JSON string in an event."
-                        )
 
             logger.info(f"Successfully found {len(events)} CloudTrail events.")
             return {"status": "success", "details": events}
@@ -1,9 +1,7 @@
 import logging
 
-import boto3
-
 from guardduty_soar.actions.base import BaseAction
-from guardduty_soar.config import AppConfig
+from guardduty_soar.clients import LazyClient
 from guardduty_soar.models import ActionResponse, GuardDutyEvent
 
 logger = logging.getLogger(__name__)
@@ -20,9 +18,7 @@ class IdentifyIamPrincipalAction(BaseAction):
     :param config: the Applications configurations.
     """
 
-    def __init__(self, session: boto3.Session, config: AppConfig):
-        super().__init__(session, config)
-        self.cloudtrail_client = self.session.client("cloudtrail")
+    cloudtrail_client = LazyClient("cloudtrail")
 
     def execute(self, event: GuardDutyEvent, **kwargs) -> ActionResponse:
         logger.info("Attempting to identify IAM principal from GuardDuty finding.")
@@ -1,11 +1,10 @@
 import logging
 from typing import Any, Dict
 
-import boto3
 from botocore.exceptions import ClientError
 
 from guardduty_soar.actions.base import BaseAction
-from guardduty_soar.config import AppConfig
+from guardduty_soar.clients import LazyClient
 from guardduty_soar.models import ActionResponse, GuardDutyEvent
 
 logger = logging.getLogger(__name__)
@@ -25,9 +24,7 @@ class QuarantineIamPrincipalAction(BaseAction):
     :param config: the Applications configurations.
     """
 
-    def __init__(self, session: boto3.Session, config: AppConfig):
-        super().__init__(session, config)
-        self.iam_client = self.session.client("iam")
+    iam_client = LazyClient("iam")
 
     def execute(self, event: GuardDutyEvent, **kwargs) -> ActionResponse:
         identity_details: Dict[str, Any] = kwargs.get("identity", {})
@@ -1,10 +1,9 @@
 import logging
 
-import boto3
 from botocore.exceptions import ClientError
 
 from guardduty_soar.actions.base import BaseAction
-from guardduty_soar.config import AppConfig
+from guardduty_soar.clients import LazyClient
 from guardduty_soar.models import ActionResponse, GuardDutyEvent
 
 logger = logging.getLogger(__name__)
@@ -17,9 +16,7 @@ class TagIamPrincipalAction(BaseAction):
     a playbook has taken action against it.
     """
 
-    def __init__(self, session: boto3.Session, config: AppConfig):
-        super().__init__(session, config)
-        self.iam_client = self.session.client("iam")
+    iam_client = LazyClient("iam")
 
     def execute(self, event: GuardDutyEvent, **kwargs) -> ActionResponse:
         principal_identity = kwargs.get("principal_identity")
@@ -2,6 +2,7 @@ import json
 import logging
 import os
 from datetime import datetime
+from functools import lru_cache
 from typing import Any, Dict, Optional
 
 import boto3
@@ -13,6 +14,50 @@ from guardduty_soar.schemas import BaseResourceDetails, IamPrincipalInfo
 
 logger = logging.getLogger(__name__)
 
+# This path navigates up from the relative path of here: /src/guardduty_soar/actions/notifications
+# to the package root and then into the /templates directory.
+TEMPLATES_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "templates",
+)
+
+
+@lru_cache(maxsize=1)
+def get_jinja_env() -> jinja2.Environment:
+    """
+    Returns the Jinja2 Environment shared by every notification action in the
+    process, with every template under `templates/` already compiled. The
+    templates ship inside the package and never change while a Lambda container
+    is alive, so `auto_reload` is disabled and the template cache is unbounded.
+    Rendering then never goes back to the filesystem to stat or parse a file,
+    including the partials pulled in with `{% include %}`.
+
+    :return: the shared jinja2.Environment object.
+    """
+    env = jinja2.Environment(
+        loader=jinja2.FileSystemLoader(searchpath=TEMPLATES_PATH),
+        autoescape=True,
+        auto_reload=False,
+        cache_size=-1,
+    )
+    compiled = compile_templates(env)
+    logger.debug(f"Compiled {compiled} templates in: {TEMPLATES_PATH}.")
+    return env
+
+
+def compile_templates(env: jinja2.Environment) -> int:
+    """
+    Loads every template the environment's loader can find, so each one is
+    parsed and compiled once and then served from the environment's cache.
+
+    :param env: the jinja2.Environment to compile the templates into.
+    :return: the number of templates compiled.
+    """
+    template_names = env.list_templates(extensions=["j2"])
+    for template_name in template_names:
+        env.get_template(template_name)
+    return len(template_names)
+
 
 class BaseNotificationAction:
     """
@@ -29,16 +74,7 @@ class BaseNotificationAction:
         """Initializes the action with a boto3 session, app config, and Jinja2."""
         self.session = session
         self.config = config
-
-        # This path navigates up from the relative path of here: /src/guardduty_soar/actions/notifications
-        # to the project root and then into the /templates directory.
-        package_dir = os.path.dirname(
-            os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        )
-        templates_path = os.path.join(package_dir, "templates")
-        logging.debug(f"Loaded templates in: {templates_path}.")
-        template_loader = jinja2.FileSystemLoader(searchpath=templates_path)
-        self.jinja_env = jinja2.Environment(loader=template_loader, autoescape=True)
+        self.jinja_env = get_jinja_env()
 
     def _render_template(self, channel: str, template_name: str, context: dict) -> str:
         """
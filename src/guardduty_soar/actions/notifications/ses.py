@@ -1,9 +1,7 @@
 import logging
 
-import boto3
-
 from guardduty_soar.actions.notifications.base import BaseNotificationAction
-from guardduty_soar.config import AppConfig
+from guardduty_soar.clients import LazyClient
 from guardduty_soar.models import ActionResponse
 
 logger = logging.getLogger(__name__)
@@ -18,9 +16,7 @@ class SendSESNotificationAction(BaseNotificationAction):
     :param config: the Applications configurations.
     """
 
-    def __init__(self, session: boto3.Session, config: AppConfig):
-        super().__init__(session, config)
-        self.ses_client = self.session.client("ses")
+    ses_client = LazyClient("ses")
 
     def execute(self, **kwargs) -> ActionResponse:
         logger.warning("ACTION: Executing SES action.")
@@ -2,11 +2,10 @@ import json
 import logging
 from typing import Union
 
-import boto3
 from botocore.exceptions import ClientError
 
 from guardduty_soar.actions.notifications.base import BaseNotificationAction
-from guardduty_soar.config import AppConfig
+from guardduty_soar.clients import LazyClient
 from guardduty_soar.models import ActionResponse
 
 logger = logging.getLogger(__name__)
@@ -23,9 +22,7 @@ class SendSNSNotificationAction(BaseNotificationAction):
 
     """
 
-    def __init__(self, session: boto3.Session, config: AppConfig):
-        super().__init__(session, config)
-        self.sns_client = self.session.client("sns")
+    sns_client = LazyClient("sns")
 
     def execute(self, **kwargs) -> ActionResponse:
         if not self.config.allow_sns:
@@ -70,6 +67,14 @@ class SendSNSNotificationAction(BaseNotificationAction):
                         "actions_summary": kwargs.get("actions_summary", "").replace(
                             "\n", "; "
                         ),
+                        "merged_findings": [
+                            {
+                                "id": merged.get("Id"),
+                                "type": merged.get("Type"),
+                                "severity": merged.get("Severity"),
+                            }
+                            for merged in kwargs.get("merged_findings") or []
+                        ],
                     }
                 )
 
@@ -1,14 +1,15 @@
 # actions/rds/enrich.py
 
 import logging
-from typing import Any, Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
 
-import boto3
 from botocore.exceptions import ClientError
 from pydantic import ValidationError
 
 from guardduty_soar.actions.base import BaseAction
-from guardduty_soar.config import AppConfig
+from guardduty_soar.clients import LazyClient
+from guardduty_soar.context import FindingContext
 from guardduty_soar.models import ActionResponse, GuardDutyEvent
 from guardduty_soar.schemas import RdsEnrichmentData, RDSInstanceDetails
 
@@ -20,68 +21,170 @@ class EnrichRdsFindingAction(BaseAction):
     An action to enrich RDS instance details from a GuardDuty finding. It gathers
     configuration details, cluster info, security groups, tags, and recent events.
 
+    Every instance in the finding is described with one filtered
+    `describe_db_instances` call, and the security groups of every instance
+    with one `describe_security_groups` call. Clusters (once each, however
+    many of their instances are listed), tags and recent events are then
+    fetched concurrently on a pool bounded by `playbook_max_workers`.
+
     :param session: A boto3 Session object to build clients with.
     :param config: The Application's configurations.
     """
 
-    def __init__(self, session: boto3.Session, config: AppConfig):
-        super().__init__(session, config)
-        self.rds_client = self.session.client("rds")
-        self.ec2_client = self.session.client("ec2")
+    rds_client = LazyClient("rds")
+    ec2_client = LazyClient("ec2")
 
-    def _get_enrichment_data(self, db_instance_identifier: str) -> Dict[str, Any]:
+    @staticmethod
+    def _fetch(description: str, fetch: Callable[[], Any]) -> Tuple[bool, Any]:
         """
-        Helper to fetch all enrichment data for a single RDS instance.
+        Makes one enrichment call, logging its failure rather than raising it,
+        so the rest of the enrichment still goes ahead.
 
-        :param db_instance_identifier: The DB instance identifier to gather information on.
-        :return: A dictionary object that is used to create the RdsEnrichmentData model.
-        """
-        data: Dict[str, Any] = {"db_instance_identifier": db_instance_identifier}
+        :param description: what is fetched, for the log message.
+        :param fetch: a callable making the API call.
+        :return: A tuple of whether the call succeeded, and its result.
 
-        # 1. Get Core Instance Details (and check for cluster association)
+        :meta private:
+        """
         try:
-            instance_info = self.rds_client.describe_db_instances(
-                DBInstanceIdentifier=db_instance_identifier
-            )["DBInstances"][0]
-            data["instance_details"] = instance_info
-
-            # 2. Get Cluster Details (if applicable)
-            cluster_id = instance_info.get("DBClusterIdentifier")
-            if cluster_id:
-                cluster_info = self.rds_client.describe_db_clusters(
-                    DBClusterIdentifier=cluster_id
-                )["DBClusters"][0]
-                data["cluster_details"] = cluster_info
-
-            # 3. Get Security Group Rules
-            sg_ids = [
-                sg["VpcSecurityGroupId"]
-                for sg in instance_info.get("VpcSecurityGroups", [])
-            ]
-            if sg_ids:
-                data["security_groups"] = self.ec2_client.describe_security_groups(
-                    GroupIds=sg_ids
-                )["SecurityGroups"]
-
-            # 4. Get Tags
-            db_arn = instance_info.get("DBInstanceArn")
-            if db_arn:
-                data["tags"] = self.rds_client.list_tags_for_resource(
-                    ResourceName=db_arn
-                ).get("TagList", [])
-
-            # 5. Get Recent Events
-            data["recent_events"] = self.rds_client.describe_events(
-                SourceIdentifier=db_instance_identifier, SourceType="db-instance"
-            ).get("Events", [])
-
-        except ClientError as e:
-            # A broad catch-all for boto errors during enrichment
-            logger.error(f"Failed to enrich RDS instance {db_instance_identifier}: {e}")
-        except Exception as e:
-            logger.error(f"An unknown error occurred: {e}.")
-
-        return data
+            return True, fetch()
+        except (ClientError, KeyError, IndexError) as e:
+            logger.error(f"Failed to get {description}: {e}")
+            return False, None
+
+    def _get_enrichment_data(
+        self, db_instance_identifiers: List[str], context: FindingContext
+    ) -> List[Dict[str, Any]]:
+        """
+        Helper to fetch all enrichment data for the RDS instances of a finding.
+
+        :param db_instance_identifiers: The DB instance identifiers to gather
+            information on.
+        :param context: the finding's FindingContext, so instances and security
+            groups are only described once per finding.
+        :return: A list of dictionary objects, in the order of the identifiers,
+            used to create the RdsEnrichmentData models.
+        """
+        rds_client = self.rds_client
+        ec2_client = self.ec2_client
+
+        def list_tags(db_arn: str) -> List[Dict[str, str]]:
+            return rds_client.list_tags_for_resource(ResourceName=db_arn).get(
+                "TagList", []
+            )
+
+        with ThreadPoolExecutor(
+            max_workers=self.config.playbook_max_workers,
+            thread_name_prefix="rds-enrich",
+        ) as pool:
+            # Recent events only need the identifier, so they are fetched
+            # while the instances are being described.
+            events = {
+                db_id: pool.submit(
+                    self._fetch,
+                    f"recent events for {db_id}",
+                    lambda db_id=db_id: rds_client.describe_events(
+                        SourceIdentifier=db_id, SourceType="db-instance"
+                    ).get("Events", []),
+                )
+                for db_id in db_instance_identifiers
+            }
+
+            _, instances = self._fetch(
+                f"RDS instances {db_instance_identifiers}",
+                lambda: context.describe_db_instances(
+                    rds_client, db_instance_identifiers
+                ),
+            )
+            instances = instances or {}
+
+            sg_ids = list(
+                dict.fromkeys(
+                    sg["VpcSecurityGroupId"]
+                    for instance in instances.values()
+                    for sg in instance.get("VpcSecurityGroups", [])
+                )
+            )
+            security_groups = (
+                pool.submit(
+                    self._fetch,
+                    f"security groups {sg_ids}",
+                    lambda: {
+                        group["GroupId"]: group
+                        for group in context.describe_security_groups(
+                            ec2_client, sg_ids
+                        )
+                    },
+                )
+                if sg_ids
+                else None
+            )
+
+            cluster_ids = {
+                instance["DBClusterIdentifier"]
+                for instance in instances.values()
+                if instance.get("DBClusterIdentifier")
+            }
+            clusters = {
+                cluster_id: pool.submit(
+                    self._fetch,
+                    f"RDS cluster {cluster_id}",
+                    lambda cluster_id=cluster_id: rds_client.describe_db_clusters(
+                        DBClusterIdentifier=cluster_id
+                    )["DBClusters"][0],
+                )
+                for cluster_id in sorted(cluster_ids)
+            }
+
+            tags = {
+                db_id: pool.submit(
+                    self._fetch,
+                    f"tags for {db_id}",
+                    lambda arn=instance["DBInstanceArn"]: list_tags(arn),
+                )
+                for db_id, instance in instances.items()
+                if instance.get("DBInstanceArn")
+            }
+
+        groups_by_id: Dict[str, Any] = {}
+        if security_groups is not None:
+            groups_by_id = security_groups.result()[1] or {}
+
+        enriched: List[Dict[str, Any]] = []
+        for db_id in db_instance_identifiers:
+            data: Dict[str, Any] = {"db_instance_identifier": db_id}
+            instance = instances.get(db_id)
+            if instance is not None:
+                data["instance_details"] = instance
+
+                cluster_id = instance.get("DBClusterIdentifier")
+                if cluster_id:
+                    fetched, cluster = clusters[cluster_id].result()
+                    if fetched:
+                        data["cluster_details"] = cluster
+
+                instance_sg_ids = [
+                    sg["VpcSecurityGroupId"]
+                    for sg in instance.get("VpcSecurityGroups", [])
+                ]
+                if instance_sg_ids and groups_by_id:
+                    data["security_groups"] = [
+                        groups_by_id[sg_id]
+                        for sg_id in instance_sg_ids
+                        if sg_id in groups_by_id
+                    ]
+
+                if db_id in tags:
+                    fetched, tag_list = tags[db_id].result()
+                    if fetched:
+                        data["tags"] = tag_list
+
+            fetched, recent_events = events[db_id].result()
+            if fetched:
+                data["recent_events"] = recent_events
+            enriched.append(data)
+
+        return enriched
 
     def execute(self, event: GuardDutyEvent, **kwargs) -> ActionResponse:
         enriched_instances: List[Dict[str, Any]] = []
@@ -101,6 +204,8 @@ class EnrichRdsFindingAction(BaseAction):
                 "details": "No RDS instances listed in this finding.",
             }
 
+        context = kwargs.get("context") or FindingContext(event)
+        db_instance_identifiers: List[str] = []
         for instance_data in instance_details_list:
             try:
                 model = RDSInstanceDetails(**instance_data, ResourceType="DBInstance")
@@ -111,13 +216,7 @@ class EnrichRdsFindingAction(BaseAction):
                 logger.warning(
                     f"ACTION: Enriching details for RDS instance: {db_instance_identifier}"
                 )
-                raw_enriched_data = self._get_enrichment_data(db_instance_identifier)
-
-                # Validate the final data structure against the Pydantic model
-                validated_data = RdsEnrichmentData(**raw_enriched_data).model_dump(
-                    exclude_none=True
-                )
-                enriched_instances.append(validated_data)
+                db_instance_identifiers.append(db_instance_identifier)
 
             except ValidationError as e:
                 error_detail = f"Failed to validate enriched data for '{instance_data.get('DbInstanceIdentifier', 'Unknown')}': {e}"
@@ -128,6 +227,29 @@ class EnrichRdsFindingAction(BaseAction):
                 logger.error(error_detail)
                 errors.append(error_detail)
 
+        if db_instance_identifiers:
+            try:
+                raw_enriched_data = self._get_enrichment_data(
+                    list(dict.fromkeys(db_instance_identifiers)), context
+                )
+            except Exception as e:
+                error_detail = f"An unknown error occurred while enriching {db_instance_identifiers}: {e}"
+                logger.error(error_detail)
+                errors.append(error_detail)
+                raw_enriched_data = []
+
+            for raw_data in raw_enriched_data:
+                try:
+                    # Validate the final data structure against the Pydantic model
+                    validated_data = RdsEnrichmentData(**raw_data).model_dump(
+                        exclude_none=True
+                    )
+                    enriched_instances.append(validated_data)
+                except ValidationError as e:
+                    error_detail = f"Failed to validate enriched data for '{raw_data['db_instance_identifier']}': {e}"
+                    logger.error(error_detail)
+                    errors.append(error_detail)
+
         if errors:
             return {
                 "status": "error",
@@ -1,18 +1,48 @@
 import logging
+import random
 import time
-from typing import Any, Dict, List
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
 
-import boto3
 from botocore.exceptions import ClientError
 from pydantic import ValidationError
 
 from guardduty_soar.actions.base import BaseAction
-from guardduty_soar.config import AppConfig
+from guardduty_soar.clients import LazyClient
 from guardduty_soar.models import ActionResponse, GuardDutyEvent
 from guardduty_soar.schemas import RDSInstanceDetails, RecentRdsQuery
 
 logger = logging.getLogger(__name__)
 
+# The most wall time the Logs Insights queries of a finding are polled for, in
+# total. Queries still running by then are stopped.
+QUERY_TIMEOUT_SECONDS = 60
+# Queries are not started with less time than this left.
+QUERY_MIN_SECONDS = 2
+# Polling starts at the first interval, and doubles (with jitter) up to the
+# second. Most queries over a day of logs finish in a few seconds.
+QUERY_POLL_INITIAL_SECONDS = 0.5
+QUERY_POLL_MAX_SECONDS = 5
+# The most results kept per instance.
+QUERY_RESULTS_PER_INSTANCE = 25
+
+
+@dataclass
+class LogQuery:
+    """
+    A Logs Insights query for a database user's recent queries on one instance.
+
+    :param db_user: the database user the query searches for.
+    :param log_group: the instance's log group.
+    :param db_instance_id: the instance the log group belongs to.
+    :param query_id: the query's ID, once it is started.
+    """
+
+    db_user: str
+    log_group: str
+    db_instance_id: str
+    query_id: Optional[str] = None
+
 
 class GatherRecentQueriesAction(BaseAction):
     """
@@ -20,13 +50,16 @@ class GatherRecentQueriesAction(BaseAction):
     CloudWatch Logs. This action is dependent on database audit logging being
     enabled and configured to send logs to CloudWatch.
 
+    Every query is started up front, one per instance and database user, and
+    the queries are then polled together with exponential backoff, within a
+    single time limit. Each instance gets its own query, and so its own limit
+    of results, so a busy instance can not crowd out the others.
+
     :param session: A boto3 Session object to build clients with.
     :param config: The Application's configurations.
     """
 
-    def __init__(self, session: boto3.Session, config: AppConfig):
-        super().__init__(session, config)
-        self.logs_client = self.session.client("logs")
+    logs_client = LazyClient("logs")
 
     def _get_log_group_name(self, engine: str, db_instance_id: str) -> str:
         """Determines the most likely CloudWatch Log Group name based on engine."""
@@ -44,77 +77,139 @@ class GatherRecentQueriesAction(BaseAction):
             # Default fallback
             return f"/aws/rds/instance/{db_instance_id}/general"
 
-    def _run_log_query(self, log_group: str, db_user: str) -> List[Dict[str, str]]:
+    @staticmethod
+    def _build_query(db_user: str, limit: int) -> str:
         """
-        Executes a CloudWatch Logs Insights query to find recent queries
-        by the specified user.
+        Builds the Logs Insights query for a user's recent queries.
+
+        :meta private:
         """
         # This query looks for the username and common SQL commands.
         # It's a best-effort search and may need tuning for specific DB engines.
-        query = f"""
+        return f"""
         fields @timestamp, @message
         | filter @message like /(?i){db_user}/
         | filter @message like /(?i)(SELECT|INSERT|UPDATE|DELETE|CREATE|ALTER|DROP|EXEC)/
         | sort @timestamp desc
-        | limit 25
+        | limit {limit}
         """
 
-        try:
-            start_query_response = self.logs_client.start_query(
-                logGroupName=log_group,
-                startTime=int((time.time() - 3600 * 24) * 1000),  # Last 24 hours
-                endTime=int(time.time() * 1000),
-                queryString=query,
-            )
-            query_id = start_query_response["queryId"]
-
-            # Poll for query completion
-            status = "Running"
-            results = []
-            timeout = time.time() + 60  # 1 minute timeout
-            while status in ["Running", "Scheduled"] and time.time() < timeout:
-                time.sleep(2)
-                response = self.logs_client.get_query_results(queryId=query_id)
-                status = response["status"]
-                if status == "Complete":
-                    results = response.get("results", [])
-                    break
-
-            if status != "Complete":
-                logger.warning(f"CloudWatch query {query_id} did not complete in time.")
-                return []
-
-            # Format results
-            parsed_results = []
-            for result_fields in results:
-                timestamp = next(
-                    (f["value"] for f in result_fields if f["field"] == "@timestamp"),
-                    None,
-                )
-                message = next(
-                    (f["value"] for f in result_fields if f["field"] == "@message"), ""
-                )
-                if timestamp:
-                    parsed_results.append({"timestamp": timestamp, "message": message})
+    def _start_query(self, query: LogQuery) -> bool:
+        """
+        Starts a query over the last 24 hours of its log group.
 
-            return parsed_results
+        :param query: the LogQuery to start, its `query_id` is set once started.
+        :return: True if the query was started.
 
+        :meta private:
+        """
+        now = time.time()
+        try:
+            response = self.logs_client.start_query(
+                logGroupName=query.log_group,
+                startTime=int((now - 3600 * 24) * 1000),  # Last 24 hours
+                endTime=int(now * 1000),
+                queryString=self._build_query(
+                    query.db_user, QUERY_RESULTS_PER_INSTANCE
+                ),
+            )
         except ClientError as e:
             if e.response["Error"]["Code"] == "ResourceNotFoundException":
                 logger.warning(
-                    f"CloudWatch Log Group {log_group} not found. "
+                    f"CloudWatch Log Group {query.log_group} not found. "
                     "Audit logging may be disabled."
                 )
             else:
-                logger.error(f"Failed to query CloudWatch Logs for {log_group}: {e}")
-            return []
-        except Exception as e:
-            logger.error(f"An unexpected error occurred during log query: {e}")
-            return []
+                logger.error(
+                    f"Failed to query CloudWatch Logs for {query.log_group}: {e}"
+                )
+            return False
+        query.query_id = response["queryId"]
+        return True
+
+    def _stop_query(self, query_id: str) -> None:
+        """
+        Stops a query that did not finish in time. Queries count against the
+        account's concurrency limit until they finish, so we do not leave them
+        running.
+
+        :meta private:
+        """
+        try:
+            self.logs_client.stop_query(queryId=query_id)
+        except ClientError as e:
+            logger.warning(f"Failed to stop CloudWatch query {query_id}: {e}")
+
+    def _poll_queries(
+        self, queries: List[LogQuery], timeout_seconds: float
+    ) -> Dict[str, List[Any]]:
+        """
+        Polls every query together until they have all finished or the time
+        limit is reached. The interval between polls starts at
+        `QUERY_POLL_INITIAL_SECONDS` and doubles up to `QUERY_POLL_MAX_SECONDS`,
+        with jitter, and is cut short so the last poll lands at the time limit.
+
+        :param queries: the started LogQuery objects.
+        :param timeout_seconds: the most time to poll for.
+        :return: The results of each completed query, by query ID.
+
+        :meta private:
+        """
+        pending = {query.query_id: query for query in queries if query.query_id}
+        completed: Dict[str, List[Any]] = {}
+        expires_at = time.monotonic() + timeout_seconds
+        interval = QUERY_POLL_INITIAL_SECONDS
+
+        while pending:
+            remaining = expires_at - time.monotonic()
+            if remaining <= 0:
+                break
+            time.sleep(min(remaining, interval * random.uniform(0.5, 1.0)))
+            interval = min(interval * 2, QUERY_POLL_MAX_SECONDS)
+
+            for query_id in list(pending):
+                try:
+                    response = self.logs_client.get_query_results(queryId=query_id)
+                except ClientError as e:
+                    logger.error(f"Failed to get CloudWatch query {query_id}: {e}")
+                    pending.pop(query_id)
+                    continue
+                status = response["status"]
+                if status == "Complete":
+                    completed[query_id] = response.get("results", [])
+                    pending.pop(query_id)
+                elif status not in ["Running", "Scheduled"]:
+                    logger.warning(f"CloudWatch query {query_id} ended as {status}.")
+                    pending.pop(query_id)
+
+        for query_id in pending:
+            logger.warning(f"CloudWatch query {query_id} did not complete in time.")
+            self._stop_query(query_id)
+
+        return completed
+
+    @staticmethod
+    def _parse_results(results: List[Any]) -> List[Dict[str, str]]:
+        """
+        Formats a query's results, skipping any without a timestamp.
+
+        :meta private:
+        """
+        rows: List[Dict[str, str]] = []
+        for result_fields in results:
+            values = {f["field"]: f["value"] for f in result_fields}
+            timestamp = values.get("@timestamp")
+            if timestamp:
+                rows.append(
+                    {"timestamp": timestamp, "message": values.get("@message", "")}
+                )
+        return rows
 
     def execute(self, event: GuardDutyEvent, **kwargs) -> ActionResponse:
         """
         Running this action requires 'allow_gather_recent_queries' to be True.
+        If a FindingContext is passed as `context`, its Deadline limits how
+        long the queries are polled for.
         """
         if not self.config.allow_gather_recent_queries:
             return {
@@ -124,6 +219,8 @@ class GatherRecentQueriesAction(BaseAction):
 
         all_queries: List[Dict[str, Any]] = []
         errors: List[str] = []
+        context = kwargs.get("context")
+        deadline = context.deadline if context else None
 
         resource_data = event.get("Resource", {})
         if resource_data.get("ResourceType") != "DBInstance":
@@ -133,6 +230,9 @@ class GatherRecentQueriesAction(BaseAction):
         if not instance_details_list:
             return {"status": "skipped", "details": "No RDS instances listed."}
 
+        # The queries to run, by instance and database user, in the finding's
+        # order.
+        queries: Dict[Tuple[str, str], LogQuery] = {}
         for instance_data in instance_details_list:
             try:
                 model = RDSInstanceDetails(**instance_data, ResourceType="DBInstance")
@@ -155,26 +255,40 @@ class GatherRecentQueriesAction(BaseAction):
                     f"Gathering recent queries for user '{db_user}' on instance '{db_instance_id}'"
                 )
                 log_group = self._get_log_group_name(engine, db_instance_id)
-
-                query_results = self._run_log_query(log_group, db_user)
-
-                for result in query_results:
-                    try:
-                        query_model = RecentRdsQuery(
-                            db_instance_identifier=db_instance_id,
-                            db_user=db_user,
-                            timestamp=result["timestamp"],
-                            query=result["message"],
-                        )
-                        all_queries.append(query_model.model_dump(exclude_none=True))
-                    except ValidationError as e:
-                        logger.warning(f"Failed to validate log result: {e}")
+                queries.setdefault(
+                    (db_instance_id, db_user),
+                    LogQuery(db_user, log_group, db_instance_id),
+                )
 
             except Exception as e:
                 error_detail = f"Failed to gather queries for '{instance_data.get('DbInstanceIdentifier', 'Unknown')}': {e}"
                 logger.error(error_detail)
                 errors.append(error_detail)
 
+        timeout_seconds = (
+            deadline.cap(QUERY_TIMEOUT_SECONDS) if deadline else QUERY_TIMEOUT_SECONDS
+        )
+        if queries and timeout_seconds < QUERY_MIN_SECONDS:
+            logger.warning("Not enough time left to query CloudWatch Logs, skipping.")
+            queries = {}
+
+        started = [query for query in queries.values() if self._start_query(query)]
+        completed = self._poll_queries(started, timeout_seconds) if started else {}
+
+        for (db_instance_id, db_user), query in queries.items():
+            rows = self._parse_results(completed.get(query.query_id or "", []))
+            for result in rows[:QUERY_RESULTS_PER_INSTANCE]:
+                try:
+                    query_model = RecentRdsQuery(
+                        db_instance_identifier=db_instance_id,
+                        db_user=db_user,
+                        timestamp=result["timestamp"],
+                        query=result["message"],
+                    )
+                    all_queries.append(query_model.model_dump(exclude_none=True))
+                except ValidationError as e:
+                    logger.warning(f"Failed to validate log result: {e}")
+
         if errors:
             return {
                 "status": "error",
@@ -5,7 +5,9 @@ import boto3
 from botocore.exceptions import ClientError
 
 from guardduty_soar.actions.base import BaseAction
+from guardduty_soar.clients import LazyClient
 from guardduty_soar.config import AppConfig
+from guardduty_soar.context import DB_INSTANCES
 from guardduty_soar.models import ActionResponse, GuardDutyEvent
 
 logger = logging.getLogger(__name__)
@@ -18,9 +20,10 @@ class ModifyRdsPublicAccessAction(BaseAction):
     can cause outages and is controlled by a configuration flag.
     """
 
+    rds_client = LazyClient("rds")
+
     def __init__(self, session: boto3.Session, config: AppConfig):
         super().__init__(session, config)
-        self.rds_client = self.session.client("rds")
         self.allow_revoke = getattr(config, "allow_revoke_public_access_rds", False)
 
     def execute(self, event: GuardDutyEvent, **kwargs) -> ActionResponse:
@@ -64,6 +67,8 @@ class ModifyRdsPublicAccessAction(BaseAction):
                     PubliclyAccessible=False,
                     ApplyImmediately=True,  # Critical for timely security response
                 )
+                if kwargs.get("context"):
+                    kwargs["context"].invalidate(DB_INSTANCES, db_instance_id)
                 logger.info(
                     f"Successfully submitted modification for {db_instance_id} to revoke public access."
                 )
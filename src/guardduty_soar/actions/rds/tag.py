@@ -3,11 +3,10 @@ from __future__ import annotations
 import logging
 from typing import TYPE_CHECKING, List, cast
 
-import boto3
 from botocore.exceptions import ClientError
 
 from guardduty_soar.actions.base import BaseAction
-from guardduty_soar.config import AppConfig
+from guardduty_soar.clients import LazyClient
 from guardduty_soar.models import ActionResponse, GuardDutyEvent
 
 if TYPE_CHECKING:
@@ -23,9 +22,7 @@ class TagRdsInstanceAction(BaseAction):
     application ran against it because of a GuardDuty finding.
     """
 
-    def __init__(self, session: boto3.Session, config: AppConfig):
-        super().__init__(session, config)
-        self.rds_client = self.session.client("rds")
+    rds_client = LazyClient("rds")
 
     def execute(self, event: GuardDutyEvent, **kwargs) -> ActionResponse:
         playbook_name = kwargs.get("playbook_name", "UnknownPlaybook")
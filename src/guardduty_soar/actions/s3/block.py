@@ -1,12 +1,11 @@
 import logging
 from typing import List
 
-import boto3
 from botocore.exceptions import ClientError
 from pydantic import ValidationError
 
 from guardduty_soar.actions.base import BaseAction
-from guardduty_soar.config import AppConfig
+from guardduty_soar.clients import LazyClient
 from guardduty_soar.models import ActionResponse, GuardDutyEvent
 from guardduty_soar.schemas import S3BucketDetails
 
@@ -24,9 +23,7 @@ class S3BlockPublicAccessAction(BaseAction):
     :param config: The application's configuration.
     """
 
-    def __init__(self, session: boto3.Session, config: AppConfig):
-        super().__init__(session, config)
-        self.s3_client = self.session.client("s3")
+    s3_client = LazyClient("s3")
 
     def execute(self, event: GuardDutyEvent, **kwargs) -> ActionResponse:
         """
@@ -1,110 +1,92 @@
 import logging
-from typing import Any, Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-import boto3
 from botocore.exceptions import ClientError
 from pydantic import ValidationError
 
 from guardduty_soar.actions.base import BaseAction
-from guardduty_soar.config import AppConfig
+from guardduty_soar.clients import LazyClient
 from guardduty_soar.models import ActionResponse, GuardDutyEvent
 from guardduty_soar.schemas import S3BucketDetails, S3EnrichmentData
 
 logger = logging.getLogger(__name__)
 
+# The call made for each field of S3EnrichmentData, how the field is read from
+# its response, and the error code meaning the bucket does not have it configured.
+ENRICHMENT_CALLS: Dict[
+    str, Tuple[str, Callable[[Dict[str, Any]], Any], Optional[str]]
+] = {
+    "public_access_block": (
+        "get_public_access_block",
+        lambda r: r["PublicAccessBlockConfiguration"],
+        "NoSuchPublicAccessBlockConfiguration",
+    ),
+    "policy": ("get_bucket_policy", lambda r: r.get("Policy"), "NoSuchBucketPolicy"),
+    "encryption": (
+        "get_bucket_encryption",
+        lambda r: r["ServerSideEncryptionConfiguration"],
+        "ServerSideEncryptionConfigurationNotFoundError",
+    ),
+    "versioning": (
+        "get_bucket_versioning",
+        lambda r: r.get("Status", "Not Configured"),
+        None,
+    ),
+    "logging": ("get_bucket_logging", lambda r: r.get("LoggingEnabled"), None),
+    "tags": ("get_bucket_tagging", lambda r: r.get("TagSet", []), "NoSuchTagSet"),
+}
+
 
 class EnrichS3BucketAction(BaseAction):
     """
     An action to enrich S3 bucket details from a GuardDuty finding. It gathers
     configuration details like policy, public access settings, encryption, and more.
 
+    Every call, for every bucket, is independent, so they are all made
+    concurrently on a pool bounded by `playbook_max_workers`. Calls use a client
+    for the finding's region, the region GuardDuty reports the bucket in, so
+    they are not redirected from another region's endpoint.
+
     :param session: A boto3 Session object to build clients with.
     :param config: The Applications configurations.
     """
 
-    def __init__(self, session: boto3.Session, config: AppConfig):
-        super().__init__(session, config)
-        self.s3_client = self.session.client("s3")
+    s3_client = LazyClient("s3")
 
-    def _get_enrichment_data(self, bucket_name: str) -> Dict[str, Any]:
+    def _get_s3_client(self, region_name: Optional[str]) -> Any:
         """
-        Helper to fetch all enrichment data for a single S3 bucket.
-
-        :param bucket_name: The bucket name to gather information on.
-        :return: A dictionary object that is used to create the S3EnrichedData model.
+        Returns the S3 client for a bucket's region.
 
         :meta private:
         """
-        data: Dict[str, Any] = {"name": bucket_name}
+        if not region_name or region_name == self.session.region_name:
+            return self.s3_client
+        return self._get_client("s3", region_name)
 
-        # 1. Get Public Access Block Configuration
-        try:
-            data["public_access_block"] = self.s3_client.get_public_access_block(
-                Bucket=bucket_name
-            )["PublicAccessBlockConfiguration"]
-        except ClientError as e:
-            if e.response["Error"]["Code"] == "NoSuchPublicAccessBlockConfiguration":
-                logger.info(f"No Public Access Block for bucket: {bucket_name}.")
-                data["public_access_block"] = None
-            else:
-                logger.error(
-                    f"Failed to get public access block for {bucket_name}: {e}"
-                )
-
-        # 2. Get Bucket Policy
-        try:
-            data["policy"] = self.s3_client.get_bucket_policy(Bucket=bucket_name).get(
-                "Policy"
-            )
-        except ClientError as e:
-            if e.response["Error"]["Code"] == "NoSuchBucketPolicy":
-                logger.info(f"No bucket policy for bucket: {bucket_name}.")
-                data["policy"] = None
-            else:
-                logger.error(f"Failed to get policy for {bucket_name}: {e}")
-
-        # 3. Get Bucket Encryption
-        try:
-            data["encryption"] = self.s3_client.get_bucket_encryption(
-                Bucket=bucket_name
-            )["ServerSideEncryptionConfiguration"]
-        except ClientError as e:
-            if (
-                e.response["Error"]["Code"]
-                == "ServerSideEncryptionConfigurationNotFoundError"
-            ):
-                logger.info(f"No encryption configuration for bucket: {bucket_name}.")
-                data["encryption"] = None
-            else:
-                logger.error(f"Failed to get encryption for {bucket_name}: {e}")
-
-        # 4. Get Bucket Versioning
-        try:
-            response = self.s3_client.get_bucket_versioning(Bucket=bucket_name)
-            data["versioning"] = response.get("Status", "Not Configured")
-        except ClientError as e:
-            logger.error(f"Failed to get versioning for {bucket_name}: {e}")
+    def _get_field(
+        self, s3_client: Any, bucket_name: str, field: str
+    ) -> Tuple[bool, Any]:
+        """
+        Fetches a single enrichment field of an S3 bucket.
 
-        # 5. Get Bucket Logging
-        try:
-            data["logging"] = self.s3_client.get_bucket_logging(Bucket=bucket_name).get(
-                "LoggingEnabled"
-            )
-        except ClientError as e:
-            logger.error(f"Failed to get logging for {bucket_name}: {e}")
+        :param s3_client: the S3 client for the bucket's region.
+        :param bucket_name: The bucket name to gather information on.
+        :param field: the S3EnrichmentData field, a key of `ENRICHMENT_CALLS`.
+        :return: A tuple of whether the field was fetched, and its value. A
+            field the bucket does not have configured is fetched as None.
 
-        # 6. Get Bucket Tags
+        :meta private:
+        """
+        method, read, not_found_code = ENRICHMENT_CALLS[field]
         try:
-            tagging_response = self.s3_client.get_bucket_tagging(Bucket=bucket_name)
-            data["tags"] = tagging_response.get("TagSet", [])
+            return True, read(getattr(s3_client, method)(Bucket=bucket_name))
         except ClientError as e:
-            if e.response["Error"]["Code"] == "NoSuchTagSet":
-                logger.info(f"No tags for bucket: {bucket_name}.")
-                data["tags"] = None
-            else:
-                logger.error(f"Failed to get tags for {bucket_name}: {e}")
-
-        return data
+            if not_found_code and e.response["Error"]["Code"] == not_found_code:
+                logger.info(f"No {field} configured for bucket: {bucket_name}.")
+                return True, None
+            logger.error(f"Failed to get {field} for {bucket_name}: {e}")
+            return False, None
 
     def execute(self, event: GuardDutyEvent, **kwargs) -> ActionResponse:
         enriched_buckets: List[Dict[str, Any]] = []
@@ -124,6 +106,7 @@ class EnrichS3BucketAction(BaseAction):
                 "details": "No S3 buckets listed in this finding.",
             }
 
+        bucket_names: List[str] = []
         for bucket_data in bucket_details_list:
             try:
                 # We need to check each bucket to see if its a directory bucket or not.
@@ -140,13 +123,7 @@ class EnrichS3BucketAction(BaseAction):
                     continue
 
                 logger.info(f"Enriching details for bucket: {bucket_name}")
-                raw_enriched_data = self._get_enrichment_data(bucket_name)
-
-                # Validate the final data structure against the Pydantic model
-                validated_data = S3EnrichmentData(**raw_enriched_data).model_dump(
-                    exclude_none=True
-                )
-                enriched_buckets.append(validated_data)
+                bucket_names.append(bucket_name)
 
             except ValidationError as e:
                 error_detail = f"Failed to validate enriched data for '{bucket_data.get('Name', 'Unknown')}': {e}"
@@ -157,6 +134,51 @@ class EnrichS3BucketAction(BaseAction):
                 logger.error(error_detail)
                 errors.append(error_detail)
 
+        if bucket_names:
+            s3_client = self._get_s3_client(event.get("Region"))
+            with ThreadPoolExecutor(
+                max_workers=min(
+                    len(bucket_names) * len(ENRICHMENT_CALLS),
+                    self.config.playbook_max_workers,
+                ),
+                thread_name_prefix="s3-enrich",
+            ) as pool:
+                futures = [
+                    {
+                        field: pool.submit(
+                            self._get_field, s3_client, bucket_name, field
+                        )
+                        for field in ENRICHMENT_CALLS
+                    }
+                    for bucket_name in bucket_names
+                ]
+
+            # Assembled in the finding's order, whatever order calls finished in.
+            for bucket_name, bucket_futures in zip(bucket_names, futures):
+                try:
+                    raw_enriched_data: Dict[str, Any] = {"name": bucket_name}
+                    for field, future in bucket_futures.items():
+                        fetched, value = future.result()
+                        if fetched:
+                            raw_enriched_data[field] = value
+
+                    # Validate the final data structure against the Pydantic model
+                    validated_data = S3EnrichmentData(**raw_enriched_data).model_dump(
+                        exclude_none=True
+                    )
+                    enriched_buckets.append(validated_data)
+
+                except ValidationError as e:
+                    error_detail = (
+                        f"Failed to validate enriched data for '{bucket_name}': {e}"
+                    )
+                    logger.error(error_detail)
+                    errors.append(error_detail)
+                except Exception as e:
+                    error_detail = f"An unknown error occurred while enriching '{bucket_name}': {e}"
+                    logger.error(error_detail)
+                    errors.append(error_detail)
+
         if errors:
             return {
                 "status": "error",
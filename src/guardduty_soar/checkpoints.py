@@ -0,0 +1,103 @@
+import json
+import logging
+from typing import Dict, Optional
+
+from guardduty_soar.idempotency import finding_key
+from guardduty_soar.models import ActionResponse, GuardDutyEvent
+from guardduty_soar.stores import StateStore
+
+logger = logging.getLogger(__name__)
+
+
+class PlaybookCheckpoint:
+    """
+    The checkpoint of one playbook run for one finding. Every step that
+    completes successfully is saved, so that when the invocation dies halfway
+    through the playbook (e.g. a timeout or throttling) the retry resumes at
+    the first incomplete step, reusing the saved results (such as the created
+    security group or snapshot ids) rather than repeating the work.
+
+    The checkpoint fails open, if the StateStore is unavailable the playbook
+    runs every step as it would without one.
+
+    :param store: the StateStore the checkpoint is kept in.
+    :param key: the store key of the checkpoint.
+    :param ttl_seconds: how long the checkpoint is kept for.
+    """
+
+    def __init__(self, store: StateStore, key: str, ttl_seconds: int):
+        self.store = store
+        self.key = key
+        self.ttl_seconds = ttl_seconds
+        self._results: Optional[Dict[str, ActionResponse]] = None
+
+    def load(self) -> Dict[str, ActionResponse]:
+        """
+        Loads the results of the steps that already completed.
+
+        :return: A dictionary of step names to their ActionResponses, empty if
+            there is no checkpoint.
+        """
+        if self._results is None:
+            try:
+                record = self.store.get(self.key)
+            except Exception as e:
+                logger.warning(f"Failed to load checkpoint '{self.key}': {e}.")
+                record = None
+            self._results = dict(record["results"]) if record else {}
+        return dict(self._results)
+
+    def save(self, step_name: str, result: ActionResponse) -> None:
+        """
+        Saves the result of a completed step. Results are stored as JSON, so
+        values that are not serializable (e.g. datetimes) are saved as strings.
+
+        :param step_name: the name of the step.
+        :param result: the step's ActionResponse.
+        """
+        results = self.load()
+        results[step_name] = json.loads(json.dumps(result, default=str))
+        self._results = results
+        try:
+            self.store.put(self.key, {"results": self._results}, self.ttl_seconds)
+        except Exception as e:
+            logger.warning(f"Failed to save checkpoint '{self.key}': {e}.")
+
+    def clear(self) -> None:
+        """
+        Removes the checkpoint, once the playbook has completed, so that a
+        later occurrence of the finding runs every step again.
+        """
+        self._results = {}
+        try:
+            self.store.delete(self.key)
+        except Exception as e:
+            logger.warning(f"Failed to clear checkpoint '{self.key}': {e}.")
+
+
+class CheckpointStore:
+    """
+    Creates the PlaybookCheckpoints of findings, keyed by the finding (its Id
+    and resource) and the playbook that runs for it.
+
+    :param store: the StateStore checkpoints are kept in.
+    :param ttl_seconds: how long a checkpoint is kept for.
+    """
+
+    def __init__(self, store: StateStore, ttl_seconds: int):
+        self.store = store
+        self.ttl_seconds = ttl_seconds
+
+    def for_playbook(
+        self, event: GuardDutyEvent, playbook_name: str
+    ) -> PlaybookCheckpoint:
+        """
+        :param event: the GuardDutyEvent.
+        :param playbook_name: the name of the playbook running for the finding.
+        :return: The finding's PlaybookCheckpoint.
+        """
+        return PlaybookCheckpoint(
+            self.store,
+            f"checkpoint#{finding_key(event)}#{playbook_name}",
+            self.ttl_seconds,
+        )
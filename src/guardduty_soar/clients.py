@@ -0,0 +1,112 @@
+import logging
+import threading
+from functools import lru_cache
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+import boto3
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=1)
+def get_session() -> boto3.Session:
+    """
+    Returns the process-wide boto3 Session. Creating a Session is not free,
+    and every client created from it shares its credential and endpoint
+    resolution, so we build it once per Lambda container and share it between
+    the engine and every playbook.
+
+    :return: the shared boto3 Session object.
+    """
+    logger.debug("Creating shared boto3 session.")
+    return boto3.Session()
+
+
+class ClientPool:
+    """
+    A thread-safe pool of boto3 clients, keyed by service, region and the
+    credentials they were built with. boto3 clients are thread-safe once
+    created, but building one is slow (the service model is loaded and parsed)
+    and sessions are not safe to share between threads, so creation is
+    serialized here and every caller asking for the same client gets the same
+    object back.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._clients: Dict[Tuple[str, Optional[str], Hashable], Any] = {}
+
+    def get_client(
+        self,
+        session: boto3.Session,
+        service_name: str,
+        region_name: Optional[str] = None,
+    ) -> Any:
+        """
+        Returns a client for the service, creating it on first use.
+
+        :param session: the boto3 Session to create the client with.
+        :param service_name: the AWS service name, e.g. "ec2".
+        :param region_name: optional region, defaults to the session's region.
+        :return: A boto3 client for the service.
+        """
+        with self._lock:
+            # Credentials are resolved (and cached) by the session, so two
+            # sessions for different principals never share a client.
+            key = (
+                service_name,
+                region_name or session.region_name,
+                session.get_credentials(),
+            )
+            client = self._clients.get(key)
+            if client is None:
+                logger.debug(f"Creating boto3 client for {service_name}.")
+                if region_name:
+                    client = session.client(service_name, region_name=region_name)
+                else:
+                    client = session.client(service_name)
+                self._clients[key] = client
+        return client
+
+    def clear(self) -> None:
+        """Drops every pooled client."""
+        with self._lock:
+            self._clients.clear()
+
+
+@lru_cache(maxsize=1)
+def get_client_pool() -> ClientPool:
+    """
+    Returns the process-wide ClientPool, created on first use.
+
+    :return: the shared ClientPool object.
+    """
+    return ClientPool()
+
+
+class LazyClient:
+    """
+    A descriptor that fetches a boto3 client from the shared pool the first
+    time the attribute is read, and then stores it on the instance. Actions
+    that are skipped by configuration never create their clients. As this is
+    a non-data descriptor, the attribute can still be assigned directly, for
+    example to inject a stubbed client in unit tests.
+
+    The owning class must have a `session` attribute holding a boto3 Session.
+
+    :param service_name: the AWS service name, e.g. "ec2".
+    """
+
+    def __init__(self, service_name: str):
+        self.service_name = service_name
+        self.attribute_name = ""
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.attribute_name = name
+
+    def __get__(self, instance: Any, owner: Optional[type] = None) -> Any:
+        if instance is None:
+            return self
+        client = get_client_pool().get_client(instance.session, self.service_name)
+        instance.__dict__[self.attribute_name] = client
+        return client
@@ -0,0 +1,183 @@
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+from guardduty_soar.idempotency import resource_key
+from guardduty_soar.models import GuardDutyEvent
+from guardduty_soar.playbook_registry import get_playbook_name
+from guardduty_soar.stores import StateStore
+
+logger = logging.getLogger(__name__)
+
+
+def _severity(event: GuardDutyEvent) -> float:
+    """
+    Returns the numerical severity of a finding, 0 if it is missing.
+
+    :meta private:
+    """
+    try:
+        return float(event.get("Severity", 0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _updated_at(event: GuardDutyEvent) -> Optional[float]:
+    """
+    Returns when the finding was last updated as a timestamp, None if it is
+    missing or malformed.
+
+    :meta private:
+    """
+    try:
+        return datetime.fromisoformat(
+            event["UpdatedAt"].replace("Z", "+00:00")
+        ).timestamp()
+    except (KeyError, AttributeError, ValueError):
+        return None
+
+
+def coalesce_key(event: GuardDutyEvent) -> str:
+    """
+    Builds the key findings are coalesced by: the finding's resource and the
+    playbook that handles its type. Findings handled by different playbooks
+    are never coalesced, as the playbook that runs would not remediate them
+    (e.g. block the new IP addresses of a port probe).
+
+    :param event: the GuardDutyEvent.
+    :return: The coalesce key of the finding.
+    """
+    playbook = get_playbook_name(event.get("Type", "")) or event.get("Type")
+    return f"{resource_key(event)}#{playbook}"
+
+
+def coalesce_findings(
+    events: Sequence[GuardDutyEvent], window_seconds: int
+) -> List[List[int]]:
+    """
+    Groups findings that target the same resource, are handled by the same
+    playbook, and were updated within `window_seconds` of the first finding in
+    the group. During an incident GuardDuty reports many findings for one
+    resource at once, and only one run of each playbook needs to respond to
+    them.
+
+    The first finding of each group is the one to run a playbook for, the one
+    with the highest severity. Ties go to the finding that came first.
+
+    :param events: the GuardDuty findings, e.g. from one batch.
+    :param window_seconds: how far apart findings can be to be grouped, 0
+        disables grouping.
+    :return: A list of groups, each a list of indexes into `events`, with the
+        finding to run first. Every index appears in exactly one group.
+    """
+    if window_seconds <= 0:
+        return [[index] for index in range(len(events))]
+
+    by_resource: Dict[str, List[int]] = {}
+    groups: List[List[int]] = []
+    for index, event in enumerate(events):
+        if resource_key(event).endswith(":-"):
+            # The resource could not be identified, it is never grouped.
+            groups.append([index])
+        else:
+            by_resource.setdefault(coalesce_key(event), []).append(index)
+
+    for indexes in by_resource.values():
+        # Findings without a timestamp are grouped with the earliest ones.
+        indexes.sort(key=lambda i: _updated_at(events[i]) or 0.0)
+        current: List[int] = []
+        window_start: Optional[float] = None
+        for index in indexes:
+            updated_at = _updated_at(events[index])
+            if (
+                window_start is not None
+                and updated_at is not None
+                and updated_at - window_start > window_seconds
+            ):
+                groups.append(current)
+                current = []
+                window_start = None
+            current.append(index)
+            if window_start is None:
+                window_start = updated_at
+        groups.append(current)
+
+    return [
+        sorted(group, key=lambda i: (-_severity(events[i]), i))
+        for group in sorted(groups, key=min)
+    ]
+
+
+class ResourceCoalescer:
+    """
+    Coalesces findings for the same resource across invocations. Once a playbook
+    has run for a resource, further findings for it that the same playbook
+    handles are not run within the window, unless they are more severe than
+    the finding that ran. Their remediation is assumed to be covered by the
+    playbook that already ran.
+
+    :param store: the StateStore the last finding for each resource is kept in.
+    :param window_seconds: how long a resource stays covered after a playbook
+        ran for it.
+    """
+
+    def __init__(self, store: StateStore, window_seconds: int):
+        self.store = store
+        self.window_seconds = window_seconds
+
+    def _key(self, event: GuardDutyEvent) -> str:
+        """
+        Builds the store key of the finding's resource and playbook.
+
+        :meta private:
+        """
+        return f"coalesce#{coalesce_key(event)}"
+
+    def claim(self, event: GuardDutyEvent) -> bool:
+        """
+        Claims the finding's resource for processing.
+
+        :param event: the GuardDutyEvent.
+        :return: True if the finding should be processed, False if an equally
+            or more severe finding for the same resource already ran within
+            the window.
+        """
+        if resource_key(event).endswith(":-"):
+            return True
+
+        key = self._key(event)
+        record = {
+            "finding_id": event["Id"],
+            "finding_type": event.get("Type"),
+            "severity": _severity(event),
+        }
+        if self.store.put_if_absent(key, record, self.window_seconds):
+            return True
+
+        existing = self.store.get(key)
+        if (
+            existing is None
+            or existing["finding_id"] == event["Id"]
+            or record["severity"] > existing["severity"]
+        ):
+            self.store.put(key, record, self.window_seconds)
+            return True
+
+        logger.info(
+            f"Finding '{event['Id']}' ({event.get('Type')}) is covered by finding "
+            f"'{existing['finding_id']}' ({existing['finding_type']}), which already "
+            f"ran for {resource_key(event)}. Skipping."
+        )
+        return False
+
+    def release(self, event: GuardDutyEvent) -> None:
+        """
+        Releases the resource, if this finding holds it, so that the next
+        finding for the resource is processed.
+
+        :param event: the GuardDutyEvent.
+        """
+        key = self._key(event)
+        existing = self.store.get(key)
+        if existing is not None and existing["finding_id"] == event["Id"]:
+            self.store.delete(key)
@@ -2,7 +2,7 @@ import configparser
 import os
 from dataclasses import dataclass
 from functools import lru_cache
-from typing import List, Optional
+from typing import Optional, Tuple
 
 
 @dataclass(frozen=True)
@@ -22,8 +22,18 @@ class AppConfig:
 
     log_level: str
     boto_log_level: str
-    ignored_findings: List[str]
+    ignored_findings: Tuple[str, ...]
+    prime_on_init: bool
+    prime_clients: Tuple[str, ...]
+    playbook_max_workers: int
+    batch_max_workers: int
+    service_max_workers: int
+    coalesce_window_seconds: int
+    deadline_reserve_seconds: int
+    optional_step_min_seconds: int
     snapshot_description_prefix: str
+    allow_multi_volume_snapshots: bool
+    nacl_max_rules: int
     allow_terminate: bool
     allow_remove_public_access: bool
     allow_ses: bool
@@ -31,12 +41,22 @@ class AppConfig:
     allow_sns: bool
     sns_topic_arn: Optional[str]
     cloudtrail_history_max_results: int
+    cloudtrail_history_window_minutes: int
     analyze_iam_permissions: bool
+    policy_cache_path: Optional[str]
+    iam_index_ttl_seconds: int
+    iam_index_path: Optional[str]
     allow_s3_public_block: bool
     allow_iam_quarantine: bool
     iam_deny_all_policy_arn: str
     allow_revoke_public_access_rds: bool
     allow_gather_recent_queries: bool
+    state_backend: str
+    state_sqlite_path: str
+    state_table_name: Optional[str]
+    state_endpoint_url: Optional[str]
+    idempotency_window_seconds: int
+    checkpoint_ttl_seconds: int
     # Add other config attributes here as they come up (Don't forget to add them below as well)
 
 
@@ -53,9 +73,44 @@ def get_config() -> AppConfig:
 
     :return: an AppConfig object with the specific configurations set.
     """
-    CLOUDTRAIL_MAX = 50
+    CLOUDTRAIL_MAX = 1000
     CLOUDTRAIL_MIN = 1
     CLOUDTRAIL_DEFAULT = 25
+    CLOUDTRAIL_WINDOW_MAX = 1440
+    CLOUDTRAIL_WINDOW_MIN = 0
+    CLOUDTRAIL_WINDOW_DEFAULT = 60
+    PLAYBOOK_WORKERS_MAX = 16
+    PLAYBOOK_WORKERS_MIN = 1
+    PLAYBOOK_WORKERS_DEFAULT = 4
+    BATCH_WORKERS_MAX = 32
+    BATCH_WORKERS_MIN = 1
+    BATCH_WORKERS_DEFAULT = 8
+    SERVICE_WORKERS_MAX = 32
+    SERVICE_WORKERS_MIN = 1
+    SERVICE_WORKERS_DEFAULT = 4
+    COALESCE_WINDOW_MAX = 3600
+    COALESCE_WINDOW_MIN = 0
+    COALESCE_WINDOW_DEFAULT = 0
+    DEADLINE_RESERVE_MAX = 120
+    DEADLINE_RESERVE_MIN = 0
+    DEADLINE_RESERVE_DEFAULT = 10
+    OPTIONAL_STEP_MIN_MAX = 300
+    OPTIONAL_STEP_MIN_MIN = 0
+    OPTIONAL_STEP_MIN_DEFAULT = 15
+    NACL_RULES_MAX = 40
+    NACL_RULES_MIN = 1
+    NACL_RULES_DEFAULT = 20
+    IAM_INDEX_TTL_MAX = 86400
+    IAM_INDEX_TTL_MIN = 0
+    IAM_INDEX_TTL_DEFAULT = 0
+    STATE_BACKENDS = ("none", "memory", "sqlite", "dynamodb")
+    STATE_BACKEND_DEFAULT = "none"
+    IDEMPOTENCY_WINDOW_MAX = 604800
+    IDEMPOTENCY_WINDOW_MIN = 60
+    IDEMPOTENCY_WINDOW_DEFAULT = 3600
+    CHECKPOINT_TTL_MAX = 86400
+    CHECKPOINT_TTL_MIN = 0
+    CHECKPOINT_TTL_DEFAULT = 3600
 
     # Environment-aware path calculation for gd.cfg
     if "LAMBDA_TASK_ROOT" in os.environ:
@@ -88,12 +143,170 @@ def get_config() -> AppConfig:
         # If the value is not a valid integer default to default
         validated_ct_results = CLOUDTRAIL_DEFAULT
 
+    raw_ct_window = (
+        os.environ.get("GD_CLOUDTRAIL_HISTORY_WINDOW_MINUTES")
+        or config.get("IAM", "cloudtrail_history_window_minutes", fallback=None)
+        or str(CLOUDTRAIL_WINDOW_DEFAULT)
+    )
+
+    try:
+        validated_ct_window = max(
+            CLOUDTRAIL_WINDOW_MIN, min(int(raw_ct_window), CLOUDTRAIL_WINDOW_MAX)
+        )
+    except (ValueError, TypeError):
+        validated_ct_window = CLOUDTRAIL_WINDOW_DEFAULT
+
+    raw_playbook_workers = (
+        os.environ.get("GD_PLAYBOOK_MAX_WORKERS")
+        or config.get("General", "playbook_max_workers", fallback=None)
+        or str(PLAYBOOK_WORKERS_DEFAULT)
+    )
+
+    try:
+        validated_playbook_workers = max(
+            PLAYBOOK_WORKERS_MIN, min(int(raw_playbook_workers), PLAYBOOK_WORKERS_MAX)
+        )
+    except (ValueError, TypeError):
+        validated_playbook_workers = PLAYBOOK_WORKERS_DEFAULT
+
+    raw_batch_workers = (
+        os.environ.get("GD_BATCH_MAX_WORKERS")
+        or config.get("General", "batch_max_workers", fallback=None)
+        or str(BATCH_WORKERS_DEFAULT)
+    )
+
+    try:
+        validated_batch_workers = max(
+            BATCH_WORKERS_MIN, min(int(raw_batch_workers), BATCH_WORKERS_MAX)
+        )
+    except (ValueError, TypeError):
+        validated_batch_workers = BATCH_WORKERS_DEFAULT
+
+    raw_service_workers = (
+        os.environ.get("GD_SERVICE_MAX_WORKERS")
+        or config.get("General", "service_max_workers", fallback=None)
+        or str(SERVICE_WORKERS_DEFAULT)
+    )
+
+    try:
+        validated_service_workers = max(
+            SERVICE_WORKERS_MIN, min(int(raw_service_workers), SERVICE_WORKERS_MAX)
+        )
+    except (ValueError, TypeError):
+        validated_service_workers = SERVICE_WORKERS_DEFAULT
+
+    raw_coalesce_window = (
+        os.environ.get("GD_COALESCE_WINDOW_SECONDS")
+        or config.get("General", "coalesce_window_seconds", fallback=None)
+        or str(COALESCE_WINDOW_DEFAULT)
+    )
+
+    try:
+        validated_coalesce_window = max(
+            COALESCE_WINDOW_MIN, min(int(raw_coalesce_window), COALESCE_WINDOW_MAX)
+        )
+    except (ValueError, TypeError):
+        validated_coalesce_window = COALESCE_WINDOW_DEFAULT
+
+    raw_deadline_reserve = (
+        os.environ.get("GD_DEADLINE_RESERVE_SECONDS")
+        or config.get("General", "deadline_reserve_seconds", fallback=None)
+        or str(DEADLINE_RESERVE_DEFAULT)
+    )
+
+    try:
+        validated_deadline_reserve = max(
+            DEADLINE_RESERVE_MIN, min(int(raw_deadline_reserve), DEADLINE_RESERVE_MAX)
+        )
+    except (ValueError, TypeError):
+        validated_deadline_reserve = DEADLINE_RESERVE_DEFAULT
+
+    raw_optional_step_min = (
+        os.environ.get("GD_OPTIONAL_STEP_MIN_SECONDS")
+        or config.get("General", "optional_step_min_seconds", fallback=None)
+        or str(OPTIONAL_STEP_MIN_DEFAULT)
+    )
+
+    try:
+        validated_optional_step_min = max(
+            OPTIONAL_STEP_MIN_MIN,
+            min(int(raw_optional_step_min), OPTIONAL_STEP_MIN_MAX),
+        )
+    except (ValueError, TypeError):
+        validated_optional_step_min = OPTIONAL_STEP_MIN_DEFAULT
+
+    raw_nacl_rules = (
+        os.environ.get("GD_NACL_MAX_RULES")
+        or config.get("EC2", "nacl_max_rules", fallback=None)
+        or str(NACL_RULES_DEFAULT)
+    )
+
+    try:
+        validated_nacl_rules = max(
+            NACL_RULES_MIN, min(int(raw_nacl_rules), NACL_RULES_MAX)
+        )
+    except (ValueError, TypeError):
+        validated_nacl_rules = NACL_RULES_DEFAULT
+
+    raw_iam_index_ttl = (
+        os.environ.get("GD_IAM_INDEX_TTL_SECONDS")
+        or config.get("IAM", "iam_index_ttl_seconds", fallback=None)
+        or str(IAM_INDEX_TTL_DEFAULT)
+    )
+
+    try:
+        validated_iam_index_ttl = max(
+            IAM_INDEX_TTL_MIN, min(int(raw_iam_index_ttl), IAM_INDEX_TTL_MAX)
+        )
+    except (ValueError, TypeError):
+        validated_iam_index_ttl = IAM_INDEX_TTL_DEFAULT
+
+    raw_idempotency_window = (
+        os.environ.get("GD_IDEMPOTENCY_WINDOW_SECONDS")
+        or config.get("State", "idempotency_window_seconds", fallback=None)
+        or str(IDEMPOTENCY_WINDOW_DEFAULT)
+    )
+
+    try:
+        validated_idempotency_window = max(
+            IDEMPOTENCY_WINDOW_MIN,
+            min(int(raw_idempotency_window), IDEMPOTENCY_WINDOW_MAX),
+        )
+    except (ValueError, TypeError):
+        validated_idempotency_window = IDEMPOTENCY_WINDOW_DEFAULT
+
+    raw_checkpoint_ttl = (
+        os.environ.get("GD_CHECKPOINT_TTL_SECONDS")
+        or config.get("State", "checkpoint_ttl_seconds", fallback=None)
+        or str(CHECKPOINT_TTL_DEFAULT)
+    )
+
+    try:
+        validated_checkpoint_ttl = max(
+            CHECKPOINT_TTL_MIN, min(int(raw_checkpoint_ttl), CHECKPOINT_TTL_MAX)
+        )
+    except (ValueError, TypeError):
+        validated_checkpoint_ttl = CHECKPOINT_TTL_DEFAULT
+
+    state_backend = (
+        os.environ.get("GD_STATE_BACKEND")
+        or config.get("State", "state_backend", fallback=STATE_BACKEND_DEFAULT)
+    ).lower()
+    if state_backend not in STATE_BACKENDS:
+        state_backend = STATE_BACKEND_DEFAULT
+
     # Helper to parse a list from the config
     def get_list(section, key):
         raw_value = os.environ.get(f"GD_{key.upper()}") or config.get(
             section, key, fallback=""
         )
-        return [line.strip() for line in raw_value.split("\n") if line.strip()]
+        return tuple(line.strip() for line in raw_value.split("\n") if line.strip())
+
+    raw_prime_on_init = os.environ.get("GD_PRIME_ON_INIT")
+    if raw_prime_on_init:
+        prime_on_init = raw_prime_on_init.strip().lower() in ("1", "true", "yes", "on")
+    else:
+        prime_on_init = config.getboolean("General", "prime_on_init", fallback=False)
 
     snapshot_prefix = os.environ.get("GD_SNAPSHOT_DESCRIPTION_PREFIX")
     if not snapshot_prefix:
@@ -104,12 +317,26 @@ def get_config() -> AppConfig:
     # Create the AppConfig object by reading each value safely
     return AppConfig(
         ignored_findings=get_list("General", "ignored_findings"),
+        prime_on_init=prime_on_init,
+        prime_clients=get_list("General", "prime_clients")
+        or ("ec2", "iam", "sns", "ses"),
+        playbook_max_workers=validated_playbook_workers,
+        batch_max_workers=validated_batch_workers,
+        service_max_workers=validated_service_workers,
+        coalesce_window_seconds=validated_coalesce_window,
+        deadline_reserve_seconds=validated_deadline_reserve,
+        optional_step_min_seconds=validated_optional_step_min,
         snapshot_description_prefix=snapshot_prefix,
+        allow_multi_volume_snapshots=os.environ.get("GD_ALLOW_MULTI_VOLUME_SNAPSHOTS")
+        is not None
+        or config.getboolean("EC2", "allow_multi_volume_snapshots", fallback=False),
+        nacl_max_rules=validated_nacl_rules,
         boto_log_level=os.environ.get("GD_BOTO_LOG_LEVEL")
         or config.get("General", "boto_log_level", fallback="WARNING").upper(),
         log_level=os.environ.get("GD_LOG_LEVEL")
         or config.get("General", "log_level", fallback="INFO").upper(),
         cloudtrail_history_max_results=validated_ct_results,
+        cloudtrail_history_window_minutes=validated_ct_window,
         allow_terminate=os.environ.get("GD_ALLOW_TERMINATE") is not None
         or config.getboolean("EC2", "allow_terminate", fallback=True),
         allow_remove_public_access=os.environ.get("GD_REMOVE_PUBLIC_ACCESS") is not None
@@ -124,6 +351,13 @@ def get_config() -> AppConfig:
         or config.get("Notifications", "sns_topic_arn", fallback=None),
         analyze_iam_permissions=os.environ.get("GD_ANALYZE_IAM_PERMISSIONS") is not None
         or config.getboolean("IAM", "analyze_iam_permissions", fallback=True),
+        policy_cache_path=os.environ.get("GD_POLICY_CACHE_PATH")
+        or config.get("IAM", "policy_cache_path", fallback=None)
+        or None,
+        iam_index_ttl_seconds=validated_iam_index_ttl,
+        iam_index_path=os.environ.get("GD_IAM_INDEX_PATH")
+        or config.get("IAM", "iam_index_path", fallback=None)
+        or None,
         allow_s3_public_block=os.environ.get("GD_ALLOW_S3_PUBLIC_BLOCK") is not None
         or config.getboolean("S3", "allow_s3_public_block", fallback=False),
         allow_iam_quarantine=os.environ.get("GD_ALLOW_IAM_QUARANTINE") is not None
@@ -143,4 +377,17 @@ def get_config() -> AppConfig:
         allow_gather_recent_queries=os.environ.get("GD_ALLOW_GATHER_RECENT_QUERIES")
         is not None
         or config.getboolean("Rds", "allow_gather_recent_queries", fallback=False),
+        state_backend=state_backend,
+        state_sqlite_path=os.environ.get("GD_STATE_SQLITE_PATH")
+        or config.get(
+            "State",
+            "state_sqlite_path",
+            fallback="/tmp/guardduty_soar_state.db",
+        ),
+        state_table_name=os.environ.get("GD_STATE_TABLE_NAME")
+        or config.get("State", "state_table_name", fallback=None),
+        state_endpoint_url=os.environ.get("GD_STATE_ENDPOINT_URL")
+        or config.get("State", "state_endpoint_url", fallback=None),
+        idempotency_window_seconds=validated_idempotency_window,
+        checkpoint_ttl_seconds=validated_checkpoint_ttl,
     )
@@ -0,0 +1,352 @@
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from botocore.exceptions import ClientError
+
+from guardduty_soar.checkpoints import CheckpointStore, PlaybookCheckpoint
+from guardduty_soar.deadline import Deadline
+from guardduty_soar.models import GuardDutyEvent
+
+logger = logging.getLogger(__name__)
+
+# The kinds of resources the context caches describe calls for.
+INSTANCES = "instances"
+SECURITY_GROUPS = "security_groups"
+NETWORK_ACLS = "network_acls"
+DB_INSTANCES = "db_instances"
+
+
+class SecurityGroupIndex:
+    """
+    An index of security groups by their ID, filled with batched
+    `describe_security_groups` calls. Every group missing from the index is
+    described by a single call, however many groups are asked for at once.
+
+    An index can be shared by the FindingContexts of every finding in a batch,
+    so that a burst of findings for instances with the same security groups
+    (e.g. a fleet behind one group) describes each group once. As with the
+    FindingContext, concurrent requests for a group share one call, errors are
+    never cached, and groups must be invalidated once they are changed.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Future] = {}
+
+    def describe(
+        self, ec2_client: Any, group_ids: Sequence[str]
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns the security groups, describing the ones that are not indexed
+        yet with one call.
+
+        :param ec2_client: the EC2 client to make the call with on a miss.
+        :param group_ids: the IDs of the security groups.
+        :return: A dictionary of group IDs to their `SecurityGroups` entry.
+        """
+        wanted = list(dict.fromkeys(group_ids))
+        with self._lock:
+            entries = {}
+            owned: Dict[str, Future] = {}
+            for group_id in wanted:
+                entry = self._entries.get(group_id)
+                if entry is None:
+                    entry = owned[group_id] = self._entries[group_id] = Future()
+                entries[group_id] = entry
+
+        if owned:
+            logger.debug(f"Describing security groups: {list(owned)}.")
+            try:
+                response = ec2_client.describe_security_groups(GroupIds=list(owned))
+                found = {
+                    group["GroupId"]: group
+                    for group in response.get("SecurityGroups", [])
+                }
+            except BaseException as e:
+                self._discard(owned)
+                for entry in owned.values():
+                    entry.set_exception(e)
+                raise
+
+            missing = [group_id for group_id in owned if group_id not in found]
+            if missing:
+                self._discard({group_id: owned[group_id] for group_id in missing})
+                error = KeyError(f"Security groups not found: {missing}.")
+                for group_id in missing:
+                    owned[group_id].set_exception(error)
+            for group_id, group in found.items():
+                if group_id in owned:
+                    owned[group_id].set_result(group)
+
+        return {group_id: entries[group_id].result() for group_id in wanted}
+
+    def _discard(self, entries: Dict[str, Future]) -> None:
+        """
+        Drops entries that failed, so the next caller describes them again.
+
+        :meta private:
+        """
+        with self._lock:
+            for group_id, entry in entries.items():
+                if self._entries.get(group_id) is entry:
+                    del self._entries[group_id]
+
+    def invalidate(self, group_id: Optional[Hashable] = None) -> None:
+        """
+        Drops indexed groups, so the next caller describes them again.
+
+        :param group_id: the ID of the security group. If None, every group is
+            dropped.
+        """
+        with self._lock:
+            if group_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(str(group_id), None)
+
+
+class FindingContext:
+    """
+    Holds the describe results for the resources of a single finding, so that
+    every action in a playbook that needs, for example, the instance's metadata
+    shares one `describe_instances` call instead of making its own.
+
+    Results are fetched lazily, the first time an action asks for them. If
+    several actions ask for the same resource at once (e.g. steps running
+    concurrently in a PlaybookExecutor) only one of them calls the API, the
+    others wait for its result. Errors are never cached, so the next caller
+    tries again. Actions that change a resource must call `invalidate` for it
+    afterwards, so that later actions see its new state.
+
+    The cached responses are shared between actions, and must be treated as
+    read only. A context is created by the Engine for every finding, and is
+    never reused across findings.
+
+    The context also carries the invocation's Deadline, so that long running
+    actions can limit themselves to the time that is left, and the
+    CheckpointStore that playbook runs are checkpointed to.
+
+    Security groups are kept in a SecurityGroupIndex, which the batch handler
+    shares between the contexts of every finding in a batch.
+
+    :param event: the GuardDutyEvent the context belongs to.
+    :param deadline: the invocation's Deadline, unlimited if not given.
+    :param checkpoints: the CheckpointStore, if checkpointing is enabled.
+    :param security_groups: the SecurityGroupIndex to share, a new one is used
+        if not given.
+    """
+
+    def __init__(
+        self,
+        event: GuardDutyEvent,
+        deadline: Optional[Deadline] = None,
+        checkpoints: Optional[CheckpointStore] = None,
+        security_groups: Optional[SecurityGroupIndex] = None,
+    ):
+        self.event = event
+        self.deadline = deadline or Deadline()
+        self.checkpoints = checkpoints
+        self.security_groups = security_groups or SecurityGroupIndex()
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, Hashable], Future] = {}
+
+    def checkpoint(self, playbook_name: str) -> Optional[PlaybookCheckpoint]:
+        """
+        Returns the checkpoint of a playbook's run for this finding.
+
+        :param playbook_name: the name of the playbook.
+        :return: A PlaybookCheckpoint, or None if checkpointing is disabled.
+        """
+        if self.checkpoints is None:
+            return None
+        return self.checkpoints.for_playbook(self.event, playbook_name)
+
+    def get_or_fetch(
+        self, kind: str, resource_id: Hashable, fetch: Callable[[], Any]
+    ) -> Any:
+        """
+        Returns the cached result for a resource, calling `fetch` to get it if
+        it is not cached yet.
+
+        :param kind: the kind of resource, e.g. `INSTANCES`.
+        :param resource_id: the identifier of the resource.
+        :param fetch: a callable making the API call, only called on a miss.
+        :return: The result of `fetch`.
+        """
+        key = (kind, resource_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            owner = entry is None
+            if owner:
+                entry = Future()
+                self._entries[key] = entry
+
+        if not owner:
+            logger.debug(f"Reusing cached {kind} for {resource_id}.")
+            return entry.result()
+
+        try:
+            result = fetch()
+        except BaseException as e:
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+            entry.set_exception(e)
+            raise
+
+        entry.set_result(result)
+        return result
+
+    def invalidate(self, kind: str, resource_id: Optional[Hashable] = None) -> None:
+        """
+        Drops cached results, so the next caller fetches the resource again.
+
+        :param kind: the kind of resource, e.g. `INSTANCES`.
+        :param resource_id: the identifier of the resource. If None, every
+            cached resource of that kind is dropped.
+        """
+        with self._lock:
+            for key in list(self._entries):
+                if key[0] == kind and (resource_id is None or key[1] == resource_id):
+                    del self._entries[key]
+        if kind == SECURITY_GROUPS:
+            self.security_groups.invalidate(resource_id)
+        logger.debug(f"Invalidated cached {kind}: {resource_id or 'all'}.")
+
+    def describe_instance(self, ec2_client: Any, instance_id: str) -> Dict[str, Any]:
+        """
+        Returns the `describe_instances` response for a single instance.
+
+        :param ec2_client: the EC2 client to make the call with on a miss.
+        :param instance_id: the ID of the EC2 instance.
+        :return: The raw `describe_instances` response.
+        """
+        return self.get_or_fetch(
+            INSTANCES,
+            instance_id,
+            lambda: ec2_client.describe_instances(InstanceIds=[instance_id]),
+        )
+
+    def describe_security_group(self, ec2_client: Any, group_id: str) -> Dict[str, Any]:
+        """
+        Returns the `describe_security_groups` response for a single group.
+
+        :param ec2_client: the EC2 client to make the call with on a miss.
+        :param group_id: the ID of the security group.
+        :return: The raw `describe_security_groups` response.
+        """
+        return {
+            "SecurityGroups": [
+                self.security_groups.describe(ec2_client, [group_id])[group_id]
+            ]
+        }
+
+    def describe_security_groups(
+        self, ec2_client: Any, group_ids: Sequence[str]
+    ) -> List[Dict[str, Any]]:
+        """
+        Returns several security groups, describing every group that is not
+        cached yet with a single `describe_security_groups` call.
+
+        :param ec2_client: the EC2 client to make the call with on a miss.
+        :param group_ids: the IDs of the security groups.
+        :return: The groups' `SecurityGroups` entries, in the order asked for.
+        """
+        groups = self.security_groups.describe(ec2_client, group_ids)
+        return [groups[group_id] for group_id in dict.fromkeys(group_ids)]
+
+    def describe_subnet_network_acls(
+        self, ec2_client: Any, subnet_id: str
+    ) -> Dict[str, Any]:
+        """
+        Returns the `describe_network_acls` response for the network ACL
+        associated with a subnet.
+
+        :param ec2_client: the EC2 client to make the call with on a miss.
+        :param subnet_id: the ID of the subnet.
+        :return: The raw `describe_network_acls` response.
+        """
+        return self.get_or_fetch(
+            NETWORK_ACLS,
+            subnet_id,
+            lambda: ec2_client.describe_network_acls(
+                Filters=[{"Name": "association.subnet-id", "Values": [subnet_id]}]
+            ),
+        )
+
+    def describe_db_instance(
+        self, rds_client: Any, db_instance_identifier: str
+    ) -> Dict[str, Any]:
+        """
+        Returns the `describe_db_instances` response for a single DB instance.
+
+        :param rds_client: the RDS client to make the call with on a miss.
+        :param db_instance_identifier: the identifier of the DB instance.
+        :return: The raw `describe_db_instances` response.
+        """
+        return self.get_or_fetch(
+            DB_INSTANCES,
+            db_instance_identifier,
+            lambda: rds_client.describe_db_instances(
+                DBInstanceIdentifier=db_instance_identifier
+            ),
+        )
+
+    def describe_db_instances(
+        self, rds_client: Any, db_instance_identifiers: Sequence[str]
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns several DB instances, describing every instance that is not
+        cached yet with a single filtered `describe_db_instances` call. Each
+        instance is cached as if it was described on its own, so later calls to
+        `describe_db_instance` reuse it.
+
+        :param rds_client: the RDS client to make the call with on a miss.
+        :param db_instance_identifiers: the identifiers of the DB instances.
+        :return: The instances' `DBInstances` entries, by identifier. Instances
+            that do not exist are left out.
+        """
+        identifiers = list(dict.fromkeys(db_instance_identifiers))
+        if len(identifiers) == 1:
+            try:
+                response = self.describe_db_instance(rds_client, identifiers[0])
+            except ClientError as e:
+                if e.response["Error"]["Code"] == "DBInstanceNotFound":
+                    return {}
+                raise
+            return {identifiers[0]: response["DBInstances"][0]}
+
+        with self._lock:
+            missing = [i for i in identifiers if (DB_INSTANCES, i) not in self._entries]
+
+        described: Dict[str, Dict[str, Any]] = {}
+        # A filter takes at most 100 values.
+        for start in range(0, len(missing), 100):
+            response = rds_client.describe_db_instances(
+                Filters=[
+                    {"Name": "db-instance-id", "Values": missing[start : start + 100]}
+                ]
+            )
+            for instance in response.get("DBInstances", []):
+                described[instance["DBInstanceIdentifier"]] = instance
+
+        instances: Dict[str, Dict[str, Any]] = {}
+        for identifier in identifiers:
+            if identifier in missing and identifier not in described:
+                continue
+            response = self.get_or_fetch(
+                DB_INSTANCES,
+                identifier,
+                lambda identifier=identifier: (
+                    {"DBInstances": [described[identifier]]}
+                    if identifier in described
+                    # Cached when we looked, but invalidated since.
+                    else rds_client.describe_db_instances(
+                        DBInstanceIdentifier=identifier
+                    )
+                ),
+            )
+            instances[identifier] = response["DBInstances"][0]
+        return instances
@@ -0,0 +1,75 @@
+import logging
+import math
+import time
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Deadline:
+    """
+    Tracks how much of the Lambda invocation's time is left, so that a playbook
+    can skip or cut short work that would otherwise run past the function's
+    timeout. A timed out invocation loses everything, including the completion
+    notification, so part of the remaining time is held back as a reserve that
+    steps are not allowed to spend.
+
+    A Deadline created without a remaining time never runs out, which is used
+    when running outside of Lambda (e.g. in tests).
+
+    :param remaining_ms: the milliseconds left before the invocation times out.
+    :param reserve_seconds: the seconds held back for sending notifications.
+    """
+
+    def __init__(self, remaining_ms: Optional[int] = None, reserve_seconds: float = 0):
+        self.reserve_seconds = reserve_seconds
+        self._expires_at = (
+            None if remaining_ms is None else time.monotonic() + remaining_ms / 1000
+        )
+
+    @classmethod
+    def from_lambda_context(cls, context: Any, reserve_seconds: float) -> "Deadline":
+        """
+        Builds a Deadline from the LambdaContext passed to a handler.
+
+        :param context: the LambdaContext, anything without a
+            `get_remaining_time_in_millis` method gives an unlimited Deadline.
+        :param reserve_seconds: the seconds held back for sending notifications.
+        :return: A Deadline object.
+        """
+        get_remaining = getattr(context, "get_remaining_time_in_millis", None)
+        if not callable(get_remaining):
+            return cls(reserve_seconds=reserve_seconds)
+        return cls(get_remaining(), reserve_seconds)
+
+    def remaining(self) -> float:
+        """
+        :return: The seconds left before the invocation times out, `math.inf`
+            if there is no limit.
+        """
+        if self._expires_at is None:
+            return math.inf
+        return max(0.0, self._expires_at - time.monotonic())
+
+    def budget(self) -> float:
+        """
+        :return: The seconds steps can still spend, which is the remaining time
+            minus the reserve.
+        """
+        return max(0.0, self.remaining() - self.reserve_seconds)
+
+    def allows(self, seconds: float) -> bool:
+        """
+        :param seconds: how long a piece of work is expected to take.
+        :return: True if the budget has at least that many seconds left.
+        """
+        return self.budget() >= seconds
+
+    def cap(self, seconds: float) -> float:
+        """
+        Limits a timeout to the budget that is left.
+
+        :param seconds: the timeout the work would use without a deadline.
+        :return: The smaller of `seconds` and the budget.
+        """
+        return min(seconds, self.budget())
@@ -1,14 +1,19 @@
+import inspect
 import logging
+import math
+import uuid
+from concurrent.futures import Future
 from datetime import datetime
-from typing import List
-
-import boto3
+from typing import Any, Dict, List, Optional, Sequence, Union
 
+from guardduty_soar.coalesce import ResourceCoalescer
 from guardduty_soar.config import AppConfig
+from guardduty_soar.context import FindingContext, SecurityGroupIndex
+from guardduty_soar.deadline import Deadline
 from guardduty_soar.exceptions import PlaybookActionFailedError
+from guardduty_soar.idempotency import LEASE_MARGIN_SECONDS, IdempotencyGuard
 from guardduty_soar.models import ActionResult, GuardDutyEvent
-from guardduty_soar.notifications.manager import NotificationManager
-from guardduty_soar.playbook_registry import get_playbook_instance
+from guardduty_soar.runtime import Runtime, get_runtime
 from guardduty_soar.schemas import map_resource_to_model
 
 logger = logging.getLogger(__name__)
@@ -23,9 +28,27 @@ class Engine:
         event json invocation.
     :param config: the AppConfig object parsed at runtime from
         `gd.cfg` or environment variables.
+    :param runtime: the Runtime holding the session, playbooks and notification
+        managers reused across warm invocations. Defaults to the process-wide one.
+    :param merged_findings: other findings for the same resource that were
+        coalesced into this one. Their playbooks are not run, they are listed in
+        the completion notification instead.
+    :param deadline: the invocation's Deadline. Optional playbook steps are
+        skipped when it runs low, and the notifications are only waited on
+        until the invocation times out. Unlimited if not given.
+    :param security_groups: the SecurityGroupIndex shared by the findings of a
+        batch. Each finding gets its own if not given.
     """
 
-    def __init__(self, event: GuardDutyEvent, config: AppConfig) -> None:
+    def __init__(
+        self,
+        event: GuardDutyEvent,
+        config: AppConfig,
+        runtime: Optional[Runtime] = None,
+        merged_findings: Optional[Sequence[GuardDutyEvent]] = None,
+        deadline: Optional[Deadline] = None,
+        security_groups: Optional[SecurityGroupIndex] = None,
+    ) -> None:
         required_keys = ["Type", "Id", "Description"]
         if not all(key in event for key in required_keys):
             # TODO We only check for these items, as (so far) these are the only items we
@@ -36,11 +59,19 @@ class Engine:
             )
 
         # Store the event in 'self', making the pointer accessible to all class
-        # methods.
+        # methods. The engine is the only object holding per-finding state, the
+        # heavier objects are borrowed from the runtime.
         self.event = event
+        self.merged_findings = list(merged_findings or [])
+        self.deadline = deadline or Deadline()
+        self.security_groups = security_groups
+        # Identifies this run's idempotency claims, so only this run completes
+        # or releases them.
+        self.owner = uuid.uuid4().hex
         self.config = config
-        self.session = boto3.Session()
-        self.notification_manager = NotificationManager(self.session, self.config)
+        self.runtime = runtime or get_runtime()
+        self.session = self.runtime.session
+        self.notification_manager = self.runtime.get_notification_manager(self.config)
 
         logger.debug(f"Initialized with config: {self.config}")
 
@@ -48,27 +79,167 @@ class Engine:
             f"Incoming GuardDuty event with id: '{self.event['Id']}'. Starting processing at: '{datetime.now()}'."
         )
         logger.info(f"Description: '{self.event['Description']}'.")
+        if self.merged_findings:
+            logger.info(
+                f"Coalesced {len(self.merged_findings)} finding(s) for the same resource: "
+                f"{[finding.get('Type') for finding in self.merged_findings]}."
+            )
 
-    def handle_finding(self) -> None:
+    def handle_finding(self) -> bool:
         """
         Handles the lookup and use of the appropriate playbook for the
         GuardDuty finding type.
+
+        :return: True if the finding was handled, False if it was skipped as a
+            repeat of a finding already handled within `idempotency_window_seconds`,
+            or as covered by a finding for the same resource within
+            `coalesce_window_seconds`.
+        """
+        guard = self.runtime.get_idempotency_guard(self.config)
+        # An invocation that died halfway through the playbook (e.g. a timeout)
+        # never completes its claim. Its lease runs out, and the retry that
+        # claims the finding next resumes the run from its checkpoint. While
+        # the lease is live the finding is skipped, so two runs never contain
+        # the same resource at once.
+        if guard is not None and not self._claim(guard, self.event, **self._lease()):
+            return False
+        coalescer = self.runtime.get_coalescer(self.config)
+        if coalescer is not None and not self._claim(coalescer, self.event):
+            # The run covering this finding may still fail, so the finding
+            # must stay claimable for its own re-emissions.
+            if guard is not None:
+                self._release(guard, self.event, owner=self.owner)
+            return False
+        if guard is not None:
+            # Re-emissions of the merged findings are covered by this run too.
+            for merged in self.merged_findings:
+                self._claim(guard, merged, **self._lease())
+
+        # Notifications are delivered in the background, every delivery queued
+        # here is waited on before returning, as Lambda freezes the container as
+        # soon as the invocation returns.
+        notifications: List[Future] = []
+        succeeded = False
+        try:
+            succeeded = self._handle_finding(notifications)
+        finally:
+            # Waiting past the invocation's timeout would only lose the result.
+            remaining = self.deadline.remaining()
+            self.notification_manager.wait(
+                notifications, timeout=remaining if remaining != math.inf else None
+            )
+            if succeeded:
+                if guard is not None:
+                    for finding in [self.event] + self.merged_findings:
+                        self._complete(guard, finding)
+            else:
+                # A failed playbook must be able to run again when GuardDuty
+                # re-emits the finding.
+                if coalescer is not None:
+                    self._release(coalescer, self.event)
+                if guard is not None:
+                    for finding in [self.event] + self.merged_findings:
+                        self._release(guard, finding, owner=self.owner)
+        return True
+
+    def _lease(self) -> Dict[str, Any]:
+        """
+        Builds the arguments of an idempotency claim. The claim is leased for
+        the rest of the invocation, so a retry after a timeout or crash can
+        claim the finding again.
+
+        :meta private:
+        """
+        remaining = self.deadline.remaining()
+        return {
+            "owner": self.owner,
+            "lease_seconds": (
+                remaining + LEASE_MARGIN_SECONDS if remaining != math.inf else None
+            ),
+        }
+
+    def _complete(self, guard: IdempotencyGuard, finding: GuardDutyEvent) -> None:
+        """
+        Marks a finding's claim completed.
+
+        :meta private:
+        """
+        try:
+            guard.complete(finding, owner=self.owner)
+        except Exception as e:
+            logger.warning(f"Failed to complete IdempotencyGuard claim: {e}.")
+
+    def _claim(
+        self,
+        claimant: Union[IdempotencyGuard, ResourceCoalescer],
+        finding: GuardDutyEvent,
+        **kwargs: Any,
+    ) -> bool:
+        """
+        Claims a finding, failing open if the state store is unavailable, as a
+        repeated remediation is better than a missed one.
+
+        :meta private:
+        """
+        try:
+            return claimant.claim(finding, **kwargs)
+        except Exception as e:
+            logger.warning(
+                f"{type(claimant).__name__} check failed, processing finding: {e}."
+            )
+            return True
+
+    def _release(
+        self,
+        claimant: Union[IdempotencyGuard, ResourceCoalescer],
+        finding: GuardDutyEvent,
+        **kwargs: Any,
+    ) -> None:
+        """
+        Releases a finding's claim.
+
+        :meta private:
+        """
+        try:
+            claimant.release(finding, **kwargs)
+        except Exception as e:
+            logger.warning(f"Failed to release {type(claimant).__name__} claim: {e}.")
+
+    def _handle_finding(self, notifications: List[Future]) -> bool:
+        """
+        Runs the playbook and queues its notifications.
+
+        :param notifications: a list that the queued notification futures are
+            added to.
+        :return: True if the playbook ran successfully.
+
+        :meta private:
         """
         playbook = None
         playbook_name = "UnknownPlaybook"
         action_results: List[ActionResult] = []
         enriched_data = None
+        context = FindingContext(
+            self.event,
+            deadline=self.deadline,
+            checkpoints=self.runtime.get_checkpoint_store(self.config),
+            security_groups=self.security_groups,
+        )
 
         logger.info(f"Starting lookup for type: '{self.event['Type']}'.")
         try:
-            playbook = get_playbook_instance(self.event["Type"], self.config)
+            playbook = self.runtime.get_playbook(self.event["Type"], self.config)
             playbook_name = playbook.__class__.__name__
 
-            # Send starting notifications
-            self.notification_manager.send_starting_notification(
+            # Send starting notifications, these are delivered while the
+            # playbook's actions are already running.
+            notifications += self.notification_manager.send_starting_notification(
                 self.event, playbook_name
             )
-            playbook_result = playbook.run(self.event)
+            if "context" in inspect.signature(playbook.run).parameters:
+                playbook_result = playbook.run(self.event, context=context)
+            else:
+                playbook_result = playbook.run(self.event)
             action_results = playbook_result["action_results"]
             enriched_data = playbook_result["enriched_data"]
 
@@ -93,15 +264,23 @@ class Engine:
 
             # This block ONLY handles failures.
             resource_model = map_resource_to_model(self.event.get("Resource", {}))
-            self.notification_manager.send_complete_notification(
+            notifications += self.notification_manager.send_complete_notification(
                 finding=self.event,
                 playbook_name=playbook_name,
                 action_results=action_results,
                 resource=resource_model,
                 enriched_data=enriched_data,
+                merged_findings=self.merged_findings,
             )
+            return False
 
         else:
+            # The playbook completed, a later occurrence of the finding must
+            # run every step again rather than resume from the checkpoint.
+            checkpoint = context.checkpoint(playbook_name)
+            if checkpoint is not None:
+                checkpoint.clear()
+
             # We still need to build the resource model for the notification
             resource_model = map_resource_to_model(
                 self.event.get("Resource", {}),
@@ -110,10 +289,12 @@ class Engine:
                 ),
             )
 
-            self.notification_manager.send_complete_notification(
+            notifications += self.notification_manager.send_complete_notification(
                 finding=self.event,
                 playbook_name=playbook_name,
                 action_results=action_results,
                 resource=resource_model,
                 enriched_data=enriched_data,
+                merged_findings=self.merged_findings,
             )
+            return True
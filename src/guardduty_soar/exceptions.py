@@ -2,3 +2,9 @@ class PlaybookActionFailedError(Exception):
     """Custom exception raised when a step in a playbook fails during execution."""
 
     pass
+
+
+class ConfigurationError(Exception):
+    """Custom exception raised when the application's configuration is invalid."""
+
+    pass
@@ -0,0 +1,218 @@
+import logging
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from guardduty_soar.actions.base import BaseAction
+from guardduty_soar.checkpoints import PlaybookCheckpoint
+from guardduty_soar.deadline import Deadline
+from guardduty_soar.exceptions import PlaybookActionFailedError
+from guardduty_soar.models import ActionResponse, ActionResult, GuardDutyEvent
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PlaybookStep:
+    """
+    A single step of a playbook, declaring which action to run and which steps
+    have to finish before it can start. Steps without dependencies between
+    them are run concurrently by the PlaybookExecutor.
+
+    :param name: the name of the step, reported as the `action_name` of its
+        result (e.g. "TagInstance").
+    :param action: the action instance to execute.
+    :param depends_on: the names of the steps that must finish first.
+    :param kwargs: keyword arguments passed to the action's `execute` method.
+    :param fail_on_error: if True, an "error" status halts the playbook with a
+        PlaybookActionFailedError. Enrichment steps typically set this to False.
+    :param optional: if True, the step is skipped when the invocation is running
+        out of time, and steps that are not optional (e.g. containment) are
+        started first. Enrichment steps typically set this to True.
+    """
+
+    name: str
+    action: BaseAction
+    depends_on: Tuple[str, ...] = ()
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+    fail_on_error: bool = True
+    optional: bool = False
+
+
+class PlaybookExecutor:
+    """
+    Runs a playbook's steps on a bounded thread pool, starting each step as
+    soon as everything it depends on has finished. The playbook then takes as
+    long as its slowest chain of dependent steps, rather than the sum of all of
+    them.
+
+    The behavior matches running the steps one after another: the first step
+    that fails raises a PlaybookActionFailedError, no further steps are started
+    after a failure (steps already running are allowed to finish), and results
+    are returned in the order the steps were declared.
+
+    With a Deadline, optional steps that would start with less than
+    `optional_step_min_seconds` of the time budget left are skipped, so the
+    invocation keeps enough time to finish containment and send its
+    notifications.
+
+    With a PlaybookCheckpoint, every step that completes successfully is
+    checkpointed, and the steps already in the checkpoint (from an earlier,
+    interrupted invocation) are not run again, their saved results are
+    reported instead.
+
+    :param steps: the playbook's steps, in the order their results are reported.
+    :param max_workers: the maximum number of steps to run at the same time.
+    :param deadline: the invocation's Deadline, if any.
+    :param optional_step_min_seconds: the budget an optional step needs to start.
+    :param checkpoint: the PlaybookCheckpoint of this run, if any.
+    """
+
+    def __init__(
+        self,
+        steps: Sequence[PlaybookStep],
+        max_workers: int = 4,
+        deadline: Optional[Deadline] = None,
+        optional_step_min_seconds: float = 0,
+        checkpoint: Optional[PlaybookCheckpoint] = None,
+    ):
+        self.steps = list(steps)
+        self.max_workers = max(1, max_workers)
+        self.deadline = deadline
+        self.optional_step_min_seconds = optional_step_min_seconds
+        self.checkpoint = checkpoint
+        self._validate()
+
+    def _validate(self) -> None:
+        """
+        Ensures step names are unique, and that every dependency exists and is
+        declared before the step that needs it, which also rules out cycles.
+
+        :meta private:
+        """
+        seen: set = set()
+        for step in self.steps:
+            if step.name in seen:
+                raise ValueError(f"Duplicate playbook step: '{step.name}'.")
+            for dependency in step.depends_on:
+                if dependency not in seen:
+                    raise ValueError(
+                        f"Step '{step.name}' depends on '{dependency}', which is not declared before it."
+                    )
+            seen.add(step.name)
+
+    def _should_skip(self, step: PlaybookStep) -> bool:
+        """
+        Checks whether an optional step has to be skipped to stay within the
+        deadline.
+
+        :meta private:
+        """
+        return (
+            step.optional
+            and self.deadline is not None
+            and not self.deadline.allows(self.optional_step_min_seconds)
+        )
+
+    def _run_step(self, step: PlaybookStep, event: GuardDutyEvent) -> ActionResponse:
+        """
+        Executes a single step's action.
+
+        :meta private:
+        """
+        logger.info(f"Starting playbook step: '{step.name}'.")
+        return step.action.execute(event, **step.kwargs)
+
+    def run(self, event: GuardDutyEvent) -> List[ActionResult]:
+        """
+        Runs every step of the playbook against the event.
+
+        :param event: the GuardDutyEvent to pass to every action.
+        :return: A list of ActionResults, in the order the steps were declared.
+        """
+        pending = list(self.steps)
+        running: Dict[Future, PlaybookStep] = {}
+        finished: Dict[str, ActionResponse] = {}
+        failure: Optional[Tuple[PlaybookStep, str]] = None
+        exception: Optional[BaseException] = None
+
+        if self.checkpoint is not None:
+            saved = self.checkpoint.load()
+            finished.update(
+                (step.name, saved[step.name])
+                for step in self.steps
+                if step.name in saved
+            )
+            if finished:
+                logger.info(
+                    f"Resuming playbook from checkpoint, skipping completed step(s): {list(finished)}."
+                )
+                pending = [step for step in pending if step.name not in finished]
+
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="playbook-step"
+        ) as pool:
+            while pending or running:
+                # Skipping a step can make its dependents ready, so we keep
+                # scheduling until nothing else can start.
+                scheduling = failure is None and exception is None
+                while scheduling:
+                    scheduling = False
+                    # Steps that are not optional (e.g. containment) go first.
+                    ready = sorted(
+                        (s for s in pending if set(s.depends_on) <= set(finished)),
+                        key=lambda s: s.optional,
+                    )
+                    for step in ready:
+                        pending.remove(step)
+                        if self._should_skip(step):
+                            details = f"Skipped, only {self.deadline.budget():.1f}s of the invocation's time budget was left."  # type: ignore[union-attr]
+                            logger.warning(f"Playbook step '{step.name}': {details}")
+                            finished[step.name] = {
+                                "status": "skipped",
+                                "details": details,
+                            }
+                            scheduling = True
+                            continue
+                        running[pool.submit(self._run_step, step, event)] = step
+
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    step = running.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        logger.error(f"Action '{step.name}' raised an exception: {e}.")
+                        exception = exception or e
+                        continue
+
+                    if result["status"] == "error" and step.fail_on_error:
+                        logger.error(
+                            f"Action '{step.name}' failed: {result['details']}."
+                        )
+                        failure = failure or (step, result["details"])
+                        continue
+
+                    finished[step.name] = result
+                    if self.checkpoint is not None and result["status"] == "success":
+                        self.checkpoint.save(step.name, result)
+                    logger.info(
+                        f"Playbook step '{step.name}' finished with status '{result['status']}'."
+                    )
+
+        if exception is not None:
+            raise exception
+        if failure is not None:
+            step, details = failure
+            raise PlaybookActionFailedError(
+                f"{step.action.__class__.__name__} failed: {details}."
+            )
+
+        return [
+            {**finished[step.name], "action_name": step.name}
+            for step in self.steps
+            if step.name in finished
+        ]
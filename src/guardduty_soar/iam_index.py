@@ -0,0 +1,317 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from guardduty_soar.config import AppConfig
+from guardduty_soar.deadline import Deadline
+
+logger = logging.getLogger(__name__)
+
+# Only the account's own principals and policies are indexed. AWS managed
+# policies are the same in every account, and there are over a thousand of
+# them, so their documents are left to the PolicyDocumentCache.
+INDEX_FILTERS = ["User", "Role", "LocalManagedPolicy"]
+
+# The fields kept from `get_account_authorization_details`, which match the
+# fields of `get_user` and `get_role`. That API does not return a user's
+# `PasswordLastUsed`, nor a role's `Description` and `MaxSessionDuration`, so
+# the details of an indexed principal do not include them.
+USER_FIELDS = (
+    "Path",
+    "UserName",
+    "UserId",
+    "Arn",
+    "CreateDate",
+    "PermissionsBoundary",
+    "Tags",
+)
+ROLE_FIELDS = (
+    "Path",
+    "RoleName",
+    "RoleId",
+    "Arn",
+    "CreateDate",
+    "AssumeRolePolicyDocument",
+    "PermissionsBoundary",
+    "Tags",
+    "RoleLastUsed",
+)
+# How long to wait before trying again after a failed build, so a missing
+# permission does not cost a bulk pull on every finding.
+RETRY_SECONDS = 300
+# The budget a rebuild needs, a bulk pull of a large account takes several
+# paginated calls. With less time left, lookups miss and actions make their
+# per-principal calls instead.
+BUILD_MIN_SECONDS = 30
+
+
+def _principal(entry: Dict[str, Any], fields: tuple, inline_key: str) -> Dict[str, Any]:
+    """
+    Builds the compact record of a user or role.
+
+    :meta private:
+    """
+    return {
+        "details": {field: entry[field] for field in fields if field in entry},
+        "attached_policies": [
+            {"PolicyName": p["PolicyName"], "PolicyArn": p["PolicyArn"]}
+            for p in entry.get("AttachedManagedPolicies", [])
+        ],
+        "inline_policies": {
+            p["PolicyName"]: p["PolicyDocument"] for p in entry.get(inline_key, [])
+        },
+    }
+
+
+def build_index(iam_client: Any) -> Dict[str, Any]:
+    """
+    Builds a snapshot of the account's IAM authorization details with paginated
+    `get_account_authorization_details` calls.
+
+    :param iam_client: the IAM client to make the calls with.
+    :return: A JSON serializable dictionary of users, roles and customer
+        managed policies (with the document of their default version).
+    """
+    users: Dict[str, Any] = {}
+    roles: Dict[str, Any] = {}
+    policies: Dict[str, Any] = {}
+
+    paginator = iam_client.get_paginator("get_account_authorization_details")
+    for page in paginator.paginate(Filter=INDEX_FILTERS):
+        for user in page.get("UserDetailList", []):
+            users[user["UserName"]] = _principal(user, USER_FIELDS, "UserPolicyList")
+        for role in page.get("RoleDetailList", []):
+            roles[role["RoleName"]] = _principal(role, ROLE_FIELDS, "RolePolicyList")
+        for policy in page.get("Policies", []):
+            default = next(
+                (
+                    v
+                    for v in policy.get("PolicyVersionList", [])
+                    if v["IsDefaultVersion"]
+                ),
+                None,
+            )
+            if default is None:
+                continue
+            policies[policy["Arn"]] = {
+                "PolicyName": policy["PolicyName"],
+                "PolicyId": policy["PolicyId"],
+                "DefaultVersionId": policy["DefaultVersionId"],
+                "Document": default["Document"],
+            }
+
+    # A round trip through JSON, so the snapshot in memory is identical to one
+    # loaded from disk (e.g. datetimes become strings).
+    return json.loads(
+        json.dumps(
+            {
+                "users": users,
+                "roles": roles,
+                "policies": policies,
+            },
+            default=str,
+        )
+    )
+
+
+class IamAuthorizationIndex:
+    """
+    A local index of the account's IAM users, roles and customer managed
+    policies, built by a single bulk pull of `get_account_authorization_details`.
+    Enrichment actions consult it before making per-principal IAM calls, IAM
+    being a global endpoint with a low request rate, so accounts with frequent
+    IAM findings make one bulk pull per `ttl_seconds` instead of several calls
+    per finding. As it may be stale, it is only used to read details, never to
+    choose what a containment action modifies.
+
+    The index is rebuilt once it is older than `ttl_seconds`, and is persisted
+    to a JSON file (e.g. in `/tmp`), so a new container can reuse it while it
+    is still fresh. The index fails open: if it can not be built, lookups miss
+    and actions make their usual calls. Lookups also miss, rather than wait,
+    while another thread rebuilds it or when the invocation has too little time
+    left for a rebuild. A principal that is not in the index (e.g. created
+    since the last pull) is also a miss.
+
+    :param ttl_seconds: how long a snapshot is used before it is rebuilt.
+    :param path: the path of the JSON file to persist the snapshot to, it is
+        only kept in memory if None.
+    """
+
+    def __init__(self, ttl_seconds: int, path: Optional[str] = None):
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        self._lock = threading.Lock()
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._built_at = 0.0
+        self._retry_at = 0.0
+
+    def _is_fresh(self, built_at: float) -> bool:
+        """
+        :meta private:
+        """
+        return time.time() - built_at < self.ttl_seconds
+
+    def _load(self) -> None:
+        """
+        Loads the persisted snapshot, if it is still fresh. Must hold the lock.
+
+        :meta private:
+        """
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                record = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to load IAM index '{self.path}': {e}.")
+            return
+        if self._is_fresh(record.get("built_at", 0)):
+            self._snapshot = record["snapshot"]
+            self._built_at = record["built_at"]
+            logger.info(f"Loaded IAM index from '{self.path}'.")
+
+    def _save(self) -> None:
+        """
+        Persists the snapshot, replacing the file atomically. Must hold the lock.
+
+        :meta private:
+        """
+        if not self.path:
+            return
+        try:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            with tempfile.NamedTemporaryFile(
+                "w", dir=directory, delete=False, suffix=".tmp"
+            ) as f:
+                json.dump({"built_at": self._built_at, "snapshot": self._snapshot}, f)
+            os.replace(f.name, self.path)
+        except OSError as e:
+            logger.warning(f"Failed to persist IAM index '{self.path}': {e}.")
+
+    def snapshot(
+        self, iam_client: Any, deadline: Optional[Deadline] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Returns the current snapshot, rebuilding it if it expired. A rebuild is
+        never waited for: while one is in progress, or when the deadline leaves
+        less than `BUILD_MIN_SECONDS` for it, the lookup misses.
+
+        :param iam_client: the IAM client to rebuild the index with.
+        :param deadline: the invocation's Deadline, unlimited if not given.
+        :return: The snapshot, or None if it is not available.
+        """
+        snapshot = self._snapshot
+        if snapshot is not None and self._is_fresh(self._built_at):
+            return snapshot
+        if not self._lock.acquire(blocking=False):
+            logger.info("The IAM authorization index is being rebuilt, skipping it.")
+            return None
+        try:
+            if self._snapshot is None:
+                self._load()
+            if self._snapshot is not None and self._is_fresh(self._built_at):
+                return self._snapshot
+            if time.time() < self._retry_at:
+                return None
+            if deadline is not None and not deadline.allows(BUILD_MIN_SECONDS):
+                logger.warning(
+                    "Not enough time left to build the IAM authorization index, "
+                    "skipping it."
+                )
+                return None
+
+            logger.info("Building the IAM authorization index.")
+            try:
+                self._snapshot = build_index(iam_client)
+            except Exception as e:
+                logger.warning(f"Failed to build the IAM authorization index: {e}.")
+                self._snapshot = None
+                self._retry_at = time.time() + min(RETRY_SECONDS, self.ttl_seconds)
+                return None
+            self._built_at = time.time()
+            self._save()
+            return self._snapshot
+        finally:
+            self._lock.release()
+
+    def _lookup(
+        self,
+        iam_client: Any,
+        kind: str,
+        name: str,
+        deadline: Optional[Deadline] = None,
+    ) -> Optional[Any]:
+        """
+        :meta private:
+        """
+        snapshot = self.snapshot(iam_client, deadline)
+        if snapshot is None:
+            return None
+        return snapshot[kind].get(name)
+
+    def get_user(
+        self, iam_client: Any, user_name: str, deadline: Optional[Deadline] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        :param iam_client: the IAM client to rebuild the index with.
+        :param user_name: the name of the IAM user.
+        :param deadline: the invocation's Deadline, unlimited if not given.
+        :return: The user's details, attached policies (name and ARN) and inline
+            policies, None on a miss.
+        """
+        return self._lookup(iam_client, "users", user_name, deadline)
+
+    def get_role(
+        self, iam_client: Any, role_name: str, deadline: Optional[Deadline] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        :param iam_client: the IAM client to rebuild the index with.
+        :param role_name: the name of the IAM role.
+        :param deadline: the invocation's Deadline, unlimited if not given.
+        :return: The role's details, attached policies (name and ARN) and inline
+            policies, None on a miss.
+        """
+        return self._lookup(iam_client, "roles", role_name, deadline)
+
+    def get_managed_policy(
+        self, iam_client: Any, policy_arn: str, deadline: Optional[Deadline] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        :param iam_client: the IAM client to rebuild the index with.
+        :param policy_arn: the ARN of a customer managed policy.
+        :param deadline: the invocation's Deadline, unlimited if not given.
+        :return: The policy's name, ID, default version and its document, None
+            on a miss (including every AWS managed policy).
+        """
+        return self._lookup(iam_client, "policies", policy_arn, deadline)
+
+
+@lru_cache(maxsize=None)
+def get_iam_index(
+    ttl_seconds: int, path: Optional[str] = None
+) -> IamAuthorizationIndex:
+    """
+    Returns the process-wide IamAuthorizationIndex, created on first use.
+
+    :param ttl_seconds: how long a snapshot is used before it is rebuilt.
+    :param path: the path of the JSON file to persist the snapshot to.
+    :return: the shared IamAuthorizationIndex object.
+    """
+    return IamAuthorizationIndex(ttl_seconds, path)
+
+
+def get_configured_iam_index(config: AppConfig) -> Optional[IamAuthorizationIndex]:
+    """
+    Returns the process-wide IamAuthorizationIndex for the configuration.
+
+    :param config: the Applications configurations.
+    :return: The IamAuthorizationIndex, or None if `iam_index_ttl_seconds` is 0.
+    """
+    if config.iam_index_ttl_seconds <= 0:
+        return None
+    return get_iam_index(config.iam_index_ttl_seconds, config.iam_index_path)
@@ -0,0 +1,198 @@
+import logging
+import math
+import time
+from typing import Any, Dict, List, Optional
+
+from guardduty_soar.models import GuardDutyEvent
+from guardduty_soar.stores import StateStore
+
+logger = logging.getLogger(__name__)
+
+# The states of a claim.
+IN_PROGRESS = "in_progress"
+COMPLETED = "completed"
+# The default lease of a claim in progress, the longest a Lambda invocation
+# can run for.
+LEASE_SECONDS = 900
+# Added to the invocation's remaining time when leasing a claim, so the lease
+# does not run out while the run that holds it is still finishing.
+LEASE_MARGIN_SECONDS = 30
+
+
+def resource_key(event: GuardDutyEvent) -> str:
+    """
+    Builds a key identifying the resource a finding was reported for, so that
+    different findings about the same resource share it.
+
+    :param event: the GuardDutyEvent.
+    :return: A string key, e.g. "Instance:i-99999999".
+    """
+    resource = event.get("Resource", {})
+    resource_type = resource.get("ResourceType", "Unknown")
+
+    identifiers: List[str] = []
+    if resource_type == "Instance":
+        identifiers = [resource.get("InstanceDetails", {}).get("InstanceId", "")]
+    elif resource_type == "AccessKey":
+        details = resource.get("AccessKeyDetails", {})
+        identifiers = [details.get("PrincipalId") or details.get("UserName", "")]
+    elif resource_type == "S3Bucket":
+        identifiers = [
+            bucket.get("Name", "") for bucket in resource.get("S3BucketDetails", [])
+        ]
+    elif resource_type == "DBInstance":
+        identifiers = [
+            instance.get("DbInstanceIdentifier", "")
+            for instance in resource.get("RdsDbInstanceDetails", [])
+        ]
+
+    resource_id = ",".join(sorted(i for i in identifiers if i)) or "-"
+    return f"{resource_type}:{resource_id}"
+
+
+def finding_key(event: GuardDutyEvent) -> str:
+    """
+    Builds the idempotency key of a finding, from its Id and the resource it
+    was reported for. GuardDuty re-emits a finding with the same Id (and a
+    bumped `Service.Count`) while the activity continues.
+
+    :param event: the GuardDutyEvent.
+    :return: A string key, e.g. "<finding id>#Instance:i-99999999".
+    """
+    return f"{event['Id']}#{resource_key(event)}"
+
+
+class IdempotencyGuard:
+    """
+    Makes sure a finding is only handled once within a time window. The first
+    occurrence of a finding claims its key in the StateStore and runs its
+    playbook. Re-emissions of the same finding within the window are not run
+    again, only the latest `Service.Count` and `UpdatedAt` are recorded against
+    the claim.
+
+    A claim starts `in_progress`, held by its owner for a short lease (about the
+    Lambda timeout), and becomes `completed` for the rest of the window once the
+    playbook succeeded. If the invocation dies before that (e.g. a timeout or a
+    crash), the lease runs out and the next delivery of the finding claims it
+    again, resuming from the playbook's checkpoint if there is one. A finding
+    is only skipped while its claim is completed, or its lease is still live.
+
+    :param store: the StateStore claims are kept in.
+    :param window_seconds: how long a completed claim lasts for.
+    :param lease_seconds: how long an in progress claim lasts for, when the
+        claim does not give its own lease.
+    """
+
+    def __init__(
+        self, store: StateStore, window_seconds: int, lease_seconds: int = LEASE_SECONDS
+    ):
+        self.store = store
+        self.window_seconds = window_seconds
+        self.lease_seconds = lease_seconds
+
+    def claim(
+        self,
+        event: GuardDutyEvent,
+        owner: Optional[str] = None,
+        lease_seconds: Optional[float] = None,
+    ) -> bool:
+        """
+        Claims a finding for processing.
+
+        :param event: the GuardDutyEvent.
+        :param owner: a token identifying the run taking the claim, so that
+            only that run completes or releases it.
+        :param lease_seconds: how long the claim is held without completing,
+            defaults to `lease_seconds`.
+        :return: True if the finding should be processed, False if it is a
+            repeat of a finding already processed within the window, or being
+            processed by another run.
+        """
+        key = finding_key(event)
+        now = time.time()
+        lease = max(1, int(math.ceil(lease_seconds or self.lease_seconds)))
+        record = {
+            "status": IN_PROGRESS,
+            "owner": owner,
+            "first_seen": now,
+            "expires_at": now + lease,
+            "count": event.get("Service", {}).get("Count", 1),
+            "updated_at": event.get("UpdatedAt"),
+        }
+        if self.store.put_if_absent(key, record, lease):
+            logger.debug(f"Claimed finding: '{key}'.")
+            return True
+
+        existing = self.store.get(key)
+        if existing is not None and existing.get("status") == COMPLETED:
+            # The cheap update path, we only record the latest occurrence. The
+            # claim keeps its original expiry, so the window is not extended by
+            # repeats. Claims in progress are left to their owner.
+            remaining = int(existing["expires_at"] - now)
+            if remaining > 0:
+                self.store.put(
+                    key,
+                    {
+                        **existing,
+                        "count": record["count"],
+                        "updated_at": record["updated_at"],
+                    },
+                    remaining,
+                )
+            logger.info(
+                f"Finding '{key}' was already processed, skipping repeat with count: {record['count']}."
+            )
+        else:
+            logger.info(
+                f"Finding '{key}' is being processed by another run, skipping repeat with count: {record['count']}."
+            )
+        return False
+
+    def _owned(self, key: str, owner: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        Returns a claim, if it is held by the owner. A run whose lease ran out
+        may have lost its claim to a retry, which it must not overwrite.
+
+        :meta private:
+        """
+        existing = self.store.get(key)
+        if existing is None or existing.get("owner") != owner:
+            logger.warning(f"Claim of finding '{key}' is no longer held by this run.")
+            return None
+        return existing
+
+    def complete(self, event: GuardDutyEvent, owner: Optional[str] = None) -> None:
+        """
+        Marks a claim completed once the playbook succeeded, so re-emissions
+        are skipped for the rest of the window.
+
+        :param event: the GuardDutyEvent.
+        :param owner: the token the claim was taken with.
+        """
+        key = finding_key(event)
+        existing = self._owned(key, owner)
+        if existing is None:
+            return
+        expires_at = existing["first_seen"] + self.window_seconds
+        remaining = int(expires_at - time.time())
+        if remaining <= 0:
+            self.store.delete(key)
+            return
+        self.store.put(
+            key, {**existing, "status": COMPLETED, "expires_at": expires_at}, remaining
+        )
+        logger.debug(f"Completed finding: '{key}'.")
+
+    def release(self, event: GuardDutyEvent, owner: Optional[str] = None) -> None:
+        """
+        Releases a claim, so the next occurrence of the finding is processed.
+        Used when a playbook fails, so that a re-emission can try again.
+
+        :param event: the GuardDutyEvent.
+        :param owner: the token the claim was taken with.
+        """
+        key = finding_key(event)
+        if self._owned(key, owner) is None:
+            return
+        self.store.delete(key)
+        logger.debug(f"Released finding: '{key}'.")
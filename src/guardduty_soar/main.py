@@ -1,16 +1,26 @@
 import importlib
+import json
 import logging
-import os
-import sys
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 from aws_lambda_powertools.utilities.typing import LambdaContext
 
-from guardduty_soar.config import get_config
+from guardduty_soar.coalesce import coalesce_findings
+from guardduty_soar.config import AppConfig, get_config
+from guardduty_soar.context import SecurityGroupIndex
+from guardduty_soar.deadline import Deadline
 from guardduty_soar.engine import Engine
-from guardduty_soar.exceptions import PlaybookActionFailedError
-from guardduty_soar.models import LambdaEvent, Response
+from guardduty_soar.exceptions import ConfigurationError, PlaybookActionFailedError
+from guardduty_soar.manifest import discover_modules, load_manifest
+from guardduty_soar.models import BatchResponse, GuardDutyEvent, LambdaEvent, Response
+from guardduty_soar.runtime import get_runtime
+from guardduty_soar.scheduler import (
+    PriorityScheduler,
+    ScheduledTask,
+    finding_priority,
+    finding_service,
+)
 
 
 def load_playbooks(package_dir_override: Optional[Path] = None):
@@ -24,32 +34,19 @@ def load_playbooks(package_dir_override: Optional[Path] = None):
 
     def _discover_and_import(root_path: Path, module_prefix: str):
         """
-        Walks a directory and imports all found python modules.
+        Imports all python modules found under a directory.
 
         :param root_path: Path object representing the root path.
         :param module_prefix: String representing the modules prefix location.
 
         :meta private:
         """
-        if not root_path.is_dir():
-            logger.debug(f"Directory not found, skipping: {root_path}")
-            return
-
-        for root, _, files in os.walk(root_path):
-            for filename in files:
-                if filename.endswith(".py") and not filename.startswith("__"):
-                    module_name_parts = [module_prefix]
-                    relative_dir = Path(root).relative_to(root_path)
-                    if str(relative_dir) != ".":
-                        module_name_parts.extend(relative_dir.parts)
-                    module_name_parts.append(Path(filename).stem)
-
-                    module_name = ".".join(module_name_parts)
-                    try:
-                        importlib.import_module(module_name)
-                        logger.debug(f"Successfully imported module: {module_name}")
-                    except ImportError as e:
-                        logger.error(f"Failed to import module {module_name}: {e}")
+        for module_name in discover_modules(root_path, module_prefix):
+            try:
+                importlib.import_module(module_name)
+                logger.debug(f"Successfully imported module: {module_name}")
+            except ImportError as e:
+                logger.error(f"Failed to import module {module_name}: {e}")
 
     # Use the override if provided for testing, otherwise calculate the real path
     package_dir = package_dir_override or Path(__file__).parent
@@ -101,11 +98,18 @@ def setup_logging():
 setup_logging()
 logger = logging.getLogger("main")
 
-# Load playbooks once when the lambda container starts (cold start), speeding up
-# warm invocations later. This may be refactored into part of the engines class.
-# With the idea that we should be able to determine and load only the necessary
-# playbook. Reducing code footprint and loading times.
-load_playbooks()
+# Rather than importing every playbook module when the lambda container starts
+# (cold start), we register the generated manifest and let the registry import
+# only the module that owns the incoming finding type. If the manifest is missing,
+# or out of date with the plugins directory, we fall back to importing everything.
+if not load_manifest():
+    load_playbooks()
+
+# Lambda gives the init phase a full CPU, and it runs before the first finding is
+# delivered. When enabled, we build the playbooks, clients and templates here rather
+# than during the first invocation.
+if get_config().prime_on_init:
+    get_runtime().prime(get_config())
 
 
 def handler(event: LambdaEvent, context: LambdaContext) -> Response:
@@ -116,17 +120,39 @@ def handler(event: LambdaEvent, context: LambdaContext) -> Response:
     :param event: a LambdaEvent object containing the full JSON passed to
         an invoked Lambda function. The GuardDutyEvent object is a nested
         object within this parent object.
-    :param context: not used directly, but is the LambdaContext passed
-        during Lambda function invocation.
+    :param context: the LambdaContext passed during Lambda function invocation,
+        used to budget the playbook against the function's timeout.
     :return: A Response object that is a dictionary with two keys (status and details).
     """
     logger.info("Lambda starting up.")
 
-    try:
-        # Get the singleton config instance we then inject it into
-        # the engine.
-        config = get_config()
+    # Get the singleton config instance we then inject it into
+    # the engine.
+    config = get_config()
+    deadline = Deadline.from_lambda_context(context, config.deadline_reserve_seconds)
+    return process_event(event, config, deadline=deadline)
+
+
+def process_event(
+    event: LambdaEvent,
+    config: AppConfig,
+    merged_findings: Optional[List[GuardDutyEvent]] = None,
+    deadline: Optional[Deadline] = None,
+    security_groups: Optional[SecurityGroupIndex] = None,
+) -> Response:
+    """
+    Processes a single EventBridge GuardDuty event, shared by both handlers.
 
+    :param event: a LambdaEvent object, with the GuardDutyEvent nested in `detail`.
+    :param config: the Applications configurations.
+    :param merged_findings: Optional list of other findings for the same resource,
+        coalesced into this one by the batch handler.
+    :param deadline: Optional Deadline of the invocation, unlimited if not given.
+    :param security_groups: Optional SecurityGroupIndex shared by the findings
+        of a batch.
+    :return: A Response object that is a dictionary with two keys (status and details).
+    """
+    try:
         # Validate finding is not an ignored finding
         if event["detail"]["Type"] in config.ignored_findings:
             logger.info(
@@ -138,18 +164,193 @@ def handler(event: LambdaEvent, context: LambdaContext) -> Response:
             }
 
         # Instantiate the Engine class to parse the event JSON data.
-        engine = Engine(event["detail"], config)
+        engine = Engine(
+            event["detail"],
+            config,
+            merged_findings=merged_findings,
+            deadline=deadline,
+            security_groups=security_groups,
+        )
 
         # Lookup the required playbook based on the GuardDuty event type.
-        engine.handle_finding()
+        if not engine.handle_finding():
+            return {
+                "statusCode": 200,
+                "message": f"GuardDuty finding {event["detail"]["Id"]} was already processed, skipping.",
+            }
 
     except PlaybookActionFailedError as e:
         logger.error(f"A playbook action failed, halting execution: {e}.")
         return {"statusCode": 500, "message": f"Internal playbook error: {e}"}
 
+    except ConfigurationError as e:
+        # Not the finding's fault, it must be retried once the configuration
+        # is fixed rather than dropped as bad input.
+        logger.error(f"Failed to process finding due to invalid configuration: {e}.")
+        return {"statusCode": 500, "message": f"Configuration error: {e}"}
+
     except (ValueError, KeyError) as e:
         logger.error(f"Failed to process finding due to bad input: {e}")
         return {"statusCode": 400, "message": str(e)}
 
     logger.info("Successfully processed GuardDuty finding.")
     return {"statusCode": 200, "message": "GuardDuty finding successfully processed."}
+
+
+def _batch_items(
+    event: Union[Dict[str, Any], List[LambdaEvent]],
+) -> List[Tuple[str, Optional[LambdaEvent]]]:
+    """
+    Normalizes a batch into (item identifier, EventBridge event) pairs. Accepts
+    an SQS batch, whose message bodies are EventBridge events, a list of
+    EventBridge events, or a single EventBridge event.
+
+    :param event: the event the batch handler was invoked with.
+    :return: A list of tuples. The event is None when a message body could not
+        be decoded.
+
+    :meta private:
+    """
+    if isinstance(event, dict) and "Records" in event:
+        items: List[Tuple[str, Optional[LambdaEvent]]] = []
+        for record in event["Records"]:
+            try:
+                items.append((record["messageId"], json.loads(record["body"])))
+            except (KeyError, TypeError, json.JSONDecodeError) as e:
+                logger.error(f"Failed to decode SQS message: {e}.")
+                items.append((record.get("messageId", "unknown"), None))
+        return items
+
+    events = event if isinstance(event, list) else [event]
+    return [
+        (item.get("id") or item.get("detail", {}).get("Id", str(index)), item)
+        for index, item in enumerate(events)
+    ]
+
+
+def _coalesce_batch(
+    items: List[Tuple[str, Optional[LambdaEvent]]], config: AppConfig
+) -> List[List[int]]:
+    """
+    Groups the batch's findings that target the same resource within
+    `coalesce_window_seconds`, see `coalesce_findings`. Items that can not be
+    processed, or are ignored, are never grouped.
+
+    :param items: the batch items, from `_batch_items`.
+    :param config: the Applications configurations.
+    :return: A list of groups of item indexes, the finding to run first.
+
+    :meta private:
+    """
+    groups: List[List[int]] = []
+    candidates: List[int] = []
+    for index, (_, event) in enumerate(items):
+        detail = event.get("detail") if isinstance(event, dict) else None
+        if (
+            not isinstance(detail, dict)
+            or "Id" not in detail
+            or detail.get("Type") in config.ignored_findings
+        ):
+            groups.append([index])
+        else:
+            candidates.append(index)
+
+    for group in coalesce_findings(
+        [items[index][1]["detail"] for index in candidates],  # type: ignore[index]
+        config.coalesce_window_seconds,
+    ):
+        groups.append([candidates[i] for i in group])
+
+    return sorted(groups, key=min)
+
+
+def _process_batch_item(
+    event: Optional[LambdaEvent],
+    config: AppConfig,
+    merged_findings: Optional[List[GuardDutyEvent]] = None,
+    deadline: Optional[Deadline] = None,
+    security_groups: Optional[SecurityGroupIndex] = None,
+) -> Response:
+    """
+    Processes one finding of a batch. Unexpected errors are returned as a 500
+    response rather than raised, so that one finding can not fail the batch.
+
+    :meta private:
+    """
+    if event is None:
+        return {"statusCode": 400, "message": "Message body is not valid JSON."}
+    try:
+        return process_event(event, config, merged_findings, deadline, security_groups)
+    except Exception as e:
+        logger.error(f"Unexpected error processing finding: {e}.", exc_info=True)
+        return {"statusCode": 500, "message": str(e)}
+
+
+def batch_handler(
+    event: Union[Dict[str, Any], List[LambdaEvent]], context: LambdaContext
+) -> BatchResponse:
+    """
+    A lambda handler for batches of findings. Invoked by an SQS event source
+    mapping (with `ReportBatchItemFailures` enabled) or directly with a list of
+    EventBridge events. Findings are processed in parallel, up to the
+    `batch_max_workers` configuration, the most severe (and most in need of
+    containment) first. No more than `service_max_workers` findings for the
+    same AWS service are processed at once.
+
+    Findings that failed with a server side error are reported back, so that
+    SQS only retries those. Findings rejected as bad input (400) are not
+    retried, as they would fail again.
+
+    :param event: an SQS event, a list of LambdaEvents, or a single LambdaEvent.
+    :param context: the LambdaContext passed during Lambda function invocation,
+        every finding of the batch shares its time budget.
+    :return: A BatchResponse listing the identifiers of the failed items.
+    """
+    config = get_config()
+    deadline = Deadline.from_lambda_context(context, config.deadline_reserve_seconds)
+    # Instances across a fleet often share security groups, so every finding of
+    # the batch describes a group at most once.
+    security_groups = SecurityGroupIndex()
+    items = _batch_items(event)
+    logger.info(f"Lambda starting up with a batch of {len(items)} finding(s).")
+
+    # Findings for the same resource only run one playbook, for the most severe
+    # of them, and the others are listed in its notifications.
+    groups = _coalesce_batch(items, config)
+    if len(groups) < len(items):
+        logger.info(
+            f"Coalesced {len(items)} finding(s) into {len(groups)} playbook run(s)."
+        )
+
+    def _process_group(group: List[int]) -> Response:
+        primary, *merged = group
+        return _process_batch_item(
+            items[primary][1],
+            config,
+            [items[index][1]["detail"] for index in merged],  # type: ignore[index]
+            deadline,
+            security_groups,
+        )
+
+    def _task(group: List[int]) -> ScheduledTask:
+        event = items[group[0]][1]
+        detail = event.get("detail") if isinstance(event, dict) else None
+        return ScheduledTask(
+            call=lambda: _process_group(group),
+            priority=finding_priority(detail),
+            service=finding_service(detail),
+        )
+
+    scheduler = PriorityScheduler(config.batch_max_workers, config.service_max_workers)
+    responses = scheduler.run([_task(group) for group in groups])
+
+    # Every finding of a group shares the outcome of its playbook run, so a
+    # failed run is retried for all of them.
+    failures = [
+        {"itemIdentifier": items[index][0]}
+        for group, response in zip(groups, responses)
+        if response["statusCode"] >= 500
+        for index in sorted(group)
+    ]
+    logger.info(f"Processed batch of {len(items)} finding(s), {len(failures)} failed.")
+    return {"batchItemFailures": failures}
@@ -0,0 +1,153 @@
+import json
+import logging
+import os
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from guardduty_soar.playbook_registry import _PLAYBOOK_REGISTRY, register_manifest
+
+logger = logging.getLogger(__name__)
+
+PACKAGE_DIR = Path(__file__).parent
+MANIFEST_PATH = PACKAGE_DIR / "playbook_manifest.json"
+
+
+def discover_modules(root_path: Path, module_prefix: str) -> List[str]:
+    """
+    Walks a directory and returns the dotted module names of every python
+    module found in it. Nothing is imported here, this is used both by
+    `load_playbooks` and when checking the manifest against the plugins
+    directory.
+
+    :param root_path: Path object representing the root path.
+    :param module_prefix: String representing the modules prefix location.
+    :return: A sorted list of dotted module names.
+    """
+    if not root_path.is_dir():
+        logger.debug(f"Directory not found, skipping: {root_path}")
+        return []
+
+    module_names = []
+    for root, _, files in os.walk(root_path):
+        for filename in files:
+            if filename.endswith(".py") and not filename.startswith("__"):
+                module_name_parts = [module_prefix]
+                relative_dir = Path(root).relative_to(root_path)
+                if str(relative_dir) != ".":
+                    module_name_parts.extend(relative_dir.parts)
+                module_name_parts.append(Path(filename).stem)
+                module_names.append(".".join(module_name_parts))
+
+    return sorted(module_names)
+
+
+def discover_plugin_modules(package_dir: Optional[Path] = None) -> List[str]:
+    """
+    Returns the module names of every custom plugin (actions and playbooks)
+    currently present in the plugins directory.
+
+    :param package_dir: Optional path object, mainly used in unit testing.
+    :return: A sorted list of dotted module names.
+    """
+    plugins_dir = (package_dir or PACKAGE_DIR) / "plugins"
+    return sorted(
+        discover_modules(plugins_dir / "actions", "guardduty_soar.plugins.actions")
+        + discover_modules(
+            plugins_dir / "playbooks", "guardduty_soar.plugins.playbooks"
+        )
+    )
+
+
+def build_manifest(package_dir: Optional[Path] = None) -> Dict[str, Any]:
+    """
+    Imports every built-in playbook and plugin module, so that all of the
+    `@register_playbook` decorators run, and then records which module and
+    class owns each finding type. Overrides from plugins are respected, as
+    plugins are imported after the built-in playbooks.
+
+    :param package_dir: Optional path object, mainly used in unit testing.
+    :return: A dictionary with the finding type mapping and the plugin modules
+        the manifest was built from.
+    """
+    # Imported here, as main imports this module to read the manifest at
+    # cold start.
+    from guardduty_soar.main import load_playbooks
+
+    load_playbooks(package_dir_override=package_dir)
+
+    return {
+        "playbooks": {
+            finding_type: f"{playbook_class.__module__}:{playbook_class.__qualname__}"
+            for finding_type, playbook_class in sorted(_PLAYBOOK_REGISTRY.items())
+        },
+        "plugins": discover_plugin_modules(package_dir),
+    }
+
+
+def write_manifest(path: Path = MANIFEST_PATH) -> Dict[str, Any]:
+    """
+    Builds the manifest and writes it to disk as JSON.
+
+    :param path: where to write the manifest, defaults to the packaged location.
+    :return: The manifest that was written.
+    """
+    manifest = build_manifest()
+    path.write_text(json.dumps(manifest, indent=2) + "\n", encoding="utf-8")
+    logger.info(
+        f"Wrote playbook manifest with {len(manifest['playbooks'])} finding types to {path}."
+    )
+    return manifest
+
+
+def read_manifest(path: Path = MANIFEST_PATH) -> Optional[Dict[str, Any]]:
+    """
+    Reads the manifest from disk.
+
+    :param path: where to read the manifest from, defaults to the packaged location.
+    :return: The manifest dictionary, or None if it is missing or unreadable.
+    """
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        logger.warning(f"Playbook manifest not found at {path}.")
+    except (OSError, json.JSONDecodeError) as e:
+        logger.error(f"Failed to read playbook manifest at {path}: {e}.")
+    return None
+
+
+def load_manifest(
+    path: Path = MANIFEST_PATH, package_dir: Optional[Path] = None
+) -> bool:
+    """
+    Registers the manifest with the playbook registry, so that playbook modules
+    are only imported when a finding for them arrives. The manifest is only used
+    if it was built from the same set of plugin modules that are on disk, as a
+    newly dropped-in plugin would otherwise never be discovered.
+
+    :param path: where to read the manifest from, defaults to the packaged location.
+    :param package_dir: Optional path object, mainly used in unit testing.
+    :return: True if the manifest was registered, False if the caller needs to
+        fall back to importing every module.
+    """
+    manifest = read_manifest(path)
+    if not manifest:
+        return False
+
+    plugin_modules = discover_plugin_modules(package_dir)
+    if sorted(manifest.get("plugins", [])) != plugin_modules:
+        logger.warning(
+            "Plugins on disk do not match the playbook manifest. Regenerate it "
+            "with 'python -m guardduty_soar.manifest'."
+        )
+        return False
+
+    register_manifest(manifest.get("playbooks", {}))
+    logger.info(
+        f"Registered playbook manifest with {len(manifest.get('playbooks', {}))} finding types."
+    )
+    return True
+
+
+if __name__ == "__main__":
+    write_manifest(Path(sys.argv[1]) if len(sys.argv) > 1 else MANIFEST_PATH)
@@ -16,6 +16,24 @@ class Response(TypedDict):
     message: str
 
 
+class BatchItemFailure(TypedDict):
+    """
+    A single failed item of a batch, in the format Lambda's SQS event source
+    mapping expects when `ReportBatchItemFailures` is enabled.
+    """
+
+    itemIdentifier: str
+
+
+class BatchResponse(TypedDict):
+    """
+    A model of the batch handler's response. Only the items listed are
+    retried, every other item in the batch is treated as processed.
+    """
+
+    batchItemFailures: List[BatchItemFailure]
+
+
 class GuardDutyEvent(TypedDict):
     """
     A model of the GuardDuty event that is nested within
@@ -38,6 +56,26 @@ class GuardDutyEvent(TypedDict):
     UpdatedAt: str
 
 
+# The GuardDuty severity levels, lowest first, with the lowest numerical
+# severity of each. The levels come from the AWS GuardDuty documentation.
+SEVERITY_LEVELS = (("LOW", 0.0), ("MEDIUM", 4.0), ("HIGH", 7.0), ("CRITICAL", 9.0))
+
+
+def severity_level(severity: float) -> int:
+    """
+    Maps a numerical severity to its position in `SEVERITY_LEVELS`. Every
+    severity belongs to a level, e.g. 8.95 is HIGH.
+
+    :param severity: a float value retrieved from the GuardDuty event.
+    :return: 3 for CRITICAL, 2 for HIGH, 1 for MEDIUM and 0 for LOW.
+    """
+    level = 0
+    for i, (_, lowest) in enumerate(SEVERITY_LEVELS):
+        if severity >= lowest:
+            level = i
+    return level
+
+
 # We declare this model differently because of the improper syntax errors
 # that would be generated for `detail-type`.
 LambdaEvent = TypedDict(
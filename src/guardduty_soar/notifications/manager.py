@@ -1,5 +1,7 @@
 import logging
-from typing import Any, Dict, List, Optional
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Tuple
 
 import boto3
 
@@ -20,6 +22,14 @@ class NotificationManager:
     are calculated. As well as after the payload has finished, usually with much
     more information.
 
+    Delivery happens in the background, so a playbook's containment actions never
+    wait on SES or SNS. Each channel has its own pool of `batch_max_workers`
+    threads, so channels, and the findings of a batch, deliver concurrently.
+    Within a channel a finding's notifications are still delivered in order (a
+    'starting' notification is never delivered after the 'complete' one). The
+    send methods return the futures of the deliveries, which callers must `wait`
+    on before the Lambda invocation returns, as the container is frozen afterwards.
+
     :param session: a Boto3 Session object to make clients with.
     :param config: the Applications configurations.
     """
@@ -32,36 +42,107 @@ class NotificationManager:
         if config.allow_sns:
             self.actions.append(SendSNSNotificationAction(session, config))
 
-    def _dispatch(self, **kwargs):
+        self._channels: Dict[BaseNotificationAction, ThreadPoolExecutor] = {
+            action: ThreadPoolExecutor(
+                max_workers=config.batch_max_workers,
+                thread_name_prefix=f"notify-{type(action).__name__}",
+            )
+            for action in self.actions
+        }
+        # The latest delivery of each finding on each channel, which its next
+        # delivery on that channel waits for.
+        self._latest: Dict[Tuple[BaseNotificationAction, str], Future] = {}
+        self._lock = threading.Lock()
+
+    def _execute(
+        self, action: BaseNotificationAction, previous: Optional[Future], **kwargs
+    ) -> None:
+        """
+        Runs a single notification action, logging rather than raising any error
+        so a failed channel never affects the playbook. It first waits for the
+        finding's previous delivery on the channel. That delivery was queued
+        earlier on the same pool, so it is already running or done.
+
+        :meta private:
+        """
+        if previous is not None:
+            wait([previous])
+        try:
+            action.execute(**kwargs)
+        except Exception as e:
+            logger.error(
+                f"Failed to execute notification action {type(action).__name__}: {e}."
+            )
+
+    def _dispatch(self, finding: GuardDutyEvent, **kwargs) -> List[Future]:
         """
-        Helper method to call execute on all registered actions.
+        Helper method to queue execute on all registered actions, on each
+        action's own channel, after the finding's previous delivery there.
+
+        :param finding: the GuardDutyEvent the notification is for.
+        :return: A list of futures, one per channel.
 
         :meta private:
         """
-        for action in self.actions:
-            try:
-                action.execute(**kwargs)
-            except Exception as e:
-                logger.error(
-                    f"Failed to execute notification action {type(action).__name__}: {e}."
+        futures = []
+        for action, executor in self._channels.items():
+            key = (action, finding.get("Id", ""))
+            with self._lock:
+                future = executor.submit(
+                    self._execute,
+                    action,
+                    self._latest.get(key),
+                    finding=finding,
+                    **kwargs,
                 )
+                self._latest[key] = future
+            future.add_done_callback(lambda done, key=key: self._forget(key, done))
+            futures.append(future)
+        return futures
+
+    def _forget(self, key: Tuple[BaseNotificationAction, str], future: Future) -> None:
+        """
+        Drops a finding's delivery once it is done, unless a later delivery of
+        the finding has been queued since.
+
+        :meta private:
+        """
+        with self._lock:
+            if self._latest.get(key) is future:
+                del self._latest[key]
+
+    def wait(self, futures: List[Future], timeout: Optional[float] = None) -> None:
+        """
+        Blocks until the given notification deliveries have finished.
+
+        :param futures: the futures returned by the send methods.
+        :param timeout: optional maximum number of seconds to wait.
+        """
+        if not futures:
+            return
+        _, not_done = wait(futures, timeout=timeout)
+        if not_done:
+            logger.warning(
+                f"{len(not_done)} notification(s) were still being delivered after {timeout}s."
+            )
 
     def send_starting_notification(
         self, event: GuardDutyEvent, playbook_name: str
-    ) -> None:
+    ) -> List[Future]:
         """
         Sends the initial notification that a playbook has started. With general information
         like the specific playbooks name being ran.
 
         :param event: the GuardDutyEvent JSON object.
         :param playbook_name: the name of the playbook being ran.
+        :return: A list of futures for the deliveries, see `wait`.
         """
         logger.info(
             f"Dispatching 'starting' notifications for playbook {playbook_name}."
         )
 
         resource_model = map_resource_to_model(event.get("Resource", {}))
-        self._dispatch(
+        return self._dispatch(
             finding=event,
             playbook_name=playbook_name,
             template_type="starting",
@@ -76,7 +157,8 @@ class NotificationManager:
         action_results: List[ActionResult],
         resource: BaseResourceDetails,
         enriched_data: Optional[Dict[str, Any]],
-    ) -> None:
+        merged_findings: Optional[List[GuardDutyEvent]] = None,
+    ) -> List[Future]:
         """
         Sends the final, detailed notification when a playbook has finished. This notification
         will consist of much more information than the starting playbook. it will list out actions
@@ -90,7 +172,9 @@ class NotificationManager:
             finding.
         :param enriched_data: Optional dictionary of enriched data, generally pulled from performing
             `describe` level Boto3 calls against the objects.
-
+        :param merged_findings: Optional list of other findings for the same resource,
+            that were coalesced into this playbook run.
+        :return: A list of futures for the deliveries, see `wait`.
         """
         logger.info(
             f"Dispatching 'complete' notifications for playbook {playbook_name}."
@@ -113,7 +197,7 @@ class NotificationManager:
             or "No actions were executed."
         )
 
-        self._dispatch(
+        return self._dispatch(
             finding=finding,
             playbook_name=playbook_name,
             template_type="complete",
@@ -122,4 +206,5 @@ class NotificationManager:
             final_status_emoji=final_status_emoji,
             actions_summary=actions_summary,
             final_status_message=final_status_message,
+            merged_findings=merged_findings or [],
         )
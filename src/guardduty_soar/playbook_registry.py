@@ -1,15 +1,22 @@
+import importlib
 import logging
-from typing import Callable, Dict, Type
-
-import boto3
+from typing import Callable, Dict, List, Optional, Sequence, Type
 
+from guardduty_soar.clients import get_session
 from guardduty_soar.config import AppConfig
-from guardduty_soar.models import GuardDutyEvent, PlaybookResult
+from guardduty_soar.context import FindingContext
+from guardduty_soar.executor import PlaybookExecutor, PlaybookStep
+from guardduty_soar.models import ActionResult, GuardDutyEvent, PlaybookResult
 
 logger = logging.getLogger(__name__)
 
 _PLAYBOOK_REGISTRY: Dict[str, Type["BasePlaybook"]] = {}
 
+# Maps finding types to the "module:ClassName" of the playbook that owns them. This
+# is populated from the generated manifest at cold start, so that only the module
+# needed for the incoming finding has to be imported.
+_PLAYBOOK_MANIFEST: Dict[str, str] = {}
+
 
 def register_playbook(*finding_types: str) -> Callable:
     """
@@ -44,9 +51,10 @@ class BasePlaybook:
     """
 
     def __init__(self, config: AppConfig):
-        # Creates a single session for the playbook.
+        # All playbooks share the process-wide session, rather than each
+        # building their own.
         self.config = config
-        self.session = boto3.Session()
+        self.session = get_session()
 
     def run(self, event: GuardDutyEvent) -> PlaybookResult:
         """
@@ -54,6 +62,10 @@ class BasePlaybook:
         specific order. All classes inherit this method, and provide their
         own set of Actions, based on their GuardDuty finding type.
 
+        Playbooks may also accept an optional `context` argument, in which case
+        the Engine passes them the finding's FindingContext, to share with their
+        actions so that resources are only described once per finding.
+
         :param event: the GuardDutyEvent object passed in with the Lambda event
             json.
         :return: A PlaybookResult object, which is a List[ActionResults] and
@@ -61,15 +73,98 @@ class BasePlaybook:
         """
         raise NotImplementedError
 
+    def _run_steps(
+        self,
+        event: GuardDutyEvent,
+        steps: Sequence[PlaybookStep],
+        context: Optional[FindingContext] = None,
+    ) -> List[ActionResult]:
+        """
+        Runs the playbook's steps with a PlaybookExecutor, so that steps that do
+        not depend on each other run concurrently.
 
-def get_playbook_instance(finding_type: str, config: AppConfig) -> BasePlaybook:
+        :param event: the GuardDutyEvent object passed in with the Lambda event
+            json.
+        :param steps: the PlaybookSteps to run, in the order their results are
+            reported.
+        :param context: the finding's FindingContext, whose Deadline is used to
+            skip optional steps when the invocation is running out of time, and
+            whose CheckpointStore is used to resume an interrupted run.
+        :return: A list of ActionResults, in the order of the steps.
+
+        :meta private:
+        """
+        executor = PlaybookExecutor(
+            steps,
+            max_workers=self.config.playbook_max_workers,
+            deadline=context.deadline if context else None,
+            optional_step_min_seconds=self.config.optional_step_min_seconds,
+            checkpoint=context.checkpoint(type(self).__name__) if context else None,
+        )
+        return executor.run(event)
+
+
+def register_manifest(entries: Dict[str, str]) -> None:
     """
-    Looks up a finding type and returns an 'instance' of the corresponding
-    playbook class.
+    Registers the finding type to playbook mapping produced by
+    `guardduty_soar.manifest`. Any previously registered manifest is replaced.
+
+    :param entries: a dictionary of finding types to "module:ClassName" strings.
+    """
+    _PLAYBOOK_MANIFEST.clear()
+    _PLAYBOOK_MANIFEST.update(entries)
+
+
+def get_playbook_class(finding_type: str) -> Type[BasePlaybook]:
     """
+    Looks up the playbook class for a finding type. If the finding type is
+    in the manifest, only the module that owns it is imported (if it has not
+    been already). Otherwise, we fall back to the registry populated by the
+    `register_playbook` decorators.
+
+    :param finding_type: the GuardDuty finding type.
+    :return: The playbook class registered for the finding type.
+    """
+    if target := _PLAYBOOK_MANIFEST.get(finding_type):
+        module_name, _, class_name = target.partition(":")
+        try:
+            # We resolve the class from its module rather than the registry, as a
+            # built-in module imported later (as a parent class) would otherwise
+            # overwrite a plugin's override of the same finding type.
+            module = importlib.import_module(module_name)
+            return getattr(module, class_name)
+        except (ImportError, AttributeError) as e:
+            logger.error(f"Failed to load playbook '{target}' from manifest: {e}.")
+
     playbook_class = _PLAYBOOK_REGISTRY.get(finding_type)
     if not playbook_class:
         raise ValueError(f"No playbook registered for finding type: {finding_type}.")
+    return playbook_class
+
+
+def get_playbook_name(finding_type: str) -> Optional[str]:
+    """
+    Looks up the name of the playbook that handles a finding type, without
+    importing it.
+
+    :param finding_type: the GuardDuty finding type.
+    :return: The "module:ClassName" of the playbook, None if no playbook is
+        registered for the finding type.
+    """
+    if target := _PLAYBOOK_MANIFEST.get(finding_type):
+        return target
+    playbook_class = _PLAYBOOK_REGISTRY.get(finding_type)
+    if playbook_class is None:
+        return None
+    return f"{playbook_class.__module__}:{playbook_class.__qualname__}"
+
+
+def get_playbook_instance(finding_type: str, config: AppConfig) -> BasePlaybook:
+    """
+    Looks up a finding type and returns an 'instance' of the corresponding
+    playbook class.
+    """
+    playbook_class = get_playbook_class(finding_type)
 
     logger.info(f"Found playbook: '{playbook_class.__name__}'.")
     return playbook_class(config)
@@ -1,6 +1,7 @@
 import logging
-from typing import List
+from typing import List, Optional
 
+from guardduty_soar.context import FindingContext
 from guardduty_soar.exceptions import PlaybookActionFailedError
 from guardduty_soar.models import ActionResult, GuardDutyEvent, PlaybookResult
 from guardduty_soar.playbook_registry import register_playbook
@@ -26,7 +27,10 @@ class EC2BruteForcePlaybook(EC2InstanceCompromisePlaybook):
     :return: Returns a PlaybookResult with completed steps and details.
     """
 
-    def run(self, event: GuardDutyEvent) -> PlaybookResult:
+    def run(
+        self, event: GuardDutyEvent, context: Optional[FindingContext] = None
+    ) -> PlaybookResult:
+        context = context or FindingContext(event)
         enriched_data = None
         results: List[ActionResult] = []
 
@@ -34,7 +38,7 @@ class EC2BruteForcePlaybook(EC2InstanceCompromisePlaybook):
         # The JSON path to ResourceRole: "Service" -> "ResourceRole"
         if event["Service"]["ResourceRole"] == "SOURCE":
             # Our instance is performing the brute force. Assume compromise
-            compromise_workflow_results = super().run(event)
+            compromise_workflow_results = super().run(event, context)
             action_results = compromise_workflow_results["action_results"]
             enriched_data = compromise_workflow_results["enriched_data"]
             return {"action_results": action_results, "enriched_data": enriched_data}
@@ -42,7 +46,9 @@ class EC2BruteForcePlaybook(EC2InstanceCompromisePlaybook):
         # At this point we assume our instance is being targeted by a brute-force
         # attack. So we need to harden the perimeter.
         # Step 2: Tag the instance with identifiers
-        result = self.tag_instance.execute(event, playbook_name=self.__class__.__name__)
+        result = self.tag_instance.execute(
+            event, playbook_name=self.__class__.__name__, context=context
+        )
         if result["status"] == "error":
             # tagging failed
             error_details = result["details"]
@@ -54,14 +60,14 @@ class EC2BruteForcePlaybook(EC2InstanceCompromisePlaybook):
         logger.info("Successfully tagged instance.")
 
         # Step 2: We grab the instances metadata before we modify its setup.
-        result = self.enrich_finding.execute(event, config=self.config)
+        result = self.enrich_finding.execute(event, config=self.config, context=context)
         if result["status"] == "success":
             enriched_data = result["details"]
         results.append({**result, "action_name": "EnrichFinding"})
         logger.info("Successfully performed enrichment step.")
 
         # Step 3: We block the attackers IP address in our Network ACL.
-        result = self.block_ip.execute(event, config=self.config)
+        result = self.block_ip.execute(event, config=self.config, context=context)
         if result["status"] == "error":
             # adding rules failed
             error_details = result["details"]
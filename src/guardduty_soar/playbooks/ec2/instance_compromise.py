@@ -1,8 +1,9 @@
 import logging
-from typing import List
+from typing import Optional
 
-from guardduty_soar.exceptions import PlaybookActionFailedError
-from guardduty_soar.models import ActionResult, GuardDutyEvent, PlaybookResult
+from guardduty_soar.context import FindingContext
+from guardduty_soar.executor import PlaybookStep
+from guardduty_soar.models import GuardDutyEvent, PlaybookResult
 from guardduty_soar.playbook_registry import register_playbook
 from guardduty_soar.playbooks.base.ec2 import EC2BasePlaybook
 
@@ -65,90 +66,91 @@ class EC2InstanceCompromisePlaybook(EC2BasePlaybook):
         steps.
     """
 
-    def run(self, event: GuardDutyEvent) -> PlaybookResult:
+    def run(
+        self, event: GuardDutyEvent, context: Optional[FindingContext] = None
+    ) -> PlaybookResult:
+        context = context or FindingContext(event)
         logger.info(
             f"Executing EC2 Instance Compromise playbook for instance: {event['Resource']['InstanceDetails']['InstanceId']}"
         )
 
-        results: List[ActionResult] = []
-        enriched_data = None
+        steps = [
+            # Step 1: Tag the instance with special tags. Everything else waits
+            # for this, so the instance is marked before we start modifying it.
+            PlaybookStep(
+                "TagInstance",
+                self.tag_instance,
+                kwargs={"playbook_name": self.__class__.__name__, "context": context},
+            ),
+            # Step 2: Isolate the instance with a quarantined SG. Ideally
+            # the security group should not have any inbound/outbound rules, and
+            # all other security groups previously used by the instance are removed.
+            PlaybookStep(
+                "IsolateInstance",
+                self.isolate_instance,
+                depends_on=("TagInstance",),
+                kwargs={"config": self.config, "context": context},
+            ),
+            # Step 3: Attach a deny all policy to the IAM instance profile associated
+            # with the instance. We check if there is an instance profile, if there
+            # isn't we return success and move on.
+            PlaybookStep(
+                "QuarantineInstance",
+                self.quarantine_profile,
+                depends_on=("TagInstance",),
+                kwargs={"config": self.config, "context": context},
+            ),
+            # Step 4: Create snapshots of all attached EBS volumes. Programmatically
+            # checks for number and if any exists and iterates over them all. As we
+            # do not know if/where any malicious activity could be nested in the
+            # volumes. Appropriate tags are added as part of the call to
+            # create_snapshot boto3 command.
+            PlaybookStep(
+                "CreateSnapshot",
+                self.create_snapshots,
+                depends_on=("TagInstance",),
+                kwargs={"config": self.config, "context": context},
+            ),
+            # Step 5: Enrich the GuardDuty finding event with metadata about the
+            # compromised EC2 instance. This data is then passed through to the end-user
+            # via the notification methods coming up. A failure here does not halt
+            # the playbook. This waits for the isolation, so the metadata always
+            # reflects the instance after it was isolated.
+            PlaybookStep(
+                "EnrichFinding",
+                self.enrich_finding,
+                depends_on=("TagInstance", "IsolateInstance"),
+                kwargs={"config": self.config, "context": context},
+                fail_on_error=False,
+                optional=True,
+            ),
+            # Step 6: Terminate the instance, if user has selected for destructive
+            # actions. This has to wait for every other step, in particular the
+            # snapshots of the volumes.
+            PlaybookStep(
+                "TerminateInstance",
+                self.terminate_instance,
+                depends_on=(
+                    "IsolateInstance",
+                    "QuarantineInstance",
+                    "CreateSnapshot",
+                    "EnrichFinding",
+                ),
+                kwargs={"config": self.config, "context": context},
+            ),
+        ]
 
-        # Step 1: Tag the instance with special tags.
-        result = self.tag_instance.execute(event, playbook_name=self.__class__.__name__)
-        if result["status"] == "error":
-            # tagging failed
-            error_details = result["details"]
-            logger.error(f"Action 'tag_instance' failed: {error_details}.")
-            raise PlaybookActionFailedError(
-                f"TagInstanceAction failed: {error_details}."
-            )
-        results.append({**result, "action_name": "TagInstance"})
-        logger.info("Successfully tagged instance.")
-
-        # Step 2: Isolate the instance with a quarantined SG. Ideally
-        # the security group should not have any inbound/outbound rules, and
-        # all other security groups previously used by the instance are removed.
-        result = self.isolate_instance.execute(event, config=self.config)
-        if result["status"] == "error":
-            # Isolation failed
-            error_details = result["details"]
-            logger.error(f"Action 'isolate_instance' failed: {error_details}.")
-            raise PlaybookActionFailedError(
-                f"IsolateInstanceAction failed: {error_details}."
-            )
-        results.append({**result, "action_name": "IsolateInstance"})
-        logger.info("Successfully isolated instance.")
-
-        # Step 3: Attach a deny all policy to the IAM instance profile associated
-        # with the instance. We check if there is an instance profile, if there
-        # isn't we return success and move on.
-        result = self.quarantine_profile.execute(event, config=self.config)
-        if result["status"] == "error":
-            # Quarantine failed
-            error_details = result["details"]
-            logger.error(f"Action 'quarantine_profile' failed: {error_details}.")
-            raise PlaybookActionFailedError(
-                f"QuarantineInstanceProfileAction failed: {error_details}."
-            )
-        results.append({**result, "action_name": "QuarantineInstance"})
-        logger.info("Successfully quarantined instance profile.")
-
-        # Step 4: Create snapshots of all attached EBS volumes. Programmatically
-        # checks for number and if any exists and iterates over them all. As we
-        # do not know if/where any malicious activity could be nested in the
-        # volumes. Appropriate tags are added as part of the call to
-        # create_snapshot boto3 command.
-        result = self.create_snapshots.execute(event, config=self.config)
-        if result["status"] == "error":
-            # Snapshotting failed
-            error_details = result["details"]
-            logger.error(f"Action: 'create_snapshot' failed: {error_details}.")
-            raise PlaybookActionFailedError(
-                f"CreateSnapshotAction failed: {error_details}."
-            )
-        results.append({**result, "action_name": "CreateSnapshot"})
-        logger.info("Successfully took snapshot(s) of instances volumes.")
-
-        # Step 5: Enrich the GuardDuty finding event with metadata about the
-        # compromised EC2 instance. This data is then passed through to the end-user
-        # via the notification methods coming up.
-        result = self.enrich_finding.execute(event, config=self.config)
-        if result["status"] == "success":
-            enriched_data = result["details"]
-        results.append({**result, "action_name": "EnrichFinding"})
-        logger.info("Successfully performed enrichment step.")
-
-        # Step 6: Terminate the instance, if user has selected for destructive actions.
-        result = self.terminate_instance.execute(event, config=self.config)
-        if result["status"] == "error":
-            # Termination failed
-            error_details = result["details"]
-            logger.error(f"Action: 'terminate_instance' failed: {error_details}.")
-            raise PlaybookActionFailedError(
-                f"TerminateInstanceAction failed: {error_details}."
-            )
-        results.append({**result, "action_name": "TerminateInstance"})
-        logger.info("Successfully terminated")
+        # Steps 2 to 5 only depend on the tagging, so they run concurrently.
+        results = self._run_steps(event, steps, context)
+        enriched_data = next(
+            (
+                result["details"]
+                for result in results
+                if result["action_name"] == "EnrichFinding"
+                and result["status"] == "success"
+            ),
+            None,
+        )
 
         logger.info(f"Playbook execution finished for {self.__class__.__name__}.")
 
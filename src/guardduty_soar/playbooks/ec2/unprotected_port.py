@@ -1,6 +1,7 @@
 import logging
-from typing import List
+from typing import List, Optional
 
+from guardduty_soar.context import FindingContext
 from guardduty_soar.exceptions import PlaybookActionFailedError
 from guardduty_soar.models import ActionResult, GuardDutyEvent, PlaybookResult
 from guardduty_soar.playbook_registry import register_playbook
@@ -25,7 +26,10 @@ class EC2UnprotectedPortPlaybook(EC2BasePlaybook):
         steps.
     """
 
-    def run(self, event: GuardDutyEvent) -> PlaybookResult:
+    def run(
+        self, event: GuardDutyEvent, context: Optional[FindingContext] = None
+    ) -> PlaybookResult:
+        context = context or FindingContext(event)
         logger.info(
             f"Executing EC2 Unprotected Port playbook for instance: {event['Resource']['InstanceDetails']['InstanceId']}"
         )
@@ -33,7 +37,9 @@ class EC2UnprotectedPortPlaybook(EC2BasePlaybook):
         enriched_data = None
 
         # Step 1: We tag the instance with special tags.
-        result = self.tag_instance.execute(event, playbook_name=self.__class__.__name__)
+        result = self.tag_instance.execute(
+            event, playbook_name=self.__class__.__name__, context=context
+        )
         if result["status"] == "error":
             # tagging failed
             error_details = result["details"]
@@ -45,7 +51,7 @@ class EC2UnprotectedPortPlaybook(EC2BasePlaybook):
         logger.info("Successfully tagged instance.")
 
         # Step 2: We need to pull details from the instance to create enriched data.
-        result = self.enrich_finding.execute(event, config=self.config)
+        result = self.enrich_finding.execute(event, config=self.config, context=context)
         if result["status"] == "success":
             enriched_data = result["details"]
         results.append({**result, "action_name": "EnrichFinding"})
@@ -53,7 +59,7 @@ class EC2UnprotectedPortPlaybook(EC2BasePlaybook):
 
         # Step 3: We block the malicious IP performing the port probe by adding it
         # to the appropriate ACL. The ACL rules are both incoming/outgoing, "Deny" rules.
-        result = self.block_ip.execute(event, config=self.config)
+        result = self.block_ip.execute(event, config=self.config, context=context)
         if result["status"] == "error":
             # adding rules failed
             error_details = result["details"]
@@ -71,7 +77,7 @@ class EC2UnprotectedPortPlaybook(EC2BasePlaybook):
         # internet by design, you can disable this rule in configurations.
         # Resource:
         # https://docs.aws.amazon.com/guardduty/latest/ug/guardduty_finding-types-ec2.html#recon-ec2-portprobeunprotectedport
-        result = self.remove_rule.execute(event, config=self.config)
+        result = self.remove_rule.execute(event, config=self.config, context=context)
         if result["status"] == "error":
             # Removing rules failed
             error_details = result["details"]
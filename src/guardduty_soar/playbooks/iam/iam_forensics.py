@@ -1,6 +1,7 @@
 import logging
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
+from guardduty_soar.context import FindingContext
 from guardduty_soar.exceptions import PlaybookActionFailedError
 from guardduty_soar.models import ActionResult, GuardDutyEvent, PlaybookResult
 from guardduty_soar.playbook_registry import register_playbook
@@ -47,7 +48,9 @@ class IamForensicsPlaybook(IamBasePlaybook):
         from those steps.
     """
 
-    def run(self, event: GuardDutyEvent) -> PlaybookResult:
+    def run(
+        self, event: GuardDutyEvent, context: Optional[FindingContext] = None
+    ) -> PlaybookResult:
         enriched_data: Dict[str, Any] = {}
         results: List[ActionResult] = []
 
@@ -85,7 +88,9 @@ class IamForensicsPlaybook(IamBasePlaybook):
         # Step 3: Now that we know the principal and have tagged it. We need to
         # request more specific information that is not included in the
         # GuardDuty finding.
-        result = self.get_details.execute(event, principal_details=identity_details)
+        result = self.get_details.execute(
+            event, principal_details=identity_details, context=context
+        )
         if result["status"] == "error":
             # Get details failed
             error_details = result["details"]
@@ -107,7 +112,9 @@ class IamForensicsPlaybook(IamBasePlaybook):
             }
         ]
 
-        result = self.get_history.execute(event, lookup_attributes=lookup_attributes)
+        result = self.get_history.execute(
+            event, lookup_attributes=lookup_attributes, context=context
+        )
         if result["status"] == "error":
             # History retrieval failed
             error_details = result["details"]
@@ -1,6 +1,7 @@
 import logging
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
+from guardduty_soar.context import FindingContext
 from guardduty_soar.exceptions import PlaybookActionFailedError
 from guardduty_soar.models import GuardDutyEvent, PlaybookResult
 from guardduty_soar.playbook_registry import register_playbook
@@ -29,7 +30,9 @@ class S3DataLossPreventionPlaybook(S3CompromisedDiscoveryPlaybook):
         any details from those steps.
     """
 
-    def run(self, event: GuardDutyEvent) -> PlaybookResult:
+    def run(
+        self, event: GuardDutyEvent, context: Optional[FindingContext] = None
+    ) -> PlaybookResult:
         enriched_data: Dict[str, Any] = {}
 
         # Step 1: we run the S3CompromisedDiscoveryPlaybook and ingest its results
@@ -48,7 +51,7 @@ class S3DataLossPreventionPlaybook(S3CompromisedDiscoveryPlaybook):
         ]
 
         history_result = self.get_history.execute(
-            event, lookup_attributes=lookup_attributes
+            event, lookup_attributes=lookup_attributes, context=context
         )
         if history_result["status"] == "error":
             # History lookup failed
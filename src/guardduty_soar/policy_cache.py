@@ -0,0 +1,106 @@
+import logging
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from guardduty_soar.stores import MemoryStateStore, SQLiteStateStore, StateStore
+
+logger = logging.getLogger(__name__)
+
+# A policy version's document never changes, so entries are only dropped when
+# the cache is full. This is only the expiry the stores require.
+POLICY_CACHE_TTL_SECONDS = 30 * 24 * 3600
+POLICY_CACHE_MAX_ENTRIES = 512
+
+
+class PolicyDocumentCache:
+    """
+    A process-wide cache of managed policy documents, keyed by the policy's ARN
+    and version. A policy version is immutable, so a cached document is never
+    stale, and AWS managed policies (the same in every account) are fetched
+    once per container rather than once per finding.
+
+    The key also holds the policy's `PolicyId`, as a customer managed policy
+    that is deleted and created again under the same name reuses the ARN and
+    version IDs, but gets a new `PolicyId`.
+
+    Documents are kept in memory, and optionally in a SQLite file (e.g. in
+    `/tmp`) so that they survive for as long as the container's ephemeral
+    storage does. The cache fails open, errors are logged and treated as a miss.
+
+    :param path: the path of the SQLite file to persist documents to, documents
+        are only kept in memory if None.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self._memory = MemoryStateStore(max_entries=POLICY_CACHE_MAX_ENTRIES)
+        self._persisted: Optional[StateStore] = None
+        if path:
+            try:
+                self._persisted = SQLiteStateStore(path)
+            except Exception as e:
+                logger.warning(f"Failed to open policy cache '{path}': {e}.")
+
+    @staticmethod
+    def _key(policy_arn: str, policy_id: str, version_id: str) -> str:
+        """
+        :meta private:
+        """
+        return f"policy#{policy_arn}#{policy_id}#{version_id}"
+
+    def get(
+        self, policy_arn: str, policy_id: str, version_id: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Returns a cached policy document.
+
+        :param policy_arn: the ARN of the managed policy.
+        :param policy_id: the `PolicyId` of the managed policy.
+        :param version_id: the version of the policy.
+        :return: The policy document, or None if it is not cached.
+        """
+        key = self._key(policy_arn, policy_id, version_id)
+        record = self._memory.get(key)
+        if record is None and self._persisted is not None:
+            try:
+                record = self._persisted.get(key)
+            except Exception as e:
+                logger.warning(f"Failed to read policy cache: {e}.")
+            if record is not None:
+                self._memory.put(key, record, POLICY_CACHE_TTL_SECONDS)
+        return record["document"] if record else None
+
+    def put(
+        self,
+        policy_arn: str,
+        policy_id: str,
+        version_id: str,
+        document: Dict[str, Any],
+    ) -> None:
+        """
+        Caches a policy document.
+
+        :param policy_arn: the ARN of the managed policy.
+        :param policy_id: the `PolicyId` of the managed policy.
+        :param version_id: the version of the policy.
+        :param document: the policy document.
+        """
+        key = self._key(policy_arn, policy_id, version_id)
+        record = {"document": document}
+        self._memory.put(key, record, POLICY_CACHE_TTL_SECONDS)
+        if self._persisted is not None:
+            try:
+                self._persisted.put(key, record, POLICY_CACHE_TTL_SECONDS)
+            except Exception as e:
+                logger.warning(f"Failed to write policy cache: {e}.")
+
+
+@lru_cache(maxsize=None)
+def get_policy_cache(path: Optional[str] = None) -> PolicyDocumentCache:
+    """
+    Returns the process-wide PolicyDocumentCache for a path, created on first use.
+
+    :param path: the path of the SQLite file to persist documents to, None to
+        only keep them in memory.
+    :return: the shared PolicyDocumentCache object.
+    """
+    return PolicyDocumentCache(path)
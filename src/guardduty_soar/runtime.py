@@ -0,0 +1,228 @@
+import logging
+import threading
+import time
+from functools import lru_cache
+from typing import Callable, Dict, Optional, Tuple, Type
+
+import boto3
+from pydantic import ValidationError
+
+from guardduty_soar.actions.notifications.base import get_jinja_env
+from guardduty_soar.checkpoints import CheckpointStore
+from guardduty_soar.clients import get_client_pool, get_session
+from guardduty_soar.coalesce import ResourceCoalescer
+from guardduty_soar.config import AppConfig
+from guardduty_soar.idempotency import IdempotencyGuard
+from guardduty_soar.notifications.manager import NotificationManager
+from guardduty_soar.playbook_registry import BasePlaybook, get_playbook_class
+from guardduty_soar.schemas import RESOURCE_MODEL_MAP
+from guardduty_soar.stores import StateStore, build_state_store
+
+logger = logging.getLogger(__name__)
+
+
+class Runtime:
+    """
+    Holds the objects that are expensive to build (the boto3 session, playbooks
+    with their actions and clients, and notification managers) for the life of
+    the Lambda container, so warm invocations reuse them instead of rebuilding
+    them for every finding.
+
+    Cached objects are keyed by the AppConfig they were built with. AppConfig is
+    a frozen dataclass, so a change in configuration produces a new key rather
+    than reusing stale objects. Nothing cached here holds per-finding state, all
+    of that lives on the Engine, which is still created for every finding.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._playbooks: Dict[Tuple[Type[BasePlaybook], AppConfig], BasePlaybook] = {}
+        self._notification_managers: Dict[AppConfig, NotificationManager] = {}
+        self._state_stores: Dict[AppConfig, Optional[StateStore]] = {}
+
+    @property
+    def session(self) -> boto3.Session:
+        return get_session()
+
+    def get_playbook(self, finding_type: str, config: AppConfig) -> BasePlaybook:
+        """
+        Returns a playbook instance for the finding type, building it on the
+        first finding that needs it and reusing it afterwards. Finding types
+        handled by the same playbook class share a single instance.
+
+        :param finding_type: the GuardDuty finding type.
+        :param config: the Applications configurations.
+        :return: A BasePlaybook instance for the finding type.
+        """
+        playbook_class = get_playbook_class(finding_type)
+        key = (playbook_class, config)
+
+        with self._lock:
+            playbook = self._playbooks.get(key)
+            if playbook is None:
+                logger.info(f"Found playbook: '{playbook_class.__name__}'.")
+                playbook = playbook_class(config)
+                self._playbooks[key] = playbook
+            else:
+                logger.info(f"Reusing warm playbook: '{playbook_class.__name__}'.")
+
+        return playbook
+
+    def get_notification_manager(self, config: AppConfig) -> NotificationManager:
+        """
+        Returns the NotificationManager for the configuration, building it on
+        first use.
+
+        :param config: the Applications configurations.
+        :return: A NotificationManager instance.
+        """
+        with self._lock:
+            manager = self._notification_managers.get(config)
+            if manager is None:
+                manager = NotificationManager(self.session, config)
+                self._notification_managers[config] = manager
+        return manager
+
+    def get_state_store(self, config: AppConfig) -> Optional[StateStore]:
+        """
+        Returns the StateStore selected by `state_backend`, building it on first
+        use. The in-memory store only remembers anything because it is kept
+        here for the life of the container.
+
+        :param config: the Applications configurations.
+        :return: A StateStore, or None if `state_backend` is "none".
+        """
+        with self._lock:
+            if config not in self._state_stores:
+                self._state_stores[config] = build_state_store(self.session, config)
+            return self._state_stores[config]
+
+    def get_idempotency_guard(self, config: AppConfig) -> Optional[IdempotencyGuard]:
+        """
+        Returns an IdempotencyGuard backed by the configured StateStore.
+
+        :param config: the Applications configurations.
+        :return: An IdempotencyGuard, or None if `state_backend` is "none".
+        """
+        store = self.get_state_store(config)
+        if store is None:
+            return None
+        return IdempotencyGuard(store, config.idempotency_window_seconds)
+
+    def get_coalescer(self, config: AppConfig) -> Optional[ResourceCoalescer]:
+        """
+        Returns a ResourceCoalescer backed by the configured StateStore.
+
+        :param config: the Applications configurations.
+        :return: A ResourceCoalescer, or None if `coalesce_window_seconds` is 0
+            or `state_backend` is "none".
+        """
+        if config.coalesce_window_seconds <= 0:
+            return None
+        store = self.get_state_store(config)
+        if store is None:
+            return None
+        return ResourceCoalescer(store, config.coalesce_window_seconds)
+
+    def get_checkpoint_store(self, config: AppConfig) -> Optional[CheckpointStore]:
+        """
+        Returns a CheckpointStore backed by the configured StateStore.
+
+        :param config: the Applications configurations.
+        :return: A CheckpointStore, or None if `checkpoint_ttl_seconds` is 0 or
+            `state_backend` is "none".
+        """
+        if config.checkpoint_ttl_seconds <= 0:
+            return None
+        store = self.get_state_store(config)
+        if store is None:
+            return None
+        return CheckpointStore(store, config.checkpoint_ttl_seconds)
+
+    def prime(self, config: AppConfig) -> Dict[str, float]:
+        """
+        Builds everything the first finding would otherwise build, so that it
+        runs at warm latency. This is intended to be called while the Lambda
+        container initializes, which is controlled by `prime_on_init`. A step
+        that fails is logged and skipped, priming must never stop the function
+        from starting.
+
+        Playbooks are not primed, importing every one of them would undo the
+        lazy loading of the playbook manifest. Each playbook is still built
+        once, by the first finding that needs it.
+
+        :param config: the Applications configurations.
+        :return: A dictionary of each priming step and how long it took, in
+            milliseconds.
+        """
+        steps: Dict[str, Callable[[], None]] = {
+            "session": get_session,
+            "notifications": lambda: self.get_notification_manager(config),
+            "clients": lambda: self._prime_clients(config),
+            "templates": get_jinja_env,
+            "models": self._prime_models,
+        }
+
+        timings: Dict[str, float] = {}
+        for name, step in steps.items():
+            start = time.perf_counter()
+            try:
+                step()
+            except Exception as e:
+                logger.warning(f"Failed to prime {name}, skipping: {e}.")
+            timings[name] = (time.perf_counter() - start) * 1000
+
+        logger.info(
+            f"Runtime primed in {sum(timings.values()):.1f}ms: "
+            + ", ".join(f"{name}={ms:.1f}ms" for name, ms in timings.items())
+        )
+        return timings
+
+    def _prime_clients(self, config: AppConfig) -> None:
+        """
+        Creates a pooled client for every service in `prime_clients`.
+
+        :param config: the Applications configurations.
+
+        :meta private:
+        """
+        pool = get_client_pool()
+        for service_name in config.prime_clients:
+            pool.get_client(self.session, service_name)
+
+    def _prime_models(self) -> None:
+        """
+        Runs validation once for every resource model, so pydantic's first call
+        overhead is not paid by the first finding.
+
+        :meta private:
+        """
+        for resource_type, (model_class, _) in RESOURCE_MODEL_MAP.items():
+            try:
+                model_class(ResourceType=resource_type).model_dump()
+            except ValidationError:
+                # Some models have required fields, failing validation still
+                # warms the validator.
+                pass
+
+    def reset(self) -> None:
+        """
+        Drops every cached object, including the shared boto3 session. The next
+        finding rebuilds them from scratch.
+        """
+        with self._lock:
+            self._playbooks.clear()
+            self._notification_managers.clear()
+            self._state_stores.clear()
+            get_session.cache_clear()
+        logger.info("Runtime caches have been reset.")
+
+
+@lru_cache(maxsize=1)
+def get_runtime() -> Runtime:
+    """
+    Returns the process-wide Runtime, created on first use.
+
+    :return: the shared Runtime object.
+    """
+    return Runtime()
@@ -0,0 +1,151 @@
+import logging
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from guardduty_soar.models import GuardDutyEvent, severity_level
+
+logger = logging.getLogger(__name__)
+
+# The AWS service a finding's playbook mostly calls, by the finding's resource type.
+SERVICE_BY_RESOURCE_TYPE = {
+    "Instance": "ec2",
+    "AccessKey": "iam",
+    "S3Bucket": "s3",
+    "DBInstance": "rds",
+}
+
+# Finding types (the threat purpose before the first ":") that indicate active
+# compromise, and so need containment before anything else of the same severity.
+CONTAINMENT_PURPOSES = (
+    "Backdoor",
+    "CredentialAccess",
+    "CryptoCurrency",
+    "DefenseEvasion",
+    "Execution",
+    "Exfiltration",
+    "Impact",
+    "PrivilegeEscalation",
+    "Trojan",
+    "UnauthorizedAccess",
+)
+
+
+def severity_rank(severity: float) -> int:
+    """
+    Ranks a numerical severity by its GuardDuty severity level, the same level
+    `BaseAction` tags resources with.
+
+    :param severity: a float value retrieved from the GuardDuty event.
+    :return: 3 for CRITICAL, 2 for HIGH, 1 for MEDIUM and 0 for LOW.
+    """
+    return severity_level(severity)
+
+
+def finding_priority(event: Optional[GuardDutyEvent]) -> Tuple[int, int, float]:
+    """
+    Builds the priority of a finding, higher runs first. Findings are ordered
+    by their severity range, then by whether they need containment, then by
+    their exact severity.
+
+    :param event: the GuardDutyEvent, None for items that are not findings.
+    :return: A tuple to compare priorities with.
+    """
+    if not event:
+        return (-1, 0, 0.0)
+    try:
+        severity = float(event.get("Severity", 0))
+    except (TypeError, ValueError):
+        severity = 0.0
+    purpose = str(event.get("Type", "")).split(":", 1)[0]
+    return (severity_rank(severity), int(purpose in CONTAINMENT_PURPOSES), severity)
+
+
+def finding_service(event: Optional[GuardDutyEvent]) -> Optional[str]:
+    """
+    :param event: the GuardDutyEvent, None for items that are not findings.
+    :return: The AWS service the finding's playbook mostly calls, None if it is
+        not known.
+    """
+    if not event:
+        return None
+    return SERVICE_BY_RESOURCE_TYPE.get(
+        event.get("Resource", {}).get("ResourceType", "")
+    )
+
+
+@dataclass
+class ScheduledTask:
+    """
+    A unit of work for the PriorityScheduler.
+
+    :param call: the callable doing the work.
+    :param priority: the task's priority, higher runs first.
+    :param service: the AWS service the task calls, used for the concurrency
+        caps. Tasks without a service are not capped.
+    """
+
+    call: Callable[[], Any]
+    priority: Tuple = ()
+    service: Optional[str] = None
+
+
+class PriorityScheduler:
+    """
+    Runs tasks on a bounded thread pool, always starting the highest priority
+    task that can start next. No more than `service_max_workers` tasks calling
+    the same AWS service run at once, so a burst of low severity findings for
+    one service can not throttle the API calls, or take every worker, that a
+    critical finding's containment needs. A task whose service is at its cap
+    waits, while lower priority tasks for other services go ahead.
+
+    :param max_workers: the maximum number of tasks to run at the same time.
+    :param service_max_workers: the maximum number of tasks per service to run
+        at the same time.
+    """
+
+    def __init__(self, max_workers: int, service_max_workers: int):
+        self.max_workers = max(1, max_workers)
+        self.service_max_workers = max(1, service_max_workers)
+
+    def run(self, tasks: Sequence[ScheduledTask]) -> List[Any]:
+        """
+        Runs every task, and waits for them to finish.
+
+        :param tasks: the tasks to run.
+        :return: The tasks' results, in the order the tasks were given. The
+            first exception raised by a task is raised once every task ended.
+        """
+        # A stable sort, so tasks of equal priority keep their order.
+        pending = sorted(
+            range(len(tasks)), key=lambda index: tasks[index].priority, reverse=True
+        )
+        futures: Dict[int, Future] = {}
+        running: Dict[Future, Optional[str]] = {}
+        per_service: Dict[Optional[str], int] = {}
+
+        with ThreadPoolExecutor(
+            max_workers=min(self.max_workers, max(1, len(tasks))),
+            thread_name_prefix="finding",
+        ) as pool:
+            while pending or running:
+                for index in list(pending):
+                    if len(running) >= self.max_workers:
+                        break
+                    service = tasks[index].service
+                    if (
+                        service is not None
+                        and per_service.get(service, 0) >= self.service_max_workers
+                    ):
+                        continue
+                    per_service[service] = per_service.get(service, 0) + 1
+                    pending.remove(index)
+                    future = pool.submit(tasks[index].call)
+                    futures[index] = future
+                    running[future] = service
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    per_service[running.pop(future)] -= 1
+
+        return [futures[index].result() for index in range(len(tasks))]
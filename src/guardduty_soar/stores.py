@@ -0,0 +1,278 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import boto3
+from botocore.exceptions import ClientError
+
+from guardduty_soar.clients import get_client_pool
+from guardduty_soar.config import AppConfig
+from guardduty_soar.exceptions import ConfigurationError
+
+logger = logging.getLogger(__name__)
+
+# Values stored in a StateStore are JSON serializable dictionaries.
+StateValue = Dict[str, Any]
+
+
+class StateStore(ABC):
+    """
+    Abstract base class for a small key/value store with per-key expiry, used to
+    keep state across findings (and, depending on the backend, across Lambda
+    containers). Expired keys behave exactly like missing keys.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[StateValue]:
+        """
+        Returns the value stored under a key.
+
+        :param key: the key to look up.
+        :return: The stored value, or None if the key is missing or expired.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def put(self, key: str, value: StateValue, ttl_seconds: int) -> None:
+        """
+        Stores a value under a key, replacing any existing value.
+
+        :param key: the key to store the value under.
+        :param value: a JSON serializable dictionary.
+        :param ttl_seconds: how long the value is kept for.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def put_if_absent(self, key: str, value: StateValue, ttl_seconds: int) -> bool:
+        """
+        Atomically stores a value, only if the key is missing or expired.
+
+        :param key: the key to store the value under.
+        :param value: a JSON serializable dictionary.
+        :param ttl_seconds: how long the value is kept for.
+        :return: True if the value was stored, False if the key already existed.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """
+        Removes a key, if it exists.
+
+        :param key: the key to remove.
+        """
+        raise NotImplementedError
+
+
+class MemoryStateStore(StateStore):
+    """
+    A StateStore held in the memory of the current process. It lives as long as
+    the Lambda container does, and is not shared between containers. The least
+    recently used keys are evicted once `max_entries` is reached.
+
+    :param max_entries: the maximum number of keys to keep.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, StateValue]]" = OrderedDict()
+
+    def _get_live(self, key: str) -> Optional[StateValue]:
+        """
+        Returns a key's value if it has not expired, must hold the lock.
+
+        :meta private:
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _set(self, key: str, value: StateValue, ttl_seconds: int) -> None:
+        """
+        Stores a value and evicts the oldest keys, must hold the lock.
+
+        :meta private:
+        """
+        self._entries[key] = (time.time() + ttl_seconds, dict(value))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key: str) -> Optional[StateValue]:
+        with self._lock:
+            value = self._get_live(key)
+            return dict(value) if value is not None else None
+
+    def put(self, key: str, value: StateValue, ttl_seconds: int) -> None:
+        with self._lock:
+            self._set(key, value, ttl_seconds)
+
+    def put_if_absent(self, key: str, value: StateValue, ttl_seconds: int) -> bool:
+        with self._lock:
+            if self._get_live(key) is not None:
+                return False
+            self._set(key, value, ttl_seconds)
+            return True
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class SQLiteStateStore(StateStore):
+    """
+    A StateStore kept in a local SQLite file. In Lambda, pointing this at `/tmp`
+    keeps the state for as long as the container's ephemeral storage survives.
+    Outside of Lambda, it keeps state across process restarts.
+
+    :param path: the path of the SQLite database file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS state "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def get(self, key: str) -> Optional[StateValue]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value FROM state WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, key: str, value: StateValue, ttl_seconds: int) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO state (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time() + ttl_seconds),
+            )
+
+    def put_if_absent(self, key: str, value: StateValue, ttl_seconds: int) -> bool:
+        now = time.time()
+        with self._lock, self._connection:
+            # Expired keys are treated as missing, so they are removed first.
+            self._connection.execute(
+                "DELETE FROM state WHERE key = ? AND expires_at <= ?", (key, now)
+            )
+            cursor = self._connection.execute(
+                "INSERT OR IGNORE INTO state (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), now + ttl_seconds),
+            )
+            return cursor.rowcount == 1
+
+    def delete(self, key: str) -> None:
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM state WHERE key = ?", (key,))
+
+
+class DynamoDBStateStore(StateStore):
+    """
+    A StateStore kept in a DynamoDB table, shared by every Lambda container. The
+    table needs a string partition key named `pk`. Enabling DynamoDB's TTL on
+    the `expires_at` attribute is recommended, so expired items are cleaned up,
+    but expiry is enforced here either way. Any DynamoDB compatible endpoint,
+    such as DynamoDB Local, can be used for testing.
+
+    :param client: a boto3 DynamoDB client.
+    :param table_name: the name of the table.
+    """
+
+    def __init__(self, client: Any, table_name: str):
+        self.client = client
+        self.table_name = table_name
+
+    def get(self, key: str) -> Optional[StateValue]:
+        response = self.client.get_item(
+            TableName=self.table_name, Key={"pk": {"S": key}}, ConsistentRead=True
+        )
+        item = response.get("Item")
+        if not item or float(item["expires_at"]["N"]) <= time.time():
+            return None
+        return json.loads(item["value"]["S"])
+
+    def _item(self, key: str, value: StateValue, ttl_seconds: int) -> Dict[str, Any]:
+        """
+        Builds the DynamoDB item for a key.
+
+        :meta private:
+        """
+        return {
+            "pk": {"S": key},
+            "value": {"S": json.dumps(value)},
+            "expires_at": {"N": str(int(time.time() + ttl_seconds))},
+        }
+
+    def put(self, key: str, value: StateValue, ttl_seconds: int) -> None:
+        self.client.put_item(
+            TableName=self.table_name, Item=self._item(key, value, ttl_seconds)
+        )
+
+    def put_if_absent(self, key: str, value: StateValue, ttl_seconds: int) -> bool:
+        try:
+            self.client.put_item(
+                TableName=self.table_name,
+                Item=self._item(key, value, ttl_seconds),
+                ConditionExpression="attribute_not_exists(pk) OR expires_at <= :now",
+                ExpressionAttributeValues={":now": {"N": str(int(time.time()))}},
+            )
+            return True
+        except ClientError as e:
+            if (
+                e.response.get("Error", {}).get("Code")
+                == "ConditionalCheckFailedException"
+            ):
+                return False
+            raise
+
+    def delete(self, key: str) -> None:
+        self.client.delete_item(TableName=self.table_name, Key={"pk": {"S": key}})
+
+
+def build_state_store(
+    session: boto3.Session, config: AppConfig
+) -> Optional[StateStore]:
+    """
+    Builds the StateStore selected by the `state_backend` configuration.
+
+    :param session: the boto3 Session used to create the DynamoDB client.
+    :param config: the Applications configurations.
+    :return: A StateStore, or None if the backend is "none".
+    :raises ConfigurationError: if the dynamodb backend has no `state_table_name`.
+    """
+    backend = config.state_backend
+    if backend == "memory":
+        return MemoryStateStore()
+    if backend == "sqlite":
+        return SQLiteStateStore(config.state_sqlite_path)
+    if backend == "dynamodb":
+        if not config.state_table_name:
+            raise ConfigurationError(
+                "'state_table_name' is required for the dynamodb backend."
+            )
+        if config.state_endpoint_url:
+            # Custom endpoints (e.g. DynamoDB Local) get their own client, the
+            # shared pool only holds clients for the real endpoints.
+            client = session.client("dynamodb", endpoint_url=config.state_endpoint_url)
+        else:
+            client = get_client_pool().get_client(session, "dynamodb")
+        return DynamoDBStateStore(client, config.state_table_name)
+    return None
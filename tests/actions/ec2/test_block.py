@@ -1,7 +1,9 @@
 import copy
+from unittest.mock import MagicMock
 
 import boto3
 import pytest
+from botocore.exceptions import ClientError
 from botocore.stub import Stubber
 
 from guardduty_soar.actions.ec2.block import BlockMaliciousIpAction
@@ -42,87 +44,67 @@ def network_connection_finding(guardduty_finding_detail):
 # --- Test Cases ---
 
 
+def make_entry(rule_number, cidr_block, egress, rule_action="deny"):
+    return {
+        "RuleNumber": rule_number,
+        "CidrBlock": cidr_block,
+        "Egress": egress,
+        "Protocol": "-1",
+        "RuleAction": rule_action,
+    }
+
+
+def nacl_response(entries):
+    return {"NetworkAcls": [{"NetworkAclId": "nacl-abcdef12", "Entries": entries}]}
+
+
+def created_entries(ec2_client):
+    return sorted(
+        (c.kwargs["Egress"], c.kwargs["RuleNumber"], c.kwargs["CidrBlock"])
+        for c in ec2_client.create_network_acl_entry.call_args_list
+    )
+
+
 def test_block_ip_success_with_port_probe(
     port_probe_finding_multiple_ips, mock_app_config
 ):
     """
-    Tests blocking multiple unique IPs from a single PortProbe finding.
+    Tests blocking multiple unique IPs from a single PortProbe finding. Rules
+    are numbered after the newest existing rule in each direction.
     """
-    ec2_client = boto3.client("ec2")
+    ec2_client = MagicMock()
+    ec2_client.describe_network_acls.return_value = nacl_response(
+        [
+            make_entry(50, "192.0.2.1/32", False),
+            make_entry(50, "192.0.2.1/32", True),
+            make_entry(32767, "0.0.0.0/0", False),
+            make_entry(32767, "0.0.0.0/0", True),
+        ]
+    )
     action = BlockMaliciousIpAction(boto3.Session(), mock_app_config)
     action.ec2_client = ec2_client
-    subnet_id = "subnet-99999999"
 
-    with Stubber(ec2_client) as stubber:
-        # Expect the initial NACL lookup
-        stubber.add_response(
-            "describe_network_acls",
-            {
-                "NetworkAcls": [
-                    {"NetworkAclId": "nacl-abcdef12", "Entries": [{"RuleNumber": 50}]}
-                ]
-            },
-            {"Filters": [{"Name": "association.subnet-id", "Values": [subnet_id]}]},
-        )
+    result = action.execute(port_probe_finding_multiple_ips)
 
-        # Expect rules for the FIRST unique IP (198.51.100.5)
-        stubber.add_response(
-            "create_network_acl_entry",
-            {},
-            {
-                "NetworkAclId": "nacl-abcdef12",
-                "RuleNumber": 51,
-                "Egress": False,
-                "CidrBlock": "198.51.100.5/32",
-                "Protocol": "-1",
-                "RuleAction": "deny",
-            },
-        )
-        stubber.add_response(
-            "create_network_acl_entry",
-            {},
-            {
-                "NetworkAclId": "nacl-abcdef12",
-                "RuleNumber": 52,
-                "Egress": True,
-                "CidrBlock": "198.51.100.5/32",
-                "Protocol": "-1",
-                "RuleAction": "deny",
-            },
-        )
-
-        # Expect rules for the SECOND unique IP (198.51.100.6)
-        stubber.add_response(
-            "create_network_acl_entry",
-            {},
-            {
-                "NetworkAclId": "nacl-abcdef12",
-                "RuleNumber": 53,
-                "Egress": False,
-                "CidrBlock": "198.51.100.6/32",
-                "Protocol": "-1",
-                "RuleAction": "deny",
-            },
-        )
-        stubber.add_response(
-            "create_network_acl_entry",
-            {},
-            {
-                "NetworkAclId": "nacl-abcdef12",
-                "RuleNumber": 54,
-                "Egress": True,
-                "CidrBlock": "198.51.100.6/32",
-                "Protocol": "-1",
-                "RuleAction": "deny",
-            },
-        )
-
-        result = action.execute(port_probe_finding_multiple_ips)
-        assert result["status"] == "success"
-        assert (
-            "Successfully added inbound/outbound deny rules for 2 IP(s)"
-            in result["details"]
-        )
+    assert result["status"] == "success"
+    assert (
+        "Successfully added inbound/outbound deny rules for 2 IP(s)"
+        in result["details"]
+    )
+    ec2_client.describe_network_acls.assert_called_once_with(
+        Filters=[{"Name": "association.subnet-id", "Values": ["subnet-99999999"]}]
+    )
+    assert created_entries(ec2_client) == [
+        (False, 51, "198.51.100.5/32"),
+        (False, 52, "198.51.100.6/32"),
+        (True, 51, "198.51.100.5/32"),
+        (True, 52, "198.51.100.6/32"),
+    ]
+    for c in ec2_client.create_network_acl_entry.call_args_list:
+        assert c.kwargs["NetworkAclId"] == "nacl-abcdef12"
+        assert c.kwargs["Protocol"] == "-1"
+        assert c.kwargs["RuleAction"] == "deny"
+    ec2_client.delete_network_acl_entry.assert_not_called()
 
 
 def test_block_ip_success_with_network_connection(
@@ -131,52 +113,112 @@ def test_block_ip_success_with_network_connection(
     """
     Tests blocking a single IP from a NETWORK_CONNECTION finding.
     """
-    ec2_client = boto3.client("ec2")
+    ec2_client = MagicMock()
+    ec2_client.describe_network_acls.return_value = nacl_response(
+        [make_entry(1, "192.0.2.1/32", False)]
+    )
     action = BlockMaliciousIpAction(boto3.Session(), mock_app_config)
     action.ec2_client = ec2_client
-    subnet_id = "subnet-99999999"
 
-    with Stubber(ec2_client) as stubber:
-        stubber.add_response(
-            "describe_network_acls",
-            {
-                "NetworkAcls": [
-                    {"NetworkAclId": "nacl-abcdef12", "Entries": [{"RuleNumber": 1}]}
-                ]
-            },
-            {"Filters": [{"Name": "association.subnet-id", "Values": [subnet_id]}]},
-        )
-        stubber.add_response(
-            "create_network_acl_entry",
-            {},
-            {
-                "NetworkAclId": "nacl-abcdef12",
-                "RuleNumber": 2,
-                "Egress": False,
-                "CidrBlock": "203.0.113.10/32",
-                "Protocol": "-1",
-                "RuleAction": "deny",
-            },
-        )
-        stubber.add_response(
-            "create_network_acl_entry",
-            {},
-            {
-                "NetworkAclId": "nacl-abcdef12",
-                "RuleNumber": 3,
-                "Egress": True,
-                "CidrBlock": "203.0.113.10/32",
-                "Protocol": "-1",
-                "RuleAction": "deny",
-            },
-        )
+    result = action.execute(network_connection_finding)
 
-        result = action.execute(network_connection_finding)
-        assert result["status"] == "success"
-        assert (
-            "Successfully added inbound/outbound deny rules for 1 IP(s)"
-            in result["details"]
-        )
+    assert result["status"] == "success"
+    assert (
+        "Successfully added inbound/outbound deny rules for 1 IP(s)"
+        in result["details"]
+    )
+    assert created_entries(ec2_client) == [
+        (False, 2, "203.0.113.10/32"),
+        (True, 1, "203.0.113.10/32"),
+    ]
+
+
+def test_block_ip_skips_already_blocked(network_connection_finding, mock_app_config):
+    """
+    Tests that an IP an existing deny rule covers in both directions is not
+    blocked again.
+    """
+    ec2_client = MagicMock()
+    ec2_client.describe_network_acls.return_value = nacl_response(
+        [
+            make_entry(10, "203.0.113.0/24", False),
+            make_entry(10, "203.0.113.10/32", True),
+        ]
+    )
+    action = BlockMaliciousIpAction(boto3.Session(), mock_app_config)
+    action.ec2_client = ec2_client
+
+    result = action.execute(network_connection_finding)
+
+    assert result["status"] == "skipped"
+    assert "already blocked" in result["details"]
+    ec2_client.create_network_acl_entry.assert_not_called()
+
+
+def test_block_ip_evicts_oldest_rules_at_quota(
+    port_probe_finding_multiple_ips, mock_app_config
+):
+    """
+    Tests that when the NACL is at its quota, the oldest SOAR-owned rules are
+    evicted before the new rules are created.
+    """
+    mock_app_config.nacl_max_rules = 4
+    ec2_client = MagicMock()
+    entries = []
+    for egress in (False, True):
+        entries += [
+            make_entry(10, "192.0.2.10/32", egress),
+            make_entry(11, "192.0.2.11/32", egress),
+            make_entry(100, "10.0.0.0/8", egress, rule_action="allow"),
+        ]
+    ec2_client.describe_network_acls.return_value = nacl_response(entries)
+    action = BlockMaliciousIpAction(boto3.Session(), mock_app_config)
+    action.ec2_client = ec2_client
+
+    result = action.execute(port_probe_finding_multiple_ips)
+
+    assert result["status"] == "success"
+    assert "Evicted 2 older rule(s)" in result["details"]
+    deleted = sorted(
+        (c.kwargs["Egress"], c.kwargs["RuleNumber"])
+        for c in ec2_client.delete_network_acl_entry.call_args_list
+    )
+    assert deleted == [(False, 10), (True, 10)]
+    assert created_entries(ec2_client) == [
+        (False, 12, "198.51.100.5/32"),
+        (False, 13, "198.51.100.6/32"),
+        (True, 12, "198.51.100.5/32"),
+        (True, 13, "198.51.100.6/32"),
+    ]
+
+
+def test_block_ip_failed_eviction_creates_nothing(
+    port_probe_finding_multiple_ips, mock_app_config
+):
+    """
+    Tests that no rules are created when an eviction fails, since they would
+    go over the quota.
+    """
+    mock_app_config.nacl_max_rules = 1
+    ec2_client = MagicMock()
+    ec2_client.describe_network_acls.return_value = nacl_response(
+        [
+            make_entry(10, "192.0.2.10/32", False),
+            make_entry(11, "192.0.2.11/32", False),
+        ]
+    )
+    ec2_client.delete_network_acl_entry.side_effect = ClientError(
+        {"Error": {"Code": "UnauthorizedOperation", "Message": "Denied"}},
+        "DeleteNetworkAclEntry",
+    )
+    action = BlockMaliciousIpAction(boto3.Session(), mock_app_config)
+    action.ec2_client = ec2_client
+
+    result = action.execute(port_probe_finding_multiple_ips)
+
+    assert result["status"] == "error"
+    assert "UnauthorizedOperation" in result["details"]
+    ec2_client.create_network_acl_entry.assert_not_called()
 
 
 def test_block_malicious_ip_no_nacl_found(port_probe_finding, mock_app_config):
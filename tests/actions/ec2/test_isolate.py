@@ -3,6 +3,7 @@ from unittest.mock import MagicMock
 
 import boto3
 import pytest
+from botocore.exceptions import ClientError
 from botocore.stub import ANY, Stubber
 
 from guardduty_soar.actions.ec2.isolate import IsolateInstanceAction
@@ -31,6 +32,18 @@ def test_isolate_action_success(finding_with_vpc, mock_app_config):
     ]
     new_sg_id = "sg-newly-created"
 
+    # 0. The VPC has no quarantine security group yet
+    stubber.add_response(
+        "describe_security_groups",
+        {"SecurityGroups": []},
+        {
+            "Filters": [
+                {"Name": "vpc-id", "Values": [vpc_id]},
+                {"Name": "tag:GUARDDUTY-SOAR-QUARANTINE", "Values": ["true"]},
+            ]
+        },
+    )
+
     # 1. Expect the call to create the security group, now including TagSpecifications
     create_sg_params = {
         "GroupName": ANY,
@@ -68,7 +81,7 @@ def test_isolate_action_success(finding_with_vpc, mock_app_config):
         result = action.execute(finding_with_vpc)
 
         assert result["status"] == "success"
-        assert f"applying new security group {new_sg_id}" in result["details"]
+        assert f"applying quarantine security group {new_sg_id}" in result["details"]
 
     stubber.assert_no_pending_responses()
 
@@ -80,6 +93,7 @@ def test_isolate_action_fails_on_create_sg(finding_with_vpc, mock_app_config):
     ec2_client = boto3.client("ec2", region_name="us-east-1")
     stubber = Stubber(ec2_client)
 
+    stubber.add_response("describe_security_groups", {"SecurityGroups": []})
     stubber.add_client_error("create_security_group", "VpcLimitExceeded")
 
     with stubber:
@@ -110,3 +124,58 @@ def test_isolate_action_fails_with_missing_vpc_id(
 
     assert result["status"] == "error"
     assert "No VPC ID found" in result["details"]
+
+
+def test_isolate_action_reuses_quarantine_group(finding_with_vpc, mock_app_config):
+    """
+    Tests that an existing quarantine group is reused, and cached, so that
+    isolating another instance in the VPC only modifies the instance.
+    """
+    ec2_client = MagicMock()
+    ec2_client.describe_security_groups.return_value = {
+        "SecurityGroups": [
+            {"GroupId": "sg-ingress", "IpPermissions": [{"IpProtocol": "-1"}]},
+            {
+                "GroupId": "sg-quarantine",
+                "IpPermissions": [],
+                "IpPermissionsEgress": [],
+            },
+        ]
+    }
+    action = IsolateInstanceAction(MagicMock(), mock_app_config)
+    action.ec2_client = ec2_client
+
+    first = action.execute(finding_with_vpc)
+    second = action.execute(finding_with_vpc)
+
+    assert first["status"] == second["status"] == "success"
+    assert "sg-quarantine" in second["details"]
+    ec2_client.describe_security_groups.assert_called_once()
+    ec2_client.create_security_group.assert_not_called()
+    ec2_client.revoke_security_group_egress.assert_not_called()
+    assert ec2_client.modify_instance_attribute.call_count == 2
+
+
+def test_isolate_action_replaces_deleted_group(finding_with_vpc, mock_app_config):
+    """Tests that a cached group that was deleted is looked up again."""
+    ec2_client = MagicMock()
+    ec2_client.describe_security_groups.side_effect = [
+        {"SecurityGroups": [{"GroupId": "sg-deleted"}]},
+        {"SecurityGroups": [{"GroupId": "sg-replacement"}]},
+    ]
+    ec2_client.modify_instance_attribute.side_effect = [
+        {},
+        ClientError(
+            {"Error": {"Code": "InvalidGroup.NotFound", "Message": "Not found"}},
+            "ModifyInstanceAttribute",
+        ),
+        {},
+    ]
+    action = IsolateInstanceAction(MagicMock(), mock_app_config)
+    action.ec2_client = ec2_client
+
+    action.execute(finding_with_vpc)
+    result = action.execute(finding_with_vpc)
+
+    assert result["status"] == "success"
+    assert "sg-replacement" in result["details"]
@@ -0,0 +1,195 @@
+import pytest
+
+from guardduty_soar.actions.ec2.nacl import NaclEntryChange, NaclRuleAllocator
+
+
+def make_entry(rule_number, cidr_block, egress, rule_action="deny"):
+    return {
+        "RuleNumber": rule_number,
+        "CidrBlock": cidr_block,
+        "Egress": egress,
+        "RuleAction": rule_action,
+    }
+
+
+def both_directions(rule_number, cidr_block, rule_action="deny"):
+    return [
+        make_entry(rule_number, cidr_block, False, rule_action),
+        make_entry(rule_number, cidr_block, True, rule_action),
+    ]
+
+
+def test_plan_numbers_rules_after_newest_soar_rule():
+    """
+    Tests that new rules are numbered after the newest SOAR-owned rule, and
+    that user rules and the default rule are left alone.
+    """
+    entries = (
+        both_directions(5, "192.0.2.5/32")
+        + both_directions(100, "10.0.0.0/8", "allow")
+        + both_directions(32767, "0.0.0.0/0")
+    )
+
+    plan = NaclRuleAllocator(entries, 20).plan(["198.51.100.1", "198.51.100.2"])
+
+    assert plan.creates == [
+        NaclEntryChange(False, 6, "198.51.100.1/32"),
+        NaclEntryChange(False, 7, "198.51.100.2/32"),
+        NaclEntryChange(True, 6, "198.51.100.1/32"),
+        NaclEntryChange(True, 7, "198.51.100.2/32"),
+    ]
+    assert plan.deletes == []
+    assert plan.blocked == ["198.51.100.1", "198.51.100.2"]
+    assert plan.covered == []
+
+
+def test_plan_skips_covered_ips():
+    """
+    Tests that IPs an existing deny rule covers are skipped, per direction.
+    """
+    entries = [
+        make_entry(10, "198.51.100.0/24", False),
+        make_entry(10, "198.51.100.1/32", True),
+        make_entry(11, "198.51.100.2/32", True, "allow"),
+    ]
+
+    plan = NaclRuleAllocator(entries, 20).plan(["198.51.100.1", "198.51.100.2"])
+
+    assert plan.creates == [NaclEntryChange(True, 12, "198.51.100.2/32")]
+    assert plan.blocked == ["198.51.100.2"]
+    assert plan.covered == ["198.51.100.1"]
+
+
+def test_plan_does_not_count_deny_after_allow_as_covered():
+    """
+    Tests that a deny rule only covers an IP when no allow rule matching it
+    comes first, as AWS evaluates rules in ascending order.
+    """
+    entries = (
+        both_directions(100, "0.0.0.0/0", "allow")
+        + both_directions(200, "198.51.100.1/32")
+        + both_directions(32767, "0.0.0.0/0")
+    )
+
+    plan = NaclRuleAllocator(entries, 20).plan(["198.51.100.1"])
+
+    assert plan.covered == []
+    assert plan.blocked == ["198.51.100.1"]
+    assert plan.creates == [
+        NaclEntryChange(False, 1, "198.51.100.1/32"),
+        NaclEntryChange(True, 1, "198.51.100.1/32"),
+    ]
+
+
+def test_plan_does_not_count_protocol_deny_as_covered():
+    """Tests that a deny rule for a single protocol does not cover an IP."""
+    entries = [
+        dict(make_entry(10, "198.51.100.0/24", False), Protocol="6"),
+        make_entry(20, "198.51.100.0/24", False),
+    ]
+
+    plan = NaclRuleAllocator(entries, 20).plan(["198.51.100.1"])
+
+    assert [c.egress for c in plan.creates] == [True]
+
+
+def test_plan_evicts_oldest_soar_rules_at_quota():
+    """
+    Tests that the lowest numbered SOAR-owned rules are evicted first, and
+    that rules for the IPs being blocked or owned by users are never evicted.
+    """
+    entries = [
+        make_entry(3, "192.0.2.3/32", False),
+        make_entry(4, "198.51.100.1/32", True),
+        make_entry(7, "192.0.2.0/24", False),
+        make_entry(8, "192.0.2.8/32", False),
+        make_entry(9, "192.0.2.9/32", False),
+    ]
+
+    plan = NaclRuleAllocator(entries, 4).plan(["198.51.100.1", "198.51.100.2"])
+
+    assert plan.deletes == [NaclEntryChange(False, 3), NaclEntryChange(False, 8)]
+    assert [c for c in plan.creates if not c.egress] == [
+        NaclEntryChange(False, 10, "198.51.100.1/32"),
+        NaclEntryChange(False, 11, "198.51.100.2/32"),
+    ]
+    assert [c for c in plan.creates if c.egress] == [
+        NaclEntryChange(True, 5, "198.51.100.2/32")
+    ]
+    assert plan.dropped == []
+
+
+def test_plan_wraps_rule_numbers_and_evicts_oldest():
+    """
+    Tests that rule numbers wrap around past 99, and that the oldest rule is
+    still the one evicted once they have.
+    """
+    entries = [
+        make_entry(97, "192.0.2.97/32", False),
+        make_entry(98, "192.0.2.98/32", False),
+        make_entry(99, "192.0.2.99/32", False),
+        make_entry(1, "192.0.2.1/32", False),
+    ]
+
+    plan = NaclRuleAllocator(entries, 4).plan(["198.51.100.1"])
+
+    assert plan.deletes == [NaclEntryChange(False, 97)]
+    assert [c for c in plan.creates if not c.egress] == [
+        NaclEntryChange(False, 2, "198.51.100.1/32")
+    ]
+
+
+def test_plan_keeps_evicting_oldest_past_the_wrap():
+    """
+    Tests that single IP findings keep evicting the oldest rule while the rule
+    numbers wrap around more than once.
+    """
+    max_rules = 20
+    entries = both_directions(100, "10.0.0.0/8", "allow")
+    blocked = []
+
+    for i in range(130):
+        ip = f"203.0.113.{i}"
+        plan = NaclRuleAllocator(entries, max_rules).plan([ip])
+        deleted = {(d.egress, d.rule_number) for d in plan.deletes}
+        entries = [
+            e for e in entries if (e["Egress"], e["RuleNumber"]) not in deleted
+        ] + [make_entry(c.rule_number, c.cidr_block, c.egress) for c in plan.creates]
+        blocked = (blocked + [ip])[-(max_rules - 1) :]
+
+        for egress in (False, True):
+            denied = {
+                e["CidrBlock"]
+                for e in entries
+                if e["Egress"] == egress and e["RuleAction"] == "deny"
+            }
+            assert denied == {f"{b}/32" for b in blocked}
+
+
+def test_plan_drops_ips_that_do_not_fit():
+    """
+    Tests that IPs are dropped when there are no SOAR-owned rules left to evict.
+    """
+    entries = both_directions(100, "10.0.0.0/8", "allow") + both_directions(
+        101, "172.16.0.0/12", "allow"
+    )
+
+    plan = NaclRuleAllocator(entries, 3).plan(["198.51.100.1", "198.51.100.2"])
+
+    assert [c.cidr_block for c in plan.creates] == [
+        "198.51.100.1/32",
+        "198.51.100.1/32",
+    ]
+    assert plan.blocked == ["198.51.100.1"]
+    assert plan.dropped == ["198.51.100.2"]
+    assert plan.covered == []
+
+
+def test_plan_rejects_invalid_ips():
+    """
+    Tests that an invalid IP address raises a ValueError.
+    """
+    with pytest.raises(ValueError):
+        NaclRuleAllocator([make_entry(1, "192.0.2.1/32", False)], 20).plan(
+            ["not-an-ip"]
+        )
@@ -168,3 +168,43 @@ def test_quarantine_fails_on_attach_policy_error(finding_with_profile, mock_app_
 
     ec2_stubber.assert_no_pending_responses()
     iam_stubber.assert_no_pending_responses()
+
+
+def test_quarantine_action_ignores_iam_index(finding_with_profile, mock_app_config):
+    """
+    Tests that the role is looked up live even when the IAM index is enabled,
+    as the index may be stale.
+    """
+    mock_app_config.iam_index_ttl_seconds = 3600
+    ec2_client = MagicMock()
+    ec2_client.describe_instances.return_value = {
+        "Reservations": [
+            {
+                "Instances": [
+                    {
+                        "IamInstanceProfile": {
+                            "Arn": "arn:aws:iam::123456789012:instance-profile/test-instance-profile",
+                        }
+                    }
+                ]
+            }
+        ]
+    }
+    iam_client = MagicMock()
+    iam_client.get_instance_profile.return_value = {
+        "InstanceProfile": {"Roles": [{"RoleName": "live-role"}]}
+    }
+    action = QuarantineInstanceProfileAction(MagicMock(), mock_app_config)
+    action.ec2_client = ec2_client
+    action.iam_client = iam_client
+
+    result = action.execute(finding_with_profile)
+
+    assert result["status"] == "success"
+    iam_client.get_instance_profile.assert_called_once_with(
+        InstanceProfileName="test-instance-profile"
+    )
+    iam_client.attach_role_policy.assert_called_once_with(
+        RoleName="live-role", PolicyArn=mock_app_config.iam_deny_all_policy_arn
+    )
+    iam_client.get_paginator.assert_not_called()
@@ -1,6 +1,8 @@
 from unittest.mock import MagicMock
 
 import boto3
+import pytest
+from botocore.exceptions import ClientError
 from botocore.stub import Stubber
 
 from guardduty_soar.actions.ec2.remove import RemovePublicAccessAction
@@ -185,3 +187,103 @@ def test_remove_public_access_disabled_by_config(
     assert result["status"] == "skipped"
     assert "disabled in config" in result["details"]
     mock_session.client_assert_not_called()
+
+
+def test_remove_public_access_batches_security_groups(
+    guardduty_finding_detail, mock_app_config
+):
+    """
+    Tests that every attached security group is described with one call, and
+    that only the groups with public rules are revoked.
+    """
+    mock_app_config.allow_remove_public_access = True
+    public_rule = {
+        "IpProtocol": "tcp",
+        "FromPort": 22,
+        "ToPort": 22,
+        "IpRanges": [{"CidrIp": "0.0.0.0/0"}],
+    }
+    private_rule = {
+        "IpProtocol": "tcp",
+        "FromPort": 80,
+        "ToPort": 80,
+        "IpRanges": [{"CidrIp": "10.0.0.0/16"}],
+    }
+    ec2_client = MagicMock()
+    ec2_client.describe_instances.return_value = {
+        "Reservations": [
+            {
+                "Instances": [
+                    {
+                        "SecurityGroups": [
+                            {"GroupId": "sg-1"},
+                            {"GroupId": "sg-2"},
+                            {"GroupId": "sg-3"},
+                        ]
+                    }
+                ]
+            }
+        ]
+    }
+    ec2_client.describe_security_groups.return_value = {
+        "SecurityGroups": [
+            {"GroupId": "sg-1", "IpPermissions": [public_rule]},
+            {"GroupId": "sg-2", "IpPermissions": [private_rule]},
+            {"GroupId": "sg-3", "IpPermissions": [public_rule, private_rule]},
+        ]
+    }
+    action = RemovePublicAccessAction(MagicMock(), mock_app_config)
+    action.ec2_client = ec2_client
+
+    result = action.execute(guardduty_finding_detail)
+
+    assert result["status"] == "success"
+    ec2_client.describe_security_groups.assert_called_once_with(
+        GroupIds=["sg-1", "sg-2", "sg-3"]
+    )
+    revoked = {
+        c.kwargs["GroupId"]: c.kwargs["IpPermissions"]
+        for c in ec2_client.revoke_security_group_ingress.call_args_list
+    }
+    assert revoked == {"sg-1": [public_rule], "sg-3": [public_rule]}
+    assert "Removed 1 public rule(s) from sg-1." in result["details"]
+    assert "Removed 1 public rule(s) from sg-3." in result["details"]
+
+
+@pytest.mark.parametrize(
+    "error_code, expected_status",
+    [("InvalidPermission.NotFound", "success"), ("UnauthorizedOperation", "error")],
+    ids=["already_revoked", "failed"],
+)
+def test_remove_public_access_revoke_errors(
+    error_code, expected_status, guardduty_finding_detail, mock_app_config
+):
+    """
+    Tests that rules another finding already revoked are not an error, while
+    other revoke failures are.
+    """
+    mock_app_config.allow_remove_public_access = True
+    ec2_client = MagicMock()
+    ec2_client.describe_instances.return_value = {
+        "Reservations": [{"Instances": [{"SecurityGroups": [{"GroupId": "sg-1"}]}]}]
+    }
+    ec2_client.describe_security_groups.return_value = {
+        "SecurityGroups": [
+            {
+                "GroupId": "sg-1",
+                "IpPermissions": [
+                    {"IpProtocol": "-1", "IpRanges": [{"CidrIp": "0.0.0.0/0"}]}
+                ],
+            }
+        ]
+    }
+    ec2_client.revoke_security_group_ingress.side_effect = ClientError(
+        {"Error": {"Code": error_code, "Message": "Error"}},
+        "RevokeSecurityGroupIngress",
+    )
+    action = RemovePublicAccessAction(MagicMock(), mock_app_config)
+    action.ec2_client = ec2_client
+
+    result = action.execute(guardduty_finding_detail)
+
+    assert result["status"] == expected_status
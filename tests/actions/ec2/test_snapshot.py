@@ -2,6 +2,7 @@ from unittest.mock import MagicMock
 
 import boto3
 import pytest
+from botocore.exceptions import ClientError
 from botocore.stub import ANY, Stubber
 
 from guardduty_soar.actions.ec2.snapshot import CreateSnapshotAction
@@ -166,3 +167,90 @@ def test_snapshot_action_partial_failure(guardduty_finding_detail, mock_app_conf
         assert "Failed for volumes: ['vol-2222']" in result["details"]
 
     stubber.assert_no_pending_responses()
+
+
+def _describe_two_volumes():
+    """Builds a describe_instances response with two attached volumes."""
+    return {
+        "Reservations": [
+            {
+                "Instances": [
+                    {
+                        "BlockDeviceMappings": [
+                            {"Ebs": {"VolumeId": "vol-1111"}},
+                            {"Ebs": {"VolumeId": "vol-2222"}},
+                        ]
+                    }
+                ]
+            }
+        ]
+    }
+
+
+def test_snapshot_action_multi_volume(guardduty_finding_detail, mock_app_config):
+    """
+    Tests that every volume is snapshotted with a single create_snapshots call
+    when multi-volume snapshots are enabled.
+    """
+    mock_app_config.allow_multi_volume_snapshots = True
+    ec2_client = boto3.client("ec2", region_name="us-east-1")
+    stubber = Stubber(ec2_client)
+    instance_id = guardduty_finding_detail["Resource"]["InstanceDetails"]["InstanceId"]
+
+    stubber.add_response(
+        "describe_instances", _describe_two_volumes(), {"InstanceIds": [instance_id]}
+    )
+    stubber.add_response(
+        "create_snapshots",
+        {
+            "Snapshots": [
+                {"SnapshotId": "snap-1111", "VolumeId": "vol-1111"},
+                {"SnapshotId": "snap-2222", "VolumeId": "vol-2222"},
+            ]
+        },
+        {
+            "InstanceSpecification": {"InstanceId": instance_id},
+            "Description": ANY,
+            "TagSpecifications": ANY,
+        },
+    )
+
+    with stubber:
+        mock_session = MagicMock()
+        mock_session.client.return_value = ec2_client
+
+        action = CreateSnapshotAction(mock_session, mock_app_config)
+        result = action.execute(guardduty_finding_detail)
+
+        assert result["status"] == "success"
+        assert "vol-1111" in result["details"] and "vol-2222" in result["details"]
+
+    stubber.assert_no_pending_responses()
+
+
+def test_snapshot_action_multi_volume_falls_back(
+    guardduty_finding_detail, mock_app_config
+):
+    """
+    Tests that a failed create_snapshots call falls back to one snapshot per
+    volume.
+    """
+    mock_app_config.allow_multi_volume_snapshots = True
+    ec2_client = MagicMock()
+    ec2_client.describe_instances.return_value = _describe_two_volumes()
+    ec2_client.create_snapshots.side_effect = ClientError(
+        {"Error": {"Code": "UnsupportedOperation", "Message": "Not supported"}},
+        "CreateSnapshots",
+    )
+    ec2_client.create_snapshot.side_effect = lambda VolumeId, **kwargs: {
+        "SnapshotId": VolumeId.replace("vol", "snap")
+    }
+
+    action = CreateSnapshotAction(MagicMock(), mock_app_config)
+    action.ec2_client = ec2_client
+    result = action.execute(guardduty_finding_detail)
+
+    assert result["status"] == "success"
+    assert sorted(
+        call.kwargs["VolumeId"] for call in ec2_client.create_snapshot.call_args_list
+    ) == ["vol-1111", "vol-2222"]
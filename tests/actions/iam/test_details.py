@@ -7,6 +7,7 @@ import pytest
 from botocore.stub import Stubber
 
 from guardduty_soar.actions.iam.details import GetIamPrincipalDetailsAction
+from guardduty_soar.policy_cache import get_policy_cache
 
 
 def test_get_iam_user_details_success(principal_details_factory, mock_app_config):
@@ -107,3 +108,141 @@ def test_get_details_client_error(principal_details_factory, mock_app_config):
 
     assert result["status"] == "error"
     assert "NoSuchEntity" in result["details"]
+
+
+@pytest.fixture
+def clear_policy_cache():
+    get_policy_cache.cache_clear()
+    yield
+    get_policy_cache.cache_clear()
+
+
+def test_get_role_policies_concurrently_and_cached(
+    principal_details_factory, mock_app_config, clear_policy_cache
+):
+    """
+    Tests that attached and inline policies are all fetched, in the order they
+    were listed, and that a managed policy version's document is only fetched
+    once across findings.
+    """
+    iam_client = MagicMock()
+    iam_client.get_role.return_value = {"Role": {"RoleName": "test-role"}}
+    iam_client.list_attached_role_policies.return_value = {
+        "AttachedPolicies": [
+            {"PolicyArn": f"arn:aws:iam::aws:policy/Policy{i}"} for i in range(5)
+        ]
+    }
+    iam_client.list_role_policies.return_value = {"PolicyNames": ["inline-a", "b"]}
+    iam_client.get_policy.side_effect = lambda PolicyArn: {
+        "Policy": {
+            "PolicyName": PolicyArn.rsplit("/", 1)[1],
+            "PolicyId": f"ANPA{PolicyArn[-1]}",
+            "DefaultVersionId": "v1",
+        }
+    }
+    iam_client.get_policy_version.side_effect = lambda PolicyArn, VersionId: {
+        "PolicyVersion": {"Document": {"Arn": PolicyArn, "Version": VersionId}}
+    }
+    iam_client.get_role_policy.side_effect = lambda RoleName, PolicyName: {
+        "PolicyDocument": {"Name": PolicyName}
+    }
+    action = GetIamPrincipalDetailsAction(MagicMock(), mock_app_config)
+    action.iam_client = iam_client
+    role_details_input = principal_details_factory(
+        user_type="Role", user_name="test-role"
+    )
+
+    first = action.execute(event={}, principal_details=role_details_input)
+    second = action.execute(event={}, principal_details=role_details_input)
+
+    assert first == second
+    assert first["status"] == "success"
+    assert [p["PolicyName"] for p in first["details"]["attached_policies"]] == [
+        f"Policy{i}" for i in range(5)
+    ]
+    assert first["details"]["attached_policies"][2]["PolicyDocument"] == {
+        "Arn": "arn:aws:iam::aws:policy/Policy2",
+        "Version": "v1",
+    }
+    assert first["details"]["inline_policies"] == {
+        "inline-a": {"Name": "inline-a"},
+        "b": {"Name": "b"},
+    }
+    assert iam_client.get_policy.call_count == 10
+    assert iam_client.get_policy_version.call_count == 5
+
+
+def test_get_role_details_from_iam_index(
+    principal_details_factory, mock_app_config, clear_policy_cache, mocker
+):
+    """
+    Tests that an indexed role is built from the IAM index, and that only the
+    AWS managed policy, which is not indexed, is fetched.
+    """
+    mock_app_config.iam_index_ttl_seconds = 3600
+    index = MagicMock()
+    index.get_role.return_value = {
+        "details": {"RoleName": "test-role"},
+        "attached_policies": [
+            {"PolicyName": "local", "PolicyArn": "arn:aws:iam::1:policy/local"},
+            {
+                "PolicyName": "AWSDenyAll",
+                "PolicyArn": "arn:aws:iam::aws:policy/AWSDenyAll",
+            },
+        ],
+        "inline_policies": {"inline": {"A": 1}},
+    }
+    index.get_managed_policy.side_effect = lambda client, arn: (
+        {"PolicyName": "local", "Document": {"Local": True}}
+        if arn.endswith("/local")
+        else None
+    )
+    mocker.patch(
+        "guardduty_soar.actions.iam.details.get_configured_iam_index",
+        return_value=index,
+    )
+    iam_client = MagicMock()
+    iam_client.get_policy.return_value = {
+        "Policy": {
+            "PolicyName": "AWSDenyAll",
+            "PolicyId": "ANPA1",
+            "DefaultVersionId": "v1",
+        }
+    }
+    iam_client.get_policy_version.return_value = {
+        "PolicyVersion": {"Document": {"Deny": True}}
+    }
+    action = GetIamPrincipalDetailsAction(MagicMock(), mock_app_config)
+    action.iam_client = iam_client
+
+    result = action.execute(
+        event={},
+        principal_details=principal_details_factory(
+            user_type="Role", user_name="test-role"
+        ),
+    )
+
+    assert result["status"] == "success"
+    assert result["details"] == {
+        "details": {"RoleName": "test-role"},
+        "attached_policies": [
+            {
+                "PolicyName": "local",
+                "PolicyArn": "arn:aws:iam::1:policy/local",
+                "PolicyDocument": {"Local": True},
+            },
+            {
+                "PolicyName": "AWSDenyAll",
+                "PolicyArn": "arn:aws:iam::aws:policy/AWSDenyAll",
+                "PolicyDocument": {"Deny": True},
+            },
+        ],
+        "inline_policies": {"inline": {"A": 1}},
+    }
+    index.get_role.assert_called_once_with(iam_client, "test-role", deadline=None)
+    iam_client.get_role.assert_not_called()
+    iam_client.list_attached_role_policies.assert_not_called()
+    iam_client.list_role_policies.assert_not_called()
+    iam_client.get_policy.assert_called_once_with(
+        PolicyArn="arn:aws:iam::aws:policy/AWSDenyAll"
+    )
@@ -1,10 +1,17 @@
+import json
+from datetime import datetime, timezone
 from unittest.mock import MagicMock
 
 import boto3
 import pytest
 from botocore.stub import Stubber
 
-from guardduty_soar.actions.iam.history import GetCloudTrailHistoryAction
+from guardduty_soar.actions.iam.history import (
+    GetCloudTrailHistoryAction,
+    project_event,
+)
+from guardduty_soar.context import FindingContext
+from guardduty_soar.deadline import Deadline
 
 
 def test_get_cloudtrail_history_success(mock_app_config):
@@ -62,3 +69,148 @@ def test_get_cloudtrail_history_client_error(mock_app_config):
 
     assert result["status"] == "error"
     assert "InvalidLookupAttributesException" in result["details"]
+
+
+def _events(count, start=0):
+    return [
+        {"EventId": f"event-{i}", "EventName": "GetObject"}
+        for i in range(start, start + count)
+    ]
+
+
+def test_get_cloudtrail_history_follows_next_token(mock_app_config):
+    """Tests that pages are followed until the limit, requesting only what is left."""
+    mock_app_config.cloudtrail_history_max_results = 120
+    action = GetCloudTrailHistoryAction(MagicMock(), mock_app_config)
+    action.cloudtrail_client = MagicMock()
+    action.cloudtrail_client.lookup_events.side_effect = [
+        {"Events": _events(50), "NextToken": "page-2"},
+        {"Events": _events(50, 50), "NextToken": "page-3"},
+        {"Events": _events(20, 100), "NextToken": "page-4"},
+    ]
+    lookup_attributes = [{"AttributeKey": "Username", "AttributeValue": "test-user"}]
+
+    result = action.execute(event={}, lookup_attributes=lookup_attributes)
+
+    assert result["status"] == "success"
+    assert [e["EventId"] for e in result["details"]] == [
+        f"event-{i}" for i in range(120)
+    ]
+    calls = action.cloudtrail_client.lookup_events.call_args_list
+    assert [c.kwargs["MaxResults"] for c in calls] == [50, 50, 20]
+    assert "NextToken" not in calls[0].kwargs
+    assert calls[1].kwargs["NextToken"] == "page-2"
+    assert calls[2].kwargs["NextToken"] == "page-3"
+
+
+def test_get_cloudtrail_history_stops_without_next_token(mock_app_config):
+    """Tests that paging stops on the last page, below the limit."""
+    mock_app_config.cloudtrail_history_max_results = 500
+    action = GetCloudTrailHistoryAction(MagicMock(), mock_app_config)
+    action.cloudtrail_client = MagicMock()
+    action.cloudtrail_client.lookup_events.return_value = {"Events": _events(3)}
+
+    result = action.execute(
+        event={},
+        lookup_attributes=[{"AttributeKey": "Username", "AttributeValue": "u"}],
+    )
+
+    assert len(result["details"]) == 3
+    action.cloudtrail_client.lookup_events.assert_called_once()
+
+
+def test_get_cloudtrail_history_time_window(mock_app_config):
+    """Tests that the lookup is bounded by a window around the finding's activity."""
+    mock_app_config.cloudtrail_history_window_minutes = 30
+    action = GetCloudTrailHistoryAction(MagicMock(), mock_app_config)
+    action.cloudtrail_client = MagicMock()
+    action.cloudtrail_client.lookup_events.return_value = {"Events": []}
+    event = {
+        "Service": {
+            "EventFirstSeen": "2025-10-01T12:00:00.000Z",
+            "EventLastSeen": "2025-10-01T13:00:00.000Z",
+        }
+    }
+
+    action.execute(
+        event, lookup_attributes=[{"AttributeKey": "Username", "AttributeValue": "u"}]
+    )
+
+    params = action.cloudtrail_client.lookup_events.call_args.kwargs
+    assert params["StartTime"] == datetime(2025, 10, 1, 11, 30, tzinfo=timezone.utc)
+    assert params["EndTime"] == datetime(2025, 10, 1, 13, 30, tzinfo=timezone.utc)
+
+
+def test_get_cloudtrail_history_window_disabled(mock_app_config):
+    """Tests that a window of 0 minutes does not bound the lookup."""
+    mock_app_config.cloudtrail_history_window_minutes = 0
+    action = GetCloudTrailHistoryAction(MagicMock(), mock_app_config)
+    action.cloudtrail_client = MagicMock()
+    action.cloudtrail_client.lookup_events.return_value = {"Events": []}
+    event = {"Service": {"EventFirstSeen": "2025-10-01T12:00:00.000Z"}}
+
+    action.execute(
+        event, lookup_attributes=[{"AttributeKey": "Username", "AttributeValue": "u"}]
+    )
+
+    params = action.cloudtrail_client.lookup_events.call_args.kwargs
+    assert "StartTime" not in params
+    assert "EndTime" not in params
+
+
+def test_get_cloudtrail_history_stops_at_deadline(mock_app_config):
+    """Tests that no further page is fetched once the deadline is near."""
+    mock_app_config.cloudtrail_history_max_results = 200
+    action = GetCloudTrailHistoryAction(MagicMock(), mock_app_config)
+    action.cloudtrail_client = MagicMock()
+    action.cloudtrail_client.lookup_events.return_value = {
+        "Events": _events(50),
+        "NextToken": "more",
+    }
+    context = FindingContext({}, deadline=Deadline(remaining_ms=1000))
+
+    result = action.execute(
+        event={},
+        lookup_attributes=[{"AttributeKey": "Username", "AttributeValue": "u"}],
+        context=context,
+    )
+
+    assert result["status"] == "success"
+    assert len(result["details"]) == 50
+    action.cloudtrail_client.lookup_events.assert_called_once()
+
+
+def test_project_event_keeps_only_used_fields():
+    """Tests that events are projected, and CloudTrailEvent decoded to a subset."""
+    cloudtrail_event = {
+        "eventSource": "s3.amazonaws.com",
+        "eventName": "DeleteBucket",
+        "sourceIPAddress": "198.51.100.5",
+        "userIdentity": {"type": "IAMUser", "userName": "test-user", "extra": 1},
+        "requestParameters": {"bucketName": "b" * 1000},
+        "responseElements": None,
+    }
+    event_item = {
+        "EventId": "event-1",
+        "EventName": "DeleteBucket",
+        "EventSource": "s3.amazonaws.com",
+        "Resources": [{"ResourceName": "b"}],
+        "CloudTrailEvent": json.dumps(cloudtrail_event),
+    }
+
+    projected = project_event(event_item)
+
+    assert "Resources" not in projected
+    assert projected["CloudTrailEvent"] == {
+        "eventSource": "s3.amazonaws.com",
+        "eventName": "DeleteBucket",
+        "sourceIPAddress": "198.51.100.5",
+        "userIdentity": {"type": "IAMUser", "userName": "test-user"},
+    }
+
+
+def test_project_event_invalid_cloudtrail_event():
+    """Tests that an unparsable CloudTrailEvent is dropped, keeping the event."""
+    projected = project_event({"EventId": "event-1", "CloudTrailEvent": "{bad"})
+
+    assert projected == {"EventId": "event-1"}
@@ -0,0 +1,34 @@
+from unittest.mock import MagicMock, patch
+
+from guardduty_soar.actions.notifications.base import (
+    BaseNotificationAction,
+    get_jinja_env,
+)
+
+
+def test_jinja_env_is_shared(mock_app_config):
+    """Tests that every notification action uses the same Jinja2 environment."""
+    first = BaseNotificationAction(MagicMock(), mock_app_config)
+    second = BaseNotificationAction(MagicMock(), mock_app_config)
+
+    assert first.jinja_env is second.jinja_env is get_jinja_env()
+
+
+def test_templates_render_without_filesystem_access():
+    """
+    Tests that all templates, including partials, are compiled up front and
+    rendering never goes back to the loader.
+    """
+    env = get_jinja_env()
+    resource = MagicMock(template_name="partials/_ec2instancedetails.html.j2")
+
+    with patch.object(
+        env.loader, "get_source", side_effect=AssertionError("loader was used")
+    ):
+        rendered = env.get_template("ses/starting.html.j2").render(
+            finding={"Type": "Test:EC2/Finding"},
+            playbook_name="TestPlaybook",
+            resource=resource,
+        )
+
+    assert "TestPlaybook" in rendered
@@ -104,6 +104,27 @@ def test_sns_action_success_complete(
     assert message_data["enriched_data"]["created_at"] == "2025-10-17 12:00:00"
 
 
+def test_sns_action_includes_merged_findings(
+    sns_action, mock_boto_session, mock_notification_kwargs_complete
+):
+    """
+    GIVEN a 'complete' notification for a run that coalesced other findings.
+    WHEN the action is executed.
+    THEN every merged finding is listed in the payload.
+    """
+    _, mock_sns_client = mock_boto_session
+    mock_notification_kwargs_complete["merged_findings"] = [
+        {"Id": "finding-2", "Type": "Recon:EC2/Portscan", "Severity": 5.0}
+    ]
+
+    sns_action.execute(**mock_notification_kwargs_complete)
+
+    message_data = get_published_message(mock_sns_client)
+    assert message_data["merged_findings"] == [
+        {"id": "finding-2", "type": "Recon:EC2/Portscan", "severity": 5.0}
+    ]
+
+
 def test_sns_action_success_starting(
     sns_action, mock_boto_session, mock_notification_kwargs_starting
 ):
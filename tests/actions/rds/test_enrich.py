@@ -1,6 +1,7 @@
 from unittest.mock import MagicMock
 
 import pytest
+from botocore.exceptions import ClientError
 
 from guardduty_soar.actions.rds.enrich import EnrichRdsFindingAction
 
@@ -122,11 +123,13 @@ def test_execute_success_multiple_instances(
     """
     session, mock_rds_client, _ = mock_boto3_session
 
-    # Use side_effect to return different values for each call
-    mock_rds_client.describe_db_instances.side_effect = [
-        {"DBInstances": [{"DBInstanceIdentifier": "test-db-instance-1"}]},
-        {"DBInstances": [{"DBInstanceIdentifier": "test-db-instance-2"}]},
-    ]
+    # Both instances are described by a single filtered call, in any order
+    mock_rds_client.describe_db_instances.return_value = {
+        "DBInstances": [
+            {"DBInstanceIdentifier": "test-db-instance-2"},
+            {"DBInstanceIdentifier": "test-db-instance-1"},
+        ]
+    }
 
     action = EnrichRdsFindingAction(session, mock_app_config)
 
@@ -136,7 +139,14 @@ def test_execute_success_multiple_instances(
     assert len(result["details"]) == 2
     assert result["details"][0]["db_instance_identifier"] == "test-db-instance-1"
     assert result["details"][1]["db_instance_identifier"] == "test-db-instance-2"
-    assert mock_rds_client.describe_db_instances.call_count == 2
+    mock_rds_client.describe_db_instances.assert_called_once_with(
+        Filters=[
+            {
+                "Name": "db-instance-id",
+                "Values": ["test-db-instance-1", "test-db-instance-2"],
+            }
+        ]
+    )
 
 
 def test_execute_skipped_not_db_instance(
@@ -154,3 +164,93 @@ def test_execute_skipped_not_db_instance(
     assert result["status"] == "skipped"
     assert "not DBInstance" in result["details"]
     mock_rds_client.describe_db_instances.assert_not_called()
+
+
+def test_execute_batches_clusters_and_security_groups(
+    mock_boto3_session, mock_app_config, rds_finding_multiple_instances
+):
+    """
+    Tests that instances of the same Aurora cluster share one cluster describe,
+    and that the security groups of every instance are described in one call.
+    """
+    session, mock_rds_client, mock_ec2_client = mock_boto3_session
+
+    mock_rds_client.describe_db_instances.return_value = {
+        "DBInstances": [
+            {
+                "DBInstanceIdentifier": f"test-db-instance-{i}",
+                "DBInstanceArn": f"arn:aws:rds:us-east-1:123456789012:db:test-db-instance-{i}",
+                "VpcSecurityGroups": [
+                    {"VpcSecurityGroupId": "sg-shared"},
+                    {"VpcSecurityGroupId": f"sg-{i}"},
+                ],
+                "DBClusterIdentifier": "test-aurora-cluster",
+            }
+            for i in (1, 2)
+        ]
+    }
+    mock_rds_client.describe_db_clusters.return_value = {
+        "DBClusters": [{"DBClusterIdentifier": "test-aurora-cluster"}]
+    }
+    mock_ec2_client.describe_security_groups.return_value = {
+        "SecurityGroups": [
+            {"GroupId": "sg-shared"},
+            {"GroupId": "sg-1"},
+            {"GroupId": "sg-2"},
+        ]
+    }
+    mock_rds_client.list_tags_for_resource.return_value = {"TagList": []}
+    mock_rds_client.describe_events.return_value = {"Events": []}
+
+    action = EnrichRdsFindingAction(session, mock_app_config)
+
+    result = action.execute(event=rds_finding_multiple_instances)
+
+    assert result["status"] == "success"
+    mock_rds_client.describe_db_clusters.assert_called_once_with(
+        DBClusterIdentifier="test-aurora-cluster"
+    )
+    mock_ec2_client.describe_security_groups.assert_called_once_with(
+        GroupIds=["sg-shared", "sg-1", "sg-2"]
+    )
+    assert [
+        [group["GroupId"] for group in instance["security_groups"]]
+        for instance in result["details"]
+    ] == [["sg-shared", "sg-1"], ["sg-shared", "sg-2"]]
+    assert mock_rds_client.list_tags_for_resource.call_count == 2
+    assert mock_rds_client.describe_events.call_count == 2
+
+
+def test_execute_keeps_other_data_when_a_call_fails(
+    mock_boto3_session, mock_app_config, rds_finding_detail
+):
+    """
+    Tests that a failed enrichment call only leaves out its own data.
+    """
+    session, mock_rds_client, _ = mock_boto3_session
+
+    mock_rds_client.describe_db_instances.return_value = {
+        "DBInstances": [
+            {
+                "DBInstanceIdentifier": "test-db-instance-1",
+                "DBInstanceArn": "arn:aws:rds:us-east-1:123456789012:db:test-db-instance-1",
+            }
+        ]
+    }
+    mock_rds_client.list_tags_for_resource.side_effect = ClientError(
+        {"Error": {"Code": "AccessDenied", "Message": "denied"}},
+        "ListTagsForResource",
+    )
+    mock_rds_client.describe_events.return_value = {
+        "Events": [{"Message": "Test event"}]
+    }
+
+    action = EnrichRdsFindingAction(session, mock_app_config)
+
+    result = action.execute(event=rds_finding_detail)
+
+    assert result["status"] == "success"
+    enriched_data = result["details"][0]
+    assert "tags" not in enriched_data
+    assert "instance_details" in enriched_data
+    assert enriched_data["recent_events"] == [{"Message": "Test event"}]
@@ -5,7 +5,14 @@ from unittest.mock import MagicMock, patch
 import pytest
 from botocore.exceptions import ClientError
 
-from guardduty_soar.actions.rds.gather import GatherRecentQueriesAction
+from guardduty_soar.actions.rds.gather import (
+    QUERY_POLL_INITIAL_SECONDS,
+    QUERY_POLL_MAX_SECONDS,
+    QUERY_RESULTS_PER_INSTANCE,
+    GatherRecentQueriesAction,
+)
+from guardduty_soar.context import FindingContext
+from guardduty_soar.deadline import Deadline
 
 
 @pytest.fixture
@@ -24,6 +31,13 @@ def mock_boto3_session():
     return session, mock_logs_client
 
 
+@pytest.fixture(autouse=True)
+def no_poll_sleep():
+    """Polling waits are not slept in unit tests."""
+    with patch("time.sleep") as mock_sleep:
+        yield mock_sleep
+
+
 @pytest.fixture
 def rds_finding_with_user(rds_finding_detail):
     """Provides an RDS finding with DbUserDetails populated."""
@@ -123,8 +137,8 @@ def test_execute_success_with_logs_found(
 
     expected_log_group = "/aws/rds/instance/test-db-instance-1/audit"
     mock_logs_client.start_query.assert_called_once()
-    assert (
-        mock_logs_client.start_query.call_args[1]["logGroupName"] == expected_log_group
+    assert mock_logs_client.start_query.call_args[1]["logGroupName"] == (
+        expected_log_group
     )
 
 
@@ -173,16 +187,13 @@ def test_execute_handles_log_group_not_found(
     assert len(result["details"]) == 0
 
 
-@patch("time.time")
 def test_execute_handles_query_timeout(
-    mock_time, mock_boto3_session, mock_app_config, rds_finding_with_user
+    mock_boto3_session, mock_app_config, rds_finding_with_user
 ):
-    """Tests that the action completes successfully even if the query times out."""
+    """Tests that a query still running at the time limit is stopped."""
     session, mock_logs_client = mock_boto3_session
     mock_app_config.allow_gather_recent_queries = True
 
-    # We don't need to mock mock_time.return_value, as side_effect takes precedence
-
     mock_logs_client.start_query.return_value = {"queryId": "test-query-id"}
 
     # Simulate the query always being 'Running'
@@ -190,25 +201,162 @@ def test_execute_handles_query_timeout(
 
     action = GatherRecentQueriesAction(session, mock_app_config)
 
-    # Patch 'time.sleep' to do nothing and advance 'time.time' to simulate timeout
-    with patch("time.sleep", return_value=None):
-        # This side_effect list needs to be long enough for all time.time() calls
-        with patch(
-            "time.time",
-            side_effect=[
-                1678886400,  # 1. startTime calculation
-                1678886400,  # 2. endTime calculation
-                1678886400,  # 3. timeout calculation (timeout = 1678886400 + 60)
-                1678886403,  # 4. loop 1 check (1678886403 < 1678886460) -> True
-                # get_query_results() call #1
-                1678886406,  # 5. loop 2 check (1678886406 < 1678886460) -> True
-                # get_query_results() call #2
-                1678886461,  # 6. loop 3 check (1678886461 < 1678886460) -> False (loop terminates)
-            ],
-        ):
-            result = action.execute(event=rds_finding_with_user)
+    # 'time.monotonic' is read once for the time limit, then once per poll.
+    with patch("time.monotonic", side_effect=[0, 1, 30, 61]):
+        result = action.execute(event=rds_finding_with_user)
 
     assert result["status"] == "success"
     assert len(result["details"]) == 0
     assert mock_logs_client.get_query_results.call_count == 2
-    assert mock_logs_client.get_query_results.call_count > 1
+    mock_logs_client.stop_query.assert_called_once_with(queryId="test-query-id")
+
+
+def test_execute_skips_query_without_time_budget(
+    mock_boto3_session, mock_app_config, rds_finding_with_user
+):
+    """Tests that no query is started when the invocation is out of time."""
+    session, mock_logs_client = mock_boto3_session
+    mock_app_config.allow_gather_recent_queries = True
+    context = FindingContext(
+        rds_finding_with_user, deadline=Deadline(remaining_ms=5000, reserve_seconds=5)
+    )
+
+    action = GatherRecentQueriesAction(session, mock_app_config)
+
+    result = action.execute(event=rds_finding_with_user, context=context)
+
+    assert result["status"] == "success"
+    assert len(result["details"]) == 0
+    mock_logs_client.start_query.assert_not_called()
+
+
+@pytest.fixture
+def rds_finding_same_user(rds_finding_multiple_instances):
+    """Provides an RDS finding with two instances accessed by the same user."""
+    finding = copy.deepcopy(rds_finding_multiple_instances)
+    for instance in finding["Resource"]["RdsDbInstanceDetails"]:
+        instance["DbUserDetails"] = {"User": "test_db_user"}
+    return finding
+
+
+def _row(timestamp, message):
+    return [
+        {"field": "@timestamp", "value": timestamp},
+        {"field": "@message", "value": message},
+    ]
+
+
+def test_execute_queries_each_instance_separately(
+    mock_boto3_session, mock_app_config, rds_finding_same_user
+):
+    """
+    Tests that every instance gets its own query, with its own limit of
+    results, so a busy instance does not crowd out the others.
+    """
+    session, mock_logs_client = mock_boto3_session
+    mock_app_config.allow_gather_recent_queries = True
+    group_1 = "/aws/rds/instance/test-db-instance-1/audit"
+    group_2 = "/aws/rds/instance/test-db-instance-2/postgresql"
+
+    mock_logs_client.start_query.side_effect = [
+        {"queryId": "q-1"},
+        {"queryId": "q-2"},
+    ]
+    busy = [
+        _row(f"2023-03-15 12:{minute:02d}:00.000", f"SELECT {minute};")
+        for minute in range(QUERY_RESULTS_PER_INSTANCE)
+    ]
+    results = {
+        "q-1": busy,
+        "q-2": [_row("2023-03-14 09:00:00.000", "DROP TABLE users;")],
+    }
+    mock_logs_client.get_query_results.side_effect = lambda queryId: {
+        "status": "Complete",
+        "results": results[queryId],
+    }
+
+    action = GatherRecentQueriesAction(session, mock_app_config)
+    result = action.execute(event=rds_finding_same_user)
+
+    assert result["status"] == "success"
+    calls = mock_logs_client.start_query.call_args_list
+    assert [c[1]["logGroupName"] for c in calls] == [group_1, group_2]
+    assert all(
+        f"limit {QUERY_RESULTS_PER_INSTANCE}" in c[1]["queryString"] for c in calls
+    )
+    # Results keep the finding's instance order.
+    instances = [q["db_instance_identifier"] for q in result["details"]]
+    assert instances == ["test-db-instance-1"] * QUERY_RESULTS_PER_INSTANCE + [
+        "test-db-instance-2"
+    ]
+    assert result["details"][-1]["query"] == "DROP TABLE users;"
+
+
+def test_execute_skips_only_the_missing_log_group(
+    mock_boto3_session, mock_app_config, rds_finding_same_user
+):
+    """
+    Tests that when one of the log groups does not exist, the other instances
+    are still queried.
+    """
+    session, mock_logs_client = mock_boto3_session
+    mock_app_config.allow_gather_recent_queries = True
+    not_found = ClientError(
+        {"Error": {"Code": "ResourceNotFoundException", "Message": "not found"}},
+        "StartQuery",
+    )
+    mock_logs_client.start_query.side_effect = [not_found, {"queryId": "q-2"}]
+    mock_logs_client.get_query_results.return_value = {
+        "status": "Complete",
+        "results": [_row("2023-03-15 12:02:00.000", "DELETE FROM t;")],
+    }
+
+    action = GatherRecentQueriesAction(session, mock_app_config)
+    result = action.execute(event=rds_finding_same_user)
+
+    assert result["status"] == "success"
+    assert mock_logs_client.start_query.call_count == 2
+    mock_logs_client.get_query_results.assert_called_once_with(queryId="q-2")
+    assert len(result["details"]) == 1
+    assert result["details"][0]["db_instance_identifier"] == "test-db-instance-2"
+
+
+def test_execute_polls_queries_together_with_backoff(
+    mock_boto3_session, mock_app_config, rds_finding_same_user, no_poll_sleep
+):
+    """
+    Tests that the queries of different users are all started before polling,
+    polled together, and that the wait between polls grows.
+    """
+    session, mock_logs_client = mock_boto3_session
+    mock_app_config.allow_gather_recent_queries = True
+    rds_finding_same_user["Resource"]["RdsDbInstanceDetails"][1]["DbUserDetails"][
+        "User"
+    ] = "other_user"
+
+    mock_logs_client.start_query.side_effect = [
+        {"queryId": "q-1"},
+        {"queryId": "q-2"},
+    ]
+    polls = {"q-1": 0, "q-2": 0}
+
+    def get_query_results(queryId):
+        polls[queryId] += 1
+        # q-1 completes on its second poll, q-2 on its fourth.
+        if polls[queryId] >= (2 if queryId == "q-1" else 4):
+            return {"status": "Complete", "results": []}
+        return {"status": "Running"}
+
+    mock_logs_client.get_query_results.side_effect = get_query_results
+
+    action = GatherRecentQueriesAction(session, mock_app_config)
+    result = action.execute(event=rds_finding_same_user)
+
+    assert result["status"] == "success"
+    assert polls == {"q-1": 2, "q-2": 4}
+    waits = [c.args[0] for c in no_poll_sleep.call_args_list]
+    assert len(waits) == 4
+    assert waits[0] <= QUERY_POLL_INITIAL_SECONDS
+    assert waits[-1] > QUERY_POLL_INITIAL_SECONDS
+    assert all(wait <= QUERY_POLL_MAX_SECONDS for wait in waits)
+    mock_logs_client.stop_query.assert_not_called()
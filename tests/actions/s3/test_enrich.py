@@ -1,9 +1,10 @@
+import threading
 from unittest.mock import MagicMock, call, patch
 
 import pytest
 from botocore.exceptions import ClientError
 
-from guardduty_soar.actions.s3.enrich import EnrichS3BucketAction
+from guardduty_soar.actions.s3.enrich import ENRICHMENT_CALLS, EnrichS3BucketAction
 
 
 @pytest.fixture
@@ -166,15 +167,68 @@ def test_enrich_s3_skips_directory_bucket(enrich_s3_action, s3_finding_mixed_buc
     THEN it should only attempt to enrich the standard buckets.
     """
     # We patch the internal helper method to see what it gets called with
-    with patch.object(enrich_s3_action, "_get_enrichment_data") as mock_get_data:
+    with patch.object(enrich_s3_action, "_get_field") as mock_get_field:
         # To prevent errors, have the mock return a valid structure
-        mock_get_data.return_value = {"name": "mocked"}
+        mock_get_field.return_value = (True, None)
 
         result = enrich_s3_action.execute(event=s3_finding_mixed_buckets)
 
     assert result["status"] == "success"
     # Verify the helper was only called for the two standard buckets
-    assert mock_get_data.call_count == 2
-    mock_get_data.assert_has_calls(
-        [call("example-bucket1"), call("example-bucket2")], any_order=True
-    )
+    assert {c.args[1] for c in mock_get_field.call_args_list} == {
+        "example-bucket1",
+        "example-bucket2",
+    }
+    assert mock_get_field.call_count == 2 * len(ENRICHMENT_CALLS)
+
+
+def test_enrich_s3_keeps_bucket_order(
+    enrich_s3_action, mock_boto_session, s3_finding_multiple_buckets
+):
+    """
+    GIVEN an S3 finding with two buckets, where the first bucket's calls are slower.
+    WHEN the enrich action is executed.
+    THEN the enriched buckets keep the finding's order.
+    """
+    _, mock_s3_client = mock_boto_session
+    configure_mock_s3_client(mock_s3_client)
+    first_done = threading.Event()
+
+    def get_bucket_versioning(Bucket):
+        if Bucket == "example-bucket1":
+            first_done.wait(timeout=1)
+            return {"Status": "Suspended"}
+        first_done.set()
+        return {"Status": "Enabled"}
+
+    mock_s3_client.get_bucket_versioning.side_effect = get_bucket_versioning
+
+    result = enrich_s3_action.execute(event=s3_finding_multiple_buckets)
+
+    assert result["status"] == "success"
+    assert [(b["name"], b["versioning"]) for b in result["details"]] == [
+        ("example-bucket1", "Suspended"),
+        ("example-bucket2", "Enabled"),
+    ]
+
+
+def test_enrich_s3_uses_bucket_region_client(mock_app_config, s3_finding_detail):
+    """
+    GIVEN an S3 finding in a different region than the session's.
+    WHEN the enrich action is executed.
+    THEN the calls are made with a client for the finding's region.
+    """
+    session = MagicMock()
+    session.region_name = "us-west-2"
+    regional_client = MagicMock()
+    session.client.return_value = regional_client
+    configure_mock_s3_client(regional_client)
+    action = EnrichS3BucketAction(session, mock_app_config)
+    action.s3_client = MagicMock()
+
+    result = action.execute(event=s3_finding_detail)
+
+    assert result["status"] == "success"
+    session.client.assert_called_once_with("s3", region_name="us-east-1")
+    regional_client.get_bucket_policy.assert_called_once_with(Bucket="example-bucket1")
+    action.s3_client.get_bucket_policy.assert_not_called()
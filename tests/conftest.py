@@ -11,7 +11,9 @@ import boto3
 import pytest
 from botocore.exceptions import ClientError
 
+from guardduty_soar.clients import get_client_pool
 from guardduty_soar.config import AppConfig, get_config
+from guardduty_soar.playbook_registry import _PLAYBOOK_MANIFEST
 
 logger = logging.getLogger(__name__)
 
@@ -29,7 +31,23 @@ def mock_app_config():
     config.boto_log_level = "WARNING"
     config.ec2_ignored_findings = []
     config.snapshot_description_prefix = "GD-SOAR-Test-Snapshot-"
+    config.allow_multi_volume_snapshots = False
+    config.nacl_max_rules = 20
+    config.cloudtrail_history_max_results = 25
+    config.cloudtrail_history_window_minutes = 60
+    config.policy_cache_path = None
+    config.iam_index_ttl_seconds = 0
+    config.iam_index_path = None
     config.allow_remove_public_access = True
+    config.playbook_max_workers = 4
+    config.batch_max_workers = 4
+    config.service_max_workers = 4
+    config.coalesce_window_seconds = 0
+    config.deadline_reserve_seconds = 10
+    config.optional_step_min_seconds = 15
+    config.state_backend = "none"
+    config.idempotency_window_seconds = 3600
+    config.checkpoint_ttl_seconds = 3600
     return config
 
 
@@ -482,6 +500,28 @@ def clear_config_cache():
     get_config.cache_clear()
 
 
+@pytest.fixture
+def restore_manifest():
+    """
+    Restores the registered playbook manifest after a test replaces it, so
+    that later tests still resolve the real playbooks.
+    """
+    original = dict(_PLAYBOOK_MANIFEST)
+    yield
+    _PLAYBOOK_MANIFEST.clear()
+    _PLAYBOOK_MANIFEST.update(original)
+
+
+@pytest.fixture(autouse=True)
+def clear_client_pool():
+    """
+    Empties the shared boto3 client pool after every test, so a stubbed or
+    mocked client never leaks into the next test.
+    """
+    yield
+    get_client_pool().clear()
+
+
 @pytest.fixture(scope="function")
 def sqs_poller():
     """
@@ -49,9 +49,9 @@ def test_isolate_instance_action_integration(
     temporary_ec2_instance, guardduty_finding_detail, real_app_config
 ):
     """
-    Tests the new dynamic IsolateInstanceAction. It verifies that a new,
-    deny-all security group is created in the instance's VPC and applied,
-    and cleans up the created security group.
+    Tests the IsolateInstanceAction. It verifies that the VPC's deny-all
+    quarantine security group is created (or reused) and applied, and cleans
+    up the security group.
     """
     session = boto3.Session()
     ec2_client = session.client("ec2")
@@ -1,3 +1,4 @@
+import threading
 from unittest.mock import MagicMock
 
 from guardduty_soar.notifications.manager import NotificationManager
@@ -51,8 +52,103 @@ def test_manager_dispatches_to_all_actions(
     mocker.spy(manager.actions[0], "execute")
     mocker.spy(manager.actions[1], "execute")
 
-    # Call a dispatch method
-    manager.send_starting_notification(guardduty_finding_detail, playbook_name="TestPB")
+    # Call a dispatch method, and wait for the background delivery
+    futures = manager.send_starting_notification(
+        guardduty_finding_detail, playbook_name="TestPB"
+    )
+    manager.wait(futures)
 
+    assert len(futures) == 2
     assert manager.actions[0].execute.call_count == 1
     assert manager.actions[1].execute.call_count == 1
+
+
+def test_manager_delivers_channels_concurrently(
+    mock_app_config, mocker, guardduty_finding_detail
+):
+    """
+    Tests that every channel delivers at the same time, rather than one after
+    the other.
+    """
+    mock_app_config.allow_ses = True
+    mock_app_config.allow_sns = True
+    manager = NotificationManager(MagicMock(), mock_app_config)
+
+    # Both channels have to be running at once for the barrier to release.
+    barrier = threading.Barrier(2, timeout=2)
+    for action in manager.actions:
+        mocker.patch.object(
+            action, "execute", side_effect=lambda **kwargs: barrier.wait()
+        )
+
+    manager.wait(
+        manager.send_starting_notification(
+            guardduty_finding_detail, playbook_name="TestPB"
+        )
+    )
+
+    assert not barrier.broken
+
+
+def test_manager_delivers_findings_concurrently_within_a_channel(
+    mock_app_config, mocker, guardduty_finding_detail
+):
+    """
+    Tests that a channel delivers the notifications of different findings at
+    the same time, so a batch is not serialized behind one channel thread.
+    """
+    mock_app_config.allow_ses = True
+    mock_app_config.allow_sns = False
+    manager = NotificationManager(MagicMock(), mock_app_config)
+
+    barrier = threading.Barrier(2, timeout=2)
+    mocker.patch.object(
+        manager.actions[0], "execute", side_effect=lambda **kwargs: barrier.wait()
+    )
+    other_finding = dict(guardduty_finding_detail, Id="other-finding")
+
+    futures = manager.send_starting_notification(
+        guardduty_finding_detail, playbook_name="TestPB"
+    )
+    futures += manager.send_starting_notification(other_finding, playbook_name="TestPB")
+    manager.wait(futures)
+
+    assert not barrier.broken
+
+
+def test_manager_keeps_order_within_a_channel(
+    mock_app_config, mocker, guardduty_finding_detail
+):
+    """
+    Tests that a channel never delivers the 'complete' notification before the
+    'starting' one, and that a failing channel does not raise.
+    """
+    mock_app_config.allow_ses = True
+    mock_app_config.allow_sns = False
+    manager = NotificationManager(MagicMock(), mock_app_config)
+
+    delivered = []
+    release = threading.Event()
+
+    def execute(**kwargs):
+        if kwargs["template_type"] == "starting":
+            release.wait(timeout=2)
+        delivered.append(kwargs["template_type"])
+        raise RuntimeError("delivery failed")
+
+    mocker.patch.object(manager.actions[0], "execute", side_effect=execute)
+
+    futures = manager.send_starting_notification(
+        guardduty_finding_detail, playbook_name="TestPB"
+    )
+    futures += manager.send_complete_notification(
+        finding=guardduty_finding_detail,
+        playbook_name="TestPB",
+        action_results=[],
+        resource=MagicMock(),
+        enriched_data=None,
+    )
+    release.set()
+    manager.wait(futures)
+
+    assert delivered == ["starting", "complete"]
@@ -0,0 +1,56 @@
+from datetime import datetime
+from unittest.mock import MagicMock
+
+from guardduty_soar.checkpoints import CheckpointStore
+from guardduty_soar.stores import MemoryStateStore
+
+
+def test_checkpoint_round_trip(guardduty_finding_detail):
+    """
+    Tests that saved step results are loaded by a new checkpoint for the same
+    finding and playbook, and that values are stored as JSON.
+    """
+    checkpoints = CheckpointStore(MemoryStateStore(), 3600)
+    checkpoint = checkpoints.for_playbook(guardduty_finding_detail, "TestPlaybook")
+    checkpoint.save("Tag", {"status": "success", "details": "Tagged."})
+    checkpoint.save(
+        "Enrich", {"status": "success", "details": {"LaunchTime": datetime(2025, 1, 1)}}
+    )
+
+    resumed = checkpoints.for_playbook(guardduty_finding_detail, "TestPlaybook")
+
+    assert resumed.load() == {
+        "Tag": {"status": "success", "details": "Tagged."},
+        "Enrich": {
+            "status": "success",
+            "details": {"LaunchTime": "2025-01-01 00:00:00"},
+        },
+    }
+    assert checkpoints.for_playbook(guardduty_finding_detail, "Other").load() == {}
+
+
+def test_checkpoint_clear(guardduty_finding_detail):
+    """Tests that a cleared checkpoint is empty for the next run."""
+    checkpoints = CheckpointStore(MemoryStateStore(), 3600)
+    checkpoint = checkpoints.for_playbook(guardduty_finding_detail, "TestPlaybook")
+    checkpoint.save("Tag", {"status": "success", "details": "Tagged."})
+
+    checkpoint.clear()
+
+    assert (
+        checkpoints.for_playbook(guardduty_finding_detail, "TestPlaybook").load() == {}
+    )
+
+
+def test_checkpoint_fails_open(guardduty_finding_detail):
+    """Tests that an unavailable store never fails the playbook."""
+    store = MagicMock()
+    store.get.side_effect = Exception("unavailable")
+    store.put.side_effect = Exception("unavailable")
+    checkpoint = CheckpointStore(store, 3600).for_playbook(
+        guardduty_finding_detail, "TestPlaybook"
+    )
+
+    assert checkpoint.load() == {}
+    checkpoint.save("Tag", {"status": "success", "details": "Tagged."})
+    assert checkpoint.load() == {"Tag": {"status": "success", "details": "Tagged."}}
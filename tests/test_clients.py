@@ -0,0 +1,62 @@
+from unittest.mock import MagicMock
+
+from guardduty_soar.clients import ClientPool, LazyClient, get_client_pool
+
+
+class DummyAction:
+    ec2_client = LazyClient("ec2")
+
+    def __init__(self, session):
+        self.session = session
+
+
+def test_client_pool_reuses_clients():
+    """Tests that the same service, region and credentials share one client."""
+    pool = ClientPool()
+    session = MagicMock()
+
+    first = pool.get_client(session, "ec2")
+    second = pool.get_client(session, "ec2")
+
+    assert first is second
+    session.client.assert_called_once_with("ec2")
+
+
+def test_client_pool_separates_region_and_credentials():
+    """Tests that a new region or new credentials get their own client."""
+    pool = ClientPool()
+    session = MagicMock()
+    session.client.side_effect = lambda *args, **kwargs: MagicMock()
+    other_session = MagicMock()
+
+    default = pool.get_client(session, "s3")
+    regional = pool.get_client(session, "s3", region_name="eu-west-1")
+    other = pool.get_client(other_session, "s3")
+
+    assert default is not regional
+    assert default is not other
+    session.client.assert_any_call("s3", region_name="eu-west-1")
+
+
+def test_lazy_client_is_created_on_first_use():
+    """Tests that no client is created until the attribute is read."""
+    session = MagicMock()
+    action = DummyAction(session)
+
+    session.client.assert_not_called()
+
+    assert action.ec2_client is session.client.return_value
+    assert action.ec2_client is get_client_pool().get_client(session, "ec2")
+    session.client.assert_called_once_with("ec2")
+
+
+def test_lazy_client_can_be_replaced():
+    """Tests that a client can still be injected, e.g. for a Stubber."""
+    session = MagicMock()
+    action = DummyAction(session)
+    injected = MagicMock()
+
+    action.ec2_client = injected
+
+    assert action.ec2_client is injected
+    session.client.assert_not_called()
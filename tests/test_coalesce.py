@@ -0,0 +1,122 @@
+import copy
+
+from guardduty_soar.coalesce import ResourceCoalescer, coalesce_findings
+from guardduty_soar.stores import MemoryStateStore
+
+
+def make_finding(
+    base,
+    finding_id,
+    severity,
+    updated_at,
+    instance_id="i-99999999",
+    finding_type="UnauthorizedAccess:EC2/TorClient",
+):
+    """Builds a finding for an instance, with the given severity and time."""
+    finding = copy.deepcopy(base)
+    finding["Id"] = finding_id
+    finding["Type"] = finding_type
+    finding["Severity"] = severity
+    finding["UpdatedAt"] = updated_at
+    finding["Resource"]["InstanceDetails"]["InstanceId"] = instance_id
+    return finding
+
+
+def test_findings_for_one_resource_are_grouped(guardduty_finding_detail):
+    """
+    Tests that findings for the same instance are grouped, most severe first,
+    and that other instances get their own group.
+    """
+    findings = [
+        make_finding(guardduty_finding_detail, "a", 5.0, "2025-10-01T14:00:00Z"),
+        make_finding(guardduty_finding_detail, "b", 8.0, "2025-10-01T14:00:20Z"),
+        make_finding(
+            guardduty_finding_detail, "c", 2.0, "2025-10-01T14:00:30Z", "i-11111111"
+        ),
+        make_finding(guardduty_finding_detail, "d", 8.0, "2025-10-01T14:00:40Z"),
+    ]
+
+    assert coalesce_findings(findings, 60) == [[1, 3, 0], [2]]
+
+
+def test_findings_outside_the_window_are_not_grouped(guardduty_finding_detail):
+    """Tests that a finding past the window starts a new group."""
+    findings = [
+        make_finding(guardduty_finding_detail, "a", 5.0, "2025-10-01T14:00:00Z"),
+        make_finding(guardduty_finding_detail, "b", 8.0, "2025-10-01T14:05:00Z"),
+    ]
+
+    assert coalesce_findings(findings, 60) == [[0], [1]]
+    assert coalesce_findings(findings, 0) == [[0], [1]]
+
+
+def test_findings_for_other_playbooks_are_not_grouped(guardduty_finding_detail, mocker):
+    """
+    Tests that findings for the same resource are only grouped with findings
+    that the same playbook handles.
+    """
+    playbooks = {
+        "UnauthorizedAccess:EC2/TorClient": "compromise:InstanceCompromise",
+        "Backdoor:EC2/C&CActivity.B": "compromise:InstanceCompromise",
+        "Recon:EC2/PortProbeUnprotectedPort": "probe:PortProbe",
+    }
+    mocker.patch("guardduty_soar.coalesce.get_playbook_name", side_effect=playbooks.get)
+    findings = [
+        make_finding(
+            guardduty_finding_detail,
+            "a",
+            8.0,
+            "2025-10-01T14:00:00Z",
+            finding_type="UnauthorizedAccess:EC2/TorClient",
+        ),
+        make_finding(
+            guardduty_finding_detail,
+            "b",
+            2.0,
+            "2025-10-01T14:00:10Z",
+            finding_type="Recon:EC2/PortProbeUnprotectedPort",
+        ),
+        make_finding(
+            guardduty_finding_detail,
+            "c",
+            5.0,
+            "2025-10-01T14:00:20Z",
+            finding_type="Backdoor:EC2/C&CActivity.B",
+        ),
+    ]
+
+    assert coalesce_findings(findings, 60) == [[0, 2], [1]]
+
+    coalescer = ResourceCoalescer(MemoryStateStore(), window_seconds=60)
+    assert coalescer.claim(findings[0]) is True
+    assert coalescer.claim(findings[1]) is True
+    assert coalescer.claim(findings[2]) is False
+
+
+def test_unidentified_resources_are_not_grouped(guardduty_finding_detail):
+    """Tests that findings without a resource identifier are never grouped."""
+    finding = copy.deepcopy(guardduty_finding_detail)
+    finding["Resource"] = {"ResourceType": "Unknown"}
+
+    assert coalesce_findings([finding, finding], 60) == [[0], [1]]
+
+
+def test_coalescer_skips_less_severe_findings(guardduty_finding_detail):
+    """
+    Tests that a resource a playbook already ran for is only run again for a
+    more severe finding, or after the running finding is released.
+    """
+    coalescer = ResourceCoalescer(MemoryStateStore(), window_seconds=60)
+    first = make_finding(guardduty_finding_detail, "a", 5.0, "2025-10-01T14:00:00Z")
+    weaker = make_finding(guardduty_finding_detail, "b", 2.0, "2025-10-01T14:00:10Z")
+    stronger = make_finding(guardduty_finding_detail, "c", 8.0, "2025-10-01T14:00:20Z")
+
+    assert coalescer.claim(first) is True
+    assert coalescer.claim(weaker) is False
+    assert coalescer.claim(stronger) is True
+
+    # Only the finding holding the resource can release it.
+    coalescer.release(first)
+    assert coalescer.claim(weaker) is False
+    coalescer.release(stronger)
+    assert coalescer.claim(weaker) is True
@@ -72,9 +72,9 @@ def test_config_handles_missing_file_gracefully(mocker):
     [
         ("30", 30),
         ("1", 1),
-        ("50", 50),
+        ("1000", 1000),
         ("0", 1),
-        ("100", 50),
+        ("5000", 1000),
         ("abc", 25),
         (None, 25),
     ],
@@ -155,3 +155,254 @@ analyze_iam_permissions = false
             with patch("builtins.open", mock_open(read_data="[General]")):
                 config_with_fallback = get_config()
                 assert config_with_fallback.analyze_iam_permissions is True
+
+
+def test_config_prime_settings(mocker):
+    """
+    Tests that the priming settings are read from the config file, and that
+    the default clients are used when none are listed.
+    """
+    mocker.patch.dict("os.environ", clear=True)
+
+    mock_config_content = """
+[General]
+prime_on_init = true
+prime_clients =
+    ec2
+    s3
+    """
+    with patch("builtins.open", mock_open(read_data=mock_config_content)):
+        with patch("os.path.exists", return_value=True):
+            get_config.cache_clear()
+            config = get_config()
+
+            assert config.prime_on_init is True
+            assert config.prime_clients == ("ec2", "s3")
+
+    with patch("os.path.exists", return_value=False):
+        get_config.cache_clear()
+        config = get_config()
+
+        assert config.prime_on_init is False
+        assert config.prime_clients == ("ec2", "iam", "sns", "ses")
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [("true", True), ("1", True), ("false", False), ("0", False), ("no", False)],
+)
+def test_config_prime_on_init_env(value, expected, mocker):
+    """
+    Tests that GD_PRIME_ON_INIT is parsed as a boolean, and overrides the
+    config file.
+    """
+    mocker.patch.dict("os.environ", {"GD_PRIME_ON_INIT": value}, clear=True)
+
+    with patch("builtins.open", mock_open(read_data="[General]\nprime_on_init = true")):
+        with patch("os.path.exists", return_value=True):
+            get_config.cache_clear()
+            assert get_config().prime_on_init is expected
+
+
+@pytest.mark.parametrize(
+    "config_value, expected_result",
+    [("2", 2), ("0", 1), ("100", 32), ("abc", 4), (None, 4)],
+    ids=["valid_value", "clamp_below_min", "clamp_above_max", "invalid", "missing"],
+)
+def test_service_max_workers_validation(config_value, expected_result, mocker):
+    """
+    Tests the validation and clamping logic for service_max_workers.
+    """
+    mocker.patch.dict("os.environ", clear=True)
+
+    mock_config_content = "[General]\nlog_level = INFO\n"
+    if config_value is not None:
+        mock_config_content += f"service_max_workers = {config_value}"
+
+    with patch("builtins.open", mock_open(read_data=mock_config_content)):
+        with patch("os.path.exists", return_value=True):
+            get_config.cache_clear()
+            config = get_config()
+
+            assert config.service_max_workers == expected_result
+
+
+@pytest.mark.parametrize(
+    "config_value, expected_result",
+    [("8", 8), ("0", 1), ("100", 16), ("abc", 4), (None, 4)],
+    ids=["valid_value", "clamp_below_min", "clamp_above_max", "invalid", "missing"],
+)
+def test_playbook_max_workers_validation(config_value, expected_result, mocker):
+    """
+    Tests the validation and clamping logic for playbook_max_workers.
+    """
+    mocker.patch.dict("os.environ", clear=True)
+
+    mock_config_content = "[General]\nlog_level = INFO\n"
+    if config_value is not None:
+        mock_config_content += f"playbook_max_workers = {config_value}"
+
+    with patch("builtins.open", mock_open(read_data=mock_config_content)):
+        with patch("os.path.exists", return_value=True):
+            get_config.cache_clear()
+            config = get_config()
+
+            assert config.playbook_max_workers == expected_result
+
+
+def test_config_state_settings(mocker):
+    """
+    Tests that the state settings are read from the config file, that an
+    unknown backend falls back to "none", and that the window is clamped.
+    """
+    mocker.patch.dict("os.environ", clear=True)
+
+    mock_config_content = """
+[State]
+state_backend = SQLite
+state_sqlite_path = /tmp/test_state.db
+idempotency_window_seconds = 10
+    """
+    with patch("builtins.open", mock_open(read_data=mock_config_content)):
+        with patch("os.path.exists", return_value=True):
+            get_config.cache_clear()
+            config = get_config()
+
+            assert config.state_backend == "sqlite"
+            assert config.state_sqlite_path == "/tmp/test_state.db"
+            assert config.idempotency_window_seconds == 60
+
+    mocker.patch.dict("os.environ", {"GD_STATE_BACKEND": "redis"})
+    with patch("os.path.exists", return_value=False):
+        get_config.cache_clear()
+        config = get_config()
+
+        assert config.state_backend == "none"
+        assert config.state_table_name is None
+        assert config.idempotency_window_seconds == 3600
+
+
+@pytest.mark.parametrize(
+    "config_value, expected_result",
+    [("30", 30), ("-5", 0), ("999", 120), ("abc", 10), (None, 10)],
+    ids=["valid_value", "clamp_below_min", "clamp_above_max", "invalid", "missing"],
+)
+def test_deadline_reserve_seconds_validation(config_value, expected_result, mocker):
+    """
+    Tests the validation and clamping logic for deadline_reserve_seconds.
+    """
+    mocker.patch.dict("os.environ", clear=True)
+
+    mock_config_content = "[General]\nlog_level = INFO\n"
+    if config_value is not None:
+        mock_config_content += f"deadline_reserve_seconds = {config_value}"
+
+    with patch("builtins.open", mock_open(read_data=mock_config_content)):
+        with patch("os.path.exists", return_value=True):
+            get_config.cache_clear()
+            config = get_config()
+
+            assert config.deadline_reserve_seconds == expected_result
+
+
+@pytest.mark.parametrize(
+    "config_value, expected_result",
+    [("30", 30), ("-5", 0), ("99999", 3600), ("abc", 0), (None, 0)],
+    ids=["valid_value", "clamp_below_min", "clamp_above_max", "invalid", "missing"],
+)
+def test_coalesce_window_seconds_validation(config_value, expected_result, mocker):
+    """
+    Tests the validation and clamping logic for coalesce_window_seconds.
+    """
+    mocker.patch.dict("os.environ", clear=True)
+
+    mock_config_content = "[General]\nlog_level = INFO\n"
+    if config_value is not None:
+        mock_config_content += f"coalesce_window_seconds = {config_value}"
+
+    with patch("builtins.open", mock_open(read_data=mock_config_content)):
+        with patch("os.path.exists", return_value=True):
+            get_config.cache_clear()
+            config = get_config()
+
+            assert config.coalesce_window_seconds == expected_result
+
+
+@pytest.mark.parametrize(
+    "config_value, expected_result",
+    [("30", 30), ("0", 1), ("100", 40), ("abc", 20), (None, 20)],
+    ids=["valid_value", "clamp_below_min", "clamp_above_max", "invalid", "missing"],
+)
+def test_nacl_max_rules_validation(config_value, expected_result, mocker):
+    """
+    Tests the validation and clamping logic for nacl_max_rules.
+    """
+    mocker.patch.dict("os.environ", clear=True)
+
+    mock_config_content = "[General]\nlog_level = INFO\n"
+    if config_value is not None:
+        mock_config_content += f"[EC2]\nnacl_max_rules = {config_value}"
+
+    with patch("builtins.open", mock_open(read_data=mock_config_content)):
+        with patch("os.path.exists", return_value=True):
+            get_config.cache_clear()
+            config = get_config()
+
+            assert config.nacl_max_rules == expected_result
+
+
+@pytest.mark.parametrize(
+    "config_value, expected_result",
+    [("900", 900), ("-1", 0), ("999999", 86400), ("abc", 0), (None, 0)],
+    ids=["valid_value", "clamp_below_min", "clamp_above_max", "invalid", "missing"],
+)
+def test_iam_index_ttl_seconds_validation(config_value, expected_result, mocker):
+    """
+    Tests the validation and clamping logic for iam_index_ttl_seconds.
+    """
+    mocker.patch.dict("os.environ", clear=True)
+
+    mock_config_content = "[General]\nlog_level = INFO\n"
+    if config_value is not None:
+        mock_config_content += f"[IAM]\niam_index_ttl_seconds = {config_value}"
+
+    with patch("builtins.open", mock_open(read_data=mock_config_content)):
+        with patch("os.path.exists", return_value=True):
+            get_config.cache_clear()
+            config = get_config()
+
+            assert config.iam_index_ttl_seconds == expected_result
+
+
+@pytest.mark.parametrize(
+    "config_value, expected_result",
+    [("120", 120), ("0", 0), ("-5", 0), ("5000", 1440), ("abc", 60), (None, 60)],
+    ids=[
+        "valid_value",
+        "disabled",
+        "clamp_below_min",
+        "clamp_above_max",
+        "invalid",
+        "missing",
+    ],
+)
+def test_cloudtrail_history_window_minutes_validation(
+    config_value, expected_result, mocker
+):
+    """
+    Tests the validation and clamping logic for cloudtrail_history_window_minutes.
+    """
+    mocker.patch.dict("os.environ", clear=True)
+
+    mock_config_content = "[General]\nlog_level = INFO\n"
+    if config_value is not None:
+        mock_config_content += (
+            f"[IAM]\ncloudtrail_history_window_minutes = {config_value}"
+        )
+
+    with patch("builtins.open", mock_open(read_data=mock_config_content)):
+        with patch("os.path.exists", return_value=True):
+            get_config.cache_clear()
+            config = get_config()
+
+            assert config.cloudtrail_history_window_minutes == expected_result
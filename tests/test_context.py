@@ -0,0 +1,204 @@
+import threading
+import time
+from unittest.mock import MagicMock, call
+
+import pytest
+from botocore.exceptions import ClientError
+
+from guardduty_soar.actions.ec2.quarantine import QuarantineInstanceProfileAction
+from guardduty_soar.actions.ec2.snapshot import CreateSnapshotAction
+from guardduty_soar.actions.ec2.tag import TagInstanceAction
+from guardduty_soar.context import (
+    DB_INSTANCES,
+    INSTANCES,
+    SECURITY_GROUPS,
+    FindingContext,
+    SecurityGroupIndex,
+)
+
+
+def test_results_are_memoized(guardduty_finding_detail):
+    """Tests that a resource is only fetched once."""
+    context = FindingContext(guardduty_finding_detail)
+    fetch = MagicMock(return_value={"Reservations": []})
+
+    first = context.get_or_fetch(INSTANCES, "i-1", fetch)
+    second = context.get_or_fetch(INSTANCES, "i-1", fetch)
+
+    assert first is second
+    fetch.assert_called_once()
+
+
+def test_concurrent_callers_share_one_fetch(guardduty_finding_detail):
+    """Tests that callers asking for the same resource at once share a call."""
+    context = FindingContext(guardduty_finding_detail)
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.05)
+        return {"Reservations": []}
+
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(context.get_or_fetch(INSTANCES, "i-1", fetch))
+        )
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert len(results) == 5
+
+
+def test_errors_are_not_cached(guardduty_finding_detail):
+    """Tests that a failed fetch is retried by the next caller."""
+    context = FindingContext(guardduty_finding_detail)
+    error = ClientError({"Error": {"Code": "Throttling"}}, "DescribeInstances")
+    fetch = MagicMock(side_effect=[error, {"Reservations": []}])
+
+    with pytest.raises(ClientError):
+        context.get_or_fetch(INSTANCES, "i-1", fetch)
+
+    assert context.get_or_fetch(INSTANCES, "i-1", fetch) == {"Reservations": []}
+    assert fetch.call_count == 2
+
+
+def test_invalidate(guardduty_finding_detail):
+    """Tests invalidating a single resource, and every resource of a kind."""
+    context = FindingContext(guardduty_finding_detail)
+    fetch = MagicMock(return_value={})
+    for resource_id in ("sg-1", "sg-2"):
+        context.get_or_fetch(SECURITY_GROUPS, resource_id, fetch)
+    context.get_or_fetch(INSTANCES, "i-1", fetch)
+    assert fetch.call_count == 3
+
+    context.invalidate(SECURITY_GROUPS, "sg-1")
+    context.get_or_fetch(SECURITY_GROUPS, "sg-1", fetch)
+    context.get_or_fetch(SECURITY_GROUPS, "sg-2", fetch)
+    assert fetch.call_count == 4
+
+    context.invalidate(SECURITY_GROUPS)
+    context.get_or_fetch(SECURITY_GROUPS, "sg-1", fetch)
+    context.get_or_fetch(SECURITY_GROUPS, "sg-2", fetch)
+    context.get_or_fetch(INSTANCES, "i-1", fetch)
+    assert fetch.call_count == 6
+
+
+def test_actions_share_describe_instances(guardduty_finding_detail, mock_app_config):
+    """
+    Tests that actions given the same context describe the instance once, and
+    that a mutating action forces the next one to describe it again.
+    """
+    ec2_client = MagicMock()
+    ec2_client.describe_instances.return_value = {
+        "Reservations": [
+            {
+                "Instances": [
+                    {
+                        "BlockDeviceMappings": [{"Ebs": {"VolumeId": "vol-1"}}],
+                    }
+                ]
+            }
+        ]
+    }
+    ec2_client.create_snapshot.return_value = {"SnapshotId": "snap-1"}
+    session = MagicMock()
+
+    quarantine = QuarantineInstanceProfileAction(session, mock_app_config)
+    quarantine.ec2_client = ec2_client
+    snapshot = CreateSnapshotAction(session, mock_app_config)
+    snapshot.ec2_client = ec2_client
+    tag = TagInstanceAction(session, mock_app_config)
+    tag.ec2_client = ec2_client
+
+    context = FindingContext(guardduty_finding_detail)
+    quarantine.execute(guardduty_finding_detail, context=context)
+    snapshot.execute(guardduty_finding_detail, context=context)
+    assert ec2_client.describe_instances.call_count == 1
+
+    tag.execute(guardduty_finding_detail, playbook_name="Test", context=context)
+    snapshot.execute(guardduty_finding_detail, context=context)
+    assert ec2_client.describe_instances.call_count == 2
+
+
+def test_security_groups_are_described_in_one_call(guardduty_finding_detail):
+    """
+    Tests that groups missing from the index are described with a single call,
+    and that an index shared by two contexts describes each group once.
+    """
+    ec2_client = MagicMock()
+    ec2_client.describe_security_groups.side_effect = lambda GroupIds: {
+        "SecurityGroups": [{"GroupId": group_id} for group_id in GroupIds]
+    }
+    index = SecurityGroupIndex()
+    first = FindingContext(guardduty_finding_detail, security_groups=index)
+    second = FindingContext(guardduty_finding_detail, security_groups=index)
+
+    groups = first.describe_security_groups(ec2_client, ["sg-1", "sg-2"])
+    assert [group["GroupId"] for group in groups] == ["sg-1", "sg-2"]
+
+    groups = second.describe_security_groups(ec2_client, ["sg-2", "sg-3", "sg-2"])
+    assert [group["GroupId"] for group in groups] == ["sg-2", "sg-3"]
+    assert second.describe_security_group(ec2_client, "sg-1") == {
+        "SecurityGroups": [{"GroupId": "sg-1"}]
+    }
+
+    assert ec2_client.describe_security_groups.call_args_list == [
+        call(GroupIds=["sg-1", "sg-2"]),
+        call(GroupIds=["sg-3"]),
+    ]
+
+    # Invalidating through one context drops the group for every context.
+    first.invalidate(SECURITY_GROUPS, "sg-1")
+    second.describe_security_groups(ec2_client, ["sg-1", "sg-2"])
+    assert ec2_client.describe_security_groups.call_args_list[-1] == call(
+        GroupIds=["sg-1"]
+    )
+
+
+def test_missing_security_groups_are_not_cached(guardduty_finding_detail):
+    """Tests that a group missing from the response raises, and is retried."""
+    ec2_client = MagicMock()
+    ec2_client.describe_security_groups.return_value = {"SecurityGroups": []}
+    context = FindingContext(guardduty_finding_detail)
+
+    with pytest.raises(KeyError):
+        context.describe_security_group(ec2_client, "sg-1")
+    with pytest.raises(KeyError):
+        context.describe_security_group(ec2_client, "sg-1")
+
+    assert ec2_client.describe_security_groups.call_count == 2
+
+
+def test_db_instances_are_described_in_one_call(rds_finding_detail):
+    """
+    Tests that DB instances are described with one filtered call, only for
+    those not cached yet, and that they are cached for single lookups.
+    """
+    rds_client = MagicMock()
+    rds_client.describe_db_instances.return_value = {
+        "DBInstances": [{"DBInstanceIdentifier": "db-2"}]
+    }
+    context = FindingContext(rds_finding_detail)
+    context.get_or_fetch(
+        DB_INSTANCES,
+        "db-1",
+        lambda: {"DBInstances": [{"DBInstanceIdentifier": "db-1"}]},
+    )
+
+    instances = context.describe_db_instances(rds_client, ["db-1", "db-2", "db-3"])
+
+    # db-3 does not exist, so it is left out.
+    assert list(instances) == ["db-1", "db-2"]
+    rds_client.describe_db_instances.assert_called_once_with(
+        Filters=[{"Name": "db-instance-id", "Values": ["db-2", "db-3"]}]
+    )
+    assert context.describe_db_instance(rds_client, "db-2") == {
+        "DBInstances": [{"DBInstanceIdentifier": "db-2"}]
+    }
+    assert rds_client.describe_db_instances.call_count == 1
@@ -0,0 +1,34 @@
+import math
+from unittest.mock import MagicMock
+
+from guardduty_soar.deadline import Deadline
+
+
+def test_unlimited_without_lambda_context():
+    """Tests that a Deadline without a LambdaContext never runs out."""
+    deadline = Deadline.from_lambda_context({}, reserve_seconds=10)
+
+    assert deadline.remaining() == math.inf
+    assert deadline.allows(3600)
+    assert deadline.cap(60) == 60
+
+
+def test_budget_holds_back_the_reserve():
+    """Tests that the budget is the remaining time minus the reserve."""
+    context = MagicMock()
+    context.get_remaining_time_in_millis.return_value = 30000
+
+    deadline = Deadline.from_lambda_context(context, reserve_seconds=10)
+
+    assert 19 < deadline.budget() <= 20
+    assert deadline.allows(15)
+    assert not deadline.allows(25)
+    assert deadline.cap(60) <= 20
+
+
+def test_budget_never_negative():
+    """Tests that a reserve larger than the remaining time gives no budget."""
+    deadline = Deadline(remaining_ms=2000, reserve_seconds=10)
+
+    assert deadline.budget() == 0
+    assert not deadline.allows(1)
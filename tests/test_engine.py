@@ -2,34 +2,48 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 
+from guardduty_soar.checkpoints import CheckpointStore
+from guardduty_soar.coalesce import ResourceCoalescer
+from guardduty_soar.deadline import Deadline
 from guardduty_soar.engine import Engine
 from guardduty_soar.exceptions import PlaybookActionFailedError
+from guardduty_soar.idempotency import (
+    LEASE_MARGIN_SECONDS,
+    IdempotencyGuard,
+    finding_key,
+)
 from guardduty_soar.models import PlaybookResult
+from guardduty_soar.stores import MemoryStateStore
 
 
-@patch("guardduty_soar.engine.boto3.Session")
-@patch("guardduty_soar.engine.NotificationManager")
-def test_engine_initialization(
-    MockNotificationManager, MockBotoSession, guardduty_finding_detail, mock_app_config
-):
+def test_engine_initialization(guardduty_finding_detail, mock_app_config):
     """Tests that the Engine initializes correctly and sets up its components."""
-    engine = Engine(guardduty_finding_detail, mock_app_config)
+    mock_runtime = MagicMock()
+    engine = Engine(guardduty_finding_detail, mock_app_config, runtime=mock_runtime)
 
     assert engine.event == guardduty_finding_detail
     assert engine.config == mock_app_config
-    MockBotoSession.assert_called_once()
-    MockNotificationManager.assert_called_once_with(
-        MockBotoSession.return_value, mock_app_config
+    assert engine.session is mock_runtime.session
+    mock_runtime.get_notification_manager.assert_called_once_with(mock_app_config)
+    assert (
+        engine.notification_manager
+        is mock_runtime.get_notification_manager.return_value
     )
 
 
-@patch("guardduty_soar.engine.NotificationManager")
-@patch("guardduty_soar.engine.get_playbook_instance")
+@patch("guardduty_soar.engine.get_runtime")
+def test_engine_defaults_to_shared_runtime(
+    mock_get_runtime, guardduty_finding_detail, mock_app_config
+):
+    """Tests that the Engine borrows the process-wide runtime when none is given."""
+    engine = Engine(guardduty_finding_detail, mock_app_config)
+
+    assert engine.runtime is mock_get_runtime.return_value
+
+
 @patch("guardduty_soar.engine.map_resource_to_model")  # Add patch for the mapper
 def test_handle_finding_success(
     mock_map_resource,
-    mock_get_playbook,
-    MockNotificationManager,
     guardduty_finding_detail,
     mock_app_config,
 ):
@@ -46,19 +60,23 @@ def test_handle_finding_success(
     }
     mock_playbook = MagicMock()
     mock_playbook.run.return_value = mock_playbook_result
-    mock_get_playbook.return_value = mock_playbook
+    mock_runtime = MagicMock()
+    mock_runtime.get_playbook.return_value = mock_playbook
 
     # Mock the resource model that the engine will create
     mock_resource_model = MagicMock()
     mock_map_resource.return_value = mock_resource_model
 
-    engine = Engine(guardduty_finding_detail, mock_app_config)
-    mock_notification_manager = MockNotificationManager.return_value
+    engine = Engine(guardduty_finding_detail, mock_app_config, runtime=mock_runtime)
+    mock_notification_manager = mock_runtime.get_notification_manager.return_value
 
     # --- Act ---
     engine.handle_finding()
 
     # --- Assert ---
+    mock_runtime.get_playbook.assert_called_once_with(
+        guardduty_finding_detail["Type"], mock_app_config
+    )
     # THE FIX 2: Verify send_complete_notification is called with the new named arguments
     mock_notification_manager.send_complete_notification.assert_called_once_with(
         finding=guardduty_finding_detail,
@@ -66,14 +84,11 @@ def test_handle_finding_success(
         action_results=mock_playbook_result["action_results"],
         resource=mock_resource_model,
         enriched_data=mock_playbook_result["enriched_data"],
+        merged_findings=[],
     )
 
 
-@patch("guardduty_soar.engine.NotificationManager")
-@patch("guardduty_soar.engine.get_playbook_instance")
 def test_handle_finding_playbook_fails(
-    mock_get_playbook,
-    MockNotificationManager,
     guardduty_finding_detail,
     mock_app_config,
 ):
@@ -82,10 +97,11 @@ def test_handle_finding_playbook_fails(
     """
     mock_playbook = MagicMock()
     mock_playbook.run.side_effect = PlaybookActionFailedError("Action failed!")
-    mock_get_playbook.return_value = mock_playbook
+    mock_runtime = MagicMock()
+    mock_runtime.get_playbook.return_value = mock_playbook
 
-    engine = Engine(guardduty_finding_detail, mock_app_config)
-    mock_notification_manager = MockNotificationManager.return_value
+    engine = Engine(guardduty_finding_detail, mock_app_config, runtime=mock_runtime)
+    mock_notification_manager = mock_runtime.get_notification_manager.return_value
 
     engine.handle_finding()
 
@@ -95,3 +111,228 @@ def test_handle_finding_playbook_fails(
     # Check that the failure was correctly added to the action_results
     assert len(call_args.kwargs["action_results"]) == 1
     assert call_args.kwargs["action_results"][0]["status"] == "error"
+
+
+def test_handle_finding_waits_for_notifications(
+    guardduty_finding_detail, mock_app_config
+):
+    """
+    Tests that the engine waits for every queued notification, even when
+    the playbook raises an unexpected error.
+    """
+    mock_runtime = MagicMock()
+    mock_runtime.get_playbook.return_value.run.side_effect = RuntimeError("boom")
+    mock_notification_manager = mock_runtime.get_notification_manager.return_value
+    starting = [MagicMock()]
+    mock_notification_manager.send_starting_notification.return_value = starting
+
+    engine = Engine(guardduty_finding_detail, mock_app_config, runtime=mock_runtime)
+
+    with pytest.raises(RuntimeError):
+        engine.handle_finding()
+
+    mock_notification_manager.wait.assert_called_once_with(starting, timeout=None)
+
+
+class CheckpointedPlaybook:
+    """A playbook accepting a FindingContext, that fails when asked to."""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+
+    def run(self, event, context=None):
+        context.checkpoint(type(self).__name__).save(
+            "Tag", {"status": "success", "details": "Tagged."}
+        )
+        if self.fail:
+            raise PlaybookActionFailedError("Action failed!")
+        return {"action_results": [], "enriched_data": None}
+
+
+def test_handle_finding_skips_repeats(guardduty_finding_detail, mock_app_config):
+    """Tests that a finding the idempotency guard rejects is not run again."""
+    mock_runtime = MagicMock()
+    mock_runtime.get_idempotency_guard.return_value.claim.return_value = False
+
+    engine = Engine(guardduty_finding_detail, mock_app_config, runtime=mock_runtime)
+
+    assert engine.handle_finding() is False
+    mock_runtime.get_playbook.assert_not_called()
+    mock_runtime.get_notification_manager.return_value.send_starting_notification.assert_not_called()
+
+
+def test_handle_finding_resumes_interrupted_run_once_its_lease_ends(
+    guardduty_finding_detail, mock_app_config, mocker
+):
+    """
+    Tests that a duplicate of a finding whose run is still in progress is
+    skipped, even though the run left a checkpoint behind, and that a retry
+    after the run's lease ran out resumes it.
+    """
+    now = 1_000_000.0
+    mocker.patch("time.time", side_effect=lambda: now)
+    store = MemoryStateStore()
+    guard = IdempotencyGuard(store, window_seconds=3600)
+    guard.claim(guardduty_finding_detail, owner="interrupted-run", lease_seconds=60)
+    checkpoints = CheckpointStore(store, 3600)
+    checkpoints.for_playbook(guardduty_finding_detail, "CheckpointedPlaybook").save(
+        "Tag", {"status": "success", "details": "Tagged."}
+    )
+    mock_runtime = MagicMock()
+    mock_runtime.get_idempotency_guard.return_value = guard
+    mock_runtime.get_coalescer.return_value = None
+    mock_runtime.get_checkpoint_store.return_value = checkpoints
+    mock_runtime.get_playbook.return_value = CheckpointedPlaybook()
+
+    duplicate = Engine(guardduty_finding_detail, mock_app_config, runtime=mock_runtime)
+    assert duplicate.handle_finding() is False
+    mock_runtime.get_playbook.assert_not_called()
+
+    now += 61
+    retry = Engine(guardduty_finding_detail, mock_app_config, runtime=mock_runtime)
+    assert retry.handle_finding() is True
+    assert (
+        checkpoints.for_playbook(
+            guardduty_finding_detail, "CheckpointedPlaybook"
+        ).load()
+        == {}
+    )
+    assert store.get(finding_key(guardduty_finding_detail))["status"] == "completed"
+
+
+def test_handle_finding_releases_claim_on_failure(
+    guardduty_finding_detail, mock_app_config
+):
+    """
+    Tests that a failed playbook releases its claim, so the re-emitted finding
+    runs again, while a successful one keeps it.
+    """
+    mock_runtime = MagicMock()
+    mock_guard = mock_runtime.get_idempotency_guard.return_value
+    mock_guard.claim.return_value = True
+    mock_runtime.get_playbook.return_value.run.side_effect = PlaybookActionFailedError(
+        "Action failed!"
+    )
+
+    engine = Engine(guardduty_finding_detail, mock_app_config, runtime=mock_runtime)
+
+    assert engine.handle_finding() is True
+    mock_guard.claim.assert_called_once_with(
+        guardduty_finding_detail, owner=engine.owner, lease_seconds=None
+    )
+    mock_guard.release.assert_called_once_with(
+        guardduty_finding_detail, owner=engine.owner
+    )
+    mock_guard.complete.assert_not_called()
+
+
+def test_handle_finding_completes_claim_on_success(
+    guardduty_finding_detail, mock_app_config
+):
+    """
+    Tests that a successful playbook completes its claim, leased for the rest
+    of the invocation.
+    """
+    mock_runtime = MagicMock()
+    mock_guard = mock_runtime.get_idempotency_guard.return_value
+    mock_guard.claim.return_value = True
+    mock_runtime.get_coalescer.return_value = None
+    mock_runtime.get_playbook.return_value.run.return_value = {
+        "action_results": [],
+        "enriched_data": None,
+    }
+
+    engine = Engine(
+        guardduty_finding_detail,
+        mock_app_config,
+        runtime=mock_runtime,
+        deadline=Deadline(remaining_ms=300_000),
+    )
+
+    assert engine.handle_finding() is True
+    lease = mock_guard.claim.call_args.kwargs["lease_seconds"]
+    assert 300 < lease <= 300 + LEASE_MARGIN_SECONDS
+    mock_guard.complete.assert_called_once_with(
+        guardduty_finding_detail, owner=engine.owner
+    )
+    mock_guard.release.assert_not_called()
+
+
+def test_handle_finding_fails_open(guardduty_finding_detail, mock_app_config):
+    """Tests that an unavailable state store does not stop the playbook."""
+    mock_runtime = MagicMock()
+    mock_runtime.get_idempotency_guard.return_value.claim.side_effect = Exception(
+        "unavailable"
+    )
+    mock_runtime.get_playbook.return_value.run.return_value = {
+        "action_results": [],
+        "enriched_data": None,
+    }
+
+    engine = Engine(guardduty_finding_detail, mock_app_config, runtime=mock_runtime)
+
+    assert engine.handle_finding() is True
+    mock_runtime.get_playbook.return_value.run.assert_called_once()
+
+
+def test_handle_finding_skips_coalesced_findings(
+    guardduty_finding_detail, mock_app_config
+):
+    """Tests that a finding covered by the coalescer is not run."""
+    mock_runtime = MagicMock()
+    mock_runtime.get_idempotency_guard.return_value = None
+    mock_runtime.get_coalescer.return_value.claim.return_value = False
+
+    engine = Engine(guardduty_finding_detail, mock_app_config, runtime=mock_runtime)
+
+    assert engine.handle_finding() is False
+    mock_runtime.get_playbook.assert_not_called()
+
+
+def test_handle_finding_releases_claim_of_coalesced_findings(
+    guardduty_finding_detail, mock_app_config
+):
+    """
+    Tests that a finding the coalescer rejects does not keep its idempotency
+    claim, so a re-emission can still run if the covering run fails.
+    """
+    store = MemoryStateStore()
+    guard = IdempotencyGuard(store, window_seconds=3600)
+    coalescer = ResourceCoalescer(store, window_seconds=60)
+    covering = dict(guardduty_finding_detail, Id="covering-finding", Severity=9.0)
+    assert coalescer.claim(covering) is True
+    mock_runtime = MagicMock()
+    mock_runtime.get_idempotency_guard.return_value = guard
+    mock_runtime.get_coalescer.return_value = coalescer
+
+    engine = Engine(guardduty_finding_detail, mock_app_config, runtime=mock_runtime)
+
+    assert engine.handle_finding() is False
+    mock_runtime.get_playbook.assert_not_called()
+    assert store.get(finding_key(guardduty_finding_detail)) is None
+    assert guard.claim(guardduty_finding_detail, owner="re-emission") is True
+
+
+@pytest.mark.parametrize("fail, kept", [(False, False), (True, True)])
+def test_handle_finding_checkpoints(
+    guardduty_finding_detail, mock_app_config, fail, kept
+):
+    """
+    Tests that the checkpoint is cleared once the playbook completes, and kept
+    for the retry when it fails.
+    """
+    checkpoints = CheckpointStore(MemoryStateStore(), 3600)
+    mock_runtime = MagicMock()
+    mock_runtime.get_idempotency_guard.return_value = None
+    mock_runtime.get_coalescer.return_value = None
+    mock_runtime.get_checkpoint_store.return_value = checkpoints
+    mock_runtime.get_playbook.return_value = CheckpointedPlaybook(fail=fail)
+
+    Engine(
+        guardduty_finding_detail, mock_app_config, runtime=mock_runtime
+    ).handle_finding()
+
+    saved = checkpoints.for_playbook(
+        guardduty_finding_detail, "CheckpointedPlaybook"
+    ).load()
+    assert bool(saved) is kept
@@ -0,0 +1,189 @@
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from guardduty_soar.checkpoints import CheckpointStore
+from guardduty_soar.deadline import Deadline
+from guardduty_soar.exceptions import PlaybookActionFailedError
+from guardduty_soar.executor import PlaybookExecutor, PlaybookStep
+from guardduty_soar.stores import MemoryStateStore
+
+
+def make_action(status="success", details="done", delay=0.0, calls=None, name=None):
+    """Builds a mock action that records the order it was executed in."""
+    action = MagicMock()
+
+    def execute(event, **kwargs):
+        time.sleep(delay)
+        if calls is not None:
+            calls.append(name)
+        return {"status": status, "details": details}
+
+    action.execute.side_effect = execute
+    return action
+
+
+def test_results_are_in_declared_order(guardduty_finding_detail):
+    """Tests that results follow the step order, not the completion order."""
+    steps = [
+        PlaybookStep("First", make_action()),
+        PlaybookStep("Slow", make_action(delay=0.05), depends_on=("First",)),
+        PlaybookStep("Fast", make_action(), depends_on=("First",)),
+    ]
+
+    results = PlaybookExecutor(steps).run(guardduty_finding_detail)
+
+    assert [result["action_name"] for result in results] == ["First", "Slow", "Fast"]
+    assert all(result["status"] == "success" for result in results)
+
+
+def test_independent_steps_run_concurrently(guardduty_finding_detail):
+    """Tests that steps sharing only a dependency overlap in time."""
+    barrier = threading.Barrier(3, timeout=2)
+    actions = []
+    for _ in range(3):
+        action = MagicMock()
+        action.execute.side_effect = lambda event, **kwargs: (
+            barrier.wait(),
+            {"status": "success", "details": "done"},
+        )[1]
+        actions.append(action)
+
+    steps = [PlaybookStep(f"Step{i}", action) for i, action in enumerate(actions)]
+
+    # Would raise BrokenBarrierError if the steps ran one after another.
+    results = PlaybookExecutor(steps, max_workers=3).run(guardduty_finding_detail)
+
+    assert len(results) == 3
+
+
+def test_dependencies_are_respected(guardduty_finding_detail):
+    """Tests that a step only starts after every step it depends on."""
+    calls = []
+    steps = [
+        PlaybookStep("A", make_action(delay=0.02, calls=calls, name="A")),
+        PlaybookStep("B", make_action(calls=calls, name="B")),
+        PlaybookStep("C", make_action(calls=calls, name="C"), depends_on=("A", "B")),
+    ]
+
+    PlaybookExecutor(steps).run(guardduty_finding_detail)
+
+    assert calls[-1] == "C"
+
+
+def test_failed_step_halts_playbook(guardduty_finding_detail):
+    """Tests fail-fast behavior, dependents of a failed step never run."""
+    dependent = make_action()
+    steps = [
+        PlaybookStep("Tag", make_action(status="error", details="denied")),
+        PlaybookStep("Terminate", dependent, depends_on=("Tag",)),
+    ]
+
+    with pytest.raises(PlaybookActionFailedError, match="denied"):
+        PlaybookExecutor(steps).run(guardduty_finding_detail)
+
+    dependent.execute.assert_not_called()
+
+
+def test_non_fatal_step_does_not_halt(guardduty_finding_detail):
+    """Tests that a step with fail_on_error=False reports its error and continues."""
+    steps = [
+        PlaybookStep("Enrich", make_action(status="error"), fail_on_error=False),
+        PlaybookStep("Tag", make_action(), depends_on=("Enrich",)),
+    ]
+
+    results = PlaybookExecutor(steps).run(guardduty_finding_detail)
+
+    assert [result["status"] for result in results] == ["error", "success"]
+
+
+def test_action_kwargs_are_passed(guardduty_finding_detail):
+    """Tests that the step kwargs are passed to the action."""
+    action = make_action()
+    steps = [PlaybookStep("Tag", action, kwargs={"playbook_name": "Test"})]
+
+    PlaybookExecutor(steps).run(guardduty_finding_detail)
+
+    action.execute.assert_called_once_with(
+        guardduty_finding_detail, playbook_name="Test"
+    )
+
+
+def test_undeclared_dependency_is_rejected():
+    """Tests that a dependency must be declared before the step using it."""
+    steps = [
+        PlaybookStep("Terminate", MagicMock(), depends_on=("Tag",)),
+        PlaybookStep("Tag", MagicMock()),
+    ]
+
+    with pytest.raises(ValueError, match="not declared before it"):
+        PlaybookExecutor(steps)
+
+
+def test_optional_steps_skipped_when_out_of_time(guardduty_finding_detail):
+    """
+    Tests that optional steps are skipped once the deadline's budget is too
+    small, while containment steps and their dependents still run.
+    """
+    enrich = make_action()
+    isolate = make_action()
+    steps = [
+        PlaybookStep("Enrich", enrich, optional=True, fail_on_error=False),
+        PlaybookStep("Isolate", isolate, depends_on=("Enrich",)),
+    ]
+    deadline = Deadline(remaining_ms=5000, reserve_seconds=1)
+
+    results = PlaybookExecutor(
+        steps, deadline=deadline, optional_step_min_seconds=10
+    ).run(guardduty_finding_detail)
+
+    assert [result["status"] for result in results] == ["skipped", "success"]
+    enrich.execute.assert_not_called()
+    isolate.execute.assert_called_once()
+
+
+def test_containment_steps_start_first(guardduty_finding_detail):
+    """Tests that steps that are not optional are started before optional ones."""
+    calls = []
+    steps = [
+        PlaybookStep("Enrich", make_action(calls=calls, name="Enrich"), optional=True),
+        PlaybookStep("Isolate", make_action(calls=calls, name="Isolate")),
+    ]
+
+    PlaybookExecutor(steps, max_workers=1, deadline=Deadline()).run(
+        guardduty_finding_detail
+    )
+
+    assert calls == ["Isolate", "Enrich"]
+
+
+def test_resumes_from_checkpoint(guardduty_finding_detail):
+    """
+    Tests that completed steps are checkpointed, and that a retried run only
+    runs the steps missing from the checkpoint, reporting the saved results.
+    """
+    checkpoints = CheckpointStore(MemoryStateStore(), 3600)
+    tag = make_action(details="Tagged.")
+    isolate = make_action(status="error", details="Throttled.")
+    steps = [
+        PlaybookStep("Tag", tag),
+        PlaybookStep("Isolate", isolate, depends_on=("Tag",)),
+    ]
+
+    with pytest.raises(PlaybookActionFailedError):
+        PlaybookExecutor(
+            steps,
+            checkpoint=checkpoints.for_playbook(guardduty_finding_detail, "Test"),
+        ).run(guardduty_finding_detail)
+
+    isolate.execute.side_effect = None
+    isolate.execute.return_value = {"status": "success", "details": "Isolated."}
+    results = PlaybookExecutor(
+        steps, checkpoint=checkpoints.for_playbook(guardduty_finding_detail, "Test")
+    ).run(guardduty_finding_detail)
+
+    assert tag.execute.call_count == 1
+    assert isolate.execute.call_count == 2
+    assert [result["details"] for result in results] == ["Tagged.", "Isolated."]
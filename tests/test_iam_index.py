@@ -0,0 +1,192 @@
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from guardduty_soar.deadline import Deadline
+from guardduty_soar.iam_index import IamAuthorizationIndex, build_index
+
+LOCAL_POLICY_ARN = "arn:aws:iam::123456789012:policy/local-policy"
+AWS_POLICY_ARN = "arn:aws:iam::aws:policy/ReadOnlyAccess"
+
+
+def make_iam_client(pages=None):
+    """Creates an IAM client whose paginator returns the given pages."""
+    if pages is None:
+        pages = [
+            {
+                "UserDetailList": [
+                    {
+                        "UserName": "test-user",
+                        "UserId": "AIDA1",
+                        "Arn": "arn:aws:iam::123456789012:user/test-user",
+                        "CreateDate": datetime(2025, 1, 1),
+                        "GroupList": ["admins"],
+                        "UserPolicyList": [
+                            {"PolicyName": "inline", "PolicyDocument": {"A": 1}}
+                        ],
+                        "AttachedManagedPolicies": [
+                            {
+                                "PolicyName": "local-policy",
+                                "PolicyArn": LOCAL_POLICY_ARN,
+                            }
+                        ],
+                    }
+                ]
+            },
+            {
+                "RoleDetailList": [
+                    {
+                        "RoleName": "test-role",
+                        "RoleId": "AROA1",
+                        "PermissionsBoundary": {
+                            "PermissionsBoundaryType": "Policy",
+                            "PermissionsBoundaryArn": LOCAL_POLICY_ARN,
+                        },
+                        "InstanceProfileList": [
+                            {
+                                "InstanceProfileName": "test-profile",
+                                "InstanceProfileId": "AIPA1",
+                                "Roles": [{"RoleName": "test-role"}],
+                            }
+                        ],
+                        "AttachedManagedPolicies": [
+                            {
+                                "PolicyName": "ReadOnlyAccess",
+                                "PolicyArn": AWS_POLICY_ARN,
+                            }
+                        ],
+                    }
+                ],
+                "Policies": [
+                    {
+                        "PolicyName": "local-policy",
+                        "PolicyId": "ANPA1",
+                        "Arn": LOCAL_POLICY_ARN,
+                        "DefaultVersionId": "v2",
+                        "PolicyVersionList": [
+                            {
+                                "VersionId": "v1",
+                                "IsDefaultVersion": False,
+                                "Document": {},
+                            },
+                            {
+                                "VersionId": "v2",
+                                "IsDefaultVersion": True,
+                                "Document": {"Statement": []},
+                            },
+                        ],
+                    }
+                ],
+            },
+        ]
+    iam_client = MagicMock()
+    iam_client.get_paginator.return_value.paginate.return_value = pages
+    return iam_client
+
+
+def test_build_index():
+    """Tests that every page is indexed into the compact structure."""
+    iam_client = make_iam_client()
+
+    snapshot = build_index(iam_client)
+
+    iam_client.get_paginator.assert_called_once_with(
+        "get_account_authorization_details"
+    )
+    iam_client.get_paginator.return_value.paginate.assert_called_once_with(
+        Filter=["User", "Role", "LocalManagedPolicy"]
+    )
+    user = snapshot["users"]["test-user"]
+    assert user["details"] == {
+        "UserName": "test-user",
+        "UserId": "AIDA1",
+        "Arn": "arn:aws:iam::123456789012:user/test-user",
+        "CreateDate": "2025-01-01 00:00:00",
+    }
+    assert user["inline_policies"] == {"inline": {"A": 1}}
+    # The role keeps its permissions boundary, but the API returns no
+    # Description or MaxSessionDuration for the index to keep.
+    assert snapshot["roles"]["test-role"]["details"] == {
+        "RoleName": "test-role",
+        "RoleId": "AROA1",
+        "PermissionsBoundary": {
+            "PermissionsBoundaryType": "Policy",
+            "PermissionsBoundaryArn": LOCAL_POLICY_ARN,
+        },
+    }
+    assert "instance_profiles" not in snapshot
+    assert snapshot["policies"][LOCAL_POLICY_ARN] == {
+        "PolicyName": "local-policy",
+        "PolicyId": "ANPA1",
+        "DefaultVersionId": "v2",
+        "Document": {"Statement": []},
+    }
+
+
+def test_lookups_share_one_pull_until_expired():
+    """Tests that lookups reuse the snapshot, and that it is rebuilt after its TTL."""
+    iam_client = make_iam_client()
+    index = IamAuthorizationIndex(ttl_seconds=60)
+
+    with patch("guardduty_soar.iam_index.time.time", return_value=1000.0):
+        assert index.get_user(iam_client, "test-user")["details"]["UserId"] == "AIDA1"
+        assert index.get_role(iam_client, "test-role") is not None
+        assert index.get_role(iam_client, "missing-role") is None
+        assert index.get_managed_policy(iam_client, AWS_POLICY_ARN) is None
+        assert iam_client.get_paginator.call_count == 1
+
+    with patch("guardduty_soar.iam_index.time.time", return_value=1061.0):
+        index.get_user(iam_client, "test-user")
+        assert iam_client.get_paginator.call_count == 2
+
+
+def test_index_is_persisted(tmp_path):
+    """Tests that a fresh persisted snapshot is loaded by a new index."""
+    path = str(tmp_path / "iam_index.json")
+    IamAuthorizationIndex(60, path).snapshot(make_iam_client())
+
+    iam_client = make_iam_client()
+    assert IamAuthorizationIndex(60, path).get_user(iam_client, "test-user")
+    iam_client.get_paginator.assert_not_called()
+
+
+def test_index_fails_open_and_backs_off():
+    """Tests that a failed build is a miss, and is not retried on every lookup."""
+    iam_client = MagicMock()
+    iam_client.get_paginator.side_effect = Exception("AccessDenied")
+    index = IamAuthorizationIndex(ttl_seconds=600)
+
+    with patch("guardduty_soar.iam_index.time.time", return_value=1000.0):
+        assert index.get_user(iam_client, "test-user") is None
+        assert index.get_user(iam_client, "test-user") is None
+        assert iam_client.get_paginator.call_count == 1
+
+    with patch("guardduty_soar.iam_index.time.time", return_value=1301.0):
+        assert index.get_user(iam_client, "test-user") is None
+        assert iam_client.get_paginator.call_count == 2
+
+
+def test_index_is_not_built_without_enough_time():
+    """Tests that a lookup misses, instead of building, near the deadline."""
+    iam_client = make_iam_client()
+    index = IamAuthorizationIndex(ttl_seconds=60)
+
+    assert index.get_role(iam_client, "test-role", Deadline(5000)) is None
+    iam_client.get_paginator.assert_not_called()
+
+    assert index.get_role(iam_client, "test-role", Deadline(60000)) is not None
+    assert index.get_role(iam_client, "test-role", Deadline(5000)) is not None
+    assert iam_client.get_paginator.call_count == 1
+
+
+def test_lookups_do_not_wait_for_a_rebuild():
+    """Tests that a lookup misses while another thread rebuilds the index."""
+    iam_client = make_iam_client()
+    index = IamAuthorizationIndex(ttl_seconds=60)
+
+    with index._lock:
+        assert index.get_user(iam_client, "test-user") is None
+    iam_client.get_paginator.assert_not_called()
+
+    assert index.get_user(iam_client, "test-user") is not None
@@ -0,0 +1,105 @@
+import copy
+
+from guardduty_soar.idempotency import IdempotencyGuard, finding_key
+from guardduty_soar.stores import MemoryStateStore
+
+
+def test_finding_key_includes_resource(guardduty_finding_detail):
+    """Tests that the key is built from the finding Id and the resource."""
+    assert finding_key(guardduty_finding_detail) == (
+        f"{guardduty_finding_detail['Id']}#Instance:i-99999999"
+    )
+
+
+def test_finding_key_for_s3_buckets(guardduty_finding_detail):
+    """Tests that every bucket of an S3 finding is part of the key."""
+    finding = copy.deepcopy(guardduty_finding_detail)
+    finding["Resource"] = {
+        "ResourceType": "S3Bucket",
+        "S3BucketDetails": [{"Name": "bucket-b"}, {"Name": "bucket-a"}],
+    }
+
+    assert finding_key(finding).endswith("#S3Bucket:bucket-a,bucket-b")
+
+
+def test_repeats_are_skipped_and_recorded(guardduty_finding_detail):
+    """
+    Tests that a re-emitted finding is not claimed again, and that its latest
+    count is recorded against the original claim.
+    """
+    store = MemoryStateStore()
+    guard = IdempotencyGuard(store, window_seconds=3600)
+    repeat = copy.deepcopy(guardduty_finding_detail)
+    repeat.setdefault("Service", {})["Count"] = 7
+
+    assert guard.claim(guardduty_finding_detail, owner="run-1") is True
+    guard.complete(guardduty_finding_detail, owner="run-1")
+    assert guard.claim(repeat) is False
+    assert store.get(finding_key(repeat))["count"] == 7
+
+
+def test_release_allows_reprocessing(guardduty_finding_detail):
+    """Tests that a released finding can be claimed again."""
+    guard = IdempotencyGuard(MemoryStateStore(), window_seconds=3600)
+
+    assert guard.claim(guardduty_finding_detail, owner="run-1") is True
+    guard.release(guardduty_finding_detail, owner="run-1")
+    assert guard.claim(guardduty_finding_detail, owner="run-2") is True
+
+
+def test_in_progress_claim_is_skipped_until_its_lease_ends(
+    guardduty_finding_detail, mocker
+):
+    """
+    Tests that a claim that was never completed (e.g. the invocation timed
+    out) only blocks retries until its lease runs out.
+    """
+    now = 1_000_000.0
+    mocker.patch("time.time", side_effect=lambda: now)
+    store = MemoryStateStore()
+    guard = IdempotencyGuard(store, window_seconds=3600)
+
+    assert guard.claim(guardduty_finding_detail, owner="run-1", lease_seconds=60)
+    assert store.get(finding_key(guardduty_finding_detail))["status"] == "in_progress"
+    assert guard.claim(guardduty_finding_detail, owner="run-2") is False
+
+    now += 61
+    assert guard.claim(guardduty_finding_detail, owner="run-2") is True
+    assert store.get(finding_key(guardduty_finding_detail))["owner"] == "run-2"
+
+
+def test_completed_claim_lasts_for_the_window(guardduty_finding_detail, mocker):
+    """Tests that a completed claim is kept for the window, not the lease."""
+    now = 1_000_000.0
+    mocker.patch("time.time", side_effect=lambda: now)
+    guard = IdempotencyGuard(MemoryStateStore(), window_seconds=3600)
+
+    guard.claim(guardduty_finding_detail, owner="run-1", lease_seconds=60)
+    guard.complete(guardduty_finding_detail, owner="run-1")
+
+    now += 3000
+    assert guard.claim(guardduty_finding_detail, owner="run-2") is False
+    now += 601
+    assert guard.claim(guardduty_finding_detail, owner="run-2") is True
+
+
+def test_only_the_owner_completes_or_releases(guardduty_finding_detail, mocker):
+    """
+    Tests that a run whose lease ran out does not complete or release the
+    claim a retry took over.
+    """
+    now = 1_000_000.0
+    mocker.patch("time.time", side_effect=lambda: now)
+    store = MemoryStateStore()
+    guard = IdempotencyGuard(store, window_seconds=3600)
+
+    guard.claim(guardduty_finding_detail, owner="run-1", lease_seconds=60)
+    now += 61
+    guard.claim(guardduty_finding_detail, owner="run-2", lease_seconds=60)
+
+    guard.release(guardduty_finding_detail, owner="run-1")
+    guard.complete(guardduty_finding_detail, owner="run-1")
+
+    record = store.get(finding_key(guardduty_finding_detail))
+    assert record["owner"] == "run-2"
+    assert record["status"] == "in_progress"
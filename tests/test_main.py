@@ -1,11 +1,14 @@
 import importlib
+import json
 import logging
 import sys
-from unittest.mock import MagicMock, call, patch
+import threading
+from unittest.mock import ANY, MagicMock, call, patch
 
 import pytest
 
-from guardduty_soar.main import handler, load_playbooks, setup_logging
+from guardduty_soar.exceptions import ConfigurationError, PlaybookActionFailedError
+from guardduty_soar.main import batch_handler, handler, load_playbooks, setup_logging
 
 logger = logging.getLogger(__name__)
 
@@ -38,7 +41,11 @@ def test_main_handler_success(valid_guardduty_event, mock_app_config):
 
             assert result["statusCode"] == 200
             MockEngine.assert_called_once_with(
-                valid_guardduty_event["detail"], mock_app_config
+                valid_guardduty_event["detail"],
+                mock_app_config,
+                merged_findings=None,
+                deadline=ANY,
+                security_groups=None,
             )
             mock_engine_instance.handle_finding.assert_called_once()
 
@@ -59,6 +66,135 @@ def test_main_handler_ignores_finding(valid_guardduty_event, mock_app_config):
             MockEngine.assert_not_called()  # Engine should never be initialized
 
 
+def _sqs_batch(*bodies):
+    """Wraps message bodies in a minimal SQS event."""
+    return {
+        "Records": [
+            {"messageId": f"message-{index}", "body": body}
+            for index, body in enumerate(bodies)
+        ]
+    }
+
+
+def test_batch_handler_reports_only_failed_items(
+    valid_guardduty_event, mock_app_config
+):
+    """
+    Tests that only findings failing with a server side error are reported for
+    retry, and that bad input is not retried.
+    """
+    failing = json.loads(json.dumps(valid_guardduty_event))
+    failing["detail"]["Id"] = "failing"
+    event = _sqs_batch(
+        json.dumps(valid_guardduty_event), json.dumps(failing), "{not json"
+    )
+
+    def make_engine(
+        detail, config, merged_findings=None, deadline=None, security_groups=None
+    ):
+        engine = MagicMock()
+        if detail["Id"] == "failing":
+            engine.handle_finding.side_effect = PlaybookActionFailedError("boom")
+        return engine
+
+    with patch("guardduty_soar.main.get_config", return_value=mock_app_config):
+        with patch("guardduty_soar.main.Engine", side_effect=make_engine):
+            result = batch_handler(event, {})
+
+    assert result == {"batchItemFailures": [{"itemIdentifier": "message-1"}]}
+
+
+def test_batch_handler_unexpected_error_is_retried(
+    valid_guardduty_event, mock_app_config
+):
+    """Tests that an unexpected exception fails only its own item."""
+    with patch("guardduty_soar.main.get_config", return_value=mock_app_config):
+        with patch("guardduty_soar.main.Engine") as MockEngine:
+            MockEngine.return_value.handle_finding.side_effect = RuntimeError("boom")
+            result = batch_handler([valid_guardduty_event], {})
+
+    assert result == {
+        "batchItemFailures": [{"itemIdentifier": valid_guardduty_event["id"]}]
+    }
+
+
+def test_batch_handler_retries_configuration_errors(
+    valid_guardduty_event, mock_app_config
+):
+    """
+    Tests that a finding failing on an invalid configuration (e.g. a dynamodb
+    state backend without a table) is retried, not dropped as bad input.
+    """
+    with patch("guardduty_soar.main.get_config", return_value=mock_app_config):
+        with patch("guardduty_soar.main.Engine") as MockEngine:
+            MockEngine.return_value.handle_finding.side_effect = ConfigurationError(
+                "'state_table_name' is required for the dynamodb backend."
+            )
+            result = batch_handler([valid_guardduty_event], {})
+            response = handler(valid_guardduty_event, {})
+
+    assert result == {
+        "batchItemFailures": [{"itemIdentifier": valid_guardduty_event["id"]}]
+    }
+    assert response["statusCode"] == 500
+
+
+def test_batch_handler_processes_list_in_parallel(
+    valid_guardduty_event, mock_app_config
+):
+    """Tests that a list of events is processed concurrently."""
+    mock_app_config.batch_max_workers = 3
+    barrier = threading.Barrier(3, timeout=2)
+
+    with patch("guardduty_soar.main.get_config", return_value=mock_app_config):
+        with patch("guardduty_soar.main.Engine") as MockEngine:
+            MockEngine.return_value.handle_finding.side_effect = lambda: barrier.wait()
+            result = batch_handler([valid_guardduty_event] * 3, {})
+
+    assert result == {"batchItemFailures": []}
+    assert MockEngine.call_count == 3
+    # Every finding of the batch shares one security group index.
+    indexes = {id(c.kwargs["security_groups"]) for c in MockEngine.call_args_list}
+    assert len(indexes) == 1
+
+
+def test_batch_handler_coalesces_findings(valid_guardduty_event, mock_app_config):
+    """
+    Tests that findings for the same resource run one playbook, for the most
+    severe finding, and that its failure is retried for every finding.
+    """
+    mock_app_config.coalesce_window_seconds = 60
+    events = []
+    for index, (finding_type, severity) in enumerate(
+        [("Recon:EC2/Portscan", 5.0), ("Backdoor:EC2/Spambot", 8.0)]
+    ):
+        event = json.loads(json.dumps(valid_guardduty_event))
+        event["id"] = f"event-{index}"
+        event["detail"].update(
+            {"Id": f"finding-{index}", "Type": finding_type, "Severity": severity}
+        )
+        events.append(event)
+
+    with patch("guardduty_soar.main.get_config", return_value=mock_app_config):
+        with patch("guardduty_soar.main.Engine") as MockEngine:
+            MockEngine.return_value.handle_finding.side_effect = RuntimeError("boom")
+            result = batch_handler(events, {})
+
+    MockEngine.assert_called_once_with(
+        events[1]["detail"],
+        mock_app_config,
+        merged_findings=[events[0]["detail"]],
+        deadline=ANY,
+        security_groups=ANY,
+    )
+    assert result == {
+        "batchItemFailures": [
+            {"itemIdentifier": "event-0"},
+            {"itemIdentifier": "event-1"},
+        ]
+    }
+
+
 class TestLoadPlaybooks:
     """Unit tests for the dynamic playbook and action loader."""
 
@@ -130,3 +266,31 @@ class TestLoadPlaybooks:
         load_playbooks(package_dir_override=fake_package_dir)
 
         mock_import.assert_not_called()
+
+
+def test_batch_handler_runs_most_severe_first(valid_guardduty_event, mock_app_config):
+    """Tests that the batch's critical findings are processed before low ones."""
+    mock_app_config.batch_max_workers = 1
+    events = []
+    for index, (finding_type, severity) in enumerate(
+        [
+            ("Policy:IAMUser/RootCredentialUsage", 2.0),
+            ("CryptoCurrency:EC2/BitcoinTool.B", 9.0),
+        ]
+    ):
+        event = json.loads(json.dumps(valid_guardduty_event))
+        event["id"] = f"event-{index}"
+        event["detail"].update(
+            {"Id": f"finding-{index}", "Type": finding_type, "Severity": severity}
+        )
+        events.append(event)
+
+    with patch("guardduty_soar.main.get_config", return_value=mock_app_config):
+        with patch("guardduty_soar.main.Engine") as MockEngine:
+            result = batch_handler(events, {})
+
+    assert result == {"batchItemFailures": []}
+    assert [c.args[0]["Id"] for c in MockEngine.call_args_list] == [
+        "finding-1",
+        "finding-0",
+    ]
@@ -0,0 +1,64 @@
+import json
+from pathlib import Path
+
+from guardduty_soar.manifest import (
+    build_manifest,
+    discover_modules,
+    load_manifest,
+    read_manifest,
+)
+from guardduty_soar.playbook_registry import _PLAYBOOK_MANIFEST
+
+
+def test_shipped_manifest_is_up_to_date():
+    """
+    Tests that the packaged manifest matches the `@register_playbook` decorators.
+    If this fails, regenerate it with `python -m guardduty_soar.manifest`.
+    """
+    assert read_manifest() == build_manifest()
+
+
+def test_discover_modules_builds_dotted_names(tmp_path):
+    """Tests that nested python modules are discovered and dunder files skipped."""
+    (tmp_path / "ec2").mkdir()
+    (tmp_path / "ec2" / "brute_force.py").touch()
+    (tmp_path / "ec2" / "__init__.py").touch()
+    (tmp_path / "custom.py").touch()
+    (tmp_path / "custom.py.example").touch()
+
+    modules = discover_modules(tmp_path, "guardduty_soar.playbooks")
+
+    assert modules == [
+        "guardduty_soar.playbooks.custom",
+        "guardduty_soar.playbooks.ec2.brute_force",
+    ]
+
+
+def test_load_manifest_registers_entries(tmp_path, restore_manifest):
+    """Tests that a manifest matching the plugins on disk is registered."""
+    manifest_path = tmp_path / "playbook_manifest.json"
+    manifest_path.write_text(
+        json.dumps(
+            {"playbooks": {"FindingTypeB": "some.module:Playbook"}, "plugins": []}
+        )
+    )
+
+    assert load_manifest(manifest_path, package_dir=tmp_path) is True
+    assert _PLAYBOOK_MANIFEST == {"FindingTypeB": "some.module:Playbook"}
+
+
+def test_load_manifest_rejects_stale_plugins(tmp_path, restore_manifest):
+    """Tests that a plugin missing from the manifest forces a full load."""
+    plugins_dir = tmp_path / "plugins" / "playbooks"
+    plugins_dir.mkdir(parents=True)
+    (plugins_dir / "my_playbook.py").touch()
+
+    manifest_path = tmp_path / "playbook_manifest.json"
+    manifest_path.write_text(json.dumps({"playbooks": {}, "plugins": []}))
+
+    assert load_manifest(manifest_path, package_dir=tmp_path) is False
+
+
+def test_load_manifest_missing_file(tmp_path):
+    """Tests that a missing manifest forces a full load."""
+    assert load_manifest(Path(tmp_path / "missing.json"), package_dir=tmp_path) is False
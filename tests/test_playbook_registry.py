@@ -1,9 +1,14 @@
+import sys
+
 import pytest
 
 from guardduty_soar.playbook_registry import (
     _PLAYBOOK_REGISTRY,
     BasePlaybook,
+    get_playbook_class,
     get_playbook_instance,
+    get_playbook_name,
+    register_manifest,
     register_playbook,
 )
 
@@ -14,6 +19,11 @@ class MockPlaybook(BasePlaybook):
         pass
 
 
+class OverridePlaybook(BasePlaybook):
+    def run(self, event):
+        pass
+
+
 def test_register_playbook():
     """Tests that the decorator correctly adds a playbook to the registry."""
     register_playbook("FindingTypeA")(MockPlaybook)
@@ -38,3 +48,54 @@ def test_get_playbook_instance_failure(mock_app_config):
         ValueError, match="No playbook registered for finding type: UnregisteredType"
     ):
         get_playbook_instance("UnregisteredType", mock_app_config)
+
+
+def test_get_playbook_class_uses_manifest(restore_manifest):
+    """
+    Tests that a finding type in the manifest resolves the class from its
+    module, even if the registry holds a different class for it.
+    """
+    register_playbook("FindingTypeC")(MockPlaybook)
+    register_manifest({"FindingTypeC": f"{__name__}:OverridePlaybook"})
+    assert get_playbook_class("FindingTypeC") is OverridePlaybook
+
+
+def test_get_playbook_class_imports_module_on_demand(restore_manifest):
+    """Tests that only the module owning the finding type is imported."""
+    module_name = "guardduty_soar.playbooks.iam.iam_forensics"
+    sys.modules.pop(module_name, None)
+    register_manifest(
+        {"Recon:IAMUser/TorIPCaller": f"{module_name}:IamForensicsPlaybook"}
+    )
+    playbook_class = get_playbook_class("Recon:IAMUser/TorIPCaller")
+
+    assert module_name in sys.modules
+    assert playbook_class.__name__ == "IamForensicsPlaybook"
+
+
+def test_get_playbook_class_falls_back_on_bad_manifest_entry(restore_manifest):
+    """Tests that a broken manifest entry falls back to the registry."""
+    register_playbook("FindingTypeD")(MockPlaybook)
+    register_manifest({"FindingTypeD": "guardduty_soar.does_not_exist:Nope"})
+    assert get_playbook_class("FindingTypeD") is MockPlaybook
+
+
+def test_get_playbook_name_does_not_import(restore_manifest):
+    """
+    Tests that a playbook's name is taken from the manifest, or the registry,
+    without importing its module.
+    """
+    module_name = "guardduty_soar.playbooks.iam.iam_forensics"
+    sys.modules.pop(module_name, None)
+    register_manifest(
+        {"Recon:IAMUser/TorIPCaller": f"{module_name}:IamForensicsPlaybook"}
+    )
+    register_playbook("FindingTypeE")(MockPlaybook)
+
+    assert (
+        get_playbook_name("Recon:IAMUser/TorIPCaller")
+        == f"{module_name}:IamForensicsPlaybook"
+    )
+    assert module_name not in sys.modules
+    assert get_playbook_name("FindingTypeE") == f"{__name__}:MockPlaybook"
+    assert get_playbook_name("UnregisteredType") is None
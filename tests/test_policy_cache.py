@@ -0,0 +1,47 @@
+from unittest.mock import MagicMock, patch
+
+from guardduty_soar.policy_cache import PolicyDocumentCache, get_policy_cache
+
+DOCUMENT = {"Version": "2012-10-17", "Statement": [{"Effect": "Deny"}]}
+POLICY_ARN = "arn:aws:iam::aws:policy/AWSDenyAll"
+
+
+def test_cache_is_keyed_by_policy_and_version():
+    """Tests that a document is only returned for the same policy and version."""
+    cache = PolicyDocumentCache()
+    cache.put(POLICY_ARN, "ANPA1", "v1", DOCUMENT)
+
+    assert cache.get(POLICY_ARN, "ANPA1", "v1") == DOCUMENT
+    assert cache.get(POLICY_ARN, "ANPA1", "v2") is None
+    # A policy created again under the same ARN has a new PolicyId.
+    assert cache.get(POLICY_ARN, "ANPA2", "v1") is None
+
+
+def test_cache_persists_across_instances(tmp_path):
+    """Tests that documents persisted to a file survive a new cache."""
+    path = str(tmp_path / "policies.db")
+    PolicyDocumentCache(path).put(POLICY_ARN, "ANPA1", "v1", DOCUMENT)
+
+    assert PolicyDocumentCache(path).get(POLICY_ARN, "ANPA1", "v1") == DOCUMENT
+    assert PolicyDocumentCache().get(POLICY_ARN, "ANPA1", "v1") is None
+
+
+def test_cache_fails_open():
+    """Tests that errors from the persisted store are treated as a miss."""
+    store = MagicMock()
+    store.get.side_effect = Exception("disk I/O error")
+    store.put.side_effect = Exception("disk I/O error")
+    with patch("guardduty_soar.policy_cache.SQLiteStateStore", return_value=store):
+        cache = PolicyDocumentCache("/tmp/policies.db")
+
+    assert cache.get(POLICY_ARN, "ANPA1", "v1") is None
+    cache.put(POLICY_ARN, "ANPA1", "v1", DOCUMENT)
+    assert cache.get(POLICY_ARN, "ANPA1", "v1") == DOCUMENT
+
+
+def test_get_policy_cache_is_shared():
+    """Tests that the process-wide cache is shared per path."""
+    get_policy_cache.cache_clear()
+
+    assert get_policy_cache(None) is get_policy_cache(None)
+    assert get_policy_cache(None) is not PolicyDocumentCache()
@@ -0,0 +1,166 @@
+from unittest.mock import MagicMock, patch
+
+from guardduty_soar.playbook_registry import BasePlaybook
+from guardduty_soar.runtime import Runtime
+
+
+class WarmPlaybook(BasePlaybook):
+    def run(self, event):
+        pass
+
+
+@patch("guardduty_soar.runtime.get_playbook_class", return_value=WarmPlaybook)
+@patch("guardduty_soar.playbook_registry.get_session")
+def test_get_playbook_reuses_instance(
+    mock_get_session, mock_get_class, mock_app_config
+):
+    """Tests that a playbook is built once and reused by later findings."""
+    runtime = Runtime()
+
+    first = runtime.get_playbook("FindingTypeA", mock_app_config)
+    second = runtime.get_playbook("FindingTypeB", mock_app_config)
+
+    assert isinstance(first, WarmPlaybook)
+    assert first is second
+
+
+@patch("guardduty_soar.runtime.get_playbook_class", return_value=WarmPlaybook)
+@patch("guardduty_soar.playbook_registry.get_session")
+def test_get_playbook_new_config_builds_new_instance(
+    mock_get_session, mock_get_class, mock_app_config
+):
+    """Tests that a change in configuration does not reuse a stale playbook."""
+    runtime = Runtime()
+
+    first = runtime.get_playbook("FindingTypeA", mock_app_config)
+    second = runtime.get_playbook("FindingTypeA", MagicMock())
+
+    assert first is not second
+
+
+@patch("guardduty_soar.runtime.NotificationManager")
+@patch("guardduty_soar.runtime.get_session")
+def test_get_notification_manager_reuses_instance(
+    mock_get_session, MockNotificationManager, mock_app_config
+):
+    """Tests that the notification manager is built once per configuration."""
+    runtime = Runtime()
+
+    first = runtime.get_notification_manager(mock_app_config)
+    second = runtime.get_notification_manager(mock_app_config)
+
+    assert first is second
+    MockNotificationManager.assert_called_once_with(
+        mock_get_session.return_value, mock_app_config
+    )
+
+
+@patch("guardduty_soar.runtime.get_session")
+def test_idempotency_guard_shares_state_store(mock_get_session, mock_app_config):
+    """
+    Tests that every guard for a configuration uses the same store, so claims
+    are remembered across findings, and that no guard is built without one.
+    """
+    runtime = Runtime()
+    assert runtime.get_idempotency_guard(mock_app_config) is None
+
+    mock_app_config.state_backend = "memory"
+    runtime.reset()
+    first = runtime.get_idempotency_guard(mock_app_config)
+    second = runtime.get_idempotency_guard(mock_app_config)
+
+    assert first.store is second.store
+    assert first.window_seconds == mock_app_config.idempotency_window_seconds
+
+
+@patch("guardduty_soar.runtime.get_session")
+def test_checkpoint_store_requires_state_store(mock_get_session, mock_app_config):
+    """
+    Tests that checkpoints are only kept with a state backend, and can be
+    disabled with a TTL of 0.
+    """
+    runtime = Runtime()
+    assert runtime.get_checkpoint_store(mock_app_config) is None
+
+    mock_app_config.state_backend = "memory"
+    runtime.reset()
+    checkpoints = runtime.get_checkpoint_store(mock_app_config)
+    assert checkpoints.store is runtime.get_state_store(mock_app_config)
+    assert checkpoints.ttl_seconds == mock_app_config.checkpoint_ttl_seconds
+
+    mock_app_config.checkpoint_ttl_seconds = 0
+    assert runtime.get_checkpoint_store(mock_app_config) is None
+
+
+@patch("guardduty_soar.runtime.get_playbook_class", return_value=WarmPlaybook)
+@patch("guardduty_soar.playbook_registry.get_session")
+def test_reset_drops_cached_objects(mock_get_session, mock_get_class, mock_app_config):
+    """Tests that reset forces the next finding to rebuild its playbook."""
+    runtime = Runtime()
+    first = runtime.get_playbook("FindingTypeA", mock_app_config)
+
+    runtime.reset()
+
+    assert runtime.get_playbook("FindingTypeA", mock_app_config) is not first
+
+
+@patch("guardduty_soar.runtime.get_jinja_env")
+@patch("guardduty_soar.runtime.get_client_pool")
+@patch("guardduty_soar.runtime.get_session")
+@patch("guardduty_soar.runtime.NotificationManager")
+@patch("guardduty_soar.runtime.get_playbook_class")
+def test_prime_builds_runtime(
+    mock_get_class,
+    MockNotificationManager,
+    mock_get_session,
+    mock_get_pool,
+    mock_get_jinja_env,
+    mock_app_config,
+):
+    """
+    Tests that priming builds the session, clients, templates and managers, and
+    leaves the playbooks to be loaded lazily.
+    """
+    mock_app_config.prime_clients = ("ec2", "iam")
+    runtime = Runtime()
+
+    timings = runtime.prime(mock_app_config)
+
+    assert set(timings) == {
+        "session",
+        "notifications",
+        "clients",
+        "templates",
+        "models",
+    }
+    mock_get_class.assert_not_called()
+    assert runtime._playbooks == {}
+    MockNotificationManager.assert_called_once()
+    mock_get_pool.return_value.get_client.assert_any_call(
+        mock_get_session.return_value, "ec2"
+    )
+    mock_get_pool.return_value.get_client.assert_any_call(
+        mock_get_session.return_value, "iam"
+    )
+    mock_get_jinja_env.assert_called_once()
+
+
+@patch("guardduty_soar.runtime.get_jinja_env")
+@patch("guardduty_soar.runtime.get_client_pool", side_effect=RuntimeError("boom"))
+@patch("guardduty_soar.runtime.get_session")
+@patch("guardduty_soar.runtime.NotificationManager")
+def test_prime_continues_after_failed_step(
+    MockNotificationManager,
+    mock_get_session,
+    mock_get_pool,
+    mock_get_jinja_env,
+    mock_app_config,
+):
+    """Tests that a failing step is skipped and the rest still run."""
+    mock_app_config.prime_clients = ("ec2",)
+    runtime = Runtime()
+
+    runtime.prime(mock_app_config)
+
+    MockNotificationManager.assert_called_once()
+    mock_get_jinja_env.assert_called_once()
@@ -0,0 +1,111 @@
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from guardduty_soar.actions.ec2.tag import TagInstanceAction
+from guardduty_soar.scheduler import (
+    PriorityScheduler,
+    ScheduledTask,
+    finding_priority,
+    finding_service,
+    severity_rank,
+)
+
+
+def test_finding_priority_orders_by_severity_then_containment():
+    """
+    Tests that the severity range goes first, and that findings needing
+    containment go before others of the same range.
+    """
+    critical = {"Type": "CryptoCurrency:EC2/BitcoinTool.B", "Severity": 9.0}
+    high_containment = {"Type": "Backdoor:EC2/Spambot", "Severity": 7.0}
+    high_recon = {"Type": "Recon:EC2/Portscan", "Severity": 8.5}
+    low = {"Type": "Policy:IAMUser/RootCredentialUsage", "Severity": 2.0}
+
+    ordered = sorted(
+        [low, high_recon, critical, high_containment],
+        key=finding_priority,
+        reverse=True,
+    )
+
+    assert ordered == [critical, high_containment, high_recon, low]
+    assert finding_priority(None) < finding_priority(low)
+
+
+@pytest.mark.parametrize(
+    "severity, rank, label",
+    [
+        (1.0, 0, "LOW"),
+        (3.95, 0, "LOW"),
+        (4.0, 1, "MEDIUM"),
+        (6.95, 1, "MEDIUM"),
+        (7.0, 2, "HIGH"),
+        (8.95, 2, "HIGH"),
+        (9.0, 3, "CRITICAL"),
+        (10.0, 3, "CRITICAL"),
+    ],
+)
+def test_severity_rank_matches_tagged_severity(severity, rank, label, mock_app_config):
+    """
+    Tests that the scheduler ranks findings by the same severity level their
+    resources are tagged with, including severities between the documented ranges.
+    """
+    action = TagInstanceAction(MagicMock(), mock_app_config)
+
+    assert severity_rank(severity) == rank
+    assert action._calculate_severity(severity) == label
+
+
+def test_finding_service(guardduty_finding_detail):
+    """Tests that findings are mapped to the AWS service their playbook calls."""
+    assert finding_service(guardduty_finding_detail) == "ec2"
+    assert finding_service({"Resource": {"ResourceType": "Unknown"}}) is None
+    assert finding_service(None) is None
+
+
+def test_tasks_run_by_priority_and_return_in_order():
+    """Tests that higher priority tasks start first, results keep task order."""
+    started = []
+
+    def task(name):
+        return ScheduledTask(
+            call=lambda: started.append(name) or name, priority=(len(name),)
+        )
+
+    results = PriorityScheduler(1, 1).run([task("a"), task("ccc"), task("bb")])
+
+    assert started == ["ccc", "bb", "a"]
+    assert results == ["a", "ccc", "bb"]
+
+
+def test_service_cap_lets_other_services_through():
+    """
+    Tests that no more than the cap run per service, and that tasks for other
+    services start while a service is at its cap.
+    """
+    lock = threading.Lock()
+    running = {"ec2": 0}
+    peak = {"ec2": 0}
+    started = []
+
+    def work(service, name):
+        with lock:
+            started.append(name)
+            running[service] = running.get(service, 0) + 1
+            peak[service] = max(peak.get(service, 0), running[service])
+        time.sleep(0.02)
+        with lock:
+            running[service] -= 1
+
+    tasks = [
+        ScheduledTask(lambda: work("ec2", "ec2-1"), priority=(3,), service="ec2"),
+        ScheduledTask(lambda: work("ec2", "ec2-2"), priority=(2,), service="ec2"),
+        ScheduledTask(lambda: work("iam", "iam-1"), priority=(1,), service="iam"),
+    ]
+
+    PriorityScheduler(max_workers=3, service_max_workers=1).run(tasks)
+
+    assert peak["ec2"] == 1
+    assert started.index("iam-1") < started.index("ec2-2")
@@ -0,0 +1,138 @@
+from unittest.mock import MagicMock, patch
+
+import boto3
+import pytest
+from botocore.stub import Stubber
+
+from guardduty_soar.exceptions import ConfigurationError
+from guardduty_soar.stores import (
+    DynamoDBStateStore,
+    MemoryStateStore,
+    SQLiteStateStore,
+    build_state_store,
+)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def local_store(request, tmp_path):
+    """Provides each local StateStore backend."""
+    if request.param == "memory":
+        return MemoryStateStore()
+    return SQLiteStateStore(str(tmp_path / "state.db"))
+
+
+def test_put_if_absent_only_stores_once(local_store):
+    """Tests that a second put_if_absent does not overwrite the first."""
+    assert local_store.put_if_absent("key", {"value": 1}, 60) is True
+    assert local_store.put_if_absent("key", {"value": 2}, 60) is False
+    assert local_store.get("key") == {"value": 1}
+
+
+def test_put_and_delete(local_store):
+    """Tests that put replaces a value and delete removes it."""
+    local_store.put("key", {"value": 1}, 60)
+    local_store.put("key", {"value": 2}, 60)
+    assert local_store.get("key") == {"value": 2}
+
+    local_store.delete("key")
+    assert local_store.get("key") is None
+    local_store.delete("missing")
+
+
+def test_expired_keys_are_missing(local_store):
+    """Tests that an expired key can not be read, and can be claimed again."""
+    with patch("guardduty_soar.stores.time.time", return_value=1000.0):
+        local_store.put("key", {"value": 1}, 60)
+
+    with patch("guardduty_soar.stores.time.time", return_value=1061.0):
+        assert local_store.get("key") is None
+        assert local_store.put_if_absent("key", {"value": 2}, 60) is True
+        assert local_store.get("key") == {"value": 2}
+
+
+def test_memory_store_evicts_least_recently_used():
+    """Tests that the oldest unused key is evicted once the store is full."""
+    store = MemoryStateStore(max_entries=2)
+    store.put("a", {}, 60)
+    store.put("b", {}, 60)
+    store.get("a")
+    store.put("c", {}, 60)
+
+    assert store.get("a") == {}
+    assert store.get("b") is None
+    assert store.get("c") == {}
+
+
+def test_sqlite_store_persists_across_instances(tmp_path):
+    """Tests that state survives the store being recreated, e.g. a new process."""
+    path = str(tmp_path / "state.db")
+    SQLiteStateStore(path).put("key", {"value": 1}, 60)
+
+    assert SQLiteStateStore(path).get("key") == {"value": 1}
+
+
+def test_dynamodb_put_if_absent():
+    """Tests the conditional write, and that a failed condition returns False."""
+    client = boto3.client("dynamodb", region_name="us-east-1")
+    store = DynamoDBStateStore(client, "state-table")
+
+    with Stubber(client) as stubber:
+        stubber.add_response("put_item", {})
+        stubber.add_client_error(
+            "put_item", service_error_code="ConditionalCheckFailedException"
+        )
+
+        assert store.put_if_absent("key", {"value": 1}, 60) is True
+        assert store.put_if_absent("key", {"value": 1}, 60) is False
+        stubber.assert_no_pending_responses()
+
+
+def test_dynamodb_get_ignores_expired_items():
+    """Tests that items past their expiry are treated as missing."""
+    client = boto3.client("dynamodb", region_name="us-east-1")
+    store = DynamoDBStateStore(client, "state-table")
+
+    with Stubber(client) as stubber:
+        for expires_at in ("2000", "1"):
+            stubber.add_response(
+                "get_item",
+                {
+                    "Item": {
+                        "pk": {"S": "key"},
+                        "value": {"S": '{"value": 1}'},
+                        "expires_at": {"N": expires_at},
+                    }
+                },
+            )
+
+        with patch("guardduty_soar.stores.time.time", return_value=1000.0):
+            assert store.get("key") == {"value": 1}
+            assert store.get("key") is None
+
+
+def test_build_state_store(mock_app_config, tmp_path):
+    """Tests that the configured backend is built."""
+    session = MagicMock()
+
+    mock_app_config.state_backend = "none"
+    assert build_state_store(session, mock_app_config) is None
+
+    mock_app_config.state_backend = "memory"
+    assert isinstance(build_state_store(session, mock_app_config), MemoryStateStore)
+
+    mock_app_config.state_backend = "sqlite"
+    mock_app_config.state_sqlite_path = str(tmp_path / "state.db")
+    assert isinstance(build_state_store(session, mock_app_config), SQLiteStateStore)
+
+    mock_app_config.state_backend = "dynamodb"
+    mock_app_config.state_table_name = "state-table"
+    mock_app_config.state_endpoint_url = "http://localhost:8000"
+    store = build_state_store(session, mock_app_config)
+    assert isinstance(store, DynamoDBStateStore)
+    session.client.assert_called_once_with(
+        "dynamodb", endpoint_url="http://localhost:8000"
+    )
+
+    mock_app_config.state_table_name = None
+    with pytest.raises(ConfigurationError):
+        build_state_store(session, mock_app_config)